@@ -27,8 +27,23 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str | None = None
     OPENAI_MODEL: str | None = None
     OPENAI_TIMEOUT_MS: int = 20000
+    # OpenAI-compatible endpoint used by llm_gateway (e.g. a local or fake server).
+    OPENAI_BASE_URL: str | None = None
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_CACHE_SIZE: int = 512
+    LLM_CACHE_TTL_SECONDS: float = 600.0
     MONGO_URI: AnyUrl | None = None
     ENABLE_DEBUG: bool = False
+    # Chat turns replayed to the LLM as history on each /chat message.
+    CHAT_HISTORY_TURNS: int = 20
+    # Token budget for the history replayed with each /chat message.
+    CHAT_HISTORY_TOKENS: int = 2000
+    # Per-process write-through cache of hot sessions (see session_store.py).
+    SESSION_CACHE_SIZE: int = 1024
+    SESSION_CACHE_TAIL: int = 200
+    SESSION_CACHE_TTL_SECONDS: float = 30.0
+    # Raw fills kept per (session, form) for /form-fill/batch reuse.
+    FORM_FILL_CACHE_SIZE: int = 256
 
     model_config = SettingsConfigDict(env_file=ENV_PATH, extra="ignore")
 
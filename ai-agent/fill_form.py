@@ -4,15 +4,21 @@ import json
 import time
 import re
 from pathlib import Path
-from typing import Dict, Any, Optional
+from collections import ChainMap
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Mapping, Optional
 from datetime import datetime
 import operator as op
+from common import slow_requests, tracing
 from common.logger import get_logger
 from config import settings
 from document_utils import extract_fields, guess_attachment
+from form_registry import CompiledTemplate, FormRegistry, thaw
 from nlp_utils import normalize_text_field, infer_state_from_zip, llm_complete
 
 FORM_DIR = Path(__file__).resolve().parents[1] / "form_templates"
+FORM_REGISTRY = FormRegistry(FORM_DIR, bundled="form_templates")
 logger = get_logger(__name__)
 
 ZIP_STATE = {
@@ -208,9 +214,177 @@ def _canonical_entity_type(value: str) -> str:
     return ENTITY_TYPE_MAP.get(key, value.strip())
 
 
+BIN_OPS = {
+    ast.Add: op.add,
+    ast.Sub: op.sub,
+    ast.Mult: op.mul,
+    ast.Div: op.truediv,
+    ast.Mod: op.mod,
+}
+UNARY_OPS = {ast.UAdd: op.pos, ast.USub: op.neg, ast.Not: op.not_}
+CMP_OPS = {
+    ast.Eq: op.eq,
+    ast.NotEq: op.ne,
+    ast.Lt: op.lt,
+    ast.LtE: op.le,
+    ast.Gt: op.gt,
+    ast.GtE: op.ge,
+}
+
+Evaluator = Callable[[Mapping[str, Any]], Any]
+
+
+class CompiledExpression:
+    """A validated expression compiled to a tree of closures.
+
+    Calling it with a mapping of names evaluates the expression.  The mapping
+    is only read, so callers can pass shared request state without copying.
+    Only the names the expression references are checked for dunder or
+    callable values; safe function names may never be overridden.
+    """
+
+    __slots__ = ("source", "names", "_fn")
+
+    def __init__(self, source: str, names: frozenset[str], fn: Evaluator) -> None:
+        self.source = source
+        self.names = names
+        self._fn = fn
+
+    def __call__(self, names: Mapping[str, Any]) -> Any:
+        if any(name in names for name in SAFE_FUNCTIONS):
+            raise ValueError("Overriding safe functions is not allowed")
+        for name in self.names:
+            if name not in names:
+                continue
+            if "__" in name:
+                raise ValueError("Invalid variable name")
+            if callable(names[name]):
+                raise ValueError("Callable values are not allowed")
+        return self._fn(names)
+
+
+def _compile_node(
+    node: ast.AST,
+    names: set[str],
+    max_string_length: int,
+    max_number: int,
+) -> Evaluator:
+    def sub(child: ast.AST) -> Evaluator:
+        return _compile_node(child, names, max_string_length, max_number)
+
+    if isinstance(node, ast.Constant):
+        val = node.value
+        if isinstance(val, str):
+            if len(val) > max_string_length:
+                raise ValueError("String constant too long")
+        elif isinstance(val, (int, float)):
+            if abs(val) > max_number:
+                raise ValueError("Numeric constant too large")
+        elif not isinstance(val, (bool, type(None))):
+            raise ValueError("Unsupported expression: Constant")
+        return lambda ctx: val
+    if isinstance(node, ast.Name):
+        name = node.id
+        names.add(name)
+        fallback = SAFE_FUNCTIONS.get(name)
+
+        def _name(ctx: Mapping[str, Any]) -> Any:
+            if name in ctx:
+                return ctx[name]
+            if fallback is not None:
+                return fallback
+            raise ValueError(f"Unknown variable: {name}")
+
+        return _name
+    if isinstance(node, ast.BinOp):
+        bin_op = BIN_OPS.get(type(node.op))
+        if bin_op is None:
+            raise ValueError("Unsupported expression: BinOp")
+        left, right = sub(node.left), sub(node.right)
+        return lambda ctx: bin_op(left(ctx), right(ctx))
+    if isinstance(node, ast.UnaryOp):
+        unary_op = UNARY_OPS.get(type(node.op))
+        if unary_op is None:
+            raise ValueError("Unsupported expression: UnaryOp")
+        operand = sub(node.operand)
+        return lambda ctx: unary_op(operand(ctx))
+    if isinstance(node, ast.BoolOp):
+        values = tuple(sub(v) for v in node.values)
+        if isinstance(node.op, ast.And):
+            return lambda ctx: all(v(ctx) for v in values)
+        if isinstance(node.op, ast.Or):
+            return lambda ctx: any(v(ctx) for v in values)
+        raise ValueError("Unsupported boolean operator")
+    if isinstance(node, ast.Compare):
+        ops = []
+        for oper in node.ops:
+            cmp_op = CMP_OPS.get(type(oper))
+            if cmp_op is None:
+                raise ValueError("Unsupported comparison operator")
+            ops.append(cmp_op)
+        first = sub(node.left)
+        pairs = tuple(zip(ops, (sub(c) for c in node.comparators)))
+
+        def _compare(ctx: Mapping[str, Any]) -> bool:
+            left = first(ctx)
+            for cmp_op, comp in pairs:
+                right = comp(ctx)
+                if not cmp_op(left, right):
+                    return False
+                left = right
+            return True
+
+        return _compare
+    if isinstance(node, ast.Call):
+        if isinstance(node.func, ast.Name) and node.func.id in SAFE_FUNCTIONS:
+            func = SAFE_FUNCTIONS[node.func.id]
+            if node.keywords:
+                raise ValueError("Keyword arguments not allowed")
+            args = tuple(sub(arg) for arg in node.args)
+            return lambda ctx: func(*(arg(ctx) for arg in args))
+        raise ValueError("Function calls are not allowed")
+    raise ValueError(f"Unsupported expression: {type(node).__name__}")
+
+
+@lru_cache(maxsize=1024)
+def _compile_cached(
+    expr: str, max_nodes: int, max_string_length: int, max_number: int
+) -> CompiledExpression | ValueError:
+    # Invalid expressions are cached too, as the error to raise.
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError:  # pragma: no cover - ast raises SyntaxError
+        return ValueError("Invalid expression")
+    if sum(1 for _ in ast.walk(tree)) > max_nodes:
+        return ValueError("Expression too complex")
+    names: set[str] = set()
+    try:
+        fn = _compile_node(tree.body, names, max_string_length, max_number)
+    except ValueError as exc:
+        return exc
+    return CompiledExpression(expr, frozenset(names), fn)
+
+
+def compile_expression(
+    expr: str,
+    *,
+    max_nodes: int = MAX_AST_NODES,
+    max_string_length: int = MAX_STRING_LENGTH,
+    max_number: int = MAX_NUMBER_ABS,
+) -> CompiledExpression:
+    """Validate ``expr`` once and return its cached :class:`CompiledExpression`.
+
+    Raises ``ValueError`` for syntax outside the :func:`safe_eval` whitelist.
+    """
+    compiled = _compile_cached(expr, max_nodes, max_string_length, max_number)
+    if isinstance(compiled, ValueError):
+        raise ValueError(str(compiled))
+    return compiled
+
+
 def safe_eval(
     expr: str,
-    names: Dict[str, Any],
+    names: Mapping[str, Any],
     *,
     max_nodes: int = MAX_AST_NODES,
     max_string_length: int = MAX_STRING_LENGTH,
@@ -224,97 +398,13 @@ def safe_eval(
     Expressions that exceed ``max_nodes`` AST nodes or contain overly
     large constants are rejected to avoid resource exhaustion.
     """
-
-    def _eval(node: ast.AST) -> Any:
-        if isinstance(node, ast.Expression):
-            return _eval(node.body)
-        if isinstance(node, ast.Constant):
-            val = node.value
-            if isinstance(val, str):
-                if len(val) > max_string_length:
-                    raise ValueError("String constant too long")
-                return val
-            if isinstance(val, (int, float)):
-                if abs(val) > max_number:
-                    raise ValueError("Numeric constant too large")
-                return val
-            if isinstance(val, (bool, type(None))):
-                return val
-            raise ValueError("Unsupported constant type")
-        if isinstance(node, ast.Name):
-            if node.id in context:
-                return context[node.id]
-            raise ValueError(f"Unknown variable: {node.id}")
-        if isinstance(node, ast.BinOp):
-            bin_ops = {
-                ast.Add: op.add,
-                ast.Sub: op.sub,
-                ast.Mult: op.mul,
-                ast.Div: op.truediv,
-                ast.Mod: op.mod,
-            }
-            if type(node.op) in bin_ops:
-                return bin_ops[type(node.op)](_eval(node.left), _eval(node.right))
-            raise ValueError("Unsupported binary operator")
-        if isinstance(node, ast.UnaryOp):
-            unary_ops = {ast.UAdd: op.pos, ast.USub: op.neg, ast.Not: op.not_}
-            if type(node.op) in unary_ops:
-                return unary_ops[type(node.op)](_eval(node.operand))
-            raise ValueError("Unsupported unary operator")
-        if isinstance(node, ast.BoolOp):
-            if isinstance(node.op, ast.And):
-                return all(_eval(v) for v in node.values)
-            if isinstance(node.op, ast.Or):
-                return any(_eval(v) for v in node.values)
-            raise ValueError("Unsupported boolean operator")
-        if isinstance(node, ast.Compare):
-            cmp_ops = {
-                ast.Eq: op.eq,
-                ast.NotEq: op.ne,
-                ast.Lt: op.lt,
-                ast.LtE: op.le,
-                ast.Gt: op.gt,
-                ast.GtE: op.ge,
-            }
-            left = _eval(node.left)
-            for oper, comp in zip(node.ops, node.comparators):
-                if type(oper) not in cmp_ops:
-                    raise ValueError("Unsupported comparison operator")
-                right = _eval(comp)
-                if not cmp_ops[type(oper)](left, right):
-                    return False
-                left = right
-            return True
-        if isinstance(node, ast.Call):
-            if isinstance(node.func, ast.Name) and node.func.id in SAFE_FUNCTIONS:
-                func = SAFE_FUNCTIONS[node.func.id]
-                if node.keywords:
-                    raise ValueError("Keyword arguments not allowed")
-                args = [_eval(arg) for arg in node.args]
-                return func(*args)
-            raise ValueError("Function calls are not allowed")
-        raise ValueError(f"Unsupported expression: {type(node).__name__}")
-
-    try:
-        tree = ast.parse(expr, mode="eval")
-    except SyntaxError as exc:  # pragma: no cover - ast raises SyntaxError
-        raise ValueError("Invalid expression") from exc
-
-    if sum(1 for _ in ast.walk(tree)) > max_nodes:
-        raise ValueError("Expression too complex")
-
-    sanitized: Dict[str, Any] = {}
-    for key, value in names.items():
-        if "__" in key:
-            raise ValueError("Invalid variable name")
-        if callable(value):
-            raise ValueError("Callable values are not allowed")
-        if key in SAFE_FUNCTIONS:
-            raise ValueError("Overriding safe functions is not allowed")
-        sanitized[key] = value
-
-    context = {**SAFE_FUNCTIONS, **sanitized}
-    return _eval(tree.body)
+    compiled = compile_expression(
+        expr,
+        max_nodes=max_nodes,
+        max_string_length=max_string_length,
+        max_number=max_number,
+    )
+    return compiled(names)
 
 
 def _generate_text(data: Dict[str, Any], example: str | None = None) -> str:
@@ -359,35 +449,31 @@ def render_template(tmpl: str, ctx: Dict[str, Any]) -> str:
 
 
 def _fill_template(
-    template: Dict[str, Any],
+    form: CompiledTemplate,
     data: Dict[str, Any],
     reasoning: list[str] | None = None,
     *,
     form_name: str | None = None,
 ) -> Dict[str, Any]:
-    fields = template.get("fields", {})
+    """Fill a compiled template node with ``data`` and return a new dict.
+
+    ``form`` is shared between requests and never mutated; ``data`` is the
+    per-request context and receives computed and conditional values.
+    """
     # Some templates provide fields as lists (e.g. complex government forms).
-    # In that case we simply recurse into any nested dictionaries but otherwise
-    # leave the structure untouched.
-    if isinstance(fields, list):
-        processed = []
-        for item in fields:
-            if isinstance(item, dict):
-                processed.append(_fill_template(item, data, reasoning, form_name=form_name))
-            else:
-                processed.append(item)
-        template["fields"] = processed
-        fields = {}
-    optional = template.get("optional_fields", {})
-    computed = template.get("computed_fields", {})
-    conditional = template.get("conditional_fields", {})
+    # In that case we simply recurse into any nested dictionaries for their
+    # side effects on ``data`` but otherwise leave the structure untouched.
+    if form.field_items is not None:
+        for item in form.field_items:
+            if isinstance(item, CompiledTemplate):
+                _fill_template(item, data, reasoning, form_name=form_name)
 
     # evaluate computed fields in the context of data
-    for key, expr in computed.items():
+    # ``data`` itself is the evaluation context; expressions only read it.
+    computed_ctx = ChainMap({"current_year": datetime.utcnow().year}, data)
+    for key, expr in form.computed_fields:
         try:
-            ctx = dict(data)
-            ctx["current_year"] = datetime.utcnow().year
-            data[key] = safe_eval(expr, ctx)
+            data[key] = safe_eval(expr, computed_ctx)
             if reasoning is not None:
                 reasoning.append(f"{key} computed from expression")
         except Exception:
@@ -410,75 +496,40 @@ def _fill_template(
                     reasoning.append("state inferred from zip")
 
     # simple conditional logic
-    for key, rule in conditional.items():
-        expr = rule.get("if")
-        val = rule.get("value", True)
+    for key, expr, val in form.conditional_fields:
         try:
-            ctx = dict(data)
-            if safe_eval(expr, ctx):
-                data[key] = val
+            if safe_eval(expr, data):
+                data[key] = thaw(val)
         except Exception:
             pass
 
     merged: Dict[str, Any] = {}
     attachments: Dict[str, str] = {}
     sources: Dict[str, str] = {}
-    FIELD_KEYS = {
-        "default",
-        "required",
-        "type",
-        "depends_on",
-        "prompt",
-        "show_if",
-        "required_if",
-        "example",
-        "expected_file",
-    }
-    for k, spec in fields.items():
-        if isinstance(spec, dict):
-            if (
-                "fields" in spec
-                or "sections" in spec
-                or (not (FIELD_KEYS & spec.keys()) and any(isinstance(v, dict) for v in spec.values()))
-            ):
-                merged[k] = _fill_template(spec, data, reasoning)
-                continue
-            default = spec.get("default", "")
-            required = spec.get("required", True)
-            ftype = spec.get("type", "text")
-            ftype = {"string": "text", "enum": "dropdown", "boolean": "checkbox"}.get(ftype, ftype)
-            depends = spec.get("depends_on")
-            prompt = spec.get("prompt")
-            show_if = spec.get("show_if")
-            required_if = spec.get("required_if")
-            example = spec.get("example")
-            expected_file = spec.get("expected_file")
-        else:
-            default = spec
-            required = True
-            ftype = "text"
-            depends = None
-            prompt = None
-            show_if = None
-            required_if = None
-            example = None
-            expected_file = None
-
-        if depends and not data.get(depends):
+    optional = form.optional_fields
+    for spec in form.fields:
+        k = spec.key
+        if spec.group is not None:
+            merged[k] = _fill_template(spec.group, data, reasoning)
             continue
+        required = spec.required
+        ftype = spec.type
+        prompt = spec.prompt
+        example = spec.example
 
-        if show_if:
+        if spec.depends_on and not data.get(spec.depends_on):
+            continue
+
+        if spec.show_if:
             try:
-                ctx = dict(data)
-                if not safe_eval(show_if, ctx):
+                if not safe_eval(spec.show_if, data):
                     continue
             except Exception:
                 pass
 
-        if required_if:
+        if spec.required_if:
             try:
-                ctx = dict(data)
-                required = bool(safe_eval(required_if, ctx))
+                required = bool(safe_eval(spec.required_if, data))
             except Exception:
                 pass
 
@@ -495,12 +546,11 @@ def _fill_template(
                 _, value = normalize_text_field(k, value)
         if value is None:
             if k in optional:
-                value = optional[k]
+                value = thaw(optional[k])
             else:
-                value = default
+                value = thaw(spec.default)
                 if value is None and required:
                     value = ""
-
         if ftype in {"text", "textarea"} and not value:
             if prompt:
                 if not getattr(settings, "OPENAI_API_KEY", None):
@@ -553,7 +603,7 @@ def _fill_template(
             if reasoning is not None:
                 reasoning.append(f"{k} defaulted to today")
         elif ftype == "file_upload" and not value:
-            guess = guess_attachment(expected_file or k)
+            guess = guess_attachment(spec.expected_file or k)
             if guess:
                 attachments[k] = guess
                 value = guess.split("/")[-1]
@@ -570,41 +620,60 @@ def _fill_template(
                 sources[k] = "file"
             else:
                 sources[k] = "inferred"
-    for k in conditional.keys():
+    for k, _, _ in form.conditional_fields:
         if k in data:
             merged[k] = data[k]
 
-    template["fields"] = merged
-    if attachments:
-        template.setdefault("files", {}).update(attachments)
-
     ctx = {**data, **merged}
-    tmpl = template.get("template")
-    if isinstance(tmpl, str):
-        template["template"] = render_template(tmpl, ctx)
-
     processed_sections = []
-    for section in template.get("sections", []):
+    files: Dict[str, Any] = {}
+    for section in form.sections:
         child = _fill_template(section, ctx, reasoning, form_name=form_name)
-        if isinstance(child, dict) and child.get("files"):
-            template.setdefault("files", {}).update(child["files"])
-        processed_sections.append(child.get("template") if isinstance(child, dict) else child)
-    if processed_sections:
-        template["sections"] = processed_sections
+        if child.get("files"):
+            files.update(child["files"])
+        processed_sections.append(child.get("template"))
+
+    filled: Dict[str, Any] = {}
+    for key in form.keys:
+        if key == "fields":
+            filled[key] = merged
+        elif key == "template" and form.template is not None:
+            filled[key] = render_template(form.template, ctx)
+        elif key == "sections" and processed_sections:
+            filled[key] = processed_sections
+        else:
+            filled[key] = thaw(form.static[key])
+    filled["fields"] = merged
+    if attachments or files:
+        target = filled.setdefault("files", {})
+        target.update(attachments)
+        target.update(files)
 
     if sources:
-        template["sources"] = sources
+        filled["sources"] = sources
 
-    return template
+    return filled
 
 
-def fill_form(
-    form_key: str,
+def prepare_form_data(
     data: Dict[str, Any],
     analyzer_fields: Optional[Dict[str, Any]] = None,
     file_bytes: bytes | None = None,
 ) -> Dict[str, Any]:
-    """Load ``form_key`` template and merge ``data`` into the fields."""
+    """Backfill, flatten and derive the checkbox fields every form reads.
+
+    The result does not depend on the form, so filling several forms from
+    one profile only needs to prepare it once (see :func:`fill_prepared_form`).
+    """
+    with tracing.span("form.prepare"), slow_requests.stage("form.prepare"):
+        return _prepare_form_data(data, analyzer_fields, file_bytes)
+
+
+def _prepare_form_data(
+    data: Dict[str, Any],
+    analyzer_fields: Optional[Dict[str, Any]],
+    file_bytes: bytes | None,
+) -> Dict[str, Any]:
     if analyzer_fields:
         filled_keys: list[str] = []
         for k, v in analyzer_fields.items():
@@ -647,23 +716,113 @@ def fill_form(
     code = str(data.get("type_of_applicant_code", "")).upper()
     for letter in "ABCDEFGHIJKLMN":
         data[f"type_of_applicant_code_{letter}"] = code == letter
-    path = FORM_DIR / f"{form_key}.json"
-    with path.open("r", encoding="utf-8") as f:
-        template = json.load(f)
-    # Some templates wrap the actual form definition under a top-level "form"
-    # key.  Normalise to a structure with "fields" at the root so the rest of
-    # the logic can operate consistently.
-    if "form" in template and "fields" not in template:
-        template = template["form"]
-    if isinstance(template.get("fields"), list):
-        flist = template["fields"]
-        converted: Dict[str, Any] = {}
-        for item in flist:
-            if isinstance(item, dict):
-                key = item.get("name") or item.get("key")
-                if key:
-                    converted[key] = {k: v for k, v in item.items() if k not in {"name", "key"}}
-        template["fields"] = converted
+    return data
+
+
+# Prepared-data keys that fill_prepared_form reads for every form, on top of
+# what the template references (zip/state inference, generated text, the
+# corporate recipient copy and the statistics passthrough prefixes).
+COMMON_REFERENCES = frozenset({"state", "zip", "industry", "employees", "city", "corporate"})
+STATS_PREFIXES = ("a1_", "a2_", "a3_", "b1_")
+# Forms whose post-processing copies the whole prepared profile.
+WHOLE_PROFILE_FORMS = frozenset({"form_424A"})
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*(?:#each\s+)?([^#/{}][^}]*?)\s*\}\}")
+
+
+@dataclass(frozen=True)
+class FormReferences:
+    """Prepared-data keys a form's output can depend on."""
+
+    keys: frozenset
+    prefixes: tuple = STATS_PREFIXES
+    everything: bool = False
+
+    def affected_by(self, changed: set) -> bool:
+        if self.everything:
+            return bool(changed)
+        return any(k in self.keys or k.startswith(self.prefixes) for k in changed)
+
+
+def _expression_names(expr: Any, keys: set) -> None:
+    if not isinstance(expr, str):
+        return
+    try:
+        keys.update(compile_expression(expr).names)
+    except ValueError:
+        # Rejected expressions are skipped when filling, so read nothing.
+        pass
+
+
+def _collect_references(form: CompiledTemplate, keys: set) -> None:
+    for item in form.field_items or ():
+        if isinstance(item, CompiledTemplate):
+            _collect_references(item, keys)
+    for key, expr in form.computed_fields:
+        keys.add(key)
+        _expression_names(expr, keys)
+    for key, expr, _ in form.conditional_fields:
+        keys.add(key)
+        _expression_names(expr, keys)
+    for spec in form.fields:
+        keys.add(spec.key)
+        if spec.group is not None:
+            _collect_references(spec.group, keys)
+            continue
+        if spec.depends_on:
+            keys.add(spec.depends_on)
+        _expression_names(spec.show_if, keys)
+        _expression_names(spec.required_if, keys)
+    if form.template:
+        keys.update(name.strip() for name in _PLACEHOLDER_RE.findall(form.template))
+    for section in form.sections:
+        _collect_references(section, keys)
+
+
+_REFERENCES: Dict[str, tuple] = {}
+
+
+def form_references(form_key: str) -> FormReferences:
+    """Return the prepared-data keys :func:`fill_prepared_form` reads for ``form_key``.
+
+    LLM-assisted fields see the whole profile; callers must treat every key as
+    referenced when ``OPENAI_API_KEY`` is set.
+    """
+    template = FORM_REGISTRY.get(form_key)
+    cached = _REFERENCES.get(form_key)
+    if cached is not None and cached[0] is template:
+        return cached[1]
+    if form_key in WHOLE_PROFILE_FORMS:
+        refs = FormReferences(frozenset(), everything=True)
+    else:
+        keys = set(COMMON_REFERENCES)
+        _collect_references(template, keys)
+        refs = FormReferences(frozenset(keys))
+    _REFERENCES[form_key] = (template, refs)
+    return refs
+
+
+def fill_form(
+    form_key: str,
+    data: Dict[str, Any],
+    analyzer_fields: Optional[Dict[str, Any]] = None,
+    file_bytes: bytes | None = None,
+) -> Dict[str, Any]:
+    """Load ``form_key`` template and merge ``data`` into the fields."""
+    return fill_prepared_form(form_key, prepare_form_data(data, analyzer_fields, file_bytes))
+
+
+def fill_prepared_form(form_key: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill ``form_key`` from data returned by :func:`prepare_form_data`.
+
+    ``data`` receives computed and conditional values; pass a copy when the
+    same prepared data is used for several forms.
+    """
+    with tracing.span("form.fill", form=form_key), slow_requests.stage("form.fill"):
+        return _fill_prepared_form(form_key, data)
+
+
+def _fill_prepared_form(form_key: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    template = FORM_REGISTRY.get(form_key)
     reasoning: list[str] = []
     filled = _fill_template(template, data, reasoning, form_name=form_key)
     if reasoning:
@@ -0,0 +1,204 @@
+"""Fill an application package of forms from one profile.
+
+``POST /form-fill`` normalizes dates, backfills analyzer fields and derives
+checkbox fields for every call.  :func:`fill_forms` does that once per
+request, fills the requested forms concurrently in worker threads and applies
+the same post-fill passes as ``/form-fill`` to each result.
+
+Raw fills are remembered per ``(session_id, form)``.  When the same session
+submits the package again, a form is only refilled if a prepared-data key it
+references (see :func:`fill_form.form_references`) changed since its last fill,
+or if its compiled template changed (``FORM_REGISTRY`` recompiles an edited
+template into a new object).
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings  # type: ignore
+from fill_form import (
+    FORM_REGISTRY,
+    YES_NO_FIELDS,
+    _normalize_state,
+    _normalize_zip,
+    fill_prepared_form,
+    form_references,
+    prepare_form_data,
+)
+from utils.dates import normalize_dates_in_mapping
+from utils.merge import merge_preserving_user
+
+_MISSING = object()
+
+
+def finalize_filled_form(
+    normalized_data: Dict[str, Any], filled: Dict[str, Any]
+) -> List[str]:
+    """Merge user values into ``filled["fields"]`` and normalize them in place.
+
+    Returns the merge reasoning steps.
+    """
+    merged_fields, merge_steps = merge_preserving_user(
+        normalized_data, filled.get("fields", {})
+    )
+    for k, v in list(merged_fields.items()):
+        if isinstance(v, str):
+            nv = v.strip()
+            if k.endswith("_zip") or k == "zip":
+                nv = _normalize_zip(nv)
+            elif k.endswith("_state") or k == "state":
+                nv = _normalize_state(nv)
+            merged_fields[k] = nv
+    for k in YES_NO_FIELDS:
+        if k in merged_fields:
+            v = merged_fields[k]
+            if isinstance(v, bool):
+                merged_fields[k] = "yes" if v else "no"
+            elif isinstance(v, str):
+                lv = v.strip().lower()
+                if lv in {"y", "yes", "true", "1"}:
+                    merged_fields[k] = "yes"
+                elif lv in {"n", "no", "false", "0"}:
+                    merged_fields[k] = "no"
+    for k, v in list(merged_fields.items()):
+        if k.startswith("funding_"):
+            if isinstance(v, str):
+                try:
+                    merged_fields[k] = float(v.replace("$", "").replace(",", ""))
+                except ValueError:
+                    continue
+    fund_keys = [k for k in merged_fields if k.startswith("funding_") and k != "funding_total"]
+    if fund_keys:
+        total = 0.0
+        for k in fund_keys:
+            val = merged_fields.get(k)
+            if isinstance(val, (int, float)):
+                total += float(val)
+        merged_fields["funding_total"] = total
+    filled["fields"] = merged_fields
+    return merge_steps
+
+
+def changed_keys(old: Dict[str, Any], new: Dict[str, Any]) -> set:
+    """Keys whose value differs (or that exist on one side only)."""
+    return {
+        k for k in old.keys() | new.keys() if old.get(k, _MISSING) != new.get(k, _MISSING)
+    }
+
+
+@dataclass
+class _FillEntry:
+    day: str
+    prepared: Dict[str, Any]
+    filled: Dict[str, Any]
+    template: Any = None
+
+
+class FilledFormCache:
+    """LRU of the last raw fill per ``(session_id, form)``."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max(int(max_entries), 0)
+        self._entries: "OrderedDict[Tuple[str, str], _FillEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, form_name: str) -> Optional[_FillEntry]:
+        with self._lock:
+            entry = self._entries.get((session_id, form_name))
+            if entry is not None:
+                self._entries.move_to_end((session_id, form_name))
+            return entry
+
+    def put(self, session_id: str, form_name: str, entry: _FillEntry) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[(session_id, form_name)] = entry
+            self._entries.move_to_end((session_id, form_name))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+FILL_CACHE = FilledFormCache(settings.FORM_FILL_CACHE_SIZE)
+
+
+@dataclass
+class BatchFillResult:
+    normalized_data: Dict[str, Any]
+    norm_steps: List[str]
+    forms: Dict[str, Tuple[Dict[str, Any], List[str]]] = field(default_factory=dict)
+    refilled: List[str] = field(default_factory=list)
+    reused: List[str] = field(default_factory=list)
+
+
+async def fill_forms(
+    form_names: List[str],
+    user_payload: Dict[str, Any],
+    analyzer_fields: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None,
+) -> BatchFillResult:
+    """Fill ``form_names`` from one profile; see the module docstring."""
+    normalized_data, norm_steps = normalize_dates_in_mapping(dict(user_payload))
+    # prepare_form_data backfills analyzer fields into ``normalized_data``,
+    # exactly as fill_form does for a single /form-fill call.
+    prepared = prepare_form_data(normalized_data, analyzer_fields)
+    snapshot = copy.deepcopy(prepared)
+    day = datetime.utcnow().strftime("%Y-%m-%d")
+    # LLM-assisted fields read the whole profile, so nothing can be reused.
+    reusable = session_id is not None and not getattr(settings, "OPENAI_API_KEY", None)
+    result = BatchFillResult(normalized_data=normalized_data, norm_steps=norm_steps)
+
+    raw: Dict[str, Dict[str, Any]] = {}
+    to_fill: List[str] = []
+    templates: Dict[str, Any] = {}
+    for name in dict.fromkeys(form_names):
+        entry = FILL_CACHE.get(session_id, name) if reusable else None
+        if session_id is not None:
+            templates[name] = FORM_REGISTRY.get(name)
+        if (
+            entry is not None
+            and entry.day == day
+            and entry.template is templates[name]
+            and not form_references(name).affected_by(changed_keys(entry.prepared, snapshot))
+        ):
+            raw[name] = copy.deepcopy(entry.filled)
+            result.reused.append(name)
+        else:
+            to_fill.append(name)
+
+    fills = await asyncio.gather(
+        *(asyncio.to_thread(fill_prepared_form, name, dict(prepared)) for name in to_fill)
+    )
+    for name, filled in zip(to_fill, fills):
+        if session_id is not None:
+            FILL_CACHE.put(
+                session_id, name, _FillEntry(day, snapshot, copy.deepcopy(filled), templates[name])
+            )
+        raw[name] = filled
+        result.refilled.append(name)
+
+    for name in dict.fromkeys(form_names):
+        filled = raw[name]
+        merge_steps = finalize_filled_form(normalized_data, filled)
+        result.forms[name] = (filled, norm_steps + merge_steps)
+    return result
+
+
+__all__ = [
+    "BatchFillResult",
+    "FILL_CACHE",
+    "FilledFormCache",
+    "changed_keys",
+    "fill_forms",
+    "finalize_filled_form",
+]
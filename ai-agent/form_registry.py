@@ -0,0 +1,245 @@
+"""Compiled, immutable form templates shared across fill requests.
+
+``form_templates/<form>.json`` is parsed once into a :class:`CompiledTemplate`
+holding the field specs, computed/conditional rules, section layout and the
+static keys echoed back in the filled form.  Compiled templates are never
+mutated; :func:`fill_form.fill_form` builds a fresh output dict from one per
+request and only copies the small mutable JSON values it hands out.
+:class:`FormRegistry` recompiles a template when its file changes on disk.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from common import catalogs
+
+FIELD_KEYS = frozenset(
+    {
+        "default",
+        "required",
+        "type",
+        "depends_on",
+        "prompt",
+        "show_if",
+        "required_if",
+        "example",
+        "expected_file",
+    }
+)
+TYPE_ALIASES = {"string": "text", "enum": "dropdown", "boolean": "checkbox"}
+
+
+def freeze(value: Any) -> Any:
+    """Return an immutable copy of a JSON value (dicts -> mappings, lists -> tuples)."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Return a mutable JSON value for a frozen one; scalars are returned as is."""
+    if isinstance(value, MappingProxyType):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """One entry of a template's ``fields`` mapping."""
+
+    key: str
+    default: Any = ""
+    required: bool = True
+    type: str = "text"
+    depends_on: Optional[str] = None
+    prompt: Optional[str] = None
+    show_if: Optional[str] = None
+    required_if: Optional[str] = None
+    example: Optional[str] = None
+    expected_file: Optional[str] = None
+    group: Optional["CompiledTemplate"] = None
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Parsed template node; sections and field groups are nested nodes.
+
+    ``keys`` preserves the order of the source keys so filled output matches
+    the layout of the JSON file.  ``field_items`` is set instead of ``fields``
+    for nested list-style field declarations.
+    """
+
+    keys: Tuple[str, ...]
+    static: Mapping[str, Any]
+    fields: Tuple[FieldSpec, ...] = ()
+    field_items: Optional[Tuple[Any, ...]] = None
+    optional_fields: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    computed_fields: Tuple[Tuple[str, Any], ...] = ()
+    conditional_fields: Tuple[Tuple[str, Any, Any], ...] = ()
+    template: Optional[str] = None
+    sections: Tuple["CompiledTemplate", ...] = ()
+
+
+def _is_group(spec: Dict[str, Any]) -> bool:
+    return (
+        "fields" in spec
+        or "sections" in spec
+        or (not (FIELD_KEYS & spec.keys()) and any(isinstance(v, dict) for v in spec.values()))
+    )
+
+
+def _compile_field(key: str, spec: Any) -> FieldSpec:
+    if not isinstance(spec, dict):
+        return FieldSpec(key=key, default=freeze(spec))
+    if _is_group(spec):
+        return FieldSpec(key=key, group=compile_template(spec))
+    ftype = spec.get("type", "text")
+    return FieldSpec(
+        key=key,
+        default=freeze(spec.get("default", "")),
+        required=spec.get("required", True),
+        type=TYPE_ALIASES.get(ftype, ftype),
+        depends_on=spec.get("depends_on"),
+        prompt=spec.get("prompt"),
+        show_if=spec.get("show_if"),
+        required_if=spec.get("required_if"),
+        example=spec.get("example"),
+        expected_file=spec.get("expected_file"),
+    )
+
+
+def compile_template(template: Dict[str, Any]) -> CompiledTemplate:
+    """Compile one template node (a form, section or field group)."""
+    fields = template.get("fields", {})
+    field_items: Optional[Tuple[Any, ...]] = None
+    specs: Tuple[FieldSpec, ...] = ()
+    if isinstance(fields, list):
+        field_items = tuple(
+            compile_template(item) if isinstance(item, dict) else freeze(item)
+            for item in fields
+        )
+    else:
+        specs = tuple(_compile_field(key, spec) for key, spec in fields.items())
+
+    sections = template.get("sections", [])
+    tmpl = template.get("template")
+    return CompiledTemplate(
+        keys=tuple(template.keys()),
+        static=freeze({k: v for k, v in template.items() if k != "fields"}),
+        fields=specs,
+        field_items=field_items,
+        optional_fields=freeze(template.get("optional_fields", {})),
+        computed_fields=tuple(template.get("computed_fields", {}).items()),
+        conditional_fields=tuple(
+            (key, rule.get("if"), freeze(rule.get("value", True)))
+            for key, rule in template.get("conditional_fields", {}).items()
+        ),
+        template=tmpl if isinstance(tmpl, str) else None,
+        sections=tuple(compile_template(section) for section in sections),
+    )
+
+
+def compile_form(raw: Dict[str, Any]) -> CompiledTemplate:
+    """Compile a top-level form file.
+
+    Some templates wrap the definition under a ``form`` key and some declare
+    ``fields`` as a list of ``{"name": ...}`` entries; both are normalised to
+    a ``fields`` mapping before compiling.
+    """
+    template = raw
+    if "form" in template and "fields" not in template:
+        template = template["form"]
+    if isinstance(template.get("fields"), list):
+        converted: Dict[str, Any] = {}
+        for item in template["fields"]:
+            if isinstance(item, dict):
+                key = item.get("name") or item.get("key")
+                if key:
+                    converted[key] = {k: v for k, v in item.items() if k not in {"name", "key"}}
+        template = {**template, "fields": converted}
+    return compile_template(template)
+
+
+class FormRegistry:
+    """Lazily compiles ``<directory>/<form_key>.json`` and reloads on change.
+
+    With ``bundled`` naming a :mod:`common.catalogs` catalog, templates are
+    compiled from the loaded catalog bundle instead, keyed by its version;
+    without a bundle the directory is read as usual.
+    """
+
+    def __init__(self, directory: Path, bundled: Optional[str] = None) -> None:
+        self.directory = Path(directory)
+        self.bundled = bundled
+        self._forms: Dict[str, Tuple[Any, CompiledTemplate]] = {}
+        self._lock = threading.Lock()
+
+    def _bundled_templates(self) -> Optional[Mapping[str, Any]]:
+        if self.bundled is None or catalogs.bundle() is None:
+            return None
+        return catalogs.load(self.bundled)
+
+    def get(self, form_key: str) -> CompiledTemplate:
+        """Return the compiled form; raises ``FileNotFoundError`` if it is missing."""
+        templates = self._bundled_templates()
+        path = self.directory / f"{form_key}.json"
+        if templates is not None:
+            if form_key not in templates:
+                raise FileNotFoundError(f"form template {form_key!r} is not in the catalog bundle")
+            stamp: Any = catalogs.version()
+        else:
+            stat = path.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._forms.get(form_key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with self._lock:
+            cached = self._forms.get(form_key)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            if templates is not None:
+                compiled = compile_form(templates[form_key])
+            else:
+                with path.open("r", encoding="utf-8") as f:
+                    compiled = compile_form(json.load(f))
+            self._forms[form_key] = (stamp, compiled)
+            return compiled
+
+    def keys(self) -> List[str]:
+        """Every template key, from the bundle or the directory."""
+        templates = self._bundled_templates()
+        if templates is not None:
+            return sorted(templates)
+        return sorted(path.stem for path in self.directory.glob("*.json"))
+
+    def preload(self) -> int:
+        """Compile every template; return how many there are."""
+        self.clear()
+        keys = self.keys()
+        for key in keys:
+            self.get(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._forms.clear()
+
+
+__all__ = [
+    "CompiledTemplate",
+    "FieldSpec",
+    "FormRegistry",
+    "compile_form",
+    "compile_template",
+    "freeze",
+    "thaw",
+]
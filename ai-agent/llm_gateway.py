@@ -0,0 +1,282 @@
+"""Async gateway to the chat-completions API used by the agent's handlers.
+
+:func:`nlp_utils.llm_complete` is synchronous and blocks the worker for the
+whole completion.  :class:`LLMGateway` talks to any OpenAI-compatible
+``/chat/completions`` endpoint over a pooled ``httpx.AsyncClient`` and adds:
+
+* a concurrency limit on outstanding upstream requests,
+* coalescing, so identical prompts in flight share one upstream call,
+* a TTL response cache keyed by a hash of the model and messages,
+* :func:`window_history`, which trims history to a token budget, and
+* :meth:`LLMGateway.stream`, which yields completion deltas as they arrive.
+
+Failures degrade the same way as ``llm_complete``: an empty completion.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from common import tracing
+from common.logger import get_logger
+from config import settings  # type: ignore
+
+logger = get_logger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+Message = Dict[str, str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token plus message overhead)."""
+    return len(text) // 4 + 4
+
+
+def window_history(history: List[Message], budget_tokens: int) -> List[Message]:
+    """Return the newest messages of ``history`` that fit in ``budget_tokens``."""
+    kept: List[Message] = []
+    used = 0
+    for message in reversed(history):
+        cost = estimate_tokens(message.get("content") or "")
+        if used + cost > budget_tokens:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    return kept
+
+
+_WS_RE = re.compile(r"\s+")
+
+
+def cache_key(model: str, messages: List[Message]) -> str:
+    """Hash of the model and messages; whitespace runs are collapsed."""
+    normalized = [
+        (m.get("role", ""), _WS_RE.sub(" ", m.get("content") or "").strip()) for m in messages
+    ]
+    payload = json.dumps([model, normalized], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMGateway:
+    """Shared async client for chat completions; one instance per process."""
+
+    def __init__(
+        self,
+        *,
+        base_url: str = DEFAULT_BASE_URL,
+        api_key: Optional[str] = None,
+        model: str = "gpt-4o-mini",
+        timeout: float = 20.0,
+        max_concurrency: int = 8,
+        max_retries: int = 2,
+        backoff_seconds: float = 0.5,
+        cache_size: int = 512,
+        cache_ttl_seconds: float = 600.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.max_retries = max(int(max_retries), 0)
+        self.backoff_seconds = backoff_seconds
+        self.cache_size = max(int(cache_size), 0)
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.transport = transport
+        self._cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        # Keyless use is allowed for self-hosted or fake endpoints.
+        return bool(self.api_key) or self.base_url != DEFAULT_BASE_URL
+
+    def _bind(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        # Clients, semaphores and futures belong to one event loop; rebuild
+        # them when called from a new loop (tests, worker restarts).
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._client is None or self._semaphore is None:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=self.timeout,
+                transport=self.transport,
+                limits=httpx.Limits(max_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+            self._loop = loop
+        return self._client, self._semaphore
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+    def _cached(self, key: str) -> Optional[str]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        stored_at, text = entry
+        if time.monotonic() - stored_at > self.cache_ttl_seconds:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        self.stats["cache_hits"] += 1
+        return text
+
+    def _remember(self, key: str, text: str) -> None:
+        if not self.cache_size or not text:
+            return
+        self._cache[key] = (time.monotonic(), text)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    async def complete(self, messages: List[Message]) -> str:
+        """Return the completion for ``messages`` (``""`` on failure)."""
+        if not self.enabled:
+            return ""
+        with tracing.span("llm.completion", model=self.model) as span:
+            return await self._complete(messages, span)
+
+    async def _complete(self, messages: List[Message], span: Any) -> str:
+        key = cache_key(self.model, messages)
+        cached = self._cached(key)
+        span.set_attribute("cache_hit", cached is not None)
+        if cached is not None:
+            return cached
+        self._bind()
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            span.set_attribute("coalesced", True)
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            text = await self._request(messages)
+            self._remember(key, text)
+            future.set_result(text)
+            return text
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Waiters re-raise; mark retrieved so an unawaited one is not logged.
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _request(self, messages: List[Message]) -> str:
+        client, semaphore = self._bind()
+        body = {"model": self.model, "messages": messages}
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                self.stats["requests"] += 1
+                try:
+                    resp = await client.post("/chat/completions", json=body)
+                    if resp.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                        await asyncio.sleep(self.backoff_seconds * 2**attempt)
+                        continue
+                    resp.raise_for_status()
+                    data = resp.json()
+                    return (data["choices"][0]["message"].get("content") or "").strip()
+                except (httpx.HTTPError, KeyError, IndexError, ValueError):
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(self.backoff_seconds * 2**attempt)
+                        continue
+                    self.stats["errors"] += 1
+                    logger.warning("llm request failed", exc_info=True)
+                    return ""
+        return ""
+
+    async def stream(self, messages: List[Message]) -> AsyncIterator[str]:
+        """Yield completion text deltas; cached answers arrive as one delta."""
+        if not self.enabled:
+            return
+        key = cache_key(self.model, messages)
+        cached = self._cached(key)
+        if cached is not None:
+            yield cached
+            return
+        client, semaphore = self._bind()
+        body = {"model": self.model, "messages": messages, "stream": True}
+        parts: List[str] = []
+        # A span context would be entered and left in different steps of this
+        # generator, so the stream is recorded once it ends.
+        started = time.perf_counter()
+        async with semaphore:
+            self.stats["requests"] += 1
+            try:
+                async with client.stream("POST", "/chat/completions", json=body) as resp:
+                    resp.raise_for_status()
+                    async for line in resp.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            choice = json.loads(data)["choices"][0]
+                        except (ValueError, KeyError, IndexError):
+                            continue
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+            except httpx.HTTPError:
+                self.stats["errors"] += 1
+                logger.warning("llm stream failed", exc_info=True)
+                tracing.record_span("llm.stream", time.perf_counter() - started, model=self.model, failed=True)
+                return
+        tracing.record_span("llm.stream", time.perf_counter() - started, model=self.model, chunks=len(parts))
+        self._remember(key, "".join(parts).strip())
+
+
+def build_gateway() -> LLMGateway:
+    """Build the agent's gateway from settings."""
+    return LLMGateway(
+        base_url=settings.OPENAI_BASE_URL or DEFAULT_BASE_URL,
+        api_key=settings.OPENAI_API_KEY,
+        model=settings.OPENAI_MODEL or "gpt-4o-mini",
+        timeout=settings.OPENAI_TIMEOUT_MS / 1000,
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        cache_size=settings.LLM_CACHE_SIZE,
+        cache_ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    )
+
+
+llm_gateway = build_gateway()
+
+
+__all__ = [
+    "LLMGateway",
+    "build_gateway",
+    "cache_key",
+    "estimate_tokens",
+    "llm_gateway",
+    "window_history",
+]
@@ -1,8 +1,11 @@
 from fastapi import FastAPI, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import Any
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 from pathlib import Path
+import asyncio
+import json
 import sys
 import os
 
@@ -14,20 +17,28 @@ sys.path.insert(0, str(ENGINE_DIR))
 sys.path.insert(0, str(BASE_DIR))
 sys.path.insert(0, str(CURRENT_DIR))
 
+from common import catalogs, profiling, serve, slow_requests, tracing, traffic
 from common.logger import get_logger
-from common.request_id import request_id_middleware
+from common.request_id import RequestContextMiddleware
+from common.warmup import Warmup
 
 from engine import analyze_eligibility  # type: ignore
-from fill_form import fill_form, _normalize_state, _normalize_zip, YES_NO_FIELDS
-from session_memory import append_memory, get_missing_fields, save_draft_form, get_conversation
-from nlp_utils import llm_semantic_inference, llm_complete
+from fill_form import FORM_REGISTRY, fill_form, form_references
+from form_batch import fill_forms, finalize_filled_form
+from session_store import session_store
+from nlp_utils import build_messages, llm_semantic_inference, openai
+from llm_gateway import llm_gateway, window_history
 from grants_loader import load_grants
+from industry_classifier import catalog_by_code, load_catalog  # type: ignore
+import document_library
 
 from config import settings  # type: ignore
 
 from schemas import (
     AgentCheckRequest,
     AgentCheckResponse,
+    FormFillBatchRequest,
+    FormFillBatchResponse,
     FormFillRequest,
     FormFillResponse,
     Reasoning,
@@ -37,13 +48,53 @@ from utils.merge import merge_preserving_user
 from utils.reasoning import build_clarifying_questions
 
 logger = get_logger(__name__)
+tracing.configure("ai-agent")
 
 
-app = FastAPI(title="AI Agent Service")
-try:
-    app.middleware("http")(request_id_middleware)
-except AttributeError:
-    pass
+warmup = Warmup("ai-agent")
+WARMUP_PAYLOAD = ENGINE_DIR / "test_payload.json"
+
+
+@warmup.step("catalogs")
+def preload_catalogs() -> None:
+    """Parse grants, catalogs and form templates; run by common.serve before forking."""
+    catalogs.reload()
+    serve.refresh_caches(load_grants, load_catalog, catalog_by_code)
+    document_library.preload()
+    FORM_REGISTRY.preload()
+
+
+@warmup.step("form_expressions")
+def _warm_form_expressions() -> None:
+    # Compiles every computed/conditional expression without filling a form,
+    # which could call the LLM.
+    for form_key in FORM_REGISTRY.keys():
+        form_references(form_key)
+
+
+@warmup.step("eligibility")
+def _warm_eligibility() -> None:
+    analyze_eligibility(json.loads(WARMUP_PAYLOAD.read_text(encoding="utf-8")), explain=True)
+
+
+@warmup.step("llm_client")
+def _warm_llm_client() -> None:
+    if settings.OPENAI_API_KEY:
+        openai.load()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    warmup.start()
+    yield
+    await llm_gateway.aclose()
+
+
+app = FastAPI(title="AI Agent Service", lifespan=lifespan)
+app.add_middleware(RequestContextMiddleware)
+traffic.install(app, "ai-agent")
+profiling.install(app, "ai-agent", enabled=settings.ENABLE_DEBUG)
+slow_requests.install(app, "ai-agent", expose=settings.ENABLE_DEBUG)
 
 app.add_middleware(
     CORSMiddleware,
@@ -61,7 +112,8 @@ def healthz() -> dict[str, str]:
 
 @app.get("/readyz")
 def readyz() -> JSONResponse:
-    return JSONResponse(status_code=200, content={"status": "ready"})
+    code, body = warmup.readiness()
+    return JSONResponse(status_code=code, content=body)
 
 
 @app.get("/")
@@ -99,6 +151,11 @@ async def check(request_model: AgentCheckRequest) -> AgentCheckResponse:
     merged_profile, merge_steps = merge_preserving_user(normalized_profile, inferred)
 
     results = analyze_eligibility(merged_profile, explain=True)
+    slow_requests.note(
+        fields=merged_profile,
+        notes_length=len(request_model.notes or ""),
+        grant_count=len(results),
+    )
     missing: set[str] = set()
     for res in results:
         missing.update(res.get("missing_fields", []))
@@ -108,7 +165,9 @@ async def check(request_model: AgentCheckRequest) -> AgentCheckResponse:
     reasoning = Reasoning(reasoning_steps=reasoning_steps, clarifying_questions=clarifying)
 
     if request_model.session_id:
-        append_memory(request_model.session_id, {"payload": merged_profile, "results": results})
+        await session_store.append(
+            request_model.session_id, {"payload": merged_profile, "results": results}
+        )
 
     logger.info(
         "eligibility_check",
@@ -123,61 +182,62 @@ async def check(request_model: AgentCheckRequest) -> AgentCheckResponse:
 @app.post("/form-fill")
 async def form_fill(request_model: FormFillRequest) -> FormFillResponse:
     payload: dict[str, Any] = dict(request_model.user_payload)
+    slow_requests.note(
+        form=request_model.form_name,
+        fields=payload,
+        analyzer_fields=request_model.analyzer_fields or {},
+    )
     normalized_data, norm_steps = normalize_dates_in_mapping(payload)
     filled = fill_form(
         request_model.form_name, normalized_data, request_model.analyzer_fields
     )
 
-    merged_fields, merge_steps = merge_preserving_user(
-        normalized_data, filled.get("fields", {})
-    )
-    for k, v in list(merged_fields.items()):
-        if isinstance(v, str):
-            nv = v.strip()
-            if k.endswith("_zip") or k == "zip":
-                nv = _normalize_zip(nv)
-            elif k.endswith("_state") or k == "state":
-                nv = _normalize_state(nv)
-            merged_fields[k] = nv
-    for k in YES_NO_FIELDS:
-        if k in merged_fields:
-            v = merged_fields[k]
-            if isinstance(v, bool):
-                merged_fields[k] = "yes" if v else "no"
-            elif isinstance(v, str):
-                lv = v.strip().lower()
-                if lv in {"y", "yes", "true", "1"}:
-                    merged_fields[k] = "yes"
-                elif lv in {"n", "no", "false", "0"}:
-                    merged_fields[k] = "no"
-    for k, v in list(merged_fields.items()):
-        if k.startswith("funding_"):
-            if isinstance(v, str):
-                try:
-                    merged_fields[k] = float(v.replace("$", "").replace(",", ""))
-                except ValueError:
-                    continue
-    fund_keys = [k for k in merged_fields if k.startswith("funding_") and k != "funding_total"]
-    if fund_keys:
-        total = 0.0
-        for k in fund_keys:
-            val = merged_fields.get(k)
-            if isinstance(val, (int, float)):
-                total += float(val)
-        merged_fields["funding_total"] = total
-    filled["fields"] = merged_fields
+    merge_steps = finalize_filled_form(normalized_data, filled)
 
     reasoning_steps = norm_steps + merge_steps
     reasoning = Reasoning(reasoning_steps=reasoning_steps)
 
     if request_model.session_id:
-        append_memory(
+        await session_store.append(
             request_model.session_id,
             {"form": request_model.form_name, "data": normalized_data},
         )
     return FormFillResponse(filled_form=filled, reasoning=reasoning)
 
 
+@app.post("/form-fill/batch")
+async def form_fill_batch(request_model: FormFillBatchRequest) -> FormFillBatchResponse:
+    """Fill several forms from one profile with a single normalization pass."""
+    slow_requests.note(
+        forms=list(request_model.form_names),
+        fields=request_model.user_payload,
+        analyzer_fields=request_model.analyzer_fields or {},
+    )
+    batch = await fill_forms(
+        request_model.form_names,
+        request_model.user_payload,
+        request_model.analyzer_fields,
+        request_model.session_id,
+    )
+    if request_model.session_id:
+        await asyncio.gather(
+            *(
+                session_store.append(
+                    request_model.session_id, {"form": name, "data": batch.normalized_data}
+                )
+                for name in batch.refilled
+            )
+        )
+    return FormFillBatchResponse(
+        forms={
+            name: FormFillResponse(filled_form=filled, reasoning=Reasoning(reasoning_steps=steps))
+            for name, (filled, steps) in batch.forms.items()
+        },
+        refilled=batch.refilled,
+        reused=batch.reused,
+    )
+
+
 @app.post("/preview-form")
 async def preview_form(body: dict, file: UploadFile | None = None):
     grant_key = body.get("grant")
@@ -189,11 +249,34 @@ async def preview_form(body: dict, file: UploadFile | None = None):
     reasoning = {k: ("provided" if v else "auto-filled") for k, v in filled.get("fields", {}).items()}
 
     if session_id:
-        save_draft_form(session_id, grant_key, filled.get("fields", {}))
+        await session_store.save_draft_form(session_id, grant_key, filled.get("fields", {}))
 
     return {"filled_form": filled, "reasoning": reasoning, "files": filled.get("files", {})}
 
 
+async def _chat_history(session_id: str | None) -> list[dict[str, str]]:
+    """Recent chat turns of the session, trimmed to the history token budget."""
+    history_msgs: list[dict[str, str]] = []
+    if session_id:
+        for entry in await session_store.recent_chat(session_id, settings.CHAT_HISTORY_TURNS):
+            chat = entry.get("chat")
+            if chat and chat.get("text"):
+                history_msgs.append({"role": "user", "content": chat.get("text")})
+            if entry.get("response"):
+                history_msgs.append({"role": "assistant", "content": entry["response"]})
+    return window_history(history_msgs, settings.CHAT_HISTORY_TOKENS)
+
+
+async def _finish_chat(session_id: str | None, text: str, response: str) -> dict[str, Any]:
+    result: dict[str, Any] = {"response": response}
+    if session_id:
+        missing = await session_store.missing_fields(session_id)
+        if missing:
+            result["follow_up"] = [f"Please provide your {f}" for f in missing]
+        await session_store.append(session_id, {"chat": {"text": text}, "response": response})
+    return result
+
+
 @app.post("/chat")
 async def chat(message: dict):
     mode = message.get("mode")
@@ -205,24 +288,9 @@ async def chat(message: dict):
     grant = next((g for g in grants if g.get("key") == grant_key), None)
 
     if text:
-        history_msgs = []
-        if session_id:
-            for entry in get_conversation(session_id):
-                chat = entry.get("chat")
-                if chat and chat.get("text"):
-                    history_msgs.append({"role": "user", "content": chat.get("text")})
-                if entry.get("response"):
-                    history_msgs.append({"role": "assistant", "content": entry["response"]})
-        response = llm_complete(text, None, history=history_msgs)
-        follow_up = []
-        if session_id:
-            missing = get_missing_fields(session_id)
-            follow_up = [f"Please provide your {f}" for f in missing]
-            append_memory(session_id, {"chat": {"text": text}, "response": response})
-        result = {"response": response}
-        if follow_up:
-            result["follow_up"] = follow_up
-        return result
+        messages = build_messages(text, None, history=await _chat_history(session_id))
+        response = await llm_gateway.complete(messages)
+        return await _finish_chat(session_id, text, response)
 
     mode = mode or "info"
     if mode == "info":
@@ -235,17 +303,47 @@ async def chat(message: dict):
         docs = [d for cat in grant.get("required_documents", {}).values() for d in cat]
         response = "Required documents: " + ", ".join(docs)
     elif mode == "missing_info" and session_id:
-        qs = get_missing_fields(session_id)
+        qs = await session_store.missing_fields(session_id)
         response = "Missing info: " + ", ".join(qs) if qs else "All required data provided."
     else:
         response = "I'm not sure how to help with that."
 
     if session_id:
-        append_memory(session_id, {"chat": message, "response": response})
+        await session_store.append(session_id, {"chat": message, "response": response})
 
     return {"response": response}
 
 
+def _sse(payload: dict[str, Any]) -> str:
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream(message: dict) -> StreamingResponse:
+    """Stream the reply to a chat message as server-sent events.
+
+    Each event carries a ``delta`` of the reply; the final event has
+    ``done: true`` plus the same ``response``/``follow_up`` body as ``/chat``.
+    """
+    text = message.get("text") or message.get("prompt")
+    if not text:
+        raise HTTPException(status_code=400, detail="text is required")
+    session_id = message.get("session_id")
+    messages = build_messages(text, None, history=await _chat_history(session_id))
+
+    async def events() -> AsyncIterator[str]:
+        parts: list[str] = []
+        async for delta in llm_gateway.stream(messages):
+            parts.append(delta)
+            yield _sse({"delta": delta})
+        result = await _finish_chat(session_id, text, "".join(parts).strip())
+        yield _sse({"done": True, **result})
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+
 ENABLE_DEBUG = os.getenv("ENABLE_DEBUG", "false").lower() == "true"
 
 
@@ -253,23 +351,21 @@ ENABLE_DEBUG = os.getenv("ENABLE_DEBUG", "false").lower() == "true"
 async def llm_debug(session_id: str):
     if not ENABLE_DEBUG:
         raise HTTPException(status_code=403, detail="Debug access disabled")
-    history = get_conversation(session_id)
+    history = await session_store.records(session_id)
     summary = [list(record.keys())[0] for record in history if record]
     inferred = [r.get("payload") for r in history if r.get("payload")]
     return {"summary": summary, "inferred": inferred}
 
 
+warmup.imported()
+
 if __name__ == "__main__":
-    import uvicorn
-    import ssl
-
-    cert = os.getenv("TLS_CERT_PATH")
-    key = os.getenv("TLS_KEY_PATH")
-    ca = os.getenv("TLS_CA_PATH")
-    kwargs: dict[str, object] = {"reload": True}
-    if cert and key:
-        kwargs.update({"ssl_certfile": cert, "ssl_keyfile": key})
-        if ca:
-            kwargs["ssl_ca_certs"] = ca
-            kwargs["ssl_cert_reqs"] = ssl.CERT_REQUIRED
-    uvicorn.run(app, host="0.0.0.0", port=5001, **kwargs)
+    serve.run(
+        "main:app",
+        app=app,
+        port=5001,
+        preload=warmup.run,
+        ssl=serve.ssl_options(
+            os.getenv("TLS_CERT_PATH"), os.getenv("TLS_KEY_PATH"), os.getenv("TLS_CA_PATH")
+        ),
+    )
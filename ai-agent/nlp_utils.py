@@ -5,30 +5,32 @@ from typing import Dict, Tuple, Any, List
 import json
 import time
 
-try:
-    import openai  # type: ignore
-except Exception:  # pragma: no cover - openai optional for tests
-    openai = None  # type: ignore
+from common import tracing
+from common.lazy_import import OptionalImport
 from config import settings  # type: ignore
+
+# Imported on first completion (or by the warmup); falsy when not installed.
+openai = OptionalImport("openai")
 OPENAI_API_KEY = getattr(settings, "OPENAI_API_KEY", None)
-if openai and OPENAI_API_KEY:
-    openai.api_key = OPENAI_API_KEY
+if OPENAI_API_KEY:
+    openai.configure(lambda module: setattr(module, "api_key", OPENAI_API_KEY))
 
 
-def llm_complete(
+DEFAULT_SYSTEM_PROMPT = "You complete grant form fields. Output plain text only; no extra quotes."
+
+
+def build_messages(
     prompt: str,
     context: Dict[str, Any] | None = None,
     *,
-    system: str | None = "You complete grant form fields. Output plain text only; no extra quotes.",
+    system: str | None = DEFAULT_SYSTEM_PROMPT,
     history: List[Dict[str, str]] | None = None,
-) -> str:
-    """Return a short completion from OpenAI with graceful fallback.
+) -> List[Dict[str, str]]:
+    """Return the chat messages sent for ``prompt``.
 
     ``context`` is serialized into the user message to give the model
-    additional background. If the OpenAI SDK or API key is unavailable,
-    an empty string is returned instead of raising.
+    additional background.
     """
-
     messages: List[Dict[str, str]] = []
     if system:
         messages.append({"role": "system", "content": system})
@@ -41,25 +43,44 @@ def llm_complete(
         except Exception:
             pass
     messages.append({"role": "user", "content": user})
+    return messages
+
+
+def llm_complete(
+    prompt: str,
+    context: Dict[str, Any] | None = None,
+    *,
+    system: str | None = DEFAULT_SYSTEM_PROMPT,
+    history: List[Dict[str, str]] | None = None,
+) -> str:
+    """Return a short completion from OpenAI with graceful fallback.
+
+    See :func:`build_messages` for how the request is assembled. If the
+    OpenAI SDK or API key is unavailable, an empty string is returned instead
+    of raising.  Async handlers should use :mod:`llm_gateway` instead.
+    """
+    messages = build_messages(prompt, context, system=system, history=history)
 
-    if not (openai and getattr(settings, "OPENAI_API_KEY", None)):
+    if not (getattr(settings, "OPENAI_API_KEY", None) and openai):
         return ""
 
     model = getattr(settings, "OPENAI_MODEL", "gpt-4o-mini")
     timeout = getattr(settings, "OPENAI_TIMEOUT_MS", 20000) / 1000
-    for attempt in range(2):  # simple retry
-        try:  # pragma: no cover - network call
-            resp = openai.ChatCompletion.create(
-                model=model,
-                messages=messages,
-                request_timeout=timeout,
-            )
-            return resp.choices[0].message.get("content", "").strip()
-        except Exception:  # pragma: no cover - network call
-            if attempt == 0:
-                time.sleep(0.5)
-            else:
-                return ""
+    with tracing.span("llm.completion", model=model) as span:
+        for attempt in range(2):  # simple retry
+            try:  # pragma: no cover - network call
+                resp = openai.ChatCompletion.create(
+                    model=model,
+                    messages=messages,
+                    request_timeout=timeout,
+                )
+                return resp.choices[0].message.get("content", "").strip()
+            except Exception:  # pragma: no cover - network call
+                if attempt == 0:
+                    time.sleep(0.5)
+                else:
+                    span.set_error("completion failed")
+                    return ""
     return ""
 
 # State lookup for basic zip inference
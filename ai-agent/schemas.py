@@ -52,18 +52,21 @@ class AgentCheckResponse(BaseModel):
     reasoning: Reasoning
 
 
+FormName = Literal[
+    "form_8974",
+    "form_6765",
+    "form_424A",
+    "form_sf424",
+    "form_RD_400_1",
+    "form_RD_400_4",
+    "form_RD_400_8",
+]
+
+
 class FormFillRequest(BaseModel):
     model_config = ConfigDict(extra="ignore")
 
-    form_name: Literal[
-        "form_8974",
-        "form_6765",
-        "form_424A",
-        "form_sf424",
-        "form_RD_400_1",
-        "form_RD_400_4",
-        "form_RD_400_8",
-    ]
+    form_name: FormName
     user_payload: Dict[str, Any]
     analyzer_fields: Dict[str, Any] | None = None
     session_id: Optional[str] = None
@@ -72,3 +75,18 @@ class FormFillRequest(BaseModel):
 class FormFillResponse(BaseModel):
     filled_form: Dict[str, Any]
     reasoning: Reasoning
+
+
+class FormFillBatchRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    form_names: List[FormName] = Field(..., min_length=1)
+    user_payload: Dict[str, Any]
+    analyzer_fields: Dict[str, Any] | None = None
+    session_id: Optional[str] = None
+
+
+class FormFillBatchResponse(BaseModel):
+    forms: Dict[str, FormFillResponse]
+    refilled: List[str] = Field(default_factory=list)
+    reused: List[str] = Field(default_factory=list)
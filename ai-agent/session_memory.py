@@ -1,42 +1,227 @@
-"""MongoDB-backed session memory."""
-from typing import Dict, Any, List
-from pymongo import MongoClient
+"""MongoDB-backed session memory.
+
+Every record the agent remembers for a session is stored as its own document
+in ``session_records`` keyed by ``(session_id, seq)`` and tagged with a
+``kind`` (``chat``, ``eligibility``, ``form``, ``draft_form`` or ``other``),
+so reads can be windowed and projected instead of loading one ever-growing
+array per session.  ``session_summaries`` holds one small document per
+session with the sequence counter and the materialized union of missing
+fields from eligibility results, updated on every write.
+
+:class:`InMemorySessionStore` implements the same interface and is used when
+MongoDB is not configured (e.g. in unit tests).
+"""
+import threading
+from typing import Dict, Any, Iterable, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, MongoClient, ReturnDocument
 from config import settings  # type: ignore
 
 MONGO_URI = getattr(settings, "MONGO_URI", None)
 
+CHAT = "chat"
+ELIGIBILITY = "eligibility"
+FORM = "form"
+DRAFT_FORM = "draft_form"
+OTHER = "other"
+
+
+def record_kind(record: Dict[str, Any]) -> str:
+    """Classify a memory record by the keys the agent writes."""
+    if "chat" in record or "response" in record:
+        return CHAT
+    if "results" in record:
+        return ELIGIBILITY
+    if "draft_form" in record:
+        return DRAFT_FORM
+    if "form" in record:
+        return FORM
+    return OTHER
+
+
+def record_missing_fields(record: Dict[str, Any]) -> List[str]:
+    """Return the missing fields reported by a record's eligibility results."""
+    missing: List[str] = []
+    res = record.get("results")
+    if isinstance(res, list):
+        for r in res:
+            missing.extend(r.get("debug", {}).get("missing_fields", []))
+    return missing
+
+
+def summary_update(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Return the summary update that reserves seqs for ``records``."""
+    missing: List[str] = []
+    for record in records:
+        missing.extend(record_missing_fields(record))
+    return {
+        "$inc": {"seq": len(records)},
+        "$addToSet": {"missing_fields": {"$each": sorted(set(missing))}},
+    }
+
+
+def record_documents(
+    session_id: str, last_seq: int, records: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Return ``session_records`` documents for ``records`` ending at ``last_seq``."""
+    first = last_seq - len(records) + 1
+    return [
+        {"session_id": session_id, "seq": first + i, "kind": record_kind(record), "record": record}
+        for i, record in enumerate(records)
+    ]
+
+
+class InMemorySessionStore:
+    """Process-local stand-in for :class:`MongoSessionStore`."""
+
+    def __init__(self) -> None:
+        self._records: Dict[str, List[Dict[str, Any]]] = {}
+        self._missing: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def append(self, session_id: str, record: Dict[str, Any]) -> None:
+        self.append_many(session_id, [record])
+
+    def append_many(self, session_id: str, records: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._records.setdefault(session_id, []).extend(records)
+            missing = self._missing.setdefault(session_id, set())
+            for record in records:
+                missing.update(record_missing_fields(record))
+
+    def records(
+        self,
+        session_id: str,
+        *,
+        kinds: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = list(self._records.get(session_id, []))
+        if kinds is not None:
+            wanted = set(kinds)
+            records = [r for r in records if record_kind(r) in wanted]
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        return records
+
+    def missing_fields(self, session_id: str) -> List[str]:
+        with self._lock:
+            return sorted(self._missing.get(session_id, ()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._missing.clear()
+
+
+class MongoSessionStore:
+    """Per-record session memory in MongoDB.
+
+    Appending allocates the next ``seq`` and merges the record's missing
+    fields into the session summary in one atomic update, then inserts the
+    record.  Windowed reads walk the ``(session_id, kind, seq)`` index
+    backwards and only project the stored record.
+    """
+
+    def __init__(self, db: Any) -> None:
+        self.records_collection = db["session_records"]
+        self.summaries = db["session_summaries"]
+        self._indexed = False
+
+    def ensure_indexes(self) -> None:
+        if self._indexed:
+            return
+        self.records_collection.create_index(
+            [("session_id", ASCENDING), ("seq", ASCENDING)], unique=True
+        )
+        self.records_collection.create_index(
+            [("session_id", ASCENDING), ("kind", ASCENDING), ("seq", ASCENDING)]
+        )
+        self._indexed = True
+
+    def append(self, session_id: str, record: Dict[str, Any]) -> None:
+        self.append_many(session_id, [record])
+
+    def append_many(self, session_id: str, records: List[Dict[str, Any]]) -> None:
+        """Append ``records`` with one summary update and one insert."""
+        if not records:
+            return
+        self.ensure_indexes()
+        summary = self.summaries.find_one_and_update(
+            {"_id": session_id},
+            summary_update(records),
+            upsert=True,
+            projection={"seq": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        self.records_collection.insert_many(record_documents(session_id, summary["seq"], records))
+
+    def records(
+        self,
+        session_id: str,
+        *,
+        kinds: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"session_id": session_id}
+        if kinds is not None:
+            query["kind"] = {"$in": list(kinds)}
+        projection = {"_id": 0, "record": 1}
+        if limit is None:
+            cursor = self.records_collection.find(query, projection).sort("seq", ASCENDING)
+            return [doc["record"] for doc in cursor]
+        if limit <= 0:
+            return []
+        cursor = (
+            self.records_collection.find(query, projection)
+            .sort("seq", DESCENDING)
+            .limit(limit)
+        )
+        return [doc["record"] for doc in cursor][::-1]
+
+    def missing_fields(self, session_id: str) -> List[str]:
+        doc = self.summaries.find_one({"_id": session_id}, {"missing_fields": 1})
+        return sorted(doc.get("missing_fields", [])) if doc else []
+
+    def migrate_legacy(self, legacy_collection: Any) -> int:
+        """Copy ``{_id, records: [...]}`` documents into per-record storage.
+
+        Sessions that already have records in the new layout are skipped.
+        Returns the number of sessions migrated.
+        """
+        migrated = 0
+        for doc in legacy_collection.find({}, {"records": 1}):
+            session_id = doc["_id"]
+            if self.summaries.find_one({"_id": session_id}, {"_id": 1}):
+                continue
+            self.append_many(session_id, doc.get("records", []))
+            migrated += 1
+        return migrated
+
+
 if MONGO_URI:
     try:
-        client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=500)
+        client = MongoClient(str(MONGO_URI), serverSelectionTimeoutMS=500)
         db = client["ai_agent"]
-        collection = db["session_memory"]
-        _memory_store: Dict[str, List[Dict[str, Any]]] | None = None
+        store: InMemorySessionStore | MongoSessionStore = MongoSessionStore(db)
     except Exception:  # pragma: no cover - fallback for tests
         client = None
         db = None
-        collection = None
-        _memory_store = {}
+        store = InMemorySessionStore()
 else:  # pragma: no cover - db disabled in tests
     client = None
     db = None
-    collection = None
-    # Simple in-memory store used when MongoDB isn't configured (e.g. in unit
-    # tests). It mimics the structure of the persisted documents.
-    _memory_store: Dict[str, List[Dict[str, Any]]] = {}
+    store = InMemorySessionStore()
 
 
 def load_memory(session_id: str) -> List[Dict[str, Any]]:
-    if collection is None:
-        return _memory_store.get(session_id, [])
-    doc = collection.find_one({"_id": session_id})
-    return doc.get("records", []) if doc else []
+    """Return every record of this session in insertion order."""
+    return store.records(session_id)
 
 
 def append_memory(session_id: str, record: Dict[str, Any]) -> None:
-    if collection is None:
-        _memory_store.setdefault(session_id, []).append(record)
-        return
-    collection.update_one({"_id": session_id}, {"$push": {"records": record}}, upsert=True)
+    store.append(session_id, record)
 
 
 def save_draft_form(session_id: str, form_key: str, fields: Dict[str, Any]) -> None:
@@ -45,14 +230,19 @@ def save_draft_form(session_id: str, form_key: str, fields: Dict[str, Any]) -> N
 
 
 def get_missing_fields(session_id: str) -> List[str]:
-    """Aggregate missing fields from stored eligibility results."""
-    missing: List[str] = []
-    for entry in load_memory(session_id):
-        res = entry.get("results")
-        if isinstance(res, list):
-            for r in res:
-                missing.extend(r.get("debug", {}).get("missing_fields", []))
-    return sorted(set(missing))
+    """Return the missing fields aggregated from stored eligibility results."""
+    return store.missing_fields(session_id)
+
+
+def get_recent_chat(session_id: str, limit: int) -> List[Dict[str, Any]]:
+    """Return the last ``limit`` chat turns of this session, oldest first."""
+    return store.records(session_id, kinds=(CHAT,), limit=limit)
+
+
+def get_latest_result(session_id: str) -> Optional[Dict[str, Any]]:
+    """Return the most recent eligibility record of this session, if any."""
+    latest = store.records(session_id, kinds=(ELIGIBILITY,), limit=1)
+    return latest[0] if latest else None
 
 
 def get_conversation(session_id: str) -> List[Dict[str, Any]]:
@@ -0,0 +1,404 @@
+"""Async session memory for the agent's request handlers.
+
+The synchronous helpers in :mod:`session_memory` block the event loop for a
+MongoDB round-trip on every call.  This module exposes the same per-record
+layout behind an async interface:
+
+* :class:`AsyncMongoSessionStore` uses pymongo's native async client.
+* :class:`ThreadedSessionStore` runs a synchronous store in worker threads and
+  is used when the installed pymongo has no async client.
+* :class:`AsyncInMemorySessionStore` is the fallback without ``MONGO_URI``.
+
+:class:`CachedSessionStore` sits in front of any of them.  It keeps the tail
+of recent records and the missing-fields summary of hot sessions in a
+per-process LRU, updated as soon as a record is appended so readers in this
+process see their own writes.  Appends are written through: each ``append``
+returns once its record is stored, and appends to one session that arrive
+while a write is in flight are coalesced into a single ``append_many``.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, ContextManager, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+import session_memory
+from common import tracing
+from config import settings  # type: ignore
+from session_memory import (
+    CHAT,
+    ELIGIBILITY,
+    InMemorySessionStore,
+    MongoSessionStore,
+    record_documents,
+    record_kind,
+    record_missing_fields,
+    summary_update,
+)
+
+try:  # pragma: no cover - async client ships with pymongo>=4.10
+    from pymongo import AsyncMongoClient  # type: ignore
+except ImportError:  # pragma: no cover - older pymongo
+    AsyncMongoClient = None  # type: ignore
+
+Record = Dict[str, Any]
+# Times a cache load is retried when appends land while it is in flight.
+LOAD_ATTEMPTS = 3
+
+
+class AsyncSessionStore(Protocol):
+    async def append_many(self, session_id: str, records: List[Record]) -> None: ...
+
+    async def records(
+        self,
+        session_id: str,
+        *,
+        kinds: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Record]: ...
+
+    async def missing_fields(self, session_id: str) -> List[str]: ...
+
+
+class AsyncInMemorySessionStore:
+    """Async facade over :class:`session_memory.InMemorySessionStore`."""
+
+    def __init__(self, store: Optional[InMemorySessionStore] = None) -> None:
+        self.store = store or InMemorySessionStore()
+
+    async def append_many(self, session_id: str, records: List[Record]) -> None:
+        self.store.append_many(session_id, records)
+
+    async def records(
+        self,
+        session_id: str,
+        *,
+        kinds: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Record]:
+        return self.store.records(session_id, kinds=kinds, limit=limit)
+
+    async def missing_fields(self, session_id: str) -> List[str]:
+        return self.store.missing_fields(session_id)
+
+
+def _mongo_span(operation: str) -> ContextManager[Any]:
+    return tracing.span(f"mongo.{operation}", **{"db.system": "mongodb", "db.operation": operation})
+
+
+class ThreadedSessionStore:
+    """Run a synchronous store's calls in worker threads."""
+
+    def __init__(self, store: MongoSessionStore) -> None:
+        self.store = store
+
+    async def append_many(self, session_id: str, records: List[Record]) -> None:
+        with _mongo_span("append_many"):
+            await asyncio.to_thread(self.store.append_many, session_id, records)
+
+    async def records(
+        self,
+        session_id: str,
+        *,
+        kinds: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Record]:
+        with _mongo_span("records"):
+            return await asyncio.to_thread(self.store.records, session_id, kinds=kinds, limit=limit)
+
+    async def missing_fields(self, session_id: str) -> List[str]:
+        with _mongo_span("missing_fields"):
+            return await asyncio.to_thread(self.store.missing_fields, session_id)
+
+
+class AsyncMongoSessionStore:
+    """:class:`session_memory.MongoSessionStore` on the async pymongo client."""
+
+    def __init__(self, db: Any) -> None:
+        self.records_collection = db["session_records"]
+        self.summaries = db["session_summaries"]
+        self._indexed = False
+
+    async def ensure_indexes(self) -> None:
+        if self._indexed:
+            return
+        await self.records_collection.create_index(
+            [("session_id", ASCENDING), ("seq", ASCENDING)], unique=True
+        )
+        await self.records_collection.create_index(
+            [("session_id", ASCENDING), ("kind", ASCENDING), ("seq", ASCENDING)]
+        )
+        self._indexed = True
+
+    async def append_many(self, session_id: str, records: List[Record]) -> None:
+        if not records:
+            return
+        with _mongo_span("append_many"):
+            await self.ensure_indexes()
+            summary = await self.summaries.find_one_and_update(
+                {"_id": session_id},
+                summary_update(records),
+                upsert=True,
+                projection={"seq": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+            await self.records_collection.insert_many(
+                record_documents(session_id, summary["seq"], records)
+            )
+
+    async def records(
+        self,
+        session_id: str,
+        *,
+        kinds: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Record]:
+        with _mongo_span("records"):
+            return await self._records(session_id, kinds, limit)
+
+    async def _records(
+        self, session_id: str, kinds: Optional[Iterable[str]], limit: Optional[int]
+    ) -> List[Record]:
+        query: Dict[str, Any] = {"session_id": session_id}
+        if kinds is not None:
+            query["kind"] = {"$in": list(kinds)}
+        projection = {"_id": 0, "record": 1}
+        if limit is None:
+            cursor = self.records_collection.find(query, projection).sort("seq", ASCENDING)
+            return [doc["record"] async for doc in cursor]
+        if limit <= 0:
+            return []
+        cursor = (
+            self.records_collection.find(query, projection)
+            .sort("seq", DESCENDING)
+            .limit(limit)
+        )
+        return [doc["record"] async for doc in cursor][::-1]
+
+    async def missing_fields(self, session_id: str) -> List[str]:
+        with _mongo_span("missing_fields"):
+            doc = await self.summaries.find_one({"_id": session_id}, {"missing_fields": 1})
+        return sorted(doc.get("missing_fields", [])) if doc else []
+
+
+class _SessionState:
+    __slots__ = ("tail", "complete", "missing", "loaded_at", "version", "pending", "flusher")
+
+    def __init__(self) -> None:
+        # ``tail`` holds the newest records once loaded; ``complete`` means it
+        # is the whole session.  ``None`` means "ask the backend".
+        self.tail: Optional[List[Record]] = None
+        self.complete = False
+        self.missing: Optional[set] = None
+        self.loaded_at = 0.0
+        # Bumped on every append so loads that raced a write are discarded.
+        self.version = 0
+        self.pending: List[Tuple[Record, asyncio.Future]] = []
+        self.flusher: Optional[asyncio.Task] = None
+
+    def reset(self) -> None:
+        self.tail = None
+        self.complete = False
+        self.missing = None
+
+
+class CachedSessionStore:
+    """Write-through LRU of hot sessions in front of an async store.
+
+    ``max_sessions`` bounds the number of cached sessions, ``tail_size`` the
+    records kept per session and ``ttl_seconds`` how long cached state is
+    trusted before it is reloaded (other workers may have written since).
+    """
+
+    def __init__(
+        self,
+        backend: AsyncSessionStore,
+        *,
+        max_sessions: int = 1024,
+        tail_size: int = 200,
+        ttl_seconds: float = 30.0,
+    ) -> None:
+        self.backend = backend
+        self.max_sessions = max(int(max_sessions), 1)
+        self.tail_size = max(int(tail_size), 1)
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, _SessionState]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+    def _state(self, session_id: str) -> _SessionState:
+        state = self._sessions.get(session_id)
+        if state is None:
+            state = self._sessions[session_id] = _SessionState()
+        self._sessions.move_to_end(session_id)
+        if len(self._sessions) > self.max_sessions:
+            for key in list(self._sessions):
+                if len(self._sessions) <= self.max_sessions:
+                    break
+                victim = self._sessions[key]
+                if key != session_id and victim.flusher is None:
+                    del self._sessions[key]
+        if (
+            state.loaded_at
+            and time.monotonic() - state.loaded_at > self.ttl_seconds
+            and state.flusher is None
+        ):
+            state.reset()
+            state.loaded_at = 0.0
+        return state
+
+    async def append(self, session_id: str, record: Record) -> None:
+        """Store ``record``; it is visible to readers in this process at once."""
+        state = self._state(session_id)
+        if state.tail is not None:
+            state.tail.append(record)
+            if len(state.tail) > self.tail_size:
+                del state.tail[: len(state.tail) - self.tail_size]
+                state.complete = False
+        if state.missing is not None:
+            state.missing.update(record_missing_fields(record))
+        state.version += 1
+        done = asyncio.get_running_loop().create_future()
+        state.pending.append((record, done))
+        if state.flusher is None:
+            state.flusher = asyncio.create_task(self._flush(session_id, state))
+        await done
+
+    async def _flush(self, session_id: str, state: _SessionState) -> None:
+        try:
+            while state.pending:
+                batch, state.pending = state.pending, []
+                try:
+                    await self.backend.append_many(session_id, [record for record, _ in batch])
+                except Exception as exc:
+                    # The cached tail holds records the backend may not have.
+                    state.reset()
+                    for _, done in batch:
+                        if not done.done():
+                            done.set_exception(exc)
+                else:
+                    self.flushes += 1
+                    for _, done in batch:
+                        if not done.done():
+                            done.set_result(None)
+        finally:
+            state.flusher = None
+
+    async def _settled(self, state: _SessionState) -> None:
+        # Backend reads must include this process's in-flight appends.
+        while state.flusher is not None:
+            await asyncio.shield(state.flusher)
+
+    async def _load_tail(self, session_id: str, state: _SessionState) -> Tuple[List[Record], bool]:
+        if state.tail is not None:
+            self.hits += 1
+            return state.tail, state.complete
+        self.misses += 1
+        for _ in range(LOAD_ATTEMPTS):
+            await self._settled(state)
+            version = state.version
+            tail = await self.backend.records(session_id, limit=self.tail_size)
+            if state.tail is not None:
+                return state.tail, state.complete
+            if state.version == version:
+                state.tail = tail
+                state.complete = len(tail) < self.tail_size
+                state.loaded_at = state.loaded_at or time.monotonic()
+                return tail, state.complete
+        # Writes keep landing mid-load; serve the settled backend view uncached.
+        await self._settled(state)
+        return await self.backend.records(session_id, limit=self.tail_size), False
+
+    async def records(
+        self,
+        session_id: str,
+        *,
+        kinds: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Record]:
+        """Return records oldest first, served from the cached tail when it suffices."""
+        state = self._state(session_id)
+        tail, complete = await self._load_tail(session_id, state)
+        wanted = set(kinds) if kinds is not None else None
+        matched = [r for r in tail if wanted is None or record_kind(r) in wanted]
+        if limit is not None and (len(matched) >= limit or complete):
+            return matched[-limit:] if limit > 0 else []
+        if limit is None and complete:
+            return matched
+        await self._settled(state)
+        return await self.backend.records(session_id, kinds=kinds, limit=limit)
+
+    async def missing_fields(self, session_id: str) -> List[str]:
+        state = self._state(session_id)
+        if state.missing is not None:
+            return sorted(state.missing)
+        for _ in range(LOAD_ATTEMPTS):
+            await self._settled(state)
+            version = state.version
+            missing = set(await self.backend.missing_fields(session_id))
+            if state.missing is not None:
+                return sorted(state.missing)
+            if state.version == version:
+                state.missing = missing
+                state.loaded_at = state.loaded_at or time.monotonic()
+                return sorted(missing)
+        await self._settled(state)
+        return await self.backend.missing_fields(session_id)
+
+    async def recent_chat(self, session_id: str, limit: int) -> List[Record]:
+        """Return the last ``limit`` chat turns, oldest first."""
+        return await self.records(session_id, kinds=(CHAT,), limit=limit)
+
+    async def latest_result(self, session_id: str) -> Optional[Record]:
+        """Return the most recent eligibility record, if any."""
+        latest = await self.records(session_id, kinds=(ELIGIBILITY,), limit=1)
+        return latest[0] if latest else None
+
+    async def save_draft_form(self, session_id: str, form_key: str, fields: Dict[str, Any]) -> None:
+        await self.append(session_id, {"draft_form": form_key, "fields": fields})
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._sessions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "flushes": self.flushes,
+        }
+
+
+def build_session_store() -> CachedSessionStore:
+    """Build the agent's session store from settings."""
+    uri = getattr(settings, "MONGO_URI", None)
+    backend: AsyncSessionStore
+    if not uri or isinstance(session_memory.store, InMemorySessionStore):
+        # Share the sync helpers' store so both views agree.
+        backend = AsyncInMemorySessionStore(session_memory.store)
+    elif AsyncMongoClient is not None:
+        client = AsyncMongoClient(str(uri), serverSelectionTimeoutMS=500)
+        backend = AsyncMongoSessionStore(client["ai_agent"])
+    else:  # pragma: no cover - depends on installed pymongo
+        backend = ThreadedSessionStore(session_memory.store)
+    return CachedSessionStore(
+        backend,
+        max_sessions=settings.SESSION_CACHE_SIZE,
+        tail_size=settings.SESSION_CACHE_TAIL,
+        ttl_seconds=settings.SESSION_CACHE_TTL_SECONDS,
+    )
+
+
+session_store = build_session_store()
+
+
+__all__ = [
+    "AsyncInMemorySessionStore",
+    "AsyncMongoSessionStore",
+    "AsyncSessionStore",
+    "CachedSessionStore",
+    "ThreadedSessionStore",
+    "build_session_store",
+    "session_store",
+]
@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+
+import main
+from fill_form import FORM_REGISTRY
+from form_batch import FILL_CACHE
+from session_memory import InMemorySessionStore
+from session_store import AsyncInMemorySessionStore, CachedSessionStore
+
+client = TestClient(main.app)
+
+FORMS = ["form_sf424", "form_RD_400_1", "form_RD_400_4", "form_424A", "form_6765", "form_8974"]
+PROFILE = {
+    "applicant_legal_name": "Acme Corp",
+    "recipient_name": "Acme Corp",
+    "recipient_address_state": "California",
+    "recipient_address_zip": "12345-6789",
+    "agreement_date": "10/19/2024",
+    "entity_type": "llc",
+    "funding_federal": "$1,000",
+    "notify_unions": True,
+}
+ANALYZER = {"recipient_title": "CEO", "ein": "12-3456789"}
+
+
+def _single(form_name, payload):
+    resp = client.post(
+        "/form-fill",
+        json={"form_name": form_name, "user_payload": payload, "analyzer_fields": ANALYZER},
+    )
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def _batch(payload, session_id=None):
+    resp = client.post(
+        "/form-fill/batch",
+        json={
+            "form_names": FORMS,
+            "user_payload": payload,
+            "analyzer_fields": ANALYZER,
+            "session_id": session_id,
+        },
+    )
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_batch_matches_individual_fills():
+    body = _batch(PROFILE)
+    assert body["refilled"] == FORMS and body["reused"] == []
+    for name in FORMS:
+        assert body["forms"][name] == _single(name, PROFILE)
+
+
+def test_session_batch_only_refills_forms_referencing_changed_fields(monkeypatch):
+    FILL_CACHE.clear()
+    monkeypatch.setattr(main, "session_store", CachedSessionStore(AsyncInMemorySessionStore(InMemorySessionStore())))
+    _batch(PROFILE, session_id="pkg")
+
+    unrelated = {**PROFILE, "favorite_color": "teal"}
+    body = _batch(unrelated, session_id="pkg")
+    assert body["refilled"] == ["form_424A"]
+    for name in FORMS:
+        assert body["forms"][name] == _single(name, unrelated)
+
+    renamed = {**unrelated, "applicant_legal_name": "Acme Holdings"}
+    body = _batch(renamed, session_id="pkg")
+    assert "form_sf424" in body["refilled"]
+    assert "form_RD_400_4" in body["reused"]
+    for name in FORMS:
+        assert body["forms"][name] == _single(name, renamed)
+
+
+def test_session_batch_refills_after_template_change(monkeypatch):
+    FILL_CACHE.clear()
+    monkeypatch.setattr(main, "session_store", CachedSessionStore(AsyncInMemorySessionStore(InMemorySessionStore())))
+    _batch(PROFILE, session_id="tpl")
+    assert _batch(PROFILE, session_id="tpl")["reused"]
+
+    # An edited template is recompiled into a new object.
+    FORM_REGISTRY.clear()
+    body = _batch(PROFILE, session_id="tpl")
+    assert body["refilled"] == FORMS and body["reused"] == []
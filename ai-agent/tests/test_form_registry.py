@@ -0,0 +1,42 @@
+import json
+import os
+
+import fill_form
+from fill_form import FORM_REGISTRY
+from form_registry import FormRegistry
+
+
+def test_templates_compile_once_and_fills_are_isolated():
+    first = fill_form.fill_form("grant_use_statement", {"business_name": "Acme"})
+    assert FORM_REGISTRY.get("grant_use_statement") is FORM_REGISTRY.get("grant_use_statement")
+    first["sections"].clear()
+    second = fill_form.fill_form("grant_use_statement", {"business_name": "Beta"})
+    assert "Business Name: Beta" in second["sections"]
+
+
+def test_registry_reloads_changed_template(tmp_path):
+    path = tmp_path / "demo.json"
+    path.write_text(json.dumps({"fields": [{"name": "a", "default": "one"}]}))
+    registry = FormRegistry(tmp_path)
+    compiled = registry.get("demo")
+    assert compiled.fields[0].default == "one"
+    assert registry.get("demo") is compiled
+
+    path.write_text(json.dumps({"fields": [{"name": "a", "default": "two!"}]}))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    reloaded = registry.get("demo")
+    assert reloaded is not compiled
+    assert reloaded.fields[0].default == "two!"
+
+
+def test_mutable_defaults_are_copied_per_request(tmp_path, monkeypatch):
+    (tmp_path / "demo.json").write_text(
+        json.dumps({"form_name": "Demo", "fields": {"items": {"type": "list", "default": ["x"]}}})
+    )
+    monkeypatch.setattr(fill_form, "FORM_REGISTRY", FormRegistry(tmp_path))
+    filled = fill_form.fill_form("demo", {})
+    assert filled["form_name"] == "Demo"
+    assert filled["fields"]["items"] == ["x"]
+    filled["fields"]["items"].append("y")
+    assert fill_form.fill_form("demo", {})["fields"]["items"] == ["x"]
@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+import main
+from llm_gateway import LLMGateway, window_history
+from session_memory import InMemorySessionStore
+from session_store import AsyncInMemorySessionStore, CachedSessionStore
+
+
+def fake_llm_server(fail_first=0):
+    """OpenAI-compatible fake that echoes the last user message."""
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.active = 0
+    app.state.peak = 0
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        if app.state.calls <= fail_first:
+            return JSONResponse({"error": "slow down"}, status_code=429)
+        app.state.active += 1
+        app.state.peak = max(app.state.peak, app.state.active)
+        await asyncio.sleep(0.02)
+        app.state.active -= 1
+        reply = "echo: " + body["messages"][-1]["content"]
+        if body.get("stream"):
+            async def chunks():
+                for word in reply.split(" "):
+                    delta = {"choices": [{"delta": {"content": word + " "}}]}
+                    yield f"data: {json.dumps(delta)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+        return {"choices": [{"message": {"role": "assistant", "content": reply}}]}
+
+    return app
+
+
+def make_gateway(server, **kwargs):
+    return LLMGateway(
+        base_url="http://fake-llm/v1",
+        transport=httpx.ASGITransport(app=server),
+        backoff_seconds=0,
+        **kwargs,
+    )
+
+
+def user(text):
+    return [{"role": "user", "content": text}]
+
+
+def test_coalesces_identical_prompts_and_caches_results():
+    server = fake_llm_server()
+    gateway = make_gateway(server)
+
+    async def scenario():
+        replies = await asyncio.gather(*(gateway.complete(user("hi")) for _ in range(5)))
+        assert replies == ["echo: hi"] * 5
+        assert await gateway.complete(user("  hi ")) == "echo: hi"
+
+    asyncio.run(scenario())
+    assert server.state.calls == 1
+    assert gateway.stats["coalesced"] == 4
+    assert gateway.stats["cache_hits"] == 1
+
+
+def test_limits_concurrency_and_retries_rate_limits():
+    server = fake_llm_server(fail_first=1)
+    gateway = make_gateway(server, max_concurrency=2)
+
+    async def scenario():
+        return await asyncio.gather(*(gateway.complete(user(f"q{i}")) for i in range(6)))
+
+    assert asyncio.run(scenario()) == [f"echo: q{i}" for i in range(6)]
+    assert server.state.peak <= 2
+    assert server.state.calls == 7
+
+
+def test_stream_yields_deltas():
+    gateway = make_gateway(fake_llm_server())
+
+    async def collect():
+        return [delta async for delta in gateway.stream(user("a b"))]
+
+    assert asyncio.run(collect()) == ["echo: ", "a ", "b "]
+    # The finished stream is cached and replayed as one delta.
+    assert asyncio.run(collect()) == ["echo: a b"]
+
+
+def test_window_history_keeps_newest_within_budget():
+    history = [{"role": "user", "content": "x" * 40} for _ in range(5)]
+    assert len(window_history(history, 30)) == 2
+    assert window_history(history, 5) == []
+
+
+def test_chat_stream_endpoint(monkeypatch):
+    backend = InMemorySessionStore()
+    monkeypatch.setattr(main, "session_store", CachedSessionStore(AsyncInMemorySessionStore(backend)))
+    monkeypatch.setattr(main, "llm_gateway", make_gateway(fake_llm_server()))
+    client = TestClient(main.app)
+    resp = client.post("/chat/stream", json={"text": "hello", "session_id": "s"})
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[len("data: "):]) for line in resp.text.splitlines() if line]
+    assert "".join(e.get("delta", "") for e in events[:-1]).strip() == "echo: Field instruction: hello"
+    assert events[-1]["done"] is True
+    assert backend.records("s")[0]["response"] == events[-1]["response"]
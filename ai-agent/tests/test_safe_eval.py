@@ -0,0 +1,46 @@
+import pytest
+
+from fill_form import compile_expression, safe_eval
+
+
+def test_compiled_expression_is_cached_and_reusable():
+    first = compile_expression("a + b * 2 > 10 and int(c) == 3")
+    assert compile_expression("a + b * 2 > 10 and int(c) == 3") is first
+    assert first({"a": 1, "b": 5, "c": "3"}) is True
+    assert first({"a": 1, "b": 1, "c": "3"}) is False
+    assert first.names == frozenset({"a", "b", "c"})
+
+
+def test_context_is_read_not_copied():
+    data = {"x": 4}
+    assert safe_eval("x * 2", data) == 8
+    assert data == {"x": 4}
+    with pytest.raises(ValueError, match="Unknown variable: y"):
+        safe_eval("y + 1", data)
+
+
+@pytest.mark.parametrize(
+    "expr, message",
+    [
+        ("open('f')", "Function calls are not allowed"),
+        ("a ** 2", "Unsupported expression: BinOp"),
+        ("[1, 2]", "Unsupported expression: List"),
+        ("'" + "x" * 1001 + "'", "String constant too long"),
+        ("10000000000", "Numeric constant too large"),
+        (" + ".join(["1"] * 60), "Expression too complex"),
+        ("1 +", "Invalid expression"),
+    ],
+)
+def test_rejected_expressions_raise_every_time(expr, message):
+    for _ in range(2):
+        with pytest.raises(ValueError, match=message):
+            safe_eval(expr, {"a": 1})
+
+
+def test_referenced_names_are_sanitized():
+    with pytest.raises(ValueError, match="Callable values"):
+        safe_eval("f", {"f": print})
+    with pytest.raises(ValueError, match="Overriding safe functions"):
+        safe_eval("int(a)", {"a": "1", "int": 5})
+    with pytest.raises(ValueError, match="Invalid variable name"):
+        safe_eval("__a", {"__a": 1})
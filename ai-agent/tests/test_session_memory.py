@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+
+import main
+import session_memory
+from session_memory import InMemorySessionStore
+from session_store import AsyncInMemorySessionStore, CachedSessionStore
+
+
+def _eligibility(*missing):
+    return {"payload": {}, "results": [{"debug": {"missing_fields": list(missing)}}]}
+
+
+def test_windowed_reads_and_missing_summary():
+    store = InMemorySessionStore()
+    store.append("s1", _eligibility("ein", "revenue"))
+    for i in range(5):
+        store.append("s1", {"chat": {"text": f"q{i}"}, "response": f"a{i}"})
+    store.append("s1", {"form": "sf424", "data": {}})
+    store.append("s1", _eligibility("ein", "payroll"))
+    store.append("s2", _eligibility("other"))
+
+    recent = store.records("s1", kinds=(session_memory.CHAT,), limit=2)
+    assert [r["chat"]["text"] for r in recent] == ["q3", "q4"]
+    latest = store.records("s1", kinds=(session_memory.ELIGIBILITY,), limit=1)
+    assert latest == [_eligibility("ein", "payroll")]
+    assert store.missing_fields("s1") == ["ein", "payroll", "revenue"]
+    assert len(store.records("s1")) == 8
+    assert store.records("missing", limit=3) == []
+
+
+def test_chat_replays_only_recent_turns(monkeypatch):
+    backend = InMemorySessionStore()
+    monkeypatch.setattr(main, "session_store", CachedSessionStore(AsyncInMemorySessionStore(backend)))
+    monkeypatch.setattr(main.settings, "CHAT_HISTORY_TURNS", 2)
+    seen = []
+
+    class FakeGateway:
+        async def complete(self, messages):
+            seen.append(messages[1:-1])
+            return f"reply {len(seen)}"
+
+    monkeypatch.setattr(main, "llm_gateway", FakeGateway())
+    backend.append("chat-1", _eligibility("ein"))
+    client = TestClient(main.app)
+    for text in ("one", "two", "three"):
+        resp = client.post("/chat", json={"text": text, "session_id": "chat-1"})
+        assert resp.status_code == 200
+    assert resp.json()["follow_up"] == ["Please provide your ein"]
+    assert [m["content"] for m in seen[-1]] == ["one", "reply 1", "two", "reply 2"]
+    assert len(backend.records("chat-1", kinds=(session_memory.CHAT,))) == 3
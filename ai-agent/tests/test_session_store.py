@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from session_memory import CHAT
+from session_store import AsyncInMemorySessionStore, CachedSessionStore
+
+
+class SlowBackend(AsyncInMemorySessionStore):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.reads = 0
+        self.fail = False
+
+    async def append_many(self, session_id, records):
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("db down")
+        self.batches.append(len(records))
+        await super().append_many(session_id, records)
+
+    async def records(self, session_id, **kwargs):
+        self.reads += 1
+        return await super().records(session_id, **kwargs)
+
+
+def test_concurrent_appends_are_coalesced_and_readable():
+    async def scenario():
+        backend = SlowBackend()
+        cache = CachedSessionStore(backend)
+        assert await cache.records("s") == []
+        await asyncio.gather(
+            *(cache.append("s", {"chat": {"text": str(i)}, "response": "ok"}) for i in range(10))
+        )
+        assert sum(backend.batches) == 10 and len(backend.batches) <= 2
+        reads = backend.reads
+        recent = await cache.recent_chat("s", 3)
+        assert [r["chat"]["text"] for r in recent] == ["7", "8", "9"]
+        assert backend.reads == reads
+        assert len(await backend.records("s", kinds=(CHAT,))) == 10
+
+    asyncio.run(scenario())
+
+
+def test_missing_fields_update_on_write_and_failures_propagate():
+    async def scenario():
+        backend = SlowBackend()
+        cache = CachedSessionStore(backend, tail_size=2)
+        assert await cache.missing_fields("s") == []
+        await cache.append("s", {"payload": {}, "results": [{"debug": {"missing_fields": ["ein"]}}]})
+        assert await cache.missing_fields("s") == ["ein"]
+        assert (await cache.latest_result("s"))["payload"] == {}
+
+        backend.fail = True
+        with pytest.raises(RuntimeError):
+            await cache.append("s", {"form": "sf424", "data": {}})
+        backend.fail = False
+        assert [r.get("form") for r in await cache.records("s")] == [None]
+
+    asyncio.run(scenario())
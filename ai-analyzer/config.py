@@ -20,6 +20,33 @@ class Settings(BaseSettings):
     TESSERACT_CMD: str | None = None
     USE_AI_ANALYZER: bool = False
     OPENAI_API_KEY: str | None = None
+    # OpenAI-compatible endpoint and tuning for /analyze-ai.
+    OPENAI_BASE_URL: str | None = None
+    AI_ANALYZER_MODEL: str = "gpt-4o-mini"
+    AI_ANALYZER_CONCURRENCY: int = 4
+    AI_ANALYZER_CACHE_TTL_SECONDS: float = 3600.0
+    # Short texts per batched request; 1 sends every text on its own.
+    AI_ANALYZER_BATCH_SIZE: int = 4
+    AI_ANALYZER_BATCH_WINDOW_MS: float = 15.0
+    REGEX_TIME_BUDGET_MS: int = 2000
+    REGEX_STEP_BUDGET: int = 25_000_000
+    ANALYSIS_CACHE_SIZE: int = 256
+    ANALYSIS_CACHE_DIR: str | None = None
+    OCR_BACKEND_ORDER: str = "pdfium,pdfplumber,pdf2image_tesseract,pil_tesseract,raw_decode"
+    OCR_ADAPTIVE_ORDER: bool = True
+    # OCR jobs run in worker threads; more wait in a queue.
+    OCR_CONCURRENCY: int = 2
+    # Per-upload memory budget (0 disables). Scans over it are rendered at a
+    # lower DPI, then with fewer pages, or rejected with 413.
+    MEMORY_BUDGET_MB: int = 0
+    OCR_DPI: int = 200
+    OCR_MIN_DPI: int = 100
+    # Share of /analyze sessions traced with tracemalloc; /diagnose always is.
+    MEMORY_TRACE_SAMPLE_RATE: float = 0.0
+    OBSERVABILITY_ENABLED: bool = False
+    PROMETHEUS_METRICS_ENABLED: bool = False
+    # Exposes /debug/profile (see common/profiling.py).
+    ENABLE_DEBUG: bool = False
 
     model_config = SettingsConfigDict(env_file=ENV_PATH, extra="ignore")
 
@@ -7,83 +7,111 @@ sys.path.append(
 
 from fastapi import FastAPI, UploadFile, HTTPException, Request, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 import io
 import cgi
 import json
+import random
 import time
 from pydantic import BaseModel, constr
-from ai_analyzer.ocr_utils import extract_text, OCRExtractionError
+from ai_analyzer.ocr_utils import (
+    configure_backends,
+    extract_text,
+    input_signature,
+    load_backends,
+    OCRExtractionError,
+)
+from ai_analyzer.ocr_utils import Image, pytesseract  # lazy: imported on first use
 from importlib import import_module
 
 from ai_analyzer.nlp_parser import extract_fields as extract_generic_fields, normalize_text
 from ai_analyzer.config import settings  # type: ignore
 from ai_analyzer.upload_utils import validate_upload
-from document_library import catalog_index
-from src.detectors import detect
+import document_library
+from document_library import catalog_index, catalog_version
+from src.detectors import DETECTOR_VERSION, detect
+from src.regex_guard import RegexBudget
+from src.result_cache import ResultCache, cache_key, extractor_stamp, normalize_cache_text
 from src.normalization import normalize_doc_type
 from src.session_manager import SessionManager
-try:  # pragma: no cover - optional OpenAI dependency
-    from openai import OpenAI  # type: ignore
-    openai_client = (
-        OpenAI(api_key=settings.OPENAI_API_KEY)
-        if settings.OPENAI_API_KEY
-        else None
+from src import memory_budget, stage_timing
+from src.structured_client import StructuredExtractionClient, StructuredExtractionError
+if settings.TESSERACT_CMD:
+    pytesseract.configure(
+        lambda module: setattr(module.pytesseract, "tesseract_cmd", settings.TESSERACT_CMD)
     )
-except Exception:  # pragma: no cover - legacy or missing libs
-    try:
-        import openai  # type: ignore
-        if settings.OPENAI_API_KEY:
-            openai.api_key = settings.OPENAI_API_KEY
-
-            class _LegacyClient:
-                chat = type(
-                    "Chat",
-                    (),
-                    {
-                        "completions": type(
-                            "Comp",
-                            (),
-                            {
-                                "create": staticmethod(
-                                    openai.ChatCompletion.create
-                                )
-                            },
-                        )
-                    },
-                )
 
-            openai_client = _LegacyClient()  # type: ignore
-        else:
-            openai_client = None
-    except Exception:  # pragma: no cover
-        openai_client = None
-
-try:  # pragma: no cover - external dependency may be missing
-    import pytesseract  # type: ignore
-    from PIL import Image  # type: ignore
-    if settings.TESSERACT_CMD:
-        pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
-except Exception:  # pragma: no cover - gracefully handle missing libs
-    pytesseract = None  # type: ignore
-    Image = None  # type: ignore
+configure_backends(
+    settings.OCR_BACKEND_ORDER.split(","), adaptive=settings.OCR_ADAPTIVE_ORDER
+)
 
 CURRENT_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(CURRENT_DIR.parent))
+from common import catalogs, profiling, serve, slow_requests, tracing, traffic  # noqa: E402
 from common.logger import get_logger  # noqa: E402
-from common.request_id import request_id_middleware  # noqa: E402
+from common.request_id import RequestContextMiddleware  # noqa: E402
+from common.warmup import Warmup  # noqa: E402
+from src import extractors  # noqa: E402
 
 logger = get_logger(__name__)
+tracing.configure("ai-analyzer")
+
+warmup = Warmup("ai-analyzer")
+WARMUP_SAMPLE = (
+    "Invoice #1001\nBill To: Example Farms LLC\nEIN: 12-3456789\n"
+    "Date: 01/15/2024  Amount Due: $1,250.00\nAccount Number: 000123\n"
+)
+
+
+@warmup.step("catalogs")
+def preload_catalogs() -> None:
+    """Parse the document catalog and aliases; run by common.serve before forking."""
+    catalogs.reload()
+    document_library.preload()
+
+
+@warmup.step("ocr_backends")
+def _warm_ocr_backends() -> None:
+    load_backends()
+
+
+@warmup.step("detect")
+def _warm_detect() -> None:
+    with _regex_budget():
+        detect(WARMUP_SAMPLE, filename="warmup.pdf")
+        extract_generic_fields(normalize_text(WARMUP_SAMPLE))
+
+
+@warmup.step("extractors")
+def _warm_extractors() -> None:
+    # Import every extractor and run it once so its patterns are compiled.
+    for name, module in extractors.import_all().items():
+        extract = getattr(module, "extract", None)
+        if not callable(extract):
+            continue
+        try:
+            with _regex_budget():
+                extract(WARMUP_SAMPLE)
+        except Exception:
+            logger.debug("warmup_extractor_failed", extra={"extractor": name}, exc_info=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    warmup.start()
+    yield
+    await structured_client.aclose()
+
 
-app = FastAPI(title="AI Analyzer")
-try:
-    app.middleware("http")(request_id_middleware)
-except AttributeError:
-    pass
+app = FastAPI(title="AI Analyzer", lifespan=lifespan)
+app.add_middleware(RequestContextMiddleware)
+traffic.install(app, "ai-analyzer")
+profiling.install(app, "ai-analyzer", enabled=settings.ENABLE_DEBUG)
+slow_requests.install(app, "ai-analyzer", expose=settings.ENABLE_DEBUG)
 
 app.add_middleware(
     CORSMiddleware,
@@ -113,7 +141,15 @@ def healthz() -> dict[str, str]:
 
 @app.get("/readyz")
 def readyz() -> JSONResponse:
-    return JSONResponse(status_code=200, content={"status": "ready"})
+    code, body = warmup.readiness()
+    return JSONResponse(status_code=code, content=body)
+
+
+if settings.OBSERVABILITY_ENABLED and settings.PROMETHEUS_METRICS_ENABLED:
+
+    @app.get("/metrics")
+    def metrics() -> Response:
+        return Response(stage_timing.render_latest(), media_type=stage_timing.CONTENT_TYPE_LATEST)
 
 
 @app.get("/")
@@ -155,7 +191,7 @@ async def ocr_image(request: Request) -> dict[str, str]:
     upload = UploadFile(io.BytesIO(file_bytes), filename=filename)
     validate_upload(upload)
     try:
-        text = extract_text(file_bytes)
+        text = await ocr_limiter.run(extract_text, file_bytes)
     except OCRExtractionError as exc:
         logger.exception("ocr_image failed")
         raise HTTPException(
@@ -202,7 +238,9 @@ async def analyze(
 
     if file is not None:
         validate_upload(file)
+        read_started = time.perf_counter()
         upload_bytes = await file.read()
+        upload_read_seconds = time.perf_counter() - read_started
         session_id = SessionManager.create_session()
         analysis_result, _ = await run_analysis_session(
             session_id=session_id,
@@ -212,6 +250,7 @@ async def analyze(
             filename=file.filename,
             content_type=file.content_type,
             raise_on_fail=True,
+            upload_read_seconds=upload_read_seconds,
         )
         return analysis_result or {}
 
@@ -277,6 +316,7 @@ async def diagnose(
     filename: str | None = None
     content_type: str | None = None
     text_input: str | None = None
+    upload_read_seconds: float | None = None
 
     if text is not None:
         form_text = text.strip()
@@ -291,7 +331,9 @@ async def diagnose(
     if file is not None:
         try:
             validate_upload(file)
+            read_started = time.perf_counter()
             upload_bytes = await file.read()
+            upload_read_seconds = time.perf_counter() - read_started
             if not upload_bytes:
                 errors.append("Uploaded file was empty.")
             else:
@@ -340,6 +382,8 @@ async def diagnose(
         content_type=content_type,
         raise_on_fail=False,
         initial_errors=errors,
+        upload_read_seconds=upload_read_seconds,
+        trace_memory=True,
     )
 
     return report
@@ -482,6 +526,85 @@ def _filter_schema_fields(
     return filtered, skipped
 
 
+def _regex_budget() -> RegexBudget:
+    """Return a fresh per-document regex budget from settings."""
+    return RegexBudget(
+        time_budget=settings.REGEX_TIME_BUDGET_MS / 1000,
+        step_budget=settings.REGEX_STEP_BUDGET,
+    )
+
+
+result_cache = ResultCache(
+    max_entries=settings.ANALYSIS_CACHE_SIZE,
+    directory=settings.ANALYSIS_CACHE_DIR,
+)
+structured_client = StructuredExtractionClient(
+    api_key=settings.OPENAI_API_KEY,
+    base_url=settings.OPENAI_BASE_URL or "https://api.openai.com/v1",
+    model=settings.AI_ANALYZER_MODEL,
+    max_concurrency=settings.AI_ANALYZER_CONCURRENCY,
+    cache_ttl_seconds=settings.AI_ANALYZER_CACHE_TTL_SECONDS,
+    batch_max_items=settings.AI_ANALYZER_BATCH_SIZE,
+    batch_window_ms=settings.AI_ANALYZER_BATCH_WINDOW_MS,
+)
+
+ocr_limiter = stage_timing.OCRLimiter(settings.OCR_CONCURRENCY)
+
+# Per-request fields that must not be replayed from the result cache.
+VOLATILE_RESPONSE_FIELDS = ("source",)
+VOLATILE_DEBUG_FIELDS = ("timestamp", "regex_budget")
+
+# Bump when the analyze post-processing (field merging, secondary fields,
+# response shaping) changes so cached analyses keyed on it are invalidated.
+ANALYSIS_FLOW_VERSION = "1"
+
+
+def _analysis_cache_key(text: str, filename: str | None) -> str:
+    return cache_key(
+        text,
+        filename=filename,
+        parts=(
+            catalog_version(),
+            DETECTOR_VERSION,
+            f"flow={ANALYSIS_FLOW_VERSION}",
+            f"secondary={settings.ENABLE_SECONDARY_FIELDS}",
+        ),
+    )
+
+
+def _write_analyzer_debug(debug_payload: dict[str, Any], session_id: str | None) -> None:
+    try:
+        base = Path("/tmp/sessions")
+        base.mkdir(parents=True, exist_ok=True)
+        folder = base / (session_id or datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%f"))
+        folder.mkdir(parents=True, exist_ok=True)
+        with (folder / "analyzer_debug.json").open("w", encoding="utf-8") as fh:
+            json.dump(debug_payload, fh, ensure_ascii=False, indent=2)
+    except Exception:  # pragma: no cover - diagnostics should not break flow
+        logger.exception("failed to write analyzer debug trace")
+
+
+def _log_analysis(
+    response: dict[str, Any],
+    *,
+    source: str,
+    filename: str | None,
+    content_type: str | None,
+    cache: str,
+) -> None:
+    extra = {
+        "source": source,
+        "doc_type": response["doc_type"],
+        "confidence": response.get("doc_confidence"),
+        "cache": cache,
+    }
+    if filename:
+        extra["upload_filename"] = filename
+    if content_type:
+        extra["content_type"] = content_type
+    logger.info("analyze", extra=extra)
+
+
 def _import_extractor(doc_type: str):
     try:
         return import_module(f"src.extractors.{doc_type}")
@@ -497,8 +620,56 @@ async def analyze_text_flow(
     content_type: str | None = None,
     session_id: str | None = None,
 ) -> dict:
+    with stage_timing.session() as timings:
+        response = _analyze_text(
+            text,
+            timings,
+            source=source,
+            filename=filename,
+            content_type=content_type,
+            session_id=session_id,
+        )
+        timings.doc_type = response.get("doc_type") or stage_timing.UNKNOWN
+        return response
+
+
+def _analyze_text(
+    text: str,
+    timings: stage_timing.StageTimings,
+    *,
+    source: str,
+    filename: str | None,
+    content_type: str | None,
+    session_id: str | None,
+) -> dict:
+    text = normalize_cache_text(text)
+    cache_id: str | None = None
+    if result_cache.enabled:
+        cache_id = _analysis_cache_key(text, filename)
+        cached = result_cache.get(cache_id)
+        if cached is not None:
+            response = cached["response"]
+            response["source"] = source
+            debug_payload = {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                **cached["debug"],
+                "cache": "hit",
+            }
+            with timings.stage("artifacts"):
+                _write_analyzer_debug(debug_payload, session_id)
+            _log_analysis(
+                response,
+                source=source,
+                filename=filename,
+                content_type=content_type,
+                cache="hit",
+            )
+            return response
+
     normalized = normalize_text(text)
-    detection = detect(text, filename=filename)
+    budget = _regex_budget()
+    with budget, timings.stage("detect"):
+        detection = detect(text, filename=filename)
     type_info = detection.get("type", {})
     normalized_type = normalize_doc_type(type_info.get("key"))
     confidence = float(type_info.get("confidence", 0.0) or 0.0)
@@ -514,6 +685,7 @@ async def analyze_text_flow(
     }
 
     extractor_name: str | None = None
+    producer = sys.modules[detect.__module__]
     skipped_fields: list[str] = []
     schema_fields: list[str] = []
 
@@ -536,7 +708,9 @@ async def analyze_text_flow(
                     extractor_module.__name__,
                 )
                 extractor_name = f"{extractor_module.__name__}.extract"
-                extracted_payload = extractor_module.extract(text)
+                producer = extractor_module
+                with budget, timings.extractor(extractor_module.__name__):
+                    extracted_payload = extractor_module.extract(text)
                 raw_fields: dict[str, Any] | None = None
                 field_confidence_map: dict[str, float] = {}
                 extractor_confidence: float | None = None
@@ -587,9 +761,10 @@ async def analyze_text_flow(
                     "[DEBUG] Extractor returned fields: %s",
                     extracted_keys,
                 )
-                filtered, skipped_fields = _filter_schema_fields(
-                    raw_fields or {}, schema_fields
-                )
+                with timings.stage("schema_filter"):
+                    filtered, skipped_fields = _filter_schema_fields(
+                        raw_fields or {}, schema_fields
+                    )
                 response["fields"] = filtered
                 response["field_confidence"] = {
                     key: field_confidence_map[key]
@@ -610,19 +785,24 @@ async def analyze_text_flow(
             skipped_fields.append("__missing_schema__")
         response["schema_fields"] = schema_fields
     else:
-        (
-            generic_fields,
-            generic_confidence_map,
-            ambiguities,
-        ) = extract_generic_fields(
-            normalized, enable_secondary=settings.ENABLE_SECONDARY_FIELDS
-        )
+        with budget, timings.extractor(extract_generic_fields.__module__):
+            (
+                generic_fields,
+                generic_confidence_map,
+                ambiguities,
+            ) = extract_generic_fields(
+                normalized, enable_secondary=settings.ENABLE_SECONDARY_FIELDS
+            )
+        producer = sys.modules[extract_generic_fields.__module__]
         response["doc_type"] = "untyped"
         response["schema_fields"] = sorted(generic_fields.keys())
         response["fields"] = generic_fields
         response["ambiguities"] = ambiguities
         response["field_confidence"] = generic_confidence_map
 
+    if budget.warnings:
+        response.setdefault("warnings", []).extend(budget.warnings)
+
     debug_payload = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "detected_type": type_info.get("key"),
@@ -632,24 +812,44 @@ async def analyze_text_flow(
         "skipped_fields": skipped_fields,
         "extractor": extractor_name,
         "used_fallback": response["doc_type"] == "untyped",
+        "regex_budget": {
+            "elapsed_seconds": round(budget.elapsed, 4),
+            "steps": budget.steps,
+            "exhausted": budget.exhausted,
+        },
     }
 
-    try:
-        base = Path("/tmp/sessions")
-        base.mkdir(parents=True, exist_ok=True)
-        folder = base / (session_id or datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%f"))
-        folder.mkdir(parents=True, exist_ok=True)
-        with (folder / "analyzer_debug.json").open("w", encoding="utf-8") as fh:
-            json.dump(debug_payload, fh, ensure_ascii=False, indent=2)
-    except Exception:  # pragma: no cover - diagnostics should not break flow
-        logger.exception("failed to write analyzer debug trace")
+    # Budget-truncated results depend on machine load, so never cache them.
+    cache_status = "miss" if cache_id else "disabled"
+    if cache_id and not budget.warnings:
+        result_cache.put(
+            cache_id,
+            {
+                "extractor": producer.__name__,
+                "stamp": extractor_stamp(producer),
+                "response": {
+                    key: value
+                    for key, value in response.items()
+                    if key not in VOLATILE_RESPONSE_FIELDS
+                },
+                "debug": {
+                    key: value
+                    for key, value in debug_payload.items()
+                    if key not in VOLATILE_DEBUG_FIELDS
+                },
+            },
+        )
+    debug_payload["cache"] = cache_status
 
-    extra = {"source": source, "doc_type": response["doc_type"], "confidence": confidence}
-    if filename:
-        extra["upload_filename"] = filename
-    if content_type:
-        extra["content_type"] = content_type
-    logger.info("analyze", extra=extra)
+    with timings.stage("artifacts"):
+        _write_analyzer_debug(debug_payload, session_id)
+    _log_analysis(
+        response,
+        source=source,
+        filename=filename,
+        content_type=content_type,
+        cache=cache_status,
+    )
     return response
 
 
@@ -690,6 +890,8 @@ def _build_diagnostic_report(
     catalog_entries: int | None,
     matched_rule: str | None,
     errors: list[str],
+    timings: dict[str, Any] | None = None,
+    budget: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
     duration = (end_time - start_time).total_seconds()
     doc_type = None
@@ -739,6 +941,12 @@ def _build_diagnostic_report(
         "errors": list(errors),
         "debug_path": str(SessionManager.get_session_path(session_id)),
     }
+    if timings is not None:
+        # ``duration_seconds`` spans the whole session; this breaks it down by
+        # stage. The report's own write is not included.
+        report["timings"] = timings
+    if budget is not None:
+        report["memory_budget"] = budget
     if analysis_result:
         report["analyzer"].update(
             {
@@ -759,6 +967,39 @@ async def run_analysis_session(
     content_type: str | None,
     raise_on_fail: bool,
     initial_errors: list[str] | None = None,
+    upload_read_seconds: float | None = None,
+    trace_memory: bool | None = None,
+) -> tuple[dict[str, Any] | None, dict[str, Any]]:
+    """Run one analysis; ``trace_memory=None`` samples memory tracing."""
+    if trace_memory is None:
+        trace_memory = random.random() < settings.MEMORY_TRACE_SAMPLE_RATE
+    with stage_timing.session(trace_memory=trace_memory) as timings:
+        if upload_read_seconds is not None:
+            timings.add("upload_read", upload_read_seconds)
+        return await _run_analysis_session(
+            timings,
+            session_id=session_id,
+            source=source,
+            text_input=text_input,
+            upload_bytes=upload_bytes,
+            filename=filename,
+            content_type=content_type,
+            raise_on_fail=raise_on_fail,
+            initial_errors=initial_errors,
+        )
+
+
+async def _run_analysis_session(
+    timings: stage_timing.StageTimings,
+    *,
+    session_id: str,
+    source: str,
+    text_input: str | None,
+    upload_bytes: bytes | None,
+    filename: str | None,
+    content_type: str | None,
+    raise_on_fail: bool,
+    initial_errors: list[str] | None,
 ) -> tuple[dict[str, Any] | None, dict[str, Any]]:
     start_time = datetime.now(timezone.utc)
     errors: list[str] = list(initial_errors or [])
@@ -775,6 +1016,7 @@ async def run_analysis_session(
     }
     pending_http_exc: HTTPException | None = None
     pending_exc: Exception | None = None
+    budget: memory_budget.BudgetDecision | None = None
 
     try:
         if upload_bytes is not None:
@@ -785,23 +1027,35 @@ async def run_analysis_session(
                 if raise_on_fail:
                     raise HTTPException(status_code=400, detail="Provide file or text")
             try:
-                SessionManager.save_bytes(
-                    session_id, "raw", file_info["name"] or "upload.bin", upload_bytes
-                )
+                with timings.stage("raw_save"):
+                    SessionManager.save_bytes(
+                        session_id, "raw", file_info["name"] or "upload.bin", upload_bytes
+                    )
             except Exception as exc:  # pragma: no cover - filesystem edge
                 logger.exception("Failed to save raw upload", extra={"session_id": session_id})
                 errors.append(f"Failed to save raw upload: {exc}")
         elif text_input is not None:
             file_info["size"] = len(text_input.encode("utf-8"))
             try:
-                SessionManager.save_text(session_id, "raw", "input_text.txt", text_input)
+                with timings.stage("raw_save"):
+                    SessionManager.save_text(session_id, "raw", "input_text.txt", text_input)
             except Exception as exc:  # pragma: no cover - filesystem edge
                 logger.exception("Failed to save raw text", extra={"session_id": session_id})
                 errors.append(f"Failed to save raw text: {exc}")
 
         if upload_bytes is not None and len(upload_bytes) > 0:
+            slow_requests.note(
+                source=source,
+                upload_bytes=len(upload_bytes),
+                content_type=content_type,
+                input_signature=lambda: input_signature(upload_bytes),
+                page_count=lambda: _page_count(upload_bytes),
+            )
             try:
-                ocr_text = extract_text(upload_bytes)
+                budget = _memory_budget(upload_bytes)
+                plan = budget.plan if budget else memory_budget.OCRPlan(dpi=settings.OCR_DPI)
+                with timings.stage("ocr"), memory_budget.use_plan(plan):
+                    ocr_text = await ocr_limiter.run(extract_text, upload_bytes)
                 ocr_status = "success"
                 if not ocr_text.strip():
                     errors.append("OCR returned no text from upload.")
@@ -834,6 +1088,13 @@ async def run_analysis_session(
                                 status_code=500, detail="Failed to extract text"
                             )
                         ocr_text = ""
+            except memory_budget.MemoryBudgetExceeded as exc:
+                ocr_status = "rejected"
+                budget = exc.decision
+                stage_timing.record_budget_decision("rejected")
+                errors.append(str(exc))
+                if raise_on_fail:
+                    raise HTTPException(status_code=413, detail=str(exc)) from exc
             except OCRExtractionError as exc:
                 ocr_status = "error"
                 logger.exception("extract_text failed", extra={"session_id": session_id})
@@ -847,6 +1108,7 @@ async def run_analysis_session(
                 if raise_on_fail:
                     raise HTTPException(status_code=500, detail="Failed to extract text") from exc
         elif text_input is not None:
+            slow_requests.note(source=source, text_length=len(text_input))
             ocr_text = text_input
             ocr_status = "provided"
         else:
@@ -857,18 +1119,21 @@ async def run_analysis_session(
 
         if ocr_text:
             try:
-                SessionManager.save_text(session_id, "ocr", "ocr_output.txt", ocr_text)
+                with timings.stage("artifacts"):
+                    SessionManager.save_text(session_id, "ocr", "ocr_output.txt", ocr_text)
             except Exception as exc:  # pragma: no cover - filesystem edge
                 logger.exception("Failed to save OCR text", extra={"session_id": session_id})
                 errors.append(f"Failed to save OCR text: {exc}")
 
         if ocr_text:
             try:
-                detect_result = detect(ocr_text, filename=filename)
+                with _regex_budget(), timings.stage("detect"):
+                    detect_result = detect(ocr_text, filename=filename)
                 matched_rule = detect_result.get("type", {}).get("key")
-                SessionManager.save_json(
-                    session_id, "detect", "detect_result.json", detect_result
-                )
+                with timings.stage("artifacts"):
+                    SessionManager.save_json(
+                        session_id, "detect", "detect_result.json", detect_result
+                    )
             except Exception as exc:  # pragma: no cover - detector errors
                 logger.exception("Detector failed", extra={"session_id": session_id})
                 errors.append(f"Detector failed: {exc}")
@@ -884,9 +1149,14 @@ async def run_analysis_session(
                     content_type=content_type,
                     session_id=session_id,
                 )
-                SessionManager.save_json(
-                    session_id, "analyze", "fields.json", analysis_result
-                )
+                if budget is not None and budget.plan.used:
+                    warning = memory_budget.describe(budget.plan, budget.pages)
+                    warnings = [*analysis_result.get("warnings", []), warning]
+                    analysis_result = {**analysis_result, "warnings": warnings}
+                with timings.stage("artifacts"):
+                    SessionManager.save_json(
+                        session_id, "analyze", "fields.json", analysis_result
+                    )
             except Exception as exc:  # pragma: no cover - analyzer errors
                 logger.exception("Analyzer failed", extra={"session_id": session_id})
                 errors.append(f"Analyzer failed: {exc}")
@@ -894,14 +1164,12 @@ async def run_analysis_session(
                     raise
 
         try:
-            catalog_path = (
-                Path(__file__).resolve().parents[1] / "document_library" / "catalog.json"
-            )
-            catalog_snapshot = json.loads(catalog_path.read_text(encoding="utf-8"))
-            catalog_entries = len(catalog_snapshot.get("documents", []))
-            SessionManager.save_json(
-                session_id, "catalog", "catalog_snapshot.json", catalog_snapshot
-            )
+            with timings.stage("artifacts"):
+                catalog_snapshot = catalogs.load("documents")
+                catalog_entries = len(catalog_snapshot.get("documents", []))
+                SessionManager.save_json(
+                    session_id, "catalog", "catalog_snapshot.json", catalog_snapshot
+                )
         except Exception as exc:  # pragma: no cover - filesystem edge
             logger.exception("Failed to snapshot catalog", extra={"session_id": session_id})
             errors.append(f"Failed to snapshot catalog: {exc}")
@@ -932,11 +1200,14 @@ async def run_analysis_session(
             catalog_entries=catalog_entries,
             matched_rule=matched_rule,
             errors=errors,
+            timings=timings.as_dict(),
+            budget=_budget_report(budget),
         )
         try:
-            SessionManager.save_json(
-                session_id, "report", "diagnostic_report.json", report
-            )
+            with timings.stage("artifacts"):
+                SessionManager.save_json(
+                    session_id, "report", "diagnostic_report.json", report
+                )
         except Exception as exc:  # pragma: no cover - filesystem edge
             logger.exception("Failed to save diagnostic report", extra={"session_id": session_id})
             errors.append(f"Failed to save diagnostic report: {exc}")
@@ -950,48 +1221,45 @@ async def run_analysis_session(
     return analysis_result, report
 
 
+def _page_count(upload_bytes: bytes) -> int:
+    if input_signature(upload_bytes) in memory_budget.PDF_SIGNATURES:
+        return memory_budget.count_pages(upload_bytes)
+    return 1
+
+
+def _memory_budget(upload_bytes: bytes) -> memory_budget.BudgetDecision | None:
+    """Plan OCR for ``upload_bytes`` within ``MEMORY_BUDGET_MB``, if set."""
+    if settings.MEMORY_BUDGET_MB <= 0:
+        return None
+    decision = memory_budget.plan_for(
+        upload_bytes,
+        input_signature(upload_bytes),
+        settings.MEMORY_BUDGET_MB * memory_budget.MB,
+        dpi=settings.OCR_DPI,
+        min_dpi=settings.OCR_MIN_DPI,
+    )
+    if decision.plan.degraded:
+        stage_timing.record_budget_decision("degraded")
+        logger.warning("ocr_degraded_for_memory_budget", extra=decision.as_dict())
+    return decision
+
+
+def _budget_report(budget: memory_budget.BudgetDecision | None) -> dict[str, Any] | None:
+    if budget is None:
+        return None
+    return {**budget.as_dict(), "applied": budget.plan.used}
+
+
 async def call_openai_structured(text: str) -> dict[str, Any]:
-    if not openai_client:
+    if not structured_client.configured:
         raise HTTPException(status_code=500, detail="OpenAI not configured")
-    system_prompt = (
-        "Extract structured business fields from the user's text. "
-        "Always return a JSON object with the keys: ein, w2_employee_count, "
-        "quarterly_revenues, entity_type, year_founded, annual_revenue, "
-        "location_state, location_country, minority_owned, female_owned, "
-        "veteran_owned, ppp_reference, ertc_reference. Use null for unknown."
-    )
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": text},
-    ]
-    last_exc: Exception | None = None
-    for _ in range(3):
-        try:
-            resp = await run_in_threadpool(
-                lambda: openai_client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=messages,
-                    response_format={"type": "json_object"},
-                    timeout=15,
-                )
-            )
-            return json.loads(resp.choices[0].message.content)
-        except TypeError:  # older openai versions
-            resp = await run_in_threadpool(
-                lambda: openai_client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=messages,
-                    timeout=15,
-                )
-            )
-            return json.loads(resp.choices[0].message.content)
-        except Exception as exc:  # pragma: no cover
-            last_exc = exc
-            time.sleep(1)
-    logger.exception("openai call failed")
-    raise HTTPException(
-        status_code=500, detail="Failed to extract using AI"
-    ) from last_exc
+    try:
+        return await structured_client.extract(text)
+    except StructuredExtractionError as exc:
+        logger.exception("openai call failed")
+        raise HTTPException(
+            status_code=500, detail="Failed to extract using AI"
+        ) from exc
 
 
 async def analyze_ai_text_flow(
@@ -1018,17 +1286,16 @@ async def analyze_ai_text_flow(
     logger.info("analyze_ai", extra=extra)
     return structured
 
+
+warmup.imported()
+
 if __name__ == "__main__":
-    import uvicorn
-    import ssl
-
-    cert = str(settings.TLS_CERT_PATH)
-    key = str(settings.TLS_KEY_PATH)
-    ca = str(settings.TLS_CA_PATH) if settings.TLS_CA_PATH else None
-    kwargs: dict[str, object] = {}
-    if cert and key:
-        kwargs = {"ssl_certfile": cert, "ssl_keyfile": key}
-        if ca:
-            kwargs["ssl_ca_certs"] = ca
-            kwargs["ssl_cert_reqs"] = ssl.CERT_REQUIRED
-    uvicorn.run(app, host="0.0.0.0", port=8000, **kwargs)
+    serve.run(
+        "main:app",
+        app=app,
+        port=8000,
+        preload=warmup.run,
+        ssl=serve.ssl_options(
+            os.getenv("TLS_CERT_PATH"), os.getenv("TLS_KEY_PATH"), os.getenv("TLS_CA_PATH")
+        ),
+    )
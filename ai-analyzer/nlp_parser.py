@@ -3,6 +3,10 @@ import re
 from datetime import datetime
 from typing import Any, Dict, Tuple, List, Optional
 
+from src import regex_guard
+
+EXTRACTOR_VERSION = "1"
+
 
 def normalize_text(text: str) -> str:
     """Return text with collapsed whitespace and printable characters only."""
@@ -225,7 +229,7 @@ def extract_ein(text: str) -> Tuple[Optional[str], float, List[str], List[Dict[s
 
 
 def extract_w2_count(text: str) -> Tuple[Optional[int], float]:
-    match = _W2_RE.search(text)
+    match = regex_guard.search(_W2_RE, text, label="w2_employee_count")
     if not match:
         return None, 0.0
     count = int(match.group(1))
@@ -236,7 +240,7 @@ def extract_quarterly_revenues(text: str) -> Tuple[Dict[str, Dict[str, int]], Di
     revenues: Dict[str, Dict[str, int]] = {}
     conf: Dict[str, float] = {}
     for pattern in _QUARTER_PATTERNS:
-        for m in pattern.finditer(text):
+        for m in regex_guard.finditer(pattern, text, label="quarterly_revenues"):
             g1, g2, amt = m.groups()
             if pattern is _QUARTER_PATTERNS[0]:
                 quarter_raw, year_raw = g1, g2
@@ -258,7 +262,9 @@ def extract_entity_type(text: str) -> Tuple[Optional[str], float]:
 
 
 def extract_year_founded(text: str) -> Tuple[Optional[int], float]:
-    m = re.search(r"(?i)(?:founded|incorporated|since)\D{0,10}(\d{4})", text)
+    m = regex_guard.search(
+        r"(?i)(?:founded|incorporated|since)\D{0,10}(\d{4})", text, label="year_founded"
+    )
     if not m:
         return None, 0.0
     year = int(m.group(1))
@@ -269,7 +275,11 @@ def extract_year_founded(text: str) -> Tuple[Optional[int], float]:
 
 
 def extract_annual_revenue(text: str) -> Tuple[Optional[int], float]:
-    m = re.search(r"(?i)(?:annual revenue|total revenue)\D{0,20}([\$0-9,\.]+[kKmM]?)", text)
+    m = regex_guard.search(
+        r"(?i)(?:annual revenue|total revenue)\D{0,20}([\$0-9,\.]+[kKmM]?)",
+        text,
+        label="annual_revenue",
+    )
     if not m:
         return None, 0.0
     return parse_money(m.group(1)), 0.8
@@ -405,7 +415,7 @@ def extract_credit_refs(text: str) -> Tuple[Optional[bool], float, Optional[bool
 
 
 def extract_ppp_wages_double_dip(text: str) -> Tuple[Optional[bool], float]:
-    if re.search(r"ppp.{0,40}wages|double dip", text, re.I):
+    if regex_guard.search(r"ppp.{0,40}wages|double dip", text, re.I, label="ppp_wages_double_dip"):
         return True, 0.9
     return None, 0.0
 
@@ -419,10 +429,12 @@ def extract_received_ppp(text: str) -> Tuple[Optional[bool], float]:
 def extract_ownership_percentage(text: str) -> Tuple[Optional[int], float]:
     patterns = [
         r"(?:ownership|stake)\D{0,20}([\w-]+)\s*(?:%|percent)",
-        r"([\w-]+)\s*(?:%|percent)\D{0,20}(?:ownership|stake)",
+        # Anchor the leading token at a word start and bound its length so a
+        # long run of word characters cannot backtrack quadratically.
+        r"(?<![\w-])([\w-]{1,24})\s*(?:%|percent)\D{0,20}(?:ownership|stake)",
     ]
     for pattern in patterns:
-        m = re.search(pattern, text, re.I)
+        m = regex_guard.search(pattern, text, re.I, label="ownership_percentage")
         if m:
             pct = parse_percent(m.group(1))
             pct = max(0, min(int(pct), 100))
@@ -445,10 +457,10 @@ def extract_opportunity_zone(text: str) -> Tuple[Optional[bool], float]:
 def extract_revenue_drop_percent(text: str) -> Tuple[Optional[float], float]:
     patterns = [
         r"(?:revenue|gross receipts).{0,40}?(?:drop|decline|decrease).{0,10}?([\w-]+\s*(?:%|percent))",
-        r"([\w-]+\s*(?:%|percent)).{0,20}?(?:drop|decline|decrease).{0,40}?(?:revenue|gross receipts)",
+        r"(?<![\w-])([\w-]{1,24}\s*(?:%|percent)).{0,20}?(?:drop|decline|decrease).{0,40}?(?:revenue|gross receipts)",
     ]
     for pattern in patterns:
-        m = re.search(pattern, text, re.I)
+        m = regex_guard.search(pattern, text, re.I, label="revenue_drop_percent")
         if m:
             pct = parse_percent(m.group(1))
             pct = max(0.0, min(pct, 100.0))
@@ -1,77 +1,351 @@
-"""OCR utilities for document parsing."""
+"""OCR utilities for document parsing.
+
+Text extraction runs through a registry of backends (PDF text layer via
+pypdfium2 or pdfplumber, rasterised PDF OCR, image OCR and a raw byte decode
+of last resort).  Each upload is classified into an input signature and only
+the backends that handle that signature are tried, in an order that starts
+from :data:`DEFAULT_ORDER` and adapts to the latency and success rate observed
+for that signature.
+
+Rasterizing backends honour the DPI and page limit of the current
+:func:`src.memory_budget.ocr_plan`.
+"""
 
 from __future__ import annotations
 
 import io
-from typing import Optional
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from common.lazy_import import OptionalImport
+from src.memory_budget import ocr_plan
+from src.stage_timing import record_ocr_attempt, record_ocr_page
+
+logger = logging.getLogger(__name__)
 
 
 class OCRExtractionError(Exception):
     """Raised when OCR extraction fails."""
 
-try:  # pragma: no cover - external dependency may be missing
-    import pdfplumber  # type: ignore
-except Exception:  # pragma: no cover - gracefully handle missing libs
-    pdfplumber = None  # type: ignore
+# Heavy optional backends are imported on first use (or by the warmup); each
+# name is falsy when its package is not installed.
+pdfium = OptionalImport("pypdfium2")
+pdfplumber = OptionalImport("pdfplumber")
+pytesseract = OptionalImport("pytesseract")
+Image = OptionalImport("PIL.Image")
+convert_from_bytes = OptionalImport("pdf2image", "convert_from_bytes")
 
-try:  # pragma: no cover - external dependency may be missing
-    import pytesseract  # type: ignore
-    from PIL import Image  # type: ignore
-except Exception:  # pragma: no cover - gracefully handle missing libs
-    pytesseract = None  # type: ignore
-    Image = None  # type: ignore
 
-try:  # pragma: no cover - external dependency may be missing
-    from pdf2image import convert_from_bytes  # type: ignore
-except Exception:  # pragma: no cover - gracefully handle missing libs
-    convert_from_bytes = None  # type: ignore
+# Input signatures used to pick and order backends.
+PDF_TEXT = "pdf_text"
+PDF_IMAGE = "pdf_image"
+RASTER = "raster"
+OTHER = "other"
 
+DEFAULT_ORDER: Tuple[str, ...] = (
+    "pdfium",
+    "pdfplumber",
+    "pdf2image_tesseract",
+    "pil_tesseract",
+    "raw_decode",
+)
+# Samples a backend needs for a signature before its stats affect ordering.
+MIN_SAMPLES = 5
+MIN_SUCCESS_RATE = 0.5
 
-def extract_text(file_bytes: bytes) -> str:
-    """Return extracted text using PDF or image OCR when available."""
-    if pdfplumber and file_bytes.lstrip()[:4] == b"%PDF":
-        try:  # pragma: no cover - depends on external library
-            with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-                text = "\n".join(page.extract_text() or "" for page in pdf.pages)
-            if text.strip():
-                text = text.strip()
-                print(f"OCR extracted {len(text)} characters")
-                return text
-        except Exception:
-            pass
-
-    if pytesseract and convert_from_bytes and file_bytes.lstrip()[:4] == b"%PDF":
-        try:  # pragma: no cover - relies on external binaries
-            pages = convert_from_bytes(file_bytes)
-            text_chunks = []
-            for page in pages:
-                page_text = pytesseract.image_to_string(page)
-                if page_text:
-                    text_chunks.append(page_text)
-            text = "\n".join(text_chunks).strip()
-            if text:
-                print(f"OCR extracted {len(text)} characters")
-                return text
-        except Exception:
-            pass
-
-    if pytesseract and Image:
-        try:  # pragma: no cover - relies on external binaries
-            image = Image.open(io.BytesIO(file_bytes))
-            text = pytesseract.image_to_string(image).strip()
-            if text:
-                print(f"OCR extracted {len(text)} characters")
-                return text
-        except Exception:
-            pass
+_RASTER_MAGIC = (
+    b"\x89PNG",
+    b"\xff\xd8\xff",
+    b"BM",
+    b"GIF8",
+    b"II*\x00",
+    b"MM\x00*",
+)
+
+
+def input_signature(file_bytes: bytes) -> str:
+    """Classify ``file_bytes`` as a text-layer PDF, image-only PDF, raster or other."""
+    head = file_bytes.lstrip()[:8]
+    if head[:4] == b"%PDF":
+        # Text-layer PDFs reference fonts; scans only embed image XObjects.
+        # Compressed object streams can hide both, so default to text first.
+        if b"/Font" not in file_bytes and b"/Image" in file_bytes:
+            return PDF_IMAGE
+        return PDF_TEXT
+    if file_bytes.startswith(_RASTER_MAGIC):
+        return RASTER
+    return OTHER
+
+
+@dataclass
+class BackendStats:
+    """Latency and outcome counters for one backend on one signature."""
+
+    calls: int = 0
+    successes: int = 0
+    total_seconds: float = 0.0
+    success_seconds: float = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.calls if self.calls else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+    @property
+    def mean_success_latency(self) -> float:
+        return self.success_seconds / self.successes if self.successes else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "success_rate": round(self.success_rate, 4),
+            "mean_latency_ms": round(self.mean_latency * 1000, 3),
+            "mean_success_latency_ms": round(self.mean_success_latency * 1000, 3),
+        }
+
+
+@dataclass
+class TextBackend:
+    """A named text extractor and the input signatures it can handle.
+
+    ``extract`` returns the extracted text (empty when it found none) and may
+    raise; ``available`` reports whether its optional dependencies are
+    installed.  ``last_resort`` backends always run after every other one.
+    """
+
+    name: str
+    extract: Callable[[bytes], str]
+    signatures: Tuple[str, ...]
+    available: Callable[[], bool] = lambda: True
+    last_resort: bool = False
+    stats: Dict[str, BackendStats] = field(default_factory=dict)
+
+
+BACKENDS: Dict[str, TextBackend] = {}
+_order: Tuple[str, ...] = DEFAULT_ORDER
+_adaptive = True
+_stats_lock = threading.Lock()
+
+
+def register_backend(
+    name: str,
+    *,
+    signatures: Iterable[str],
+    available: Callable[[], bool] = lambda: True,
+    last_resort: bool = False,
+) -> Callable[[Callable[[bytes], str]], Callable[[bytes], str]]:
+    """Register ``func`` as the text backend ``name``."""
+
+    def decorator(func: Callable[[bytes], str]) -> Callable[[bytes], str]:
+        BACKENDS[name] = TextBackend(
+            name=name,
+            extract=func,
+            signatures=tuple(signatures),
+            available=available,
+            last_resort=last_resort,
+        )
+        return func
+
+    return decorator
+
+
+def configure_backends(order: Optional[Iterable[str]] = None, *, adaptive: bool = True) -> None:
+    """Set the preferred backend order and whether observed stats may reorder it.
 
+    Unknown names are ignored; registered backends missing from ``order`` run
+    after the listed ones.
+    """
+    global _order, _adaptive
+    if order is not None:
+        names = [name.strip() for name in order if name and name.strip()]
+        unknown = [name for name in names if name not in BACKENDS]
+        if unknown:
+            logger.warning("ignoring unknown OCR backends", extra={"backends": unknown})
+        _order = tuple(name for name in names if name in BACKENDS)
+    _adaptive = adaptive
+
+
+def ordered_backends(signature: str) -> List[TextBackend]:
+    """Return available backends for ``signature`` in the order they will run.
+
+    Backends proven reliable on this signature run first, fastest first; then
+    backends without enough samples in configured order; then unreliable ones.
+    """
+    configured = list(_order) + [name for name in BACKENDS if name not in _order]
+    candidates = [
+        BACKENDS[name]
+        for name in configured
+        if name in BACKENDS
+        and signature in BACKENDS[name].signatures
+        and BACKENDS[name].available()
+    ]
+    if not _adaptive:
+        return sorted(candidates, key=lambda backend: backend.last_resort)
+
+    def rank(item: Tuple[int, TextBackend]) -> Tuple[int, float, int]:
+        position, backend = item
+        stats = backend.stats.get(signature)
+        if backend.last_resort:
+            return (3, 0.0, position)
+        if stats is None or stats.calls < MIN_SAMPLES:
+            return (1, 0.0, position)
+        if stats.success_rate >= MIN_SUCCESS_RATE:
+            return (0, stats.mean_success_latency, position)
+        return (2, -stats.success_rate, position)
+
+    return [backend for _, backend in sorted(enumerate(candidates), key=rank)]
+
+
+def load_backends() -> Dict[str, bool]:
+    """Import the configured backends' libraries now; return availability by name."""
+    names = list(_order) + [name for name in BACKENDS if name not in _order]
+    return {name: BACKENDS[name].available() for name in names if name in BACKENDS}
+
+
+def _record(backend: TextBackend, signature: str, elapsed: float, ok: bool) -> None:
+    with _stats_lock:
+        stats = backend.stats.setdefault(signature, BackendStats())
+        stats.calls += 1
+        stats.total_seconds += elapsed
+        if ok:
+            stats.successes += 1
+            stats.success_seconds += elapsed
+
+
+def backend_stats() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Return ``{backend: {signature: stats}}`` for every registered backend."""
+    with _stats_lock:
+        return {
+            name: {sig: stats.as_dict() for sig, stats in backend.stats.items()}
+            for name, backend in BACKENDS.items()
+        }
+
+
+def reset_backend_stats() -> None:
+    with _stats_lock:
+        for backend in BACKENDS.values():
+            backend.stats.clear()
+
+
+@register_backend(
+    "pdfium",
+    signatures=(PDF_TEXT,),
+    available=lambda: bool(pdfium),
+)
+def _pdfium_text(file_bytes: bytes) -> str:  # pragma: no cover - depends on external library
+    pdf = pdfium.PdfDocument(file_bytes)
     try:
-        text = file_bytes.decode("utf-8", errors="ignore").strip()
-        if text:
-            print(f"OCR extracted {len(text)} characters")
-            return text
-    except Exception:
-        pass
+        chunks = []
+        for page in pdf:
+            start = time.perf_counter()
+            textpage = page.get_textpage()
+            try:
+                chunks.append(textpage.get_text_bounded() or "")
+            finally:
+                textpage.close()
+                page.close()
+            record_ocr_page("pdfium", time.perf_counter() - start)
+    finally:
+        pdf.close()
+    return "\n".join(chunks).replace("\r\n", "\n").strip()
 
-    return ""
 
+@register_backend(
+    "pdfplumber",
+    signatures=(PDF_TEXT, PDF_IMAGE),
+    available=lambda: bool(pdfplumber),
+)
+def _pdfplumber_text(file_bytes: bytes) -> str:  # pragma: no cover - depends on external library
+    chunks = []
+    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+        for page in pdf.pages:
+            start = time.perf_counter()
+            chunks.append(page.extract_text() or "")
+            record_ocr_page("pdfplumber", time.perf_counter() - start)
+    return "\n".join(chunks).strip()
+
+
+@register_backend(
+    "pdf2image_tesseract",
+    signatures=(PDF_TEXT, PDF_IMAGE),
+    available=lambda: bool(pytesseract) and bool(convert_from_bytes),
+)
+def _pdf2image_tesseract(file_bytes: bytes) -> str:  # pragma: no cover - relies on external binaries
+    plan = ocr_plan()
+    if plan.max_pages == 0:
+        return ""
+    kwargs = {"dpi": plan.dpi}
+    if plan.max_pages is not None:
+        kwargs["last_page"] = plan.max_pages
+    pages = convert_from_bytes(file_bytes, **kwargs)
+    plan.used = plan.used or plan.degraded
+    text_chunks = []
+    for page in pages:
+        start = time.perf_counter()
+        page_text = pytesseract.image_to_string(page)
+        record_ocr_page("pdf2image_tesseract", time.perf_counter() - start)
+        if page_text:
+            text_chunks.append(page_text)
+    return "\n".join(text_chunks).strip()
+
+
+@register_backend(
+    "pil_tesseract",
+    signatures=(RASTER, OTHER),
+    available=lambda: bool(pytesseract) and bool(Image),
+)
+def _pil_tesseract(file_bytes: bytes) -> str:  # pragma: no cover - relies on external binaries
+    start = time.perf_counter()
+    image = Image.open(io.BytesIO(file_bytes))
+    text = pytesseract.image_to_string(image).strip()
+    record_ocr_page("pil_tesseract", time.perf_counter() - start)
+    return text
+
+
+@register_backend(
+    "raw_decode",
+    signatures=(PDF_TEXT, PDF_IMAGE, RASTER, OTHER),
+    last_resort=True,
+)
+def _raw_decode(file_bytes: bytes) -> str:
+    return file_bytes.decode("utf-8", errors="ignore").strip()
+
+
+def extract_text(file_bytes: bytes) -> str:
+    """Return extracted text using the first backend that yields any."""
+    signature = input_signature(file_bytes)
+    for backend in ordered_backends(signature):
+        start = time.perf_counter()
+        try:
+            text = backend.extract(file_bytes) or ""
+        except Exception:
+            text = ""
+            logger.debug(
+                "text backend failed",
+                extra={"backend": backend.name, "signature": signature},
+                exc_info=True,
+            )
+        elapsed = time.perf_counter() - start
+        ok = bool(text.strip())
+        if not backend.last_resort:
+            _record(backend, signature, elapsed, ok)
+        record_ocr_attempt(backend.name, signature, elapsed, ok)
+        if ok:
+            logger.info(
+                "OCR extracted text",
+                extra={
+                    "backend": backend.name,
+                    "signature": signature,
+                    "chars": len(text),
+                    "duration_ms": round(elapsed * 1000, 3),
+                },
+            )
+            return text
+    return ""
@@ -3,9 +3,16 @@ from typing import Callable, Dict, Optional
 
 from document_library import normalize_key
 from document_library.detectors import build_identify_map
+from src import regex_guard
 
 
+# Bump when scoring changes so cached analyses keyed on it are invalidated.
+DETECTOR_VERSION = "1"
+
 DOC_TYPES = build_identify_map()
+# ``[^\S\n]`` rather than ``\s`` so the leading indent cannot run across
+# blank lines, which made this scan quadratic on whitespace-heavy OCR output.
+BOX_LINE_RE = re.compile(r"(?im)^[^\S\n]*[1-7]\s+")
 
 
 def _score_1099_nec(text: str) -> float:
@@ -23,7 +30,7 @@ def _score_1099_nec(text: str) -> float:
         score += 0.1
     if "irs.gov/form1099nec" in lowered:
         score += 0.1
-    if len(re.findall(r"(?im)^\s*[1-7]\s+", text)) >= 3:
+    if len(BOX_LINE_RE.findall(text)) >= 3:
         score += 0.1
     return min(score, 1.2)
 
@@ -160,7 +167,7 @@ def identify(doc_text: str, *, filename: Optional[str] = None) -> dict:
             score += 0.5
             score += min(0.3, 0.1 * (len(text_hits) - 1))
 
-        if rx and any(re.search(r, text) for r in rx):
+        if rx and any(regex_guard.search(r, text, label=f"{key}.regex_any") for r in rx):
             score += 0.5
 
         if lowered_filename and filename_terms:
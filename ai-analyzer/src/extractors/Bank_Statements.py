@@ -1,29 +1,42 @@
 from __future__ import annotations
 
 import logging
+import os
 import re
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+
+from src import regex_guard
+
+EXTRACTOR_VERSION = "1"
 
 LOG_DIRECTORY = Path("/tmp/session_diagnostics")
-LOG_DIRECTORY.mkdir(parents=True, exist_ok=True)
 LOG_PATH = LOG_DIRECTORY / "bank_statement_extraction.log"
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    filename=str(LOG_PATH),
-    filemode="a",
-    format="%(asctime)s %(levelname)s %(message)s",
-)
-
 logger = logging.getLogger("bank_statement_extractor")
 
+# Per-line debug tracing to a file is opt-in; never reconfigure the root logger.
+if os.getenv("BANK_STATEMENT_DEBUG_LOG", "").lower() in {"1", "true", "yes"}:
+    LOG_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    _handler = logging.FileHandler(LOG_PATH, mode="a", encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.DEBUG)
+
 CURRENCY_PATTERN = r"\$?\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2}))"
 DATE_TOKEN_PATTERN = r"(?:\b[A-Za-z]+\s+\d{1,2},?\s*\d{2,4}|\d{1,2}/\d{1,2}/\d{2,4})"
 DATE_RANGE_PATTERN = rf"({DATE_TOKEN_PATTERN})\s*-\s*({DATE_TOKEN_PATTERN})"
 MONTH_RANGE_PATTERN = r"([A-Za-z]+\s*\d{1,2},?\s*\d{4})"
+SUMMARY_AMOUNT_PATTERN = r"-?\$?\(?[0-9,]+\.[0-9]{2}\)?"
+SUMMARY_AMOUNT_RE = re.compile(SUMMARY_AMOUNT_PATTERN)
+SUMMARY_LABEL_RES = tuple(
+    re.compile(label, re.IGNORECASE)
+    for label in ("Beginning balance", "Total credits", "Total debits", "Ending balance")
+)
+ACCOUNT_LABEL_RE = re.compile(r"Account number[:\t ]+", re.IGNORECASE)
+ACCOUNT_LAST4_RE = re.compile(r"(\d{4})\b")
 DATE_FORMATS = (
     "%B %d %Y",
     "%b %d %Y",
@@ -89,6 +102,29 @@ def _to_decimal(value: str | None) -> Decimal | None:
         return None
 
 
+def _find_summary_row(text: str) -> Optional[List[str]]:
+    """Return the four amounts of a "Beginning balance ... Ending balance" row.
+
+    Each label is searched once, starting after the previous amount, so the
+    scan stays linear; a single lazy ``.*?`` chain over the whole document
+    backtracks cubically when the labels repeat without completing a row.
+    """
+    values: List[str] = []
+    pos = 0
+    for label_re in SUMMARY_LABEL_RES:
+        label = regex_guard.search(label_re, text, pos=pos, label="bank_summary_label")
+        if not label:
+            return None
+        amount = regex_guard.search(
+            SUMMARY_AMOUNT_RE, text, pos=label.end(), label="bank_summary_amount"
+        )
+        if not amount:
+            return None
+        values.append(amount.group(0))
+        pos = amount.end()
+    return values
+
+
 def extract(document_text: str) -> Dict[str, Any]:
     """Extract structured data from a bank statement text."""
 
@@ -101,15 +137,8 @@ def extract(document_text: str) -> Dict[str, Any]:
     field_confidence: Dict[str, float] = {}
     warnings: list[str] = []
 
-    table_values: list[str] | None = None
-    table_match = re.search(
-        r"Beginning balance.*?(-?\$?\(?[0-9,]+\.[0-9]{2}\)?).*?Total credits.*?(-?\$?\(?[0-9,]+\.[0-9]{2}\)?).*?Total debits.*?(-?\$?\(?[0-9,]+\.[0-9]{2}\)?).*?Ending balance.*?(-?\$?\(?[0-9,]+\.[0-9]{2}\)?)",
-        text,
-        re.IGNORECASE | re.DOTALL,
-    )
-    if table_match:
-        table_values = [table_match.group(idx) for idx in range(1, 5)]
-    else:
+    table_values: list[str] | None = _find_summary_row(text)
+    if table_values is None:
         normalized_lines = [line.strip() for line in normalized_raw.split("\n") if line.strip()]
         for index, line in enumerate(normalized_lines):
             lowered = line.lower()
@@ -120,7 +149,7 @@ def extract(document_text: str) -> Dict[str, Any]:
                 and "ending balance" in lowered
             ):
                 for next_line in normalized_lines[index + 1 :]:
-                    amounts = re.findall(r"-?\$?\(?[0-9,]+\.[0-9]{2}\)?", next_line)
+                    amounts = SUMMARY_AMOUNT_RE.findall(next_line)
                     if len(amounts) >= 4:
                         table_values = amounts[:4]
                         break
@@ -156,14 +185,27 @@ def extract(document_text: str) -> Dict[str, Any]:
             logger.debug("[Bank_Statements] Parsed compact summary row: %s", result)
 
     # --- Account number (last 4 digits) ---
-    acct_match = re.search(r"Account number[:\s]+.*?(\d{4})\b", text, re.IGNORECASE)
+    # The last four digits must be on the line the number starts on; ``text``
+    # has its newlines flattened, so the lines come from ``normalized_raw``.
+    # Otherwise a masked "Account number: ****" takes the year from the
+    # statement period below it.  Each label is tried in turn, and only its
+    # own line is searched.
+    acct_match = None
+    for acct_label in regex_guard.finditer(ACCOUNT_LABEL_RE, normalized_raw, label="bank_account_label"):
+        line_end = normalized_raw.find("\n", acct_label.end())
+        if line_end == -1:
+            line_end = len(normalized_raw)
+        line = normalized_raw[acct_label.end():line_end]
+        acct_match = regex_guard.search(ACCOUNT_LAST4_RE, line, label="bank_account_last4")
+        if acct_match:
+            break
     if acct_match:
         result["account_number_last4"] = acct_match.group(1)
         field_confidence["account_number_last4"] = 0.7
         logger.debug("Found account_number_last4=%s", result["account_number_last4"])
 
     # --- Statement period ---
-    period_match = re.search(DATE_RANGE_PATTERN, text)
+    period_match = regex_guard.search(DATE_RANGE_PATTERN, text, label="bank_statement_period")
     if period_match:
         start_raw, end_raw = period_match.groups()
         start_iso = _parse_date(start_raw)
@@ -186,10 +228,11 @@ def extract(document_text: str) -> Dict[str, Any]:
                 logger.debug("Detected statement_period=%s", period)
 
     # --- Beginning balance ---
-    begin_match = re.search(
+    begin_match = regex_guard.search(
         r"(?:Beginning|Opening|Start(?:ing)?) balance[:\s]*" + CURRENCY_PATTERN,
         text,
         re.IGNORECASE,
+        label="bank_beginning_balance",
     )
     if begin_match:
         normalized = _normalize_amount(begin_match.group(1))
@@ -204,10 +247,11 @@ def extract(document_text: str) -> Dict[str, Any]:
                 logger.debug("Found beginning_balance=%s", normalized)
 
     # --- Ending balance ---
-    end_match = re.search(
+    end_match = regex_guard.search(
         r"(?:Ending|Closing) balance[:\s]*" + CURRENCY_PATTERN,
         text,
         re.IGNORECASE,
+        label="bank_ending_balance",
     )
     if end_match:
         normalized = _normalize_amount(end_match.group(1))
@@ -222,10 +266,11 @@ def extract(document_text: str) -> Dict[str, Any]:
                 logger.debug("Found ending_balance=%s", normalized)
 
     # --- Total credits / deposits ---
-    credit_match = re.search(
+    credit_match = regex_guard.search(
         r"Total (?:credits?|deposits?)(?:\s+posted)?[:\s]*" + CURRENCY_PATTERN,
         text,
         re.IGNORECASE,
+        label="bank_total_credits",
     )
     if credit_match:
         normalized = _normalize_amount(credit_match.group(1))
@@ -240,10 +285,11 @@ def extract(document_text: str) -> Dict[str, Any]:
                 logger.debug("Found total_deposits=%s", normalized)
 
     # --- Total debits / withdrawals ---
-    debit_match = re.search(
+    debit_match = regex_guard.search(
         r"Total (?:debits?|withdrawals?)(?:\s+posted)?[:\s]*-?" + CURRENCY_PATTERN,
         text,
         re.IGNORECASE,
+        label="bank_total_debits",
     )
     if debit_match:
         normalized = _normalize_amount(debit_match.group(1))
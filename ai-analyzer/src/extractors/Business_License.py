@@ -7,6 +7,8 @@ from typing import Any, Dict, Optional, Tuple
 from document_library import catalog_index
 from document_library.aliases import get_aliases_for
 
+EXTRACTOR_VERSION = "1"
+
 
 def _schema_fields() -> Tuple[str, ...]:
     definition = catalog_index().get("Business_License")
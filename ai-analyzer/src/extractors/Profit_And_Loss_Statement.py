@@ -7,6 +7,8 @@ from typing import Any, Dict, Iterable, Optional, Tuple
 from document_library import catalog_index
 from document_library.aliases import get_aliases_for
 
+EXTRACTOR_VERSION = "1"
+
 DATE_RANGE = re.compile(
     r"(?:For the|For)\s+(?:period|year|quarter)\s+(.*?)(?:-|to)\s+(.*)",
     re.IGNORECASE,
@@ -1,41 +1,55 @@
-from .business_plan import detect as detect_business_plan, extract as extract_business_plan
-from .utility_bill import detect as detect_utility_bill, extract as extract_utility_bill
-from .installer_contract import (
-    detect as detect_installer_contract,
-    extract as extract_installer_contract,
-)
-from .equipment_specs import detect as detect_equipment_specs, extract as extract_equipment_specs
-from .invoices_or_quotes import detect as detect_invoices_or_quotes, extract as extract_invoices_or_quotes
-from .energy_savings_report import (
-    detect as detect_energy_savings_report,
-    extract as extract_energy_savings_report,
+"""Document extractors, one module per document type.
+
+Modules are imported on demand: ``main`` loads ``src.extractors.<doc_type>``
+for the detected type only, and the names below (``EXTRACTORS``,
+``detect_business_plan`` ...) are resolved on first access, so importing the
+package does not import every extractor and its patterns.  The warmup imports
+all of them with :func:`import_all` before the service reports ready.
+"""
+from importlib import import_module
+import pkgutil
+from typing import Any, Dict, List
+
+# Extractors exposed through ``EXTRACTORS`` and ``detect_<name>`` / ``extract_<name>``.
+_EXPORTED = (
+    "business_plan",
+    "utility_bill",
+    "installer_contract",
+    "equipment_specs",
+    "invoices_or_quotes",
+    "energy_savings_report",
 )
 
-EXTRACTORS = {
-    "business_plan": {
-        "detect": detect_business_plan,
-        "extract": extract_business_plan,
-    }
-}
-EXTRACTORS.update({
-    "utility_bill": {"detect": detect_utility_bill, "extract": extract_utility_bill},
-    "installer_contract": {
-        "detect": detect_installer_contract,
-        "extract": extract_installer_contract,
-    },
-    "equipment_specs": {
-        "detect": detect_equipment_specs,
-        "extract": extract_equipment_specs,
-    },
-    "invoices_or_quotes": {
-        "detect": detect_invoices_or_quotes,
-        "extract": extract_invoices_or_quotes,
-    },
-    "energy_savings_report": {
-        "detect": detect_energy_savings_report,
-        "extract": extract_energy_savings_report,
-    },
-})
+
+def module_names() -> List[str]:
+    """Names of every extractor module in this package."""
+    return sorted(info.name for info in pkgutil.iter_modules(__path__))
+
+
+def import_all() -> Dict[str, Any]:
+    """Import every extractor module; return them by name."""
+    return {name: import_module(f"{__name__}.{name}") for name in module_names()}
+
+
+def _build_extractors() -> Dict[str, Dict[str, Any]]:
+    extractors = {}
+    for name in _EXPORTED:
+        module = import_module(f"{__name__}.{name}")
+        extractors[name] = {"detect": module.detect, "extract": module.extract}
+    return extractors
+
+
+def __getattr__(name: str) -> Any:
+    if name == "EXTRACTORS":
+        value: Any = _build_extractors()
+    else:
+        kind, _, doc_type = name.partition("_")
+        if kind not in ("detect", "extract") or doc_type not in _EXPORTED:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        value = getattr(import_module(f"{__name__}.{doc_type}"), kind)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "EXTRACTORS",
@@ -51,4 +65,6 @@ __all__ = [
     "extract_invoices_or_quotes",
     "detect_energy_savings_report",
     "extract_energy_savings_report",
+    "import_all",
+    "module_names",
 ]
@@ -2,6 +2,8 @@ from datetime import datetime
 import re
 from pydantic import BaseModel
 
+EXTRACTOR_VERSION = "1"
+
 KEYWORDS = [
     "Articles of Incorporation",
     "Articles of Organization",
@@ -33,7 +35,9 @@ def _normalize_date(val: str) -> str:
     return val
 
 
-BUSINESS_NAME_RE = re.compile(r"(?:Company|Business)?\s*Name\s*[:\-]\s*(.+)", re.I)
+# The optional "Company"/"Business" prefix never changes the captured value,
+# and leaving it out keeps the scan linear on long runs of whitespace.
+BUSINESS_NAME_RE = re.compile(r"Name\s*[:\-]\s*(.+)", re.I)
 ENTITY_TYPE_RE = re.compile(r"Entity\s*Type\s*[:\-]\s*(.+)", re.I)
 DATE_RE = re.compile(r"(?:Date\s*of\s*Incorporation|Effective\s*Date|Date)\s*[:\-]\s*([0-9/\-]+)", re.I)
 STATE_RE = re.compile(r"State\s*of\s*Incorporation\s*[:\-]\s*(.+)", re.I)
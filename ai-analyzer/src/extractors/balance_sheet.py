@@ -2,6 +2,8 @@ import re
 from datetime import datetime
 from typing import Any, Dict, Optional
 
+EXTRACTOR_VERSION = "1"
+
 MONEY = r"[-+]?\$?\s?\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?"
 
 
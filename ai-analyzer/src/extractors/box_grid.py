@@ -0,0 +1,188 @@
+"""Single-pass box grid parser shared by the IRS information-return extractors.
+
+W-2 and 1099 forms lay their values out as numbered boxes (``1``-``20``) with
+optional letter suffixes (``12a``-``12d``).  Rather than compiling a regex per
+box and rescanning the document for each one, :func:`parse_box_grid` walks the
+text once, labels every box marker it finds and returns a :class:`BoxGrid`
+mapping each box to its cells, amounts and checkbox states.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MIN_BOX = 1
+MAX_BOX = 20
+
+# A box marker either opens a line ("1 Wages ...", "12a D 1500.00") or appears
+# inline for the lettered sub-boxes of box 12 ("... 12b DD 3200.00").
+LINE_MARKER = r"^[^\S\n]*(?P<num>\d{1,2})(?:(?P<suffix>[a-dA-D])(?![A-Za-z]))?(?!\d)"
+INLINE_MARKER = r"(?<=\s)(?P<inum>12)(?P<isuffix>[a-dA-D])(?=\s)"
+MARKER_RE = re.compile(rf"(?m){LINE_MARKER}|{INLINE_MARKER}")
+LINE_MARKER_RE = re.compile(rf"(?m){LINE_MARKER}")
+
+TRAILING_AMOUNT_RE = re.compile(r"[\$0-9,\.]+(?=\s*$)")
+FIRST_AMOUNT_RE = re.compile(r"[\$0-9,\.]+")
+CHECKBOX_MARK_RE = re.compile(
+    r"☑|☒|✅|✔|\[\s*[xX]\s*\]|\(\s*[xX]\s*\)|\b[Xx]\b|☐|\[\s*\]|\b(?i:yes|no)\b"
+)
+CHECK_TRUE_RE = re.compile(r"☑|☒|✅|✔|\[\s*[xX]\s*\]|\(\s*[xX]\s*\)|\b[Xx]\b|(?i:yes)")
+LABEL_STRIP = " :-\t"
+
+
+@dataclass(frozen=True)
+class BoxCell:
+    """One occurrence of a box on the form."""
+
+    box: str
+    number: int
+    suffix: str
+    body: str
+    line: int
+    trailing_amount: Optional[str]
+    first_amount: Optional[str]
+    checkboxes: Tuple[Tuple[str, bool], ...]
+
+    @property
+    def amount(self) -> Optional[str]:
+        """Amount printed at the end of the cell, else the first amount in it."""
+        return self.trailing_amount or self.first_amount
+
+
+class BoxGrid:
+    """Box -> cells map produced by :func:`parse_box_grid`."""
+
+    def __init__(self, cells: Dict[str, List[BoxCell]]) -> None:
+        self._cells = cells
+
+    def __contains__(self, box: object) -> bool:
+        return box in self._cells
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._cells)
+
+    def cells(self, box: str) -> List[BoxCell]:
+        """Return every cell labelled ``box`` in document order."""
+        return self._cells.get(box, [])
+
+    def first(self, box: str) -> Optional[BoxCell]:
+        cells = self._cells.get(box)
+        return cells[0] if cells else None
+
+    def subboxes(self, number: int) -> List[BoxCell]:
+        """Return the lettered cells of box ``number`` (12 -> 12a-12d) in order."""
+        found = [
+            cell
+            for cells in self._cells.values()
+            for cell in cells
+            if cell.number == number and cell.suffix
+        ]
+        return sorted(found, key=lambda cell: cell.line)
+
+    def value(self, box: str) -> Optional[str]:
+        """Return the raw amount for ``box``.
+
+        Cells ending in an amount win over cells that merely contain one, which
+        keeps labels such as ``"5 Medicare wages"`` from shadowing the value.
+        """
+        cells = self._cells.get(box, [])
+        for cell in cells:
+            if cell.trailing_amount:
+                return cell.trailing_amount
+        for cell in cells:
+            if cell.first_amount:
+                return cell.first_amount
+        return None
+
+    def checkbox(self, box: str, label: str) -> Optional[bool]:
+        """Return the state of the checkbox labelled ``label`` inside ``box``."""
+        needle = label.lower()
+        for cell in self._cells.get(box, []):
+            for cell_label, state in cell.checkboxes:
+                if needle in cell_label:
+                    return state
+        return None
+
+
+def _parse_checkboxes(body: str) -> Tuple[Tuple[str, bool], ...]:
+    # Each checkbox mark closes the label text that precedes it, so
+    # "Statutory employee (x) Retirement plan [ ]" yields two entries.
+    entries: List[Tuple[str, bool]] = []
+    start = 0
+    for match in CHECKBOX_MARK_RE.finditer(body):
+        label = body[start:match.start()].strip(LABEL_STRIP).lower()
+        start = match.end()
+        if not label:
+            continue
+        entries.append((label, bool(CHECK_TRUE_RE.fullmatch(match.group(0)))))
+    return tuple(entries)
+
+
+def _continuation_checkboxes(lines: str) -> Tuple[Tuple[str, bool], ...]:
+    # Box 13 is often printed as one option per line under its numbered label
+    # ("13 Statutory employee (x)" then "Retirement plan [X]"); checkbox lines
+    # directly below a cell belong to it.  The first other line ends the run.
+    entries: List[Tuple[str, bool]] = []
+    for line in lines.splitlines():
+        if not line.strip():
+            continue
+        found = _parse_checkboxes(line)
+        if not found or any(ch.isdigit() for ch in line):
+            break
+        entries.extend(found)
+    return tuple(entries)
+
+
+def _build_cell(
+    num: str, suffix: Optional[str], body: str, line: int, following: str = ""
+) -> BoxCell:
+    suffix = (suffix or "").lower()
+    trailing = TRAILING_AMOUNT_RE.search(body)
+    first = FIRST_AMOUNT_RE.search(body)
+    return BoxCell(
+        box=f"{int(num)}{suffix}",
+        number=int(num),
+        suffix=suffix,
+        body=body,
+        line=line,
+        trailing_amount=trailing.group(0) if trailing else None,
+        first_amount=first.group(0) if first else None,
+        checkboxes=_parse_checkboxes(body) + _continuation_checkboxes(following),
+    )
+
+
+def parse_box_grid(text: str, *, inline_subboxes: bool = True) -> BoxGrid:
+    """Tokenize ``text`` once and return every labelled box.
+
+    ``inline_subboxes`` controls whether ``12a``-``12d`` markers in the middle
+    of a line start their own cell; 1099 forms have no lettered boxes and
+    disable it so addresses like ``"Suite 12B"`` are left alone.
+    """
+    cells: Dict[str, List[BoxCell]] = {}
+    if not text:
+        return BoxGrid(cells)
+
+    pattern = MARKER_RE if inline_subboxes else LINE_MARKER_RE
+    markers = list(pattern.finditer(text))
+    line = 0
+    cursor = 0
+    for idx, match in enumerate(markers):
+        num = match.group("num") if match.group("num") is not None else match.group("inum")
+        if not MIN_BOX <= int(num) <= MAX_BOX:
+            continue
+        suffix = match.group("suffix") if match.group("num") is not None else match.group("isuffix")
+        line += text.count("\n", cursor, match.start())
+        cursor = match.start()
+        end = text.find("\n", match.end())
+        if end == -1:
+            end = len(text)
+        stop = markers[idx + 1].start() if idx + 1 < len(markers) else len(text)
+        end = min(end, stop)
+        body = text[match.end():end].rstrip()
+        cell = _build_cell(num, suffix, body, line, text[end:stop])
+        cells.setdefault(cell.box, []).append(cell)
+    return BoxGrid(cells)
+
+
+__all__ = ["BoxCell", "BoxGrid", "parse_box_grid"]
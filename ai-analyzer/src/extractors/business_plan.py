@@ -2,6 +2,8 @@ import re
 from datetime import datetime
 from typing import Any, Dict, Optional
 
+EXTRACTOR_VERSION = "1"
+
 SECONDARY_SECTIONS = [
     "Executive Summary",
     "Market Analysis",
@@ -5,6 +5,10 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from src import regex_guard
+
+EXTRACTOR_VERSION = "1"
+
 FREQUENCY_MAP = {
     "A": "always",
     "F": "frequently",
@@ -39,6 +43,10 @@ EIN_RE = re.compile(r"(?<!\d)(\d{2})[-\s]?(\d{7})(?!\d)")
 MONEY_CANDIDATE_RE = re.compile(r"\(?[-$]?\d[\d,]*(?:\.\d+)?\)?")
 PERCENT_RE = re.compile(r"(-?\d+[\d,.]*)(%)?")
 STATE_RE = re.compile(r"\b([A-Z]{2})\b")
+OWNER_BLOCK_RE = re.compile(
+    r"Owner Name:\s*(.+?)(?=(?:Owner Name:|Section\s+4:|ACDBE|Affidavit|$))",
+    re.IGNORECASE | re.DOTALL,
+)
 
 
 @dataclass
@@ -210,8 +218,7 @@ def _split_entries(raw: Optional[str]) -> List[str]:
 
 def _parse_owner_blocks(section: str) -> List[ParsedOwner]:
     owners: List[ParsedOwner] = []
-    pattern = re.compile(r"Owner Name:\s*(.+?)(?=(?:Owner Name:|Section\s+4:|ACDBE|Affidavit|$))", re.IGNORECASE | re.DOTALL)
-    for idx, match in enumerate(pattern.finditer(section)):
+    for idx, match in enumerate(regex_guard.finditer(OWNER_BLOCK_RE, section, label="dbe_owner_blocks")):
         owners.append(ParsedOwner(raw_block=match.group(0), index=idx))
     return owners
 
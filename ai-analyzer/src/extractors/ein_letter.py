@@ -2,6 +2,8 @@ import re
 from datetime import datetime
 from typing import Any, Dict, Optional
 
+EXTRACTOR_VERSION = "1"
+
 
 EIN_RE = re.compile(r"\b(\d{2}-\d{7})\b")
 DATE_CANDIDATES = [
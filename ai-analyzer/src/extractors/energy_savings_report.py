@@ -4,6 +4,8 @@ import re
 from typing import List
 from pydantic import BaseModel
 
+EXTRACTOR_VERSION = "1"
+
 KEYWORDS = [
     "Energy Savings Report",
     "Engineering Report",
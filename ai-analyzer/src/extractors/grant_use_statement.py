@@ -2,6 +2,8 @@ import re
 from datetime import datetime
 from typing import Any, Dict, Optional
 
+EXTRACTOR_VERSION = "1"
+
 KEYWORDS = [
     "Use of Funds",
     "Grant Use Statement",
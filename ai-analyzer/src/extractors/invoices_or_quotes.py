@@ -4,6 +4,8 @@ from typing import Any, Dict, Optional
 
 from pydantic import BaseModel
 
+EXTRACTOR_VERSION = "1"
+
 INVOICE_KEYWORDS = [
     "Invoice",
     "Tax Invoice",
@@ -5,6 +5,10 @@ import re
 from decimal import Decimal, InvalidOperation
 from typing import Any, Dict, List, Optional, Tuple
 
+from .box_grid import BoxCell, BoxGrid, parse_box_grid
+
+EXTRACTOR_VERSION = "1"
+
 logger = logging.getLogger(__name__)
 
 FORM_RE = re.compile(r"form\s+1099[-\u2011]?nec", re.IGNORECASE)
@@ -23,23 +27,26 @@ PHONE_RE = re.compile(r"Phone\s*[:\-]?\s*([\d()\-\s\.]+)", re.IGNORECASE)
 ACCOUNT_RE = re.compile(r"Account\s+number\s*[:\-]?\s*(.+)$", re.IGNORECASE)
 STATE_SPLIT_RE = re.compile(r"[,/]|\s{2,}")
 
-BOX_PATTERNS = {
-    "box1_nonemployee_comp": re.compile(
-        r"(?im)^\s*1\s+Nonemployee\s+comp(?:ensation)?[^0-9\n]*([\$0-9,()\.-]+)"
-    ),
-    "box3_excess_golden_parachute": re.compile(
-        r"(?im)^\s*3\s+Excess\s+golden\s+parachute[^0-9\n]*([\$0-9,()\.-]+)"
-    ),
-    "box4_federal_income_tax_wh": re.compile(
-        r"(?im)^\s*4\s+Federal\s+income\s+tax\s+withheld[^0-9\n]*([\$0-9,()\.-]+)"
-    ),
-    "box5_state_tax_wh": re.compile(
-        r"(?im)^\s*5\s+State\s+tax\s+withheld[^0-9\n]*([\$0-9,()\.-]+(?:\s+[\$0-9,()\.-]+)*)"
-    ),
-    "box7_state_income": re.compile(
-        r"(?im)^\s*7\s+State\s+income[^0-9\n]*([\$0-9,()\.-]+(?:\s+[\$0-9,()\.-]+)*)"
-    ),
+# Box key -> (box number, label expected right after the number on the form).
+BOX_LABELS = {
+    "box1_nonemployee_comp": ("1", re.compile(r"\s+Nonemployee\s+comp(?:ensation)?", re.IGNORECASE)),
+    "box3_excess_golden_parachute": ("3", re.compile(r"\s+Excess\s+golden\s+parachute", re.IGNORECASE)),
+    "box4_federal_income_tax_wh": ("4", re.compile(r"\s+Federal\s+income\s+tax\s+withheld", re.IGNORECASE)),
+    "box5_state_tax_wh": ("5", re.compile(r"\s+State\s+tax\s+withheld", re.IGNORECASE)),
+    "box7_state_income": ("7", re.compile(r"\s+State\s+income", re.IGNORECASE)),
 }
+BOX_VALUE_RE = re.compile(r"[^0-9\n]*([\$0-9,()\.-]+)")
+BOX_MULTI_VALUE_RE = re.compile(r"[^0-9\n]*([\$0-9,()\.-]+(?:\s+[\$0-9,()\.-]+)*)")
+MONEY_TOKEN_RE = re.compile(r"\(?[\$0-9,\.\-]+\)?")
+PAYER_LABEL_RE = re.compile(r"Payer'?s\s+name[:\-]?", re.IGNORECASE)
+PAYER_ADDRESS_LABEL_RE = re.compile(r"Street\s+address[:\-]?", re.IGNORECASE)
+PAYER_TIN_LABEL_RE = re.compile(r"Payer'?s\s+TIN[:\-]?", re.IGNORECASE)
+RECIPIENT_LABEL_RE = re.compile(r"Recipient'?s\s+name[:\-]?", re.IGNORECASE)
+RECIPIENT_ADDRESS_LABEL_RE = re.compile(r"Street\s+address\s*\(including\s+apt\.?", re.IGNORECASE)
+RECIPIENT_TIN_LABEL_RE = re.compile(r"Recipient'?s\s+TIN[:\-]?", re.IGNORECASE)
+STATE_NO_LABEL_RE = re.compile(r"State/Payer'?s\s+state\s+no\.", re.IGNORECASE)
+VOID_LABEL_RE = re.compile(r"void[^\n]*", re.IGNORECASE)
+CORRECTED_LABEL_RE = re.compile(r"corrected[^\n]*", re.IGNORECASE)
 
 MULTI_VALUE_BOXES = {"box5_state_tax_wh", "box7_state_income"}
 
@@ -99,12 +106,12 @@ def _normalize_tin(value: Optional[str]) -> Tuple[Optional[str], Optional[str],
     return None, masked, last4
 
 
-def _checkbox_value(line: str, label: Optional[str] = None) -> Optional[bool]:
+def _checkbox_value(line: str, label: Optional[re.Pattern[str]] = None) -> Optional[bool]:
     if not line:
         return None
     snippet = line
     if label:
-        match = re.search(rf"{label}[^\n]*", line, re.IGNORECASE)
+        match = label.search(line)
         if match:
             snippet = match.group(0)
     true = CHECK_TRUE_RE.search(snippet)
@@ -128,7 +135,7 @@ def _extract_labeled(
         for pat in patterns:
             match = pat.search(line)
             if match:
-                tail = line[match.end() :].strip(" :\t-·")
+                tail = line[match.end():].strip(" :\t-·")
                 parts = [tail] if tail else []
                 for offset in range(1, join_next + 1):
                     if idx + offset >= len(lines):
@@ -142,15 +149,13 @@ def _extract_labeled(
     return None, None
 
 
-def _extract_box_values(
-    pattern: re.Pattern[str], text: str, allow_multi: bool = False
-) -> Tuple[List[str], List[float]]:
-    match = pattern.search(text)
+def _extract_box_values(body: str, allow_multi: bool = False) -> Tuple[List[str], List[float]]:
+    match = (BOX_MULTI_VALUE_RE if allow_multi else BOX_VALUE_RE).match(body)
     if not match:
         return [], []
     raw = match.group(1).strip()
     if allow_multi:
-        tokens = [tok.strip() for tok in re.findall(r"\(?[\$0-9,\.\-]+\)?", raw) if tok.strip()]
+        tokens = [tok.strip() for tok in MONEY_TOKEN_RE.findall(raw) if tok.strip()]
     else:
         tokens = [raw]
     raw_values: List[str] = []
@@ -177,6 +182,14 @@ def _extract_box_values(
     return raw_values, clean_values
 
 
+def _labelled_cell(grid: BoxGrid, box: str, label: re.Pattern[str]) -> Tuple[Optional[BoxCell], str]:
+    for cell in grid.cells(box):
+        match = label.match(cell.body)
+        if match:
+            return cell, cell.body[match.end():]
+    return None, ""
+
+
 def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
     lines = [line.rstrip("\n") for line in text.splitlines()]
     stripped_lines = [line.strip() for line in lines]
@@ -189,7 +202,7 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
 
     payer_name, payer_name_idx = _extract_labeled(
         stripped_lines,
-        [re.compile(r"Payer'?s\s+name[:\-]?", re.IGNORECASE)],
+        [PAYER_LABEL_RE],
         join_next=0,
     )
     if payer_name:
@@ -200,7 +213,7 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
 
     payer_address, payer_address_idx = _extract_labeled(
         stripped_lines,
-        [re.compile(r"Street\s+address[:\-]?", re.IGNORECASE)],
+        [PAYER_ADDRESS_LABEL_RE],
         join_next=1,
     )
     if payer_address:
@@ -233,7 +246,7 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
 
     payer_tin_value, payer_tin_idx = _extract_labeled(
         stripped_lines,
-        [re.compile(r"Payer'?s\s+TIN[:\-]?", re.IGNORECASE)],
+        [PAYER_TIN_LABEL_RE],
         join_next=0,
     )
     if payer_tin_value:
@@ -260,7 +273,7 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
 
     recipient_name, recipient_name_idx = _extract_labeled(
         stripped_lines,
-        [re.compile(r"Recipient'?s\s+name[:\-]?", re.IGNORECASE)],
+        [RECIPIENT_LABEL_RE],
         join_next=0,
     )
     if recipient_name:
@@ -275,7 +288,7 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
 
     recipient_address, recipient_addr_idx = _extract_labeled(
         stripped_lines,
-        [re.compile(r"Street\s+address\s*\(including\s+apt\.?", re.IGNORECASE)],
+        [RECIPIENT_ADDRESS_LABEL_RE],
         join_next=1,
     )
     if recipient_address:
@@ -290,7 +303,7 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
 
     recipient_tin_value, recipient_tin_idx = _extract_labeled(
         stripped_lines,
-        [re.compile(r"Recipient'?s\s+TIN[:\-]?", re.IGNORECASE)],
+        [RECIPIENT_TIN_LABEL_RE],
         join_next=0,
     )
     if recipient_tin_value:
@@ -344,14 +357,14 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
     corrected_value = None
     for idx, line in enumerate(stripped_lines[:5]):
         if "void" in line.lower():
-            void_value = _checkbox_value(line, label="void")
+            void_value = _checkbox_value(line, label=VOID_LABEL_RE)
             field_sources["void"] = {
                 "page": 1,
                 "line": idx + 1,
                 "raw": stripped_lines[idx],
             }
         if "corrected" in line.lower():
-            corrected_value = _checkbox_value(line, label="corrected")
+            corrected_value = _checkbox_value(line, label=CORRECTED_LABEL_RE)
             field_sources["corrected"] = {
                 "page": 1,
                 "line": idx + 1,
@@ -364,23 +377,29 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
         fields_clean["corrected"] = bool(corrected_value)
         field_confidence["corrected"] = 0.6
 
-    box2_value = None
-    for idx, line in enumerate(stripped_lines):
-        if line.lower().startswith("2 payer"):
-            box2_value = _checkbox_value(line, label="payer")
-            field_sources["box2_direct_sales_over_5000"] = {
-                "page": 1,
-                "line": idx + 1,
-                "raw": stripped_lines[idx],
-            }
-            break
-    if box2_value is not None:
-        fields_clean["box2_direct_sales_over_5000"] = bool(box2_value)
-        field_confidence["box2_direct_sales_over_5000"] = 0.75
+    grid = parse_box_grid(text, inline_subboxes=False)
 
-    for key, pattern in BOX_PATTERNS.items():
+    box2_cell = next(
+        (cell for cell in grid.cells("2") if cell.body.lstrip().lower().startswith("payer")),
+        None,
+    )
+    if box2_cell is not None:
+        field_sources["box2_direct_sales_over_5000"] = {
+            "page": 1,
+            "line": box2_cell.line + 1,
+            "raw": stripped_lines[box2_cell.line],
+        }
+        box2_value = grid.checkbox("2", "payer")
+        if box2_value is not None:
+            fields_clean["box2_direct_sales_over_5000"] = bool(box2_value)
+            field_confidence["box2_direct_sales_over_5000"] = 0.75
+
+    for key, (box, label) in BOX_LABELS.items():
+        cell, remainder = _labelled_cell(grid, box, label)
+        if cell is None:
+            continue
         raw_values, parsed_values = _extract_box_values(
-            pattern, text, allow_multi=key in MULTI_VALUE_BOXES
+            remainder, allow_multi=key in MULTI_VALUE_BOXES
         )
         if not raw_values and not parsed_values:
             continue
@@ -395,16 +414,13 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
         field_confidence[key] = 0.85
         field_sources[key] = {
             "page": 1,
-            "line": next(
-                (idx + 1 for idx, line in enumerate(stripped_lines) if pattern.search(line)),
-                1,
-            ),
+            "line": cell.line + 1,
             "raw": raw_values if len(raw_values) > 1 else (raw_values[0] if raw_values else ""),
         }
 
     state_raw, state_idx = _extract_labeled(
         stripped_lines,
-        [re.compile(r"State/Payer'?s\s+state\s+no\.", re.IGNORECASE)],
+        [STATE_NO_LABEL_RE],
         join_next=0,
     )
     if state_raw:
@@ -8,6 +8,10 @@ from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import logging
 
+from .layout_plans import PLAN_CACHE, ParsePlan, layout_signature
+
+EXTRACTOR_VERSION = "1"
+
 logger = logging.getLogger(__name__)
 
 TITLE_HINTS = [
@@ -188,6 +192,24 @@ def _accumulate(numbers: List[Optional[float]]) -> Optional[float]:
     return round(sum(clean), 2)
 
 
+def _discover_header(
+    rows: List[List[str]], signature: str
+) -> Tuple[Optional[List[str]], Dict[int, str], int]:
+    for idx, row in enumerate(rows):
+        mapping = _map_header(row)
+        if mapping:
+            PLAN_CACHE.store(
+                signature,
+                ParsePlan(
+                    header_index=idx,
+                    header_labels=tuple(_normalize_label(cell) for cell in row),
+                    columns=tuple(sorted(mapping.items())),
+                ),
+            )
+            return row, mapping, idx + 1
+    return None, {}, 0
+
+
 def _extract(
     text: str,
     *,
@@ -195,16 +217,14 @@ def _extract(
     evidence_key: Optional[str] = None,
 ) -> Dict[str, Any]:
     rows = _iter_rows(text)
-    header_row: Optional[List[str]] = None
-    header_map: Dict[int, str] = {}
-    start_index = 0
-    for idx, row in enumerate(rows):
-        mapping = _map_header(row)
-        if mapping:
-            header_row = row
-            header_map = mapping
-            start_index = idx + 1
-            break
+    signature = layout_signature("irs_1099_summary", rows)
+    plan = PLAN_CACHE.lookup(signature, rows, _normalize_label)
+    if plan is not None:
+        header_row: Optional[List[str]] = rows[plan.header_index]
+        header_map = plan.column_map
+        start_index = plan.header_index + 1
+    else:
+        header_row, header_map, start_index = _discover_header(rows, signature)
     warnings: List[str] = []
     if "amounts.box1_nonemployee_comp" not in header_map.values():
         warnings.append("missing_box1_column")
@@ -1,6 +1,8 @@
 import re
 from typing import Dict
 
+EXTRACTOR_VERSION = "1"
+
 def extract(text: str) -> Dict[str, str]:
     out = {}
     m = re.search(r"EIN[:\s]+([0-9\-]{9,10})", text, flags=re.I)
@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 import re
 
+EXTRACTOR_VERSION = "1"
+
 class IRS941XFields(BaseModel):
     ein: str | None = None
     year: str | None = None
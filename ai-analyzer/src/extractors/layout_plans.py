@@ -0,0 +1,127 @@
+"""Layout fingerprints and cached parse plans for tabular payroll exports.
+
+Payroll registers and 1099 summaries mostly come from a handful of vendors
+whose exports share one layout.  :func:`layout_signature` reduces the first
+rows of a document to their shape (cell count and text/number class of every
+cell), which is stable across exports of the same layout while ignoring the
+names and amounts that change.  The extractor that discovered the header for
+a layout stores a :class:`ParsePlan` under that signature; later documents
+with the same signature reuse it after :meth:`ParsePlan.matches` confirms the
+header row is where the plan expects it, and fall back to full header
+discovery otherwise.  Lookup outcomes go to the analyzer's stage metrics
+rather than into the extracted payload.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from src import stage_timing
+
+SIGNATURE_ROWS = 8
+
+
+@dataclass(frozen=True)
+class ParsePlan:
+    """Validated header location and column mapping for one layout."""
+
+    header_index: int
+    header_labels: Tuple[str, ...]
+    columns: Tuple[Tuple[int, str], ...]
+
+    @property
+    def column_map(self) -> Dict[int, str]:
+        return dict(self.columns)
+
+    def matches(
+        self, rows: Sequence[Sequence[str]], normalize: Callable[[str], str]
+    ) -> bool:
+        """Return ``True`` when ``rows`` carries this plan's header row."""
+        if self.header_index >= len(rows):
+            return False
+        row = rows[self.header_index]
+        if len(row) != len(self.header_labels):
+            return False
+        return tuple(normalize(cell) for cell in row) == self.header_labels
+
+
+def _cell_class(cell: str) -> str:
+    if not cell:
+        return "_"
+    return "n" if any(ch.isdigit() for ch in cell) else "a"
+
+
+def layout_signature(kind: str, rows: Sequence[Sequence[str]]) -> str:
+    """Fingerprint the leading rows of a document for ``kind`` of extractor."""
+    shape = "|".join(
+        "".join(_cell_class(cell) for cell in row) for row in rows[:SIGNATURE_ROWS]
+    )
+    digest = hashlib.sha1(f"{kind}:{shape}".encode("utf-8")).hexdigest()
+    return f"{kind}:{digest[:16]}"
+
+
+class LayoutPlanCache:
+    """Bounded, thread-safe signature -> :class:`ParsePlan` map."""
+
+    def __init__(self, max_entries: int = 128) -> None:
+        self.max_entries = max_entries
+        self._plans: "OrderedDict[str, ParsePlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def lookup(
+        self,
+        signature: str,
+        rows: Sequence[Sequence[str]],
+        normalize: Callable[[str], str],
+    ) -> Optional[ParsePlan]:
+        """Return the cached plan for ``signature`` if it validates on ``rows``."""
+        with self._lock:
+            plan = self._plans.get(signature)
+            if plan is not None:
+                self._plans.move_to_end(signature)
+        kind = signature.split(":", 1)[0]
+        if plan is None:
+            self.misses += 1
+            stage_timing.record_layout_plan(kind, "miss")
+            return None
+        if not plan.matches(rows, normalize):
+            self.rejected += 1
+            stage_timing.record_layout_plan(kind, "rejected")
+            return None
+        self.hits += 1
+        stage_timing.record_layout_plan(kind, "hit")
+        return plan
+
+    def store(self, signature: str, plan: ParsePlan) -> None:
+        with self._lock:
+            self._plans[signature] = plan
+            self._plans.move_to_end(signature)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+        self.hits = self.misses = self.rejected = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            size = len(self._plans)
+        return {
+            "plans": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+        }
+
+
+PLAN_CACHE = LayoutPlanCache()
+
+
+__all__ = ["LayoutPlanCache", "PLAN_CACHE", "ParsePlan", "layout_signature"]
@@ -8,6 +8,10 @@ from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from .layout_plans import PLAN_CACHE, ParsePlan, layout_signature
+
+EXTRACTOR_VERSION = "1"
+
 PAY_PERIOD_RE = re.compile(
     r"Pay\s*Period\s*[:\-]?\s*(?P<start>[^\s]+)\s*(?:to|\-|through)\s*(?P<end>[^\s]+)",
     re.IGNORECASE,
@@ -278,6 +282,27 @@ def _ensure_employee_structure() -> Dict[str, Any]:
     }
 
 
+def _discover_header(
+    rows: List[ParsedRow], signature: str
+) -> Tuple[Optional[ParsedRow], Dict[int, str]]:
+    for position, row in enumerate(rows):
+        mapping = _map_header(row.values)
+        if mapping and (
+            "employee.name" in mapping.values()
+            and ("net_pay" in mapping.values() or "pay_components.gross_pay" in mapping.values())
+        ):
+            PLAN_CACHE.store(
+                signature,
+                ParsePlan(
+                    header_index=position,
+                    header_labels=tuple(_normalize_label(cell) for cell in row.values),
+                    columns=tuple(sorted(mapping.items())),
+                ),
+            )
+            return row, mapping
+    return None, {}
+
+
 def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
     if not detect(text):
         return {
@@ -294,17 +319,14 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
         }
 
     rows = _split_rows(text)
-    header_map: Dict[int, str] = {}
-    header_row: Optional[ParsedRow] = None
-    for row in rows:
-        mapping = _map_header(row.values)
-        if mapping and (
-            "employee.name" in mapping.values()
-            and ("net_pay" in mapping.values() or "pay_components.gross_pay" in mapping.values())
-        ):
-            header_map = mapping
-            header_row = row
-            break
+    row_values = [row.values for row in rows]
+    signature = layout_signature("payroll_register", row_values)
+    plan = PLAN_CACHE.lookup(signature, row_values, _normalize_label)
+    if plan is not None:
+        header_row: Optional[ParsedRow] = rows[plan.header_index]
+        header_map = plan.column_map
+    else:
+        header_row, header_map = _discover_header(rows, signature)
 
     warnings: List[str] = []
     if not header_row:
@@ -2,6 +2,8 @@ import re
 from datetime import datetime
 from typing import Dict
 
+EXTRACTOR_VERSION = "1"
+
 
 def _parse_currency(val: str) -> float:
     return float(val.replace(",", ""))
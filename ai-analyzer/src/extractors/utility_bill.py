@@ -2,6 +2,8 @@ from datetime import datetime
 import re
 from pydantic import BaseModel
 
+EXTRACTOR_VERSION = "1"
+
 KEYWORDS = [
     "Electricity bill",
     "Utility bill",
@@ -9,6 +9,8 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from ai_analyzer.nlp_parser import extract_ein, normalize_country, normalize_state
 
+EXTRACTOR_VERSION = "1"
+
 
 def _make_field(value: Any = None, confidence: float = 0.0, source: Optional[str] = None) -> Dict[str, Any]:
     return {"value": value, "confidence": round(confidence, 2), "source": source}
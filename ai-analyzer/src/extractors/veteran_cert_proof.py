@@ -6,6 +6,8 @@ from datetime import UTC, datetime
 import re
 from typing import Any, Dict, List, Optional
 
+EXTRACTOR_VERSION = "1"
+
 
 def _make_field(value: Any = None, confidence: float = 0.0, source: Optional[str] = None) -> Dict[str, Any]:
     return {"value": value, "confidence": round(confidence, 2), "source": source}
@@ -3,14 +3,18 @@ from __future__ import annotations
 import logging
 import re
 from decimal import Decimal, InvalidOperation
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
+
+from .box_grid import BoxCell, parse_box_grid
+
+EXTRACTOR_VERSION = "1"
 
 logger = logging.getLogger(__name__)
 
 FORM_TITLE_RE = re.compile(r"Form\s+W-2\s+Wage\s+and\s+Tax\s+Statement", re.IGNORECASE)
 OMB_RE = re.compile(r"OMB\s+No\.?\s*1545-0029", re.IGNORECASE)
 COPY_RE = re.compile(r"Copy\s+(?:A|B|C|D|1|2)\b", re.IGNORECASE)
-BOX_HEADER_RE = re.compile(r"^\s*(?:1|2|3|4|5|6|7|8|10|11|12|13|14|15|16|17|18|19|20)\b", re.IGNORECASE | re.MULTILINE)
+BOX_HEADER_RE = re.compile(r"^[^\S\n]*(?:1|2|3|4|5|6|7|8|10|11|12|13|14|15|16|17|18|19|20)\b", re.IGNORECASE | re.MULTILINE)
 
 EIN_RE = re.compile(r"Employer\s+identification\s+number\s*(?:\(EIN\))?\s*[:#-]?\s*([0-9][0-9\-\s]{8,})", re.IGNORECASE)
 SSN_RE = re.compile(r"Employee'?s\s+social\s+security\s+number\s*[:#-]?\s*([0-9][0-9\-\s]{8,})", re.IGNORECASE)
@@ -58,15 +62,22 @@ FIELD_BOX_MAP: Dict[str, str] = {
 FIELD_BOX_MAP.update({key: str(num) for num, key in BOX_NUMBER_TO_KEY.items()})
 
 BOX_LINE_RE = re.compile(r"^(?P<num>\d{1,2})(?P<suffix>[a-d]?)\s+(?P<body>.+)$", re.IGNORECASE)
-BOX12_RE = re.compile(r"12([a-d])\s+([A-Z0-9]{1,3})\s+([$0-9,\.]+)", re.IGNORECASE)
-CHECK_TRUE_RE = re.compile(r"(☑|☒|✅|✔|\[\s*[xX]\s*\]|\(\s*[xX]\s*\)|\b[Xx]\b)")
-CHECK_FALSE_RE = re.compile(r"(☐|\[\s*\])")
+BOX12_CELL_RE = re.compile(r"\s+([A-Z0-9]{1,3})\s+([$0-9,\.]+)", re.IGNORECASE)
+BOX13_CHECKBOXES: Dict[str, str] = {
+    "box13_statutory_employee": "Statutory employee",
+    "box13_retirement_plan": "Retirement plan",
+    "box13_third_party_sick_pay": "Third-party sick pay",
+}
 STATE_LINE_RE = re.compile(
     r"15\s+State\s+([A-Z]{2})[^\n]*?state\s+ID\s+number\s+([A-Za-z0-9\-]+)",
     re.IGNORECASE | re.DOTALL,
 )
 LOCALITY_RE = re.compile(r"20\s+Locality\s+name\s+([A-Za-z0-9 \-]+)", re.IGNORECASE)
-BOX14_LINE_RE = re.compile(r"^\s*14\s+Other\s+(.*)$", re.IGNORECASE)
+BOX14_CELL_RE = re.compile(r"\s+Other\s+(.*)$", re.IGNORECASE)
+EMPLOYER_BLOCK_RE = re.compile(r"Employer'?s\s+name,\s+address", re.IGNORECASE)
+EMPLOYEE_NAME_RE = re.compile(r"Employee'?s\s+name", re.IGNORECASE)
+EMPLOYEE_ADDRESS_RE = re.compile(r"Employee'?s\s+address", re.IGNORECASE)
+ZIP_RE = re.compile(r"\b\d{5}(?:-\d{4})?\b")
 
 
 def detect(text: str) -> bool:
@@ -129,25 +140,8 @@ def _collect_block(lines: List[str], pattern: re.Pattern[str], max_lines: int =
     return []
 
 
-def _extract_box_value(text: str, box_number: int) -> Tuple[Optional[str], Optional[float]]:
-    pattern = re.compile(
-        rf"(?im)^\s*{box_number}(?!\d)[^\n]*?([\$0-9,\.]+)\s*$"
-    )
-    match = pattern.search(text)
-    if match:
-        raw = match.group(1).strip()
-        return raw, _parse_money(raw)
-    # fallback: capture last numeric token on the line
-    pattern_fallback = re.compile(rf"(?im)^\s*{box_number}(?!\d)[^\n]*?([\$0-9,\.]+)")
-    match = pattern_fallback.search(text)
-    if match:
-        raw = match.group(1).strip()
-        return raw, _parse_money(raw)
-    return None, None
-
-
-def _parse_box14(line: str) -> Optional[Dict[str, Any]]:
-    match = BOX14_LINE_RE.match(line)
+def _parse_box14(cell: BoxCell) -> Optional[Dict[str, Any]]:
+    match = BOX14_CELL_RE.match(cell.body)
     if not match:
         return None
     payload = match.group(1).strip()
@@ -173,31 +167,6 @@ def _parse_box14(line: str) -> Optional[Dict[str, Any]]:
     return result
 
 
-def _checkbox_value(text: str, label: str) -> Optional[bool]:
-    pattern = re.compile(rf"{label}[^\n]*", re.IGNORECASE)
-    match = pattern.search(text)
-    if not match:
-        return None
-    snippet = match.group(0)
-    marker_match = re.search(
-        r"(☑|☒|✅|✔|\[\s*[xX]\s*\]|\(\s*[xX]\s*\)|\b[Xx]\b|☐|\[\s*\])",
-        snippet,
-    )
-    if marker_match:
-        marker = marker_match.group(0)
-        if CHECK_TRUE_RE.search(marker):
-            return True
-        if CHECK_FALSE_RE.search(marker):
-            return False
-    # textual cues
-    lowered = snippet.lower()
-    if "yes" in lowered:
-        return True
-    if "no" in lowered:
-        return False
-    return None
-
-
 def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
     if not detect(text):
         return {
@@ -210,6 +179,7 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
         }
 
     lines = text.splitlines()
+    grid = parse_box_grid(text)
     fields: Dict[str, Any] = {}
     fields_clean: Dict[str, Any] = {}
     field_confidence: Dict[str, float] = {}
@@ -232,9 +202,7 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
     if "ein" in fields:
         field_sources["ein"] = {"page": 1, "box": FIELD_BOX_MAP.get("ein", "b")}
 
-    employer_block = _collect_block(
-        lines, re.compile(r"Employer'?s\s+name,\s+address", re.IGNORECASE)
-    )
+    employer_block = _collect_block(lines, EMPLOYER_BLOCK_RE)
     if employer_block:
         fields["employer_name"] = employer_block[0]
         fields_clean["employer_name"] = employer_block[0]
@@ -243,7 +211,7 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
             address = ", ".join(address_lines)
             fields["employer_address"] = address
             fields_clean["employer_address"] = address
-            zip_match = re.search(r"\b\d{5}(?:-\d{4})?\b", address)
+            zip_match = ZIP_RE.search(address)
             if zip_match:
                 zip_val = zip_match.group(0)
                 fields["employer_zip"] = zip_val
@@ -283,7 +251,7 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
     else:
         warnings.append("Missing employee SSN (box a)")
 
-    employee_name_block = _collect_block(lines, re.compile(r"Employee'?s\s+name", re.IGNORECASE))
+    employee_name_block = _collect_block(lines, EMPLOYEE_NAME_RE)
     if employee_name_block:
         fields["employee_name"] = employee_name_block[0]
         fields_clean["employee_name"] = employee_name_block[0]
@@ -292,14 +260,12 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
     else:
         warnings.append("Missing employee name (box e)")
 
-    employee_address_block = _collect_block(
-        lines, re.compile(r"Employee'?s\s+address", re.IGNORECASE)
-    )
+    employee_address_block = _collect_block(lines, EMPLOYEE_ADDRESS_RE)
     if employee_address_block:
         address = ", ".join(employee_address_block)
         fields["employee_address"] = address
         fields_clean["employee_address"] = address
-        zip_match = re.search(r"\b\d{5}(?:-\d{4})?\b", address)
+        zip_match = ZIP_RE.search(address)
         if zip_match:
             zip_val = zip_match.group(0)
             fields["employee_zip"] = zip_val
@@ -319,15 +285,18 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
         warnings.append("Missing employee address (box f)")
 
     # Box 12 codes
-    box12_matches = BOX12_RE.findall(text)
-    if box12_matches:
-        entries = []
-        for suffix, code, amount_raw in box12_matches:
-            amount = _parse_money(amount_raw)
-            entry: Dict[str, Any] = {"box": suffix.lower(), "code": code.upper()}
-            if amount is not None:
-                entry["amount"] = amount
-            entries.append(entry)
+    entries = []
+    for cell in grid.subboxes(12):
+        match = BOX12_CELL_RE.match(cell.body)
+        if not match:
+            continue
+        code, amount_raw = match.groups()
+        amount = _parse_money(amount_raw)
+        entry: Dict[str, Any] = {"box": cell.suffix, "code": code.upper()}
+        if amount is not None:
+            entry["amount"] = amount
+        entries.append(entry)
+    if entries:
         fields["box12"] = entries
         fields_clean["box12"] = [
             {k: v for k, v in entry.items() if k != "box"} for entry in entries
@@ -337,11 +306,11 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
 
     # Numeric boxes
     for box_number, key in BOX_NUMBER_TO_KEY.items():
-        raw, normalized = _extract_box_value(text, box_number)
-        if raw is None and normalized is None:
+        raw = grid.value(str(box_number))
+        if raw is None:
             continue
-        if raw is not None:
-            fields[key] = raw
+        normalized = _parse_money(raw)
+        fields[key] = raw
         if normalized is not None:
             fields_clean[key] = normalized
             field_confidence[key] = 0.8
@@ -350,35 +319,18 @@ def extract(text: str, evidence_key: Optional[str] = None) -> Dict[str, Any]:
             warnings.append(f"Box {box_number} value appears malformed")
 
     # Box 13 checkboxes
-    stat_emp = _checkbox_value(text, "Statutory employee")
-    if stat_emp is not None:
-        fields_clean["box13_statutory_employee"] = stat_emp
-        field_confidence["box13_statutory_employee"] = 0.7
-        field_sources["box13_statutory_employee"] = {
-            "page": 1,
-            "box": FIELD_BOX_MAP.get("box13_statutory_employee", "13"),
-        }
-    retire_plan = _checkbox_value(text, "Retirement plan")
-    if retire_plan is not None:
-        fields_clean["box13_retirement_plan"] = retire_plan
-        field_confidence["box13_retirement_plan"] = 0.7
-        field_sources["box13_retirement_plan"] = {
-            "page": 1,
-            "box": FIELD_BOX_MAP.get("box13_retirement_plan", "13"),
-        }
-    sick_pay = _checkbox_value(text, "Third-party sick pay")
-    if sick_pay is not None:
-        fields_clean["box13_third_party_sick_pay"] = sick_pay
-        field_confidence["box13_third_party_sick_pay"] = 0.7
-        field_sources["box13_third_party_sick_pay"] = {
-            "page": 1,
-            "box": FIELD_BOX_MAP.get("box13_third_party_sick_pay", "13"),
-        }
+    for key, label in BOX13_CHECKBOXES.items():
+        checked = grid.checkbox("13", label)
+        if checked is None:
+            continue
+        fields_clean[key] = checked
+        field_confidence[key] = 0.7
+        field_sources[key] = {"page": 1, "box": FIELD_BOX_MAP.get(key, "13")}
 
     # Box 14 other
     box14_entries: List[Dict[str, Any]] = []
-    for line in lines:
-        parsed = _parse_box14(line)
+    for cell in grid.cells("14"):
+        parsed = _parse_box14(cell)
         if parsed:
             box14_entries.append(parsed)
     if box14_entries:
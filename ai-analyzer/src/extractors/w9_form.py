@@ -2,6 +2,8 @@ import re
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+EXTRACTOR_VERSION = "1"
+
 # Match EIN even when digits are separated by arbitrary non-digit
 # characters (spaces, boxes, stray dashes, underscores, etc.). Between
 # digits we allow any number of characters that are **not** letters or
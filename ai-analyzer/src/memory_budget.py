@@ -0,0 +1,301 @@
+"""Per-request memory accounting and budgets for the analysis pipeline.
+
+:class:`MemoryTracker` measures each stage with :mod:`tracemalloc`.  It
+records the peak allocated above the level when the stage started, and what
+the stage left allocated when it ended.  Tracing slows every allocation in
+the process, so sessions are traced only on demand (``/diagnose``) or when
+sampled.  Only one session is traced at a time.  Allocations from requests
+running alongside it are still counted, so peaks are an upper bound under
+load.
+
+:func:`plan_for` runs before OCR and checks the memory a document is
+expected to need against a budget.  Rasterizing a scan costs about
+``pages x width x height x 3`` bytes at the render DPI, and pdf2image renders
+every page at once.  A document over budget is first rendered at a lower
+DPI, then with fewer pages.  If even that cannot fit, it is rejected with
+:class:`MemoryBudgetExceeded` so the worker is not OOM-killed.  The OCR
+backends read the chosen :class:`OCRPlan` from a context variable.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from common.serve import rss_bytes
+
+MB = 1024 * 1024
+
+# pdf2image's default DPI, and the lowest DPI tesseract still reads reliably.
+DEFAULT_DPI = 200
+MIN_DPI = 100
+# US letter in inches; scans are rarely larger.
+PAGE_INCHES = (8.5, 11.0)
+# pdf2image holds the PPM output and the decoded RGB image at once.
+RASTER_COPIES = 2
+RASTER_CHANNELS = 3
+# Request body, the saved raw copy and the raw-decode fallback string.
+UPLOAD_COPIES = 3
+
+PDF_SIGNATURES = ("pdf_text", "pdf_image")
+_PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when a document cannot fit the budget even when degraded."""
+
+    def __init__(self, message: str, decision: "BudgetDecision") -> None:
+        super().__init__(message)
+        self.decision = decision
+
+
+@dataclass
+class OCRPlan:
+    """How rasterizing OCR backends may render the current document."""
+
+    dpi: int = DEFAULT_DPI
+    # ``None`` renders every page; ``0`` skips rasterizing entirely.
+    max_pages: Optional[int] = None
+    degraded: bool = False
+    # Set by a backend that rendered under a degraded plan.
+    used: bool = False
+
+
+_plan: "ContextVar[Optional[OCRPlan]]" = ContextVar("analyzer_ocr_plan", default=None)
+
+
+def ocr_plan() -> OCRPlan:
+    return _plan.get() or OCRPlan()
+
+
+@contextmanager
+def use_plan(plan: OCRPlan) -> Iterator[OCRPlan]:
+    token = _plan.set(plan)
+    try:
+        yield plan
+    finally:
+        _plan.reset(token)
+
+
+@dataclass
+class BudgetDecision:
+    budget_bytes: int
+    estimate_bytes: int
+    pages: int
+    plan: OCRPlan
+    rejected: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "budget_mb": _mb(self.budget_bytes),
+            "estimate_mb": _mb(self.estimate_bytes),
+            "pages": self.pages,
+            "dpi": self.plan.dpi,
+            "max_pages": self.plan.max_pages,
+            "degraded": self.plan.degraded,
+            "rejected": self.rejected,
+        }
+
+
+def count_pages(pdf_bytes: bytes) -> int:
+    """Page objects in ``pdf_bytes``; at least 1 (object streams hide them)."""
+    return max(len(_PAGE_RE.findall(pdf_bytes)), 1)
+
+
+def raster_bytes(pages: int, dpi: int) -> int:
+    width, height = (int(inches * dpi) for inches in PAGE_INCHES)
+    return pages * width * height * RASTER_CHANNELS * RASTER_COPIES
+
+
+def _fitting_dpi(available: int, pages: int) -> int:
+    per_dot = pages * PAGE_INCHES[0] * PAGE_INCHES[1] * RASTER_CHANNELS * RASTER_COPIES
+    return int(math.sqrt(max(available, 0) / per_dot)) if per_dot else DEFAULT_DPI
+
+
+def plan_for(
+    upload: bytes,
+    signature: str,
+    budget_bytes: int,
+    *,
+    dpi: int = DEFAULT_DPI,
+    min_dpi: int = MIN_DPI,
+) -> BudgetDecision:
+    """Choose an :class:`OCRPlan` for ``upload`` that fits ``budget_bytes``.
+
+    Text-layer PDFs are only rasterized if their text cannot be read, so
+    they are never rejected; at worst that fallback is skipped.
+    """
+    fixed = len(upload) * UPLOAD_COPIES
+    pages = count_pages(upload) if signature in PDF_SIGNATURES else 1
+    decision = BudgetDecision(budget_bytes, fixed, pages, OCRPlan(dpi=dpi))
+    if fixed > budget_bytes:
+        decision.rejected = True
+        raise MemoryBudgetExceeded(
+            f"Upload needs ~{_mb(fixed)} MB, over the {_mb(budget_bytes)} MB memory budget",
+            decision,
+        )
+    if signature not in PDF_SIGNATURES:
+        return decision
+
+    available = budget_bytes - fixed
+    decision.estimate_bytes = fixed + raster_bytes(pages, dpi)
+    if raster_bytes(pages, dpi) <= available:
+        return decision
+    decision.plan.degraded = True
+    fitting = _fitting_dpi(available, pages)
+    if fitting >= min_dpi:
+        decision.plan.dpi = fitting
+    else:
+        decision.plan.dpi = min_dpi
+        decision.plan.max_pages = min(available // raster_bytes(1, min_dpi), pages)
+        if decision.plan.max_pages == 0 and signature == "pdf_image":
+            decision.rejected = True
+            raise MemoryBudgetExceeded(
+                f"Scanned PDF cannot be rendered within the {_mb(budget_bytes)} MB memory budget",
+                decision,
+            )
+    rendered = pages if decision.plan.max_pages is None else decision.plan.max_pages
+    decision.estimate_bytes = fixed + raster_bytes(rendered, decision.plan.dpi)
+    return decision
+
+
+def describe(plan: OCRPlan, pages: int) -> str:
+    """Warning text for a degraded plan."""
+    text = f"OCR degraded to fit the memory budget: rendered at {plan.dpi} DPI"
+    if plan.max_pages is not None and plan.max_pages < pages:
+        text += f", first {plan.max_pages} of {pages} pages"
+    return text
+
+
+# --- accounting -------------------------------------------------------------
+
+_trace_lock = threading.Lock()
+
+
+@dataclass(eq=False)
+class _Frame:
+    name: str
+    start: int
+    peak: int
+
+
+class MemoryTracker:
+    """Peak and retained traced memory per stage of one session, in bytes."""
+
+    def __init__(self) -> None:
+        self.active = False
+        self.skipped: Optional[str] = None
+        self._owns_tracing = False
+        self._frames: List[_Frame] = []
+        self.stages: Dict[str, Dict[str, int]] = {}
+        self.peak_bytes = 0
+        self.net_bytes = 0
+        self.rss_start: Optional[int] = None
+        self.rss_end: Optional[int] = None
+
+    def start(self) -> "MemoryTracker":
+        if not _trace_lock.acquire(blocking=False):
+            self.skipped = "another request is being traced"
+            return self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        self.active = True
+        self.rss_start = rss_bytes()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self._frames = [_Frame("session", current, current)]
+        return self
+
+    def _sample_peak(self) -> int:
+        """Fold the peak since the last reset into every open frame."""
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for frame in self._frames:
+            frame.peak = max(frame.peak, peak)
+        return peak
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.active:
+            yield
+            return
+        self._sample_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        frame = _Frame(name, current, current)
+        self._frames.append(frame)
+        try:
+            yield
+        finally:
+            self._sample_peak()
+            if frame in self._frames:
+                self._frames.remove(frame)
+            end, _ = tracemalloc.get_traced_memory()
+            entry = self.stages.setdefault(name, {"peak_bytes": 0, "net_bytes": 0})
+            entry["peak_bytes"] = max(entry["peak_bytes"], frame.peak - frame.start)
+            entry["net_bytes"] += end - frame.start
+
+    def _update_totals(self) -> None:
+        self._sample_peak()
+        session = self._frames[0]
+        end, _ = tracemalloc.get_traced_memory()
+        self.peak_bytes = session.peak - session.start
+        self.net_bytes = end - session.start
+        self.rss_end = rss_bytes()
+
+    def stop(self) -> None:
+        if not self.active:
+            return
+        try:
+            self._update_totals()
+        finally:
+            self.active = False
+            self._frames = []
+            if self._owns_tracing:
+                tracemalloc.stop()
+            _trace_lock.release()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Totals so far (reports are built before the session ends), in MB."""
+        if self.skipped:
+            return {"traced": False, "reason": self.skipped}
+        if self.active:
+            self._update_totals()
+        # tracemalloc only sees Python allocations; native buffers such as
+        # rendered page images show up in RSS instead.
+        return {
+            "traced": True,
+            "peak_mb": _mb(self.peak_bytes),
+            "net_mb": _mb(self.net_bytes),
+            "rss_start_mb": _mb(self.rss_start) if self.rss_start is not None else None,
+            "rss_mb": _mb(self.rss_end) if self.rss_end is not None else None,
+            "stages": {
+                name: {"peak_mb": _mb(entry["peak_bytes"]), "net_mb": _mb(entry["net_bytes"])}
+                for name, entry in self.stages.items()
+            },
+        }
+
+
+def _mb(value: int) -> float:
+    return round(value / MB, 3)
+
+
+__all__ = [
+    "BudgetDecision",
+    "DEFAULT_DPI",
+    "MIN_DPI",
+    "MemoryBudgetExceeded",
+    "MemoryTracker",
+    "OCRPlan",
+    "count_pages",
+    "describe",
+    "ocr_plan",
+    "plan_for",
+    "raster_bytes",
+    "use_plan",
+]
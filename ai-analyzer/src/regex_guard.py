@@ -0,0 +1,155 @@
+"""Budgeted regex execution for document extractors.
+
+Extractors run their patterns over whole OCR documents.  Garbled or hostile
+input can make a careless pattern backtrack for seconds, so patterns that
+scan entire documents go through :func:`search`, :func:`finditer` and
+:func:`findall` here instead of calling :mod:`re` directly.
+
+Each document gets a :class:`RegexBudget` with a wall-clock budget and a step
+budget (characters scanned across all guarded calls).  When the third-party
+``regex`` engine is installed every call also receives the remaining time as
+a hard timeout, so a single runaway match is interrupted.  Without it the
+budget is enforced between calls.  Either way an exhausted budget degrades to
+"no match" and records a warning instead of raising.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, List, Optional, Pattern, Union
+
+try:  # pragma: no cover - optional dependency
+    import regex as _regex_engine  # type: ignore
+except Exception:  # pragma: no cover - fall back to the stdlib engine
+    _regex_engine = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIME_BUDGET = 2.0
+DEFAULT_STEP_BUDGET = 5_000_000
+
+PatternLike = Union[str, Pattern[str]]
+
+_ACTIVE_BUDGET: ContextVar[Optional["RegexBudget"]] = ContextVar("regex_budget", default=None)
+
+
+@dataclass
+class RegexBudget:
+    """Per-document allowance shared by every guarded regex call.
+
+    Use it as a context manager around detection/extraction of one document::
+
+        with RegexBudget(time_budget=0.5) as budget:
+            payload = extractor.extract(text)
+        warnings.extend(budget.warnings)
+    """
+
+    time_budget: float = DEFAULT_TIME_BUDGET
+    step_budget: int = DEFAULT_STEP_BUDGET
+    elapsed: float = 0.0
+    steps: int = 0
+    warnings: List[str] = field(default_factory=list)
+    _token: Optional[Token] = field(default=None, init=False, repr=False)
+
+    def __enter__(self) -> "RegexBudget":
+        self._token = _ACTIVE_BUDGET.set(self)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._token is not None:
+            _ACTIVE_BUDGET.reset(self._token)
+            self._token = None
+
+    @property
+    def remaining(self) -> float:
+        return max(self.time_budget - self.elapsed, 0.0)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.elapsed >= self.time_budget or self.steps >= self.step_budget
+
+    def _skip(self, label: str, reason: str) -> None:
+        message = f"Pattern '{label}' skipped: {reason}"
+        if message not in self.warnings:
+            self.warnings.append(message)
+        logger.warning("regex budget exceeded", extra={"pattern": label, "reason": reason})
+
+
+def current_budget() -> Optional[RegexBudget]:
+    """Return the budget active in this context, if any."""
+    return _ACTIVE_BUDGET.get()
+
+
+@lru_cache(maxsize=512)
+def _compile(pattern: str, flags: int) -> Any:
+    if _regex_engine is not None:
+        return _regex_engine.compile(pattern, flags)
+    return re.compile(pattern, flags)
+
+
+def _resolve(pattern: PatternLike, flags: int) -> Any:
+    if isinstance(pattern, re.Pattern):
+        # Strip the implicit UNICODE flag so both engines agree on the key.
+        return _compile(pattern.pattern, pattern.flags & ~re.UNICODE)
+    return _compile(pattern, flags)
+
+
+def _run(method: str, pattern: PatternLike, text: str, flags: int, label: Optional[str], pos: int) -> Any:
+    budget = _ACTIVE_BUDGET.get() or RegexBudget()
+    label = label or (pattern.pattern if isinstance(pattern, re.Pattern) else pattern)[:60]
+    if budget.elapsed >= budget.time_budget:
+        budget._skip(label, "time budget exhausted")
+        return None
+    scan = max(len(text) - pos, 0)
+    if budget.steps + scan > budget.step_budget:
+        budget._skip(label, "step budget exhausted")
+        return None
+    budget.steps += scan
+
+    compiled = _resolve(pattern, flags)
+    call = getattr(compiled, method)
+    start = time.monotonic()
+    try:
+        if _regex_engine is not None:
+            result = call(text, pos, timeout=budget.remaining)
+            if method == "finditer":
+                result = list(result)
+        else:
+            result = call(text, pos)
+            if method == "finditer":
+                result = list(result)
+    except TimeoutError:
+        budget.elapsed = budget.time_budget
+        budget._skip(label, "timed out")
+        return None
+    finally:
+        budget.elapsed += time.monotonic() - start
+    return result
+
+
+def search(
+    pattern: PatternLike, text: str, flags: int = 0, *, label: Optional[str] = None, pos: int = 0
+) -> Optional[Any]:
+    """Budgeted ``re.search``; returns ``None`` when the budget runs out."""
+    return _run("search", pattern, text, flags, label, pos)
+
+
+def finditer(
+    pattern: PatternLike, text: str, flags: int = 0, *, label: Optional[str] = None, pos: int = 0
+) -> List[Any]:
+    """Budgeted ``re.finditer`` returning a list; empty when the budget runs out."""
+    return _run("finditer", pattern, text, flags, label, pos) or []
+
+
+def findall(
+    pattern: PatternLike, text: str, flags: int = 0, *, label: Optional[str] = None, pos: int = 0
+) -> List[Any]:
+    """Budgeted ``re.findall``; empty when the budget runs out."""
+    return _run("findall", pattern, text, flags, label, pos) or []
+
+
+__all__ = ["RegexBudget", "current_budget", "search", "finditer", "findall"]
@@ -0,0 +1,254 @@
+"""Cache of finished ``/analyze`` results keyed by document text.
+
+Detection and extraction are deterministic functions of the OCR text, the
+upload filename and the analyzer code, so re-analysing the same document (UI
+refreshes, ``/diagnose`` after ``/analyze``, agent retries) can reuse the
+previous response.  Entries are keyed by :func:`cache_key` - a hash of the
+normalized text, the filename, the detector catalog version and the detector
+version and the analyze-flow version - and carry the version stamp of the
+extractor that produced them, which covers the helpers it uses.
+:meth:`ResultCache.get` recomputes that stamp and drops entries written by an
+older extractor, so a stale result is never served.
+
+The cache has a bounded in-memory LRU tier and an optional on-disk tier (one
+JSON file per entry) that survives restarts and is shared between workers.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from importlib import import_module
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = 1
+
+
+def normalize_cache_text(text: str) -> str:
+    """Normalize line endings and trailing blank space.
+
+    Unlike :func:`nlp_parser.normalize_text` this keeps line structure intact,
+    which the extractors rely on, so the result is also what gets analysed.
+    """
+    if not text:
+        return ""
+    return text.replace("\r\n", "\n").replace("\r", "\n").rstrip()
+
+
+def cache_key(text: str, *, filename: Optional[str], parts: tuple[str, ...] = ()) -> str:
+    """Return the hex digest identifying one analysis of ``text``."""
+    digest = hashlib.sha256()
+    for part in (str(CACHE_FORMAT), *parts, filename or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _helper_modules(module: ModuleType) -> list[str]:
+    """Names of ``module`` and the modules of its package it uses, transitively.
+
+    A helper counts when the module holds it (``from src import regex_guard``)
+    or one of its functions or classes (``from src.extractors.box_grid import
+    parse_box_grid``).
+    """
+    root = module.__name__.split(".", 1)[0] + "."
+    seen = {module.__name__}
+    pending = [module]
+    while pending:
+        current = pending.pop()
+        for value in list(vars(current).values()):
+            if isinstance(value, ModuleType):
+                name = value.__name__
+            else:
+                name = getattr(value, "__module__", None)
+            if not isinstance(name, str) or not name.startswith(root) or name in seen:
+                continue
+            helper = sys.modules.get(name)
+            if helper is not None:
+                seen.add(name)
+                pending.append(helper)
+    return sorted(seen)
+
+
+def _file_hash(module_name: str) -> str:
+    path = getattr(sys.modules.get(module_name), "__file__", None)
+    if not path:
+        return "nosource"
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return "nosource"
+
+
+@lru_cache(maxsize=None)
+def _source_hash(module_name: str) -> str:
+    module = sys.modules.get(module_name)
+    if module is None:
+        return "nosource"
+    digest = hashlib.sha256()
+    for name in _helper_modules(module):
+        digest.update(f"{name}={_file_hash(name)}\n".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def extractor_stamp(module: ModuleType) -> str:
+    """Return the version stamp of an extractor module.
+
+    Combines the module's declared ``EXTRACTOR_VERSION`` with a hash of its
+    source and of the helper modules it uses from the same package
+    (``box_grid``, ``layout_plans``, ``regex_guard`` ...), so edits to any of
+    them invalidate cached results even without a version bump.
+    """
+    declared = getattr(module, "EXTRACTOR_VERSION", "0")
+    return f"{module.__name__}@{declared}+{_source_hash(module.__name__)}"
+
+
+class ResultCache:
+    """Two-tier cache of analysis responses.
+
+    ``max_entries`` bounds the memory tier (``0`` disables caching entirely);
+    ``directory`` enables the disk tier.  Stored and returned payloads are
+    deep copies so callers can mutate responses freely.
+    """
+
+    def __init__(self, max_entries: int = 256, directory: Optional[str | Path] = None) -> None:
+        self.max_entries = max(int(max_entries), 0)
+        self.directory = Path(directory) if directory else None
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with path.open("r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("discarding unreadable cache entry", extra={"path": str(path)})
+            self._discard_disk(key)
+            return None
+        return entry if isinstance(entry, dict) else None
+
+    def _discard_disk(self, key: str) -> None:
+        if self.directory is None:
+            return
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for ``key`` if its extractor is current."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        from_disk = False
+        if entry is None:
+            entry = self._load_disk(key)
+            from_disk = entry is not None
+        if entry is None or not self._is_current(entry):
+            if entry is not None:
+                self.invalidate(key)
+            self.misses += 1
+            return None
+        if from_disk:
+            self._remember(key, entry)
+        self.hits += 1
+        return copy.deepcopy(entry)
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store ``entry``; it must carry the ``extractor`` and ``stamp`` keys."""
+        if not self.enabled:
+            return
+        entry = copy.deepcopy(entry)
+        self._remember(key, entry)
+        if self.directory is None:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(entry, fh, ensure_ascii=False)
+            os.replace(tmp_name, path)
+        except (OSError, TypeError, ValueError):
+            logger.warning("failed to persist cache entry", extra={"path": str(path)}, exc_info=True)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        self._discard_disk(key)
+
+    def clear(self) -> None:
+        """Drop the memory tier; disk entries age out via version stamps."""
+        with self._lock:
+            self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk": str(self.directory) if self.directory else None,
+        }
+
+    @staticmethod
+    def _is_current(entry: Dict[str, Any]) -> bool:
+        module_name = entry.get("extractor")
+        if not module_name:
+            return False
+        module = sys.modules.get(module_name)
+        if module is None:
+            try:
+                module = import_module(module_name)
+            except Exception:
+                return False
+        return entry.get("stamp") == extractor_stamp(module)
+
+
+__all__ = [
+    "ResultCache",
+    "cache_key",
+    "extractor_stamp",
+    "normalize_cache_text",
+]
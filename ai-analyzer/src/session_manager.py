@@ -2,15 +2,23 @@
 from __future__ import annotations
 
 import json
+import os
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 
+DEFAULT_BASE_DIR = Path(__file__).resolve().parents[2] / "tmp" / "sessions"
+
+
 class SessionManager:
-    """Create and manage directories for diagnostic tracing sessions."""
+    """Create and manage directories for diagnostic tracing sessions.
+
+    Sessions are written under ``ANALYZER_SESSION_DIR`` (default
+    ``<repo>/tmp/sessions``).
+    """
 
-    BASE_DIR = Path(__file__).resolve().parents[2] / "tmp" / "sessions"
+    BASE_DIR = Path(os.getenv("ANALYZER_SESSION_DIR") or DEFAULT_BASE_DIR)
     SUBFOLDERS = ("raw", "ocr", "detect", "analyze", "catalog", "report")
 
     @classmethod
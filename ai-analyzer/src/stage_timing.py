@@ -0,0 +1,281 @@
+"""Per-stage timing of analysis sessions and the analyzer's metrics.
+
+:func:`session` opens a :class:`StageTimings` for the current request (nested
+uses share it).  Stages are timed with ``time.perf_counter``; OCR attempts
+are kept per backend and extractor runs per module.  When the outermost
+session closes, its durations are exported as Prometheus histograms labelled
+by the detected ``doc_type``, and ``/diagnose`` reports embed
+:meth:`StageTimings.as_dict`.
+
+Stages, extractor runs and OCR attempts are also recorded as
+:mod:`common.tracing` spans when tracing is enabled.  Closed sessions add
+their stages and ``doc_type`` to the :mod:`common.slow_requests` record.
+
+Layout parse-plan lookups (:mod:`src.extractors.layout_plans`) are counted
+by extractor kind and outcome and listed per session.
+
+``session(trace_memory=True)`` also measures allocations per stage with a
+:class:`src.memory_budget.MemoryTracker`; traced peaks are exported too.
+
+OCR runs through :class:`OCRLimiter`, which bounds concurrent OCR work in
+worker threads and exposes queue depth and in-flight gauges.
+
+``prometheus_client`` is used when installed; otherwise the in-process
+implementation in :mod:`common.metrics` serves the same text format.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+    USING_PROMETHEUS = True
+except ImportError:  # pragma: no cover - prometheus-client is pinned in requirements.txt
+    from common.metrics import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+    USING_PROMETHEUS = False
+
+from common import slow_requests, tracing
+from src.memory_budget import MemoryTracker
+
+T = TypeVar("T")
+
+STAGES = (
+    "upload_read",
+    "raw_save",
+    "ocr",
+    "detect",
+    "extract",
+    "schema_filter",
+    "artifacts",
+)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+UNKNOWN = "unknown"
+
+STAGE_LATENCY = Histogram(
+    "analyzer_stage_duration_seconds",
+    "Time per analysis stage and session",
+    ["stage", "doc_type"],
+    buckets=BUCKETS,
+)
+EXTRACTOR_LATENCY = Histogram(
+    "analyzer_extractor_duration_seconds",
+    "Time spent in one extractor module",
+    ["extractor", "doc_type"],
+    buckets=BUCKETS,
+)
+OCR_BACKEND_LATENCY = Histogram(
+    "analyzer_ocr_backend_duration_seconds",
+    "Time per OCR backend attempt",
+    ["backend", "signature", "outcome"],
+    buckets=BUCKETS,
+)
+OCR_PAGE_LATENCY = Histogram(
+    "analyzer_ocr_page_duration_seconds",
+    "Time per page inside an OCR backend",
+    ["backend"],
+    buckets=BUCKETS,
+)
+MEMORY_BUCKETS = tuple(float(mb * 1024 * 1024) for mb in (1, 4, 16, 64, 128, 256, 512, 1024, 2048))
+STAGE_MEMORY_PEAK = Histogram(
+    "analyzer_stage_memory_peak_bytes",
+    "Peak traced allocation per analysis stage (sampled sessions)",
+    ["stage", "doc_type"],
+    buckets=MEMORY_BUCKETS,
+)
+MEMORY_BUDGET_DECISIONS = Counter(
+    "analyzer_memory_budget_decisions_total",
+    "Uploads degraded or rejected by the per-request memory budget",
+    ["outcome"],
+)
+LAYOUT_PLAN_LOOKUPS = Counter(
+    "analyzer_layout_plan_lookups_total",
+    "Cached layout parse-plan lookups by outcome (hit, miss, rejected)",
+    ["kind", "outcome"],
+)
+OCR_QUEUE_DEPTH = Gauge("analyzer_ocr_queue_depth", "OCR jobs waiting for a worker")
+OCR_IN_FLIGHT = Gauge("analyzer_ocr_in_flight", "OCR jobs currently running")
+
+
+class StageTimings:
+    """Durations of one analysis session, in seconds."""
+
+    def __init__(self, memory: Optional[MemoryTracker] = None) -> None:
+        self.started = time.perf_counter()
+        self.memory = memory
+        self.stages: Dict[str, float] = {}
+        self.extractors: Dict[str, float] = {}
+        self.ocr: List[Dict[str, Any]] = []
+        self.layout_plans: Dict[str, str] = {}
+        self.doc_type = UNKNOWN
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def _memory_stage(self, name: str):
+        return self.memory.stage(name) if self.memory is not None else nullcontext()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            with tracing.span(f"analyzer.{name}"), self._memory_stage(name):
+                yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @contextmanager
+    def extractor(self, module: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            with tracing.span("analyzer.extract", extractor=module), self._memory_stage("extract"):
+                yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.extractors[module] = self.extractors.get(module, 0.0) + elapsed
+            self.add("extract", elapsed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-friendly breakdown in milliseconds (memory in MB)."""
+        data = {
+            "total_ms": _ms(time.perf_counter() - self.started),
+            "stages_ms": {name: _ms(s) for name, s in self.stages.items()},
+            "extractors_ms": {name: _ms(s) for name, s in self.extractors.items()},
+            "ocr": [dict(attempt, duration_ms=_ms(attempt["seconds"])) for attempt in self.ocr],
+        }
+        if self.layout_plans:
+            data["layout_plans"] = dict(self.layout_plans)
+        if self.memory is not None:
+            data["memory"] = self.memory.as_dict()
+        return data
+
+    def export(self) -> None:
+        doc_type = self.doc_type or UNKNOWN
+        for name, seconds in self.stages.items():
+            STAGE_LATENCY.labels(name, doc_type).observe(seconds)
+        STAGE_LATENCY.labels("total", doc_type).observe(time.perf_counter() - self.started)
+        for module, seconds in self.extractors.items():
+            EXTRACTOR_LATENCY.labels(module, doc_type).observe(seconds)
+        if self.memory is not None and not self.memory.skipped:
+            for name, entry in self.memory.stages.items():
+                STAGE_MEMORY_PEAK.labels(name, doc_type).observe(entry["peak_bytes"])
+            STAGE_MEMORY_PEAK.labels("total", doc_type).observe(self.memory.peak_bytes)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+_current: "ContextVar[Optional[StageTimings]]" = ContextVar("analyzer_timings", default=None)
+
+
+@contextmanager
+def session(*, trace_memory: bool = False) -> Iterator[StageTimings]:
+    """Yield the active :class:`StageTimings`, starting one if needed.
+
+    Nested uses share the outermost one, which exports on exit.
+    ``trace_memory`` only applies when a new session is started.
+    """
+    timings = _current.get()
+    if timings is not None:
+        yield timings
+        return
+    timings = StageTimings(MemoryTracker().start() if trace_memory else None)
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+        if timings.memory is not None:
+            timings.memory.stop()
+        timings.export()
+        slow_requests.record_stages(timings.stages)
+        slow_requests.record_stages(timings.extractors, prefix="extractor.")
+        slow_requests.note(doc_type=timings.doc_type)
+
+
+def current() -> Optional[StageTimings]:
+    return _current.get()
+
+
+def record_ocr_attempt(backend: str, signature: str, seconds: float, ok: bool) -> None:
+    """Record one OCR backend attempt (called from worker threads too)."""
+    outcome = "text" if ok else "empty"
+    OCR_BACKEND_LATENCY.labels(backend, signature, outcome).observe(seconds)
+    tracing.record_span("analyzer.ocr.backend", seconds, backend=backend, signature=signature, outcome=outcome)
+    timings = _current.get()
+    if timings is not None:
+        timings.ocr.append({"backend": backend, "signature": signature, "ok": ok, "seconds": seconds})
+
+
+def record_ocr_page(backend: str, seconds: float) -> None:
+    OCR_PAGE_LATENCY.labels(backend).observe(seconds)
+
+
+def record_layout_plan(kind: str, outcome: str) -> None:
+    """Count a layout parse-plan lookup for ``kind`` of extractor."""
+    LAYOUT_PLAN_LOOKUPS.labels(kind, outcome).inc()
+    timings = _current.get()
+    if timings is not None:
+        timings.layout_plans[kind] = outcome
+
+
+def record_budget_decision(outcome: str) -> None:
+    """Count an upload the memory budget ``degraded`` or ``rejected``."""
+    MEMORY_BUDGET_DECISIONS.labels(outcome).inc()
+
+
+class OCRLimiter:
+    """Run blocking OCR in worker threads, at most ``max_concurrency`` at once."""
+
+    def __init__(self, max_concurrency: int = 2) -> None:
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _bind(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        semaphore = self._bind()
+        OCR_QUEUE_DEPTH.inc()
+        try:
+            await semaphore.acquire()
+        finally:
+            OCR_QUEUE_DEPTH.dec()
+        OCR_IN_FLIGHT.inc()
+        try:
+            # to_thread copies the context, so the worker records into the
+            # caller's StageTimings.
+            return await asyncio.to_thread(func, *args)
+        finally:
+            OCR_IN_FLIGHT.dec()
+            semaphore.release()
+
+
+def render_latest() -> bytes:
+    return generate_latest()
+
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "OCRLimiter",
+    "STAGES",
+    "StageTimings",
+    "current",
+    "record_budget_decision",
+    "record_layout_plan",
+    "record_ocr_attempt",
+    "record_ocr_page",
+    "render_latest",
+    "session",
+]
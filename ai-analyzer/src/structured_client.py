@@ -0,0 +1,322 @@
+"""Async client for LLM structured field extraction (``/analyze-ai``).
+
+One :class:`StructuredExtractionClient` per process shares a pooled
+``httpx.AsyncClient`` against an OpenAI-compatible ``/chat/completions``
+endpoint.  Requests are bounded by a semaphore and retried with exponential
+backoff on rate limits, server errors and transport failures, sleeping with
+``asyncio.sleep`` so the event loop keeps serving other requests.  Results are
+cached by a hash of the normalized text (and the prompt/model) for a TTL.
+
+Short texts that arrive within ``batch_window_ms`` of each other are packed
+into one request asking for a ``{"results": [...]}`` array, one object per
+input in order.  If the backend returns anything else the batch is retried
+one text per request, so batching never changes what callers get back.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from common import tracing
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+# Longest Retry-After we honour before falling back to our own backoff.
+MAX_RETRY_AFTER_SECONDS = 10.0
+
+FIELDS_PROMPT = (
+    "Extract structured business fields from the user's text. "
+    "Always return a JSON object with the keys: ein, w2_employee_count, "
+    "quarterly_revenues, entity_type, year_founded, annual_revenue, "
+    "location_state, location_country, minority_owned, female_owned, "
+    "veteran_owned, ppp_reference, ertc_reference. Use null for unknown."
+)
+BATCH_PROMPT = (
+    FIELDS_PROMPT
+    + " The user message is a JSON array of {\"id\", \"text\"} documents. "
+    "Return a JSON object {\"results\": [...]} with one such object per "
+    "document, in the same order."
+)
+
+
+class StructuredExtractionError(Exception):
+    """Raised when the backend cannot produce structured fields."""
+
+
+def text_key(model: str, text: str) -> str:
+    """Content hash identifying one extraction of ``text``."""
+    normalized = text.replace("\r\n", "\n").strip()
+    digest = hashlib.sha256()
+    for part in (model, FIELDS_PROMPT, normalized):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+@dataclass
+class _Pending:
+    key: str
+    text: str
+    future: asyncio.Future
+
+
+@dataclass
+class _LoopState:
+    client: httpx.AsyncClient
+    semaphore: asyncio.Semaphore
+    queue: List[_Pending] = field(default_factory=list)
+    flush_handle: Optional[asyncio.TimerHandle] = None
+    inflight: Dict[str, asyncio.Future] = field(default_factory=dict)
+    tasks: Set[asyncio.Task] = field(default_factory=set)
+
+    def spawn(self, coro: Any) -> None:
+        # Keep a reference so the event loop does not drop running work.
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+class StructuredExtractionClient:
+    """Pooled, cached, batched structured-extraction calls."""
+
+    def __init__(
+        self,
+        *,
+        api_key: Optional[str],
+        base_url: str = DEFAULT_BASE_URL,
+        model: str = "gpt-4o-mini",
+        timeout: float = 15.0,
+        max_concurrency: int = 4,
+        max_attempts: int = 3,
+        backoff_seconds: float = 1.0,
+        cache_size: int = 512,
+        cache_ttl_seconds: float = 3600.0,
+        batch_max_items: int = 4,
+        batch_max_chars: int = 2000,
+        batch_window_ms: float = 15.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.max_attempts = max(int(max_attempts), 1)
+        self.backoff_seconds = backoff_seconds
+        self.cache_size = max(int(cache_size), 0)
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.batch_max_items = max(int(batch_max_items), 1)
+        self.batch_max_chars = batch_max_chars
+        self.batch_window = batch_window_ms / 1000
+        self.transport = transport
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._state: Optional[_LoopState] = None
+        self.stats = {"requests": 0, "batches": 0, "cache_hits": 0, "retries": 0}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key) or self.base_url != DEFAULT_BASE_URL
+
+    def _bind(self) -> _LoopState:
+        # The pool, semaphore and queue belong to the running event loop.
+        loop = asyncio.get_running_loop()
+        if self._state is None or self._loop is not loop:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._state = _LoopState(
+                client=httpx.AsyncClient(
+                    base_url=self.base_url,
+                    headers=headers,
+                    timeout=self.timeout,
+                    transport=self.transport,
+                    limits=httpx.Limits(max_connections=self.max_concurrency),
+                ),
+                semaphore=asyncio.Semaphore(self.max_concurrency),
+            )
+            self._loop = loop
+        return self._state
+
+    async def aclose(self) -> None:
+        if self._state is not None:
+            await self._state.client.aclose()
+        self._state = None
+        self._loop = None
+
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.cache_ttl_seconds:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        self.stats["cache_hits"] += 1
+        return json.loads(json.dumps(value))
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        if not self.cache_size:
+            return
+        self._cache[key] = (time.monotonic(), json.loads(json.dumps(value)))
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    async def extract(self, text: str) -> Dict[str, Any]:
+        """Return the structured fields for ``text``.
+
+        Raises :class:`StructuredExtractionError` when every attempt fails.
+        """
+        with tracing.span("llm.extract", model=self.model, chars=len(text)) as span:
+            return await self._extract(text, span)
+
+    async def _extract(self, text: str, span: Any) -> Dict[str, Any]:
+        key = text_key(self.model, text)
+        cached = self._cached(key)
+        span.set_attribute("cache_hit", cached is not None)
+        if cached is not None:
+            return cached
+        state = self._bind()
+        pending = state.inflight.get(key)
+        if pending is None:
+            pending = asyncio.get_running_loop().create_future()
+            state.inflight[key] = pending
+            if self.batch_max_items > 1 and len(text) <= self.batch_max_chars:
+                self._enqueue(state, _Pending(key, text, pending))
+            else:
+                state.spawn(self._run_single(state, _Pending(key, text, pending)))
+        result = await asyncio.shield(pending)
+        return json.loads(json.dumps(result))
+
+    def _enqueue(self, state: _LoopState, item: _Pending) -> None:
+        state.queue.append(item)
+        if len(state.queue) >= self.batch_max_items:
+            self._flush(state)
+        elif state.flush_handle is None:
+            state.flush_handle = asyncio.get_running_loop().call_later(
+                self.batch_window, self._flush, state
+            )
+
+    def _flush(self, state: _LoopState) -> None:
+        if state.flush_handle is not None:
+            state.flush_handle.cancel()
+            state.flush_handle = None
+        batch, state.queue = state.queue, []
+        if len(batch) == 1:
+            state.spawn(self._run_single(state, batch[0]))
+        elif batch:
+            state.spawn(self._run_batch(state, batch))
+
+    def _settle(self, state: _LoopState, item: _Pending, result: Any) -> None:
+        state.inflight.pop(item.key, None)
+        if item.future.done():
+            return
+        if isinstance(result, BaseException):
+            item.future.set_exception(result)
+            # Callers may have gone away; do not log it as never retrieved.
+            item.future.exception()
+        else:
+            self._remember(item.key, result)
+            item.future.set_result(result)
+
+    async def _run_single(self, state: _LoopState, item: _Pending) -> None:
+        try:
+            content = await self._post(
+                state,
+                [{"role": "system", "content": FIELDS_PROMPT}, {"role": "user", "content": item.text}],
+            )
+            result: Any = _parse_object(content)
+        except Exception as exc:
+            result = exc if isinstance(exc, StructuredExtractionError) else StructuredExtractionError(str(exc))
+        self._settle(state, item, result)
+
+    async def _run_batch(self, state: _LoopState, batch: List[_Pending]) -> None:
+        self.stats["batches"] += 1
+        documents = [{"id": i, "text": item.text} for i, item in enumerate(batch)]
+        try:
+            content = await self._post(
+                state,
+                [
+                    {"role": "system", "content": BATCH_PROMPT},
+                    {"role": "user", "content": json.dumps(documents, ensure_ascii=False)},
+                ],
+            )
+            results = _parse_object(content).get("results")
+            if not isinstance(results, list) or len(results) != len(batch):
+                raise ValueError("batch result shape mismatch")
+            if not all(isinstance(r, dict) for r in results):
+                raise ValueError("batch result is not a list of objects")
+        except Exception:
+            logger.info("structured batch unusable; retrying individually", extra={"size": len(batch)})
+            await asyncio.gather(*(self._run_single(state, item) for item in batch))
+            return
+        for item, result in zip(batch, results):
+            result.pop("id", None)
+            self._settle(state, item, result)
+
+    async def _post(self, state: _LoopState, messages: List[Dict[str, str]]) -> str:
+        body = {
+            "model": self.model,
+            "messages": messages,
+            "response_format": {"type": "json_object"},
+        }
+        last_exc: Optional[Exception] = None
+        async with state.semaphore:
+            for attempt in range(self.max_attempts):
+                self.stats["requests"] += 1
+                delay = self.backoff_seconds * 2**attempt
+                try:
+                    resp = await state.client.post("/chat/completions", json=body)
+                    if resp.status_code in RETRY_STATUSES:
+                        delay = _retry_after(resp, delay)
+                        raise httpx.HTTPStatusError(
+                            f"retryable status {resp.status_code}", request=resp.request, response=resp
+                        )
+                    resp.raise_for_status()
+                    return resp.json()["choices"][0]["message"]["content"]
+                except (httpx.TransportError, httpx.HTTPStatusError) as exc:
+                    last_exc = exc
+                    status = exc.response.status_code if isinstance(exc, httpx.HTTPStatusError) else None
+                    if status is not None and status not in RETRY_STATUSES:
+                        break
+                    if attempt + 1 < self.max_attempts:
+                        self.stats["retries"] += 1
+                        await asyncio.sleep(delay)
+        raise StructuredExtractionError("structured extraction failed") from last_exc
+
+
+def _retry_after(resp: httpx.Response, default: float) -> float:
+    value = resp.headers.get("retry-after")
+    try:
+        seconds = float(value) if value is not None else default
+    except ValueError:
+        return default
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER_SECONDS)
+
+
+def _parse_object(content: Any) -> Dict[str, Any]:
+    data = json.loads(content) if isinstance(content, str) else content
+    if not isinstance(data, dict):
+        raise StructuredExtractionError("expected a JSON object")
+    return data
+
+
+__all__ = [
+    "FIELDS_PROMPT",
+    "StructuredExtractionClient",
+    "StructuredExtractionError",
+    "text_key",
+]
@@ -0,0 +1,9 @@
+import pytest
+
+from src.session_manager import SessionManager
+
+
+@pytest.fixture(autouse=True)
+def _session_dir(tmp_path, monkeypatch):
+    """Keep diagnostic session artifacts out of the repository."""
+    monkeypatch.setattr(SessionManager, "BASE_DIR", tmp_path / "sessions")
@@ -0,0 +1,82 @@
+"""Adversarial inputs for the extractor regexes.
+
+Each entry repeats a fragment that used to drive one of the document patterns
+into heavy backtracking (long runs of digits, spaces, newlines, half-finished
+summary rows, ...).  ``tests/test_regex_budget.py`` runs every extractor over
+the corpus; run this module directly to print a timing table::
+
+    python tests/pathological_corpus.py 100000
+"""
+from __future__ import annotations
+
+import importlib
+import pkgutil
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FRAGMENTS: Dict[str, str] = {
+    "bank_chain": "Beginning balance 1.00 Total credits 2.00 ",
+    "account": "Account number: x ",
+    "owner": "Owner Name: a\n",
+    "digits": "1",
+    "digitcomma": "1,",
+    "spaces": " ",
+    "newlines": "\n",
+    "colon": ": ",
+    "quarter": "Q1 2020 ",
+    "dollars": "$",
+    "word": "abc ",
+    "caps": "A b ",
+    "dotdigit": "1.",
+    "percent": "ownership 1 ",
+    "dash": "- ",
+    "date": "January 1, 2020 ",
+    "name": "Company Name Name Name ",
+}
+
+
+def corpus(size: int) -> Iterator[Tuple[str, str]]:
+    """Yield ``(case, text)`` pairs of roughly ``size`` characters."""
+    for case, fragment in FRAGMENTS.items():
+        yield case, fragment * max(size // len(fragment), 1)
+
+
+def targets() -> List[Tuple[str, Callable[[str], object]]]:
+    """Every document entry point that runs regexes over raw text."""
+    for path in (str(ROOT), str(ROOT.parent)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    import src.extractors as extractors
+    from nlp_parser import extract_fields
+    from src.detectors import detect
+
+    found: List[Tuple[str, Callable[[str], object]]] = []
+    for info in pkgutil.iter_modules(extractors.__path__):
+        module = importlib.import_module(f"src.extractors.{info.name}")
+        for attr in ("extract", "extract_form1099_summary"):
+            fn = getattr(module, attr, None)
+            if callable(fn):
+                found.append((f"{info.name}.{attr}", fn))
+    found.append(("nlp_parser.extract_fields", extract_fields))
+    found.append(("detectors.detect", detect))
+    return found
+
+
+def main(size: int) -> None:
+    for name, fn in targets():
+        worst = ("", 0.0)
+        for case, text in corpus(size):
+            start = time.perf_counter()
+            fn(text)
+            elapsed = time.perf_counter() - start
+            if elapsed > worst[1]:
+                worst = (case, elapsed)
+        print(f"{name:<60} {worst[1] * 1000:8.1f} ms  ({worst[0]})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,54 @@
+"""Reference documents for the memory tests, as text-layer PDFs.
+
+The text fixtures below are rendered into a minimal one-page PDF, so an
+upload goes through the real PDF text extraction without OCR binaries.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+REFERENCE_FIXTURES = (
+    "business_plan_sample.txt",
+    "invoice_sample.txt",
+    "utility_bill_sample.txt",
+    "w9_form_sample.txt",
+)
+
+
+def documents() -> Dict[str, str]:
+    """Reference document text by name (fixture stem)."""
+    return {Path(name).stem: (FIXTURES / name).read_text(encoding="utf-8") for name in REFERENCE_FIXTURES}
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_pdf(text: str) -> bytes:
+    """Render ``text`` into a minimal one-page PDF with a text layer."""
+    ops = ["BT", "/F1 10 Tf", "12 TL", "50 760 Td"]
+    ops += ["(%s) Tj T*" % _pdf_escape(line) for line in text.splitlines()[:60]]
+    ops.append("ET")
+    stream = "\n".join(ops).encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
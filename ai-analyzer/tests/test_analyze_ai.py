@@ -1,7 +1,10 @@
 import json
 import env_setup  # noqa: F401
+import httpx
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import ai_analyzer.main as main
+from src.structured_client import StructuredExtractionClient
 
 client = TestClient(main.app)
 
@@ -23,20 +26,20 @@ def test_analyze_ai_json(monkeypatch):
         "ertc_reference": None,
     }
 
-    class DummyResp:
-        choices = [
-            type(
-                "C",
-                (),
-                {"message": type("M", (), {"content": json.dumps(sample)})()},
-            )
-        ]
+    stub = FastAPI()
 
-    def fake_create(**_):
-        return DummyResp()
+    @stub.post("/v1/chat/completions")
+    async def completions():
+        return {"choices": [{"message": {"content": json.dumps(sample)}}]}
 
     monkeypatch.setattr(
-        main.openai_client.chat.completions, "create", fake_create
+        main,
+        "structured_client",
+        StructuredExtractionClient(
+            api_key="test-key",
+            base_url="http://stub/v1",
+            transport=httpx.ASGITransport(app=stub),
+        ),
     )
 
     resp = client.post("/analyze-ai", json={"text": "hello"})
@@ -31,3 +31,16 @@ def test_extract_bank_statement_fields(sample_bank_pdf_text: str) -> None:
     assert fields["totals"]["withdrawals"] == "3300.00"
     assert result["field_confidence"]["ending_balance"] >= 0.7
     assert result["confidence"] >= 0.6
+
+
+def test_masked_account_number_does_not_borrow_digits_from_next_line(sample_bank_pdf_text: str) -> None:
+    text = sample_bank_pdf_text.replace(
+        "Account Number: ****1234\nStatement Period: 06/01/2025 - 06/30/2025\n",
+        "Account Number: ****\nStatement Period: January 1, 2024 - January 31, 2024\n",
+    )
+    assert "account_number_last4" not in extract(text)["fields"]
+
+
+def test_later_account_label_is_used_when_first_has_no_digits(sample_bank_pdf_text: str) -> None:
+    text = "Account number: see below\n" + sample_bank_pdf_text
+    assert extract(text)["fields"]["account_number_last4"] == "1234"
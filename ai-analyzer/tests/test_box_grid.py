@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from src.extractors.box_grid import parse_box_grid
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+W2_SAMPLE = (FIXTURES / "w2_sample_pdf.txt").read_text()
+NEC_SAMPLE = (FIXTURES / "irs_1099_nec_copyB.pdf").read_text()
+
+
+def test_grid_labels_numeric_and_lettered_boxes() -> None:
+    grid = parse_box_grid(W2_SAMPLE)
+    assert grid.value("1") == "55,000.00"
+    assert grid.value("6") == "797.50"
+    assert [cell.box for cell in grid.subboxes(12)] == ["12a", "12b"]
+    assert grid.first("12b").body.split() == ["DD", "3200.00"]
+    # Address lines and ZIP codes are not mistaken for boxes.
+    assert "9" not in grid
+    assert all(1 <= int(cell.number) <= 20 for box in grid for cell in grid.cells(box))
+
+
+def test_grid_reads_checkbox_segments() -> None:
+    grid = parse_box_grid(W2_SAMPLE)
+    assert grid.checkbox("13", "statutory employee") is True
+    assert grid.checkbox("13", "retirement plan") is False
+    assert grid.checkbox("13", "third-party sick pay") is False
+    assert grid.checkbox("13", "missing label") is None
+
+
+def test_grid_textual_checkbox_cues() -> None:
+    grid = parse_box_grid("13 Statutory employee: Yes Retirement plan: No\n")
+    assert grid.checkbox("13", "statutory employee") is True
+    assert grid.checkbox("13", "retirement plan") is False
+
+
+def test_grid_reads_checkbox_lines_below_the_cell() -> None:
+    text = "13 Statutory employee (x)\nRetirement plan [X]\nThird-party sick pay [ ]\n14 Other\n"
+    grid = parse_box_grid(text)
+    assert grid.checkbox("13", "statutory employee") is True
+    assert grid.checkbox("13", "retirement plan") is True
+    assert grid.checkbox("13", "third-party sick pay") is False
+    assert grid.first("13").body.strip() == "Statutory employee (x)"
+
+
+def test_grid_tracks_line_numbers_without_inline_subboxes() -> None:
+    grid = parse_box_grid(NEC_SAMPLE, inline_subboxes=False)
+    lines = NEC_SAMPLE.splitlines()
+    cell = grid.first("4")
+    assert lines[cell.line].startswith("4 Federal income tax withheld")
+    assert grid.checkbox("2", "payer") is True
@@ -0,0 +1,21 @@
+import sys
+
+import src.extractors as extractors
+
+
+def test_extractor_modules_import_on_demand() -> None:
+    assert "utility_bill" in extractors.module_names()
+    assert callable(extractors.detect_utility_bill)
+    assert extractors.extract_utility_bill is sys.modules["src.extractors.utility_bill"].extract
+
+
+def test_extractors_table_lists_exported_types() -> None:
+    assert set(extractors.EXTRACTORS) == {
+        "business_plan",
+        "utility_bill",
+        "installer_contract",
+        "equipment_specs",
+        "invoices_or_quotes",
+        "energy_savings_report",
+    }
+    assert extractors.EXTRACTORS["business_plan"]["extract"] is extractors.extract_business_plan
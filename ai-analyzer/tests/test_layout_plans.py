@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from src import stage_timing
+from src.extractors.irs_1099_summary import extract_form1099_summary
+from src.extractors.layout_plans import PLAN_CACHE, layout_signature
+from src.extractors.payroll_register import extract as extract_payroll
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def _read(name: str) -> str:
+    return (FIXTURES / name).read_text()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_plans():
+    PLAN_CACHE.clear()
+    yield
+    PLAN_CACHE.clear()
+
+
+def test_signature_ignores_names_and_amounts() -> None:
+    first = [["Payroll Register"], ["Name", "Net Pay"], ["Jane Smith", "1,125.25"]]
+    second = [["Payroll Register"], ["Name", "Net Pay"], ["John Doe", "880.00"]]
+    shifted = [["Payroll Register"], ["Company: Demo"], ["Name", "Net Pay"]]
+    assert layout_signature("payroll_register", first) == layout_signature("payroll_register", second)
+    assert layout_signature("payroll_register", first) != layout_signature("payroll_register", shifted)
+
+
+def test_recurring_payroll_layout_reuses_plan() -> None:
+    sample = _read("payroll_register_adp.pdf")
+    with stage_timing.session() as timings:
+        first = extract_payroll(sample)
+        assert timings.as_dict()["layout_plans"] == {"payroll_register": "miss"}
+    with stage_timing.session() as timings:
+        second = extract_payroll(sample.replace("Jane Smith", "Mary Major"))
+        assert timings.as_dict()["layout_plans"] == {"payroll_register": "hit"}
+
+    assert "layout_plan" not in second["parse_summary"]
+    assert PLAN_CACHE.stats()["hits"] == 1
+    assert second["fields_clean"]["employees"][0]["employee"]["name"] == "Mary Major"
+    assert second["fields_clean"]["document_totals"] == first["fields_clean"]["document_totals"]
+
+
+def test_plan_failing_validation_falls_back_to_discovery() -> None:
+    sample = _read("payroll_register_adp.pdf")
+    extract_payroll(sample)
+    # Same shape, different header wording: the cached column map must not apply.
+    reordered = sample.replace("Gross Pay,Regular Pay", "Regular Pay,Gross Pay")
+    with stage_timing.session() as timings:
+        result = extract_payroll(reordered)
+        assert timings.layout_plans == {"payroll_register": "rejected"}
+
+    assert PLAN_CACHE.stats()["rejected"] == 1
+    assert result["fields_clean"]["employees"][0]["pay_components"]["gross_pay"] == pytest.approx(1200.0)
+
+
+def test_1099_summary_reuses_plan() -> None:
+    sample = _read("1099_summary_qb.csv")
+    first = extract_form1099_summary(sample)
+    second = extract_form1099_summary(sample)
+    assert PLAN_CACHE.stats()["hits"] == 1
+    assert second["fields_clean"] == first["fields_clean"]
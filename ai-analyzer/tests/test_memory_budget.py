@@ -0,0 +1,158 @@
+import io
+import re
+import uuid
+
+import pytest
+import env_setup  # noqa: F401
+from fastapi.testclient import TestClient
+
+from ai_analyzer.main import app, settings
+from reference_documents import documents, text_pdf
+from src import memory_budget, stage_timing
+from src.memory_budget import MB, MemoryBudgetExceeded, MemoryTracker, plan_for
+
+client = TestClient(app)
+
+# Peak traced allocation allowed for one reference document, end to end.
+REFERENCE_PEAK_MB = 10.0
+
+
+def _sample(name: str, **labels: str) -> float:
+    for line in stage_timing.render_latest().decode().splitlines():
+        metric, _, value = line.rpartition(" ")
+        if metric.partition("{")[0] != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', metric))
+        if all(found.get(k) == v for k, v in labels.items()):
+            return float(value)
+    return 0.0
+
+
+def _scan(pages: int) -> bytes:
+    """Looks like an image-only PDF with ``pages`` pages to the planner."""
+    return b"%PDF-1.4\n" + b"<< /Type /Page /Resources << /XObject /Image >> >>\n" * pages
+
+
+def test_plan_keeps_defaults_within_budget() -> None:
+    decision = plan_for(_scan(2), "pdf_image", 256 * MB)
+    assert decision.plan == memory_budget.OCRPlan()
+    assert decision.pages == 2 and not decision.rejected
+
+
+def test_plan_lowers_dpi_then_pages() -> None:
+    lower_dpi = plan_for(_scan(4), "pdf_image", 64 * MB)
+    assert lower_dpi.plan.degraded and 100 <= lower_dpi.plan.dpi < 200
+    assert lower_dpi.plan.max_pages is None
+    assert lower_dpi.estimate_bytes <= 64 * MB
+
+    fewer_pages = plan_for(_scan(50), "pdf_image", 64 * MB)
+    assert fewer_pages.plan.dpi == 100 and fewer_pages.plan.max_pages == 11
+    assert fewer_pages.estimate_bytes <= 64 * MB
+    assert memory_budget.describe(fewer_pages.plan, 50).endswith("first 11 of 50 pages")
+
+
+def test_plan_rejects_what_cannot_fit() -> None:
+    with pytest.raises(MemoryBudgetExceeded) as exc:
+        plan_for(_scan(3), "pdf_image", 4 * MB)
+    assert exc.value.decision.rejected
+    with pytest.raises(MemoryBudgetExceeded, match="over the 1.0 MB memory budget"):
+        plan_for(b"x" * MB, "other", MB)
+    # A text layer is read without rendering; only the fallback is dropped.
+    text_pdf_plan = plan_for(_scan(3).replace(b"/Image", b"/Font"), "pdf_text", 4 * MB)
+    assert text_pdf_plan.plan.max_pages == 0
+
+
+def test_tracker_reports_nested_stage_peaks() -> None:
+    tracker = MemoryTracker().start()
+    try:
+        with tracker.stage("ocr"):
+            with tracker.stage("detect"):
+                block = bytearray(4 * MB)
+                del block
+            kept = bytearray(MB)
+    finally:
+        tracker.stop()
+    assert tracker.stages["detect"]["peak_bytes"] >= 4 * MB
+    assert tracker.stages["detect"]["net_bytes"] < MB
+    assert tracker.stages["ocr"]["peak_bytes"] >= 4 * MB
+    assert tracker.stages["ocr"]["net_bytes"] >= MB
+    assert tracker.peak_bytes >= 4 * MB
+    assert len(kept) == MB
+
+
+def test_only_one_session_is_traced_at_a_time() -> None:
+    first = MemoryTracker().start()
+    try:
+        second = MemoryTracker().start()
+        assert second.as_dict() == {"traced": False, "reason": "another request is being traced"}
+        second.stop()
+    finally:
+        first.stop()
+    third = MemoryTracker().start()
+    assert third.active
+    third.stop()
+
+
+def test_sampled_sessions_export_peaks() -> None:
+    with stage_timing.session(trace_memory=True) as timings:
+        with timings.stage("detect"):
+            bytearray(2 * MB)
+        timings.doc_type = "memory_test"
+    assert timings.as_dict()["memory"]["stages"]["detect"]["peak_mb"] >= 2
+    assert _sample("analyzer_stage_memory_peak_bytes_count", stage="detect", doc_type="memory_test") == 1
+
+
+@pytest.mark.parametrize("name", sorted(documents()))
+def test_reference_documents_stay_under_peak_bound(name: str) -> None:
+    text = documents()[name] + f"\nReference {uuid.uuid4().hex}\n"
+    resp = client.post(
+        "/diagnose", files={"file": (f"{name}.pdf", io.BytesIO(text_pdf(text)), "application/pdf")}
+    )
+    assert resp.status_code == 200
+    report = resp.json()
+    assert report["ocr"]["status"] == "success"
+    memory = report["timings"]["memory"]
+    assert memory["traced"] is True
+    assert {"raw_save", "ocr", "detect"} <= set(memory["stages"])
+    assert 0 < memory["peak_mb"] < REFERENCE_PEAK_MB
+    assert all(stage["peak_mb"] <= memory["peak_mb"] for stage in memory["stages"].values())
+
+
+def test_analyze_rejects_uploads_over_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "MEMORY_BUDGET_MB", 4)
+    resp = client.post("/analyze", files={"file": ("scan.pdf", io.BytesIO(_scan(3)), "application/pdf")})
+    assert resp.status_code == 413
+    assert "memory budget" in resp.json()["error"]
+
+    report = client.post("/diagnose", files={"file": ("scan.pdf", io.BytesIO(_scan(3)), "application/pdf")}).json()
+    assert report["ocr"]["status"] == "rejected"
+    assert report["memory_budget"]["rejected"] is True
+
+
+def test_degraded_ocr_is_reported(monkeypatch: pytest.MonkeyPatch) -> None:
+    seen = []
+
+    def fake_raster_ocr(_: bytes) -> str:
+        plan = memory_budget.ocr_plan()
+        seen.append((plan.dpi, plan.max_pages))
+        plan.used = True
+        return "Founded 2019\nW-2 employees: 25\nEIN 12-3456789\n" + uuid.uuid4().hex
+
+    monkeypatch.setattr(settings, "MEMORY_BUDGET_MB", 64)
+    monkeypatch.setattr("ai_analyzer.main.extract_text", fake_raster_ocr)
+    resp = client.post("/analyze", files={"file": ("scan.pdf", io.BytesIO(_scan(50)), "application/pdf")})
+    assert resp.status_code == 200
+    assert seen == [(100, 11)]
+    assert "OCR degraded to fit the memory budget: rendered at 100 DPI, first 11 of 50 pages" in resp.json()["warnings"]
+
+    report = client.post("/diagnose", files={"file": ("scan.pdf", io.BytesIO(_scan(50)), "application/pdf")}).json()
+    assert report["memory_budget"] == {
+        "budget_mb": 64.0,
+        "estimate_mb": report["memory_budget"]["estimate_mb"],
+        "pages": 50,
+        "dpi": 100,
+        "max_pages": 11,
+        "degraded": True,
+        "rejected": False,
+        "applied": True,
+    }
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from ai_analyzer import ocr_utils
+from ai_analyzer.ocr_utils import (
+    OTHER,
+    PDF_IMAGE,
+    PDF_TEXT,
+    RASTER,
+    TextBackend,
+    configure_backends,
+    extract_text,
+    input_signature,
+    ordered_backends,
+)
+
+SAMPLE_PDF = Path(__file__).resolve().parent / "payroll_records_bluewave_fixed.pdf"
+
+
+@pytest.fixture
+def registry(monkeypatch: pytest.MonkeyPatch) -> dict[str, TextBackend]:
+    backends: dict[str, TextBackend] = {}
+    monkeypatch.setattr(ocr_utils, "BACKENDS", backends)
+    monkeypatch.setattr(ocr_utils, "_order", ())
+    monkeypatch.setattr(ocr_utils, "_adaptive", True)
+    return backends
+
+
+def _add(registry: dict[str, TextBackend], name: str, func, *, last_resort: bool = False) -> None:
+    registry[name] = TextBackend(
+        name=name, extract=func, signatures=(OTHER,), last_resort=last_resort
+    )
+
+
+def test_input_signature_classification() -> None:
+    assert input_signature(SAMPLE_PDF.read_bytes()) == PDF_TEXT
+    assert input_signature(b"%PDF-1.4 /XObject /Subtype /Image") == PDF_IMAGE
+    assert input_signature(b"\x89PNG\r\n\x1a\n....") == RASTER
+    assert input_signature(b"plain words") == OTHER
+
+
+def test_text_layer_pdf_uses_fast_backend_first() -> None:
+    configure_backends(ocr_utils.DEFAULT_ORDER)
+    names = [backend.name for backend in ordered_backends(PDF_TEXT)]
+    assert names[0] == "pdfium"
+    assert names[-1] == "raw_decode"
+    assert "EIN 12-3456789" in extract_text(SAMPLE_PDF.read_bytes())
+
+
+def test_failed_backend_falls_through_and_records_stats(registry) -> None:
+    def broken(_: bytes) -> str:
+        raise RuntimeError("boom")
+
+    _add(registry, "broken", broken)
+    _add(registry, "works", lambda data: "decoded text")
+    configure_backends(["broken", "works"])
+
+    assert extract_text(b"abc") == "decoded text"
+    stats = ocr_utils.backend_stats()
+    assert stats["broken"][OTHER]["successes"] == 0
+    assert stats["works"][OTHER]["success_rate"] == 1.0
+
+
+def test_adaptive_order_prefers_reliable_then_fastest(registry) -> None:
+    _add(registry, "slow", lambda data: "slow")
+    _add(registry, "fast", lambda data: "fast")
+    _add(registry, "flaky", lambda data: "")
+    _add(registry, "raw", lambda data: "raw", last_resort=True)
+    configure_backends(["flaky", "slow", "fast", "raw"])
+    assert [b.name for b in ordered_backends(OTHER)] == ["flaky", "slow", "fast", "raw"]
+
+    for _ in range(ocr_utils.MIN_SAMPLES):
+        ocr_utils._record(registry["flaky"], OTHER, 0.001, False)
+        ocr_utils._record(registry["slow"], OTHER, 0.5, True)
+        ocr_utils._record(registry["fast"], OTHER, 0.01, True)
+    assert [b.name for b in ordered_backends(OTHER)] == ["fast", "slow", "flaky", "raw"]
+
+    configure_backends(["flaky", "slow", "fast", "raw"], adaptive=False)
+    assert [b.name for b in ordered_backends(OTHER)] == ["flaky", "slow", "fast", "raw"]
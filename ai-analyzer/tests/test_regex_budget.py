@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import re
+import time
+
+import pytest
+
+from src import regex_guard
+from src.regex_guard import RegexBudget
+from pathological_corpus import corpus, targets
+
+CORPUS_SIZE = 20_000
+PER_CALL_LIMIT = 1.0
+
+
+@pytest.mark.parametrize("name,fn", targets(), ids=lambda value: value if isinstance(value, str) else "")
+def test_extractors_stay_linear_on_pathological_input(name, fn) -> None:
+    for case, text in corpus(CORPUS_SIZE):
+        start = time.perf_counter()
+        fn(text)
+        elapsed = time.perf_counter() - start
+        assert elapsed < PER_CALL_LIMIT, f"{name} took {elapsed:.2f}s on {case!r}"
+
+
+def test_exhausted_time_budget_skips_pattern() -> None:
+    with RegexBudget(time_budget=0.0) as budget:
+        assert regex_guard.search(r"\d+", "abc 123", label="digits") is None
+        assert regex_guard.finditer(r"\d+", "abc 123", label="digits") == []
+    assert budget.exhausted
+    assert budget.warnings == ["Pattern 'digits' skipped: time budget exhausted"]
+
+
+def test_step_budget_counts_scanned_characters() -> None:
+    with RegexBudget(step_budget=10) as budget:
+        assert regex_guard.search(r"b", "abc").group(0) == "b"
+        assert regex_guard.findall(r"\d", "1234567890", label="digits") == []
+    assert budget.steps == 3
+    assert budget.warnings == ["Pattern 'digits' skipped: step budget exhausted"]
+
+
+def test_budget_is_scoped_to_context() -> None:
+    assert regex_guard.current_budget() is None
+    with RegexBudget() as outer:
+        with RegexBudget() as inner:
+            assert regex_guard.current_budget() is inner
+        assert regex_guard.current_budget() is outer
+    assert regex_guard.current_budget() is None
+
+
+def test_compiled_patterns_keep_their_flags() -> None:
+    pattern = re.compile(r"^total\s+(\d+)", re.I | re.M)
+    match = regex_guard.search(pattern, "header\nTOTAL 42")
+    assert match is not None and match.group(1) == "42"
@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import pytest
+
+import main
+from main import analyze_text_flow
+from src import result_cache
+from src.result_cache import ResultCache, extractor_stamp
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = ResultCache(max_entries=4, directory=tmp_path / "cache")
+    monkeypatch.setattr(main, "result_cache", cache)
+    return cache
+
+
+async def test_repeat_analysis_is_served_from_cache(cache, monkeypatch):
+    text = (FIXTURES_DIR / "w2_sample_pdf.txt").read_text(encoding="utf-8")
+    first = await analyze_text_flow(text, source="text", filename="w2.pdf")
+
+    def _fail(*_args, **_kwargs):
+        raise AssertionError("detector should not run on a cache hit")
+
+    monkeypatch.setattr(main, "detect", _fail)
+    second = await analyze_text_flow(text.replace("\n", "\r\n"), source="file", filename="w2.pdf")
+
+    assert cache.hits == 1
+    assert second["source"] == "file"
+    assert {k: v for k, v in second.items() if k != "source"} == {
+        k: v for k, v in first.items() if k != "source"
+    }
+    second["fields"].clear()
+    third = await analyze_text_flow(text, source="text", filename="w2.pdf")
+    assert third["fields"] == first["fields"]
+
+
+async def test_filename_is_part_of_the_key(cache):
+    text = "EIN 12-3456789; W-2 employees: 13"
+    await analyze_text_flow(text, source="text", filename="a.txt")
+    await analyze_text_flow(text, source="text", filename="b.txt")
+    assert cache.hits == 0
+    assert cache.stats()["entries"] == 2
+
+
+async def test_new_extractor_version_invalidates_entry(cache, monkeypatch):
+    from src.extractors import Bank_Statements
+
+    text = (FIXTURES_DIR / "bank_statement_sample.pdf").read_text(encoding="utf-8")
+    first = await analyze_text_flow(text, source="text", filename="statement.pdf")
+    assert first["doc_type"] == "Bank_Statements"
+    monkeypatch.setattr(Bank_Statements, "EXTRACTOR_VERSION", "999")
+    await analyze_text_flow(text, source="text", filename="statement.pdf")
+    assert cache.hits == 0
+    assert cache.misses == 2
+
+
+def test_stamp_covers_helper_modules(monkeypatch):
+    from src.extractors import w2_form
+
+    assert "src.extractors.box_grid" in result_cache._helper_modules(w2_form)
+    before = extractor_stamp(w2_form)
+    result_cache._source_hash.cache_clear()
+    real_file_hash = result_cache._file_hash
+    monkeypatch.setattr(
+        result_cache,
+        "_file_hash",
+        lambda name: "edited" if name == "src.extractors.box_grid" else real_file_hash(name),
+    )
+    try:
+        assert extractor_stamp(w2_form) != before
+    finally:
+        result_cache._source_hash.cache_clear()
+
+
+def test_disk_tier_survives_restart_and_memory_is_bounded(tmp_path):
+    from src.extractors import w2_form
+
+    entry = {"extractor": w2_form.__name__, "stamp": extractor_stamp(w2_form), "response": {"doc_type": "W2"}}
+    first = ResultCache(max_entries=2, directory=tmp_path)
+    for key in ("aa01", "bb02", "cc03"):
+        first.put(key, entry)
+    assert first.stats()["entries"] == 2
+
+    restarted = ResultCache(max_entries=2, directory=tmp_path)
+    assert restarted.get("aa01")["response"] == {"doc_type": "W2"}
+
+    stale = dict(entry, stamp="src.extractors.w2_form@0+old")
+    restarted.put("dd04", stale)
+    restarted.clear()
+    assert restarted.get("dd04") is None
+    assert not (tmp_path / "dd" / "dd04.json").exists()
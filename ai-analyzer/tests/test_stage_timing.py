@@ -0,0 +1,87 @@
+import asyncio
+import io
+import re
+import time
+import uuid
+
+import pytest
+import env_setup  # noqa: F401
+from fastapi.testclient import TestClient
+
+from ai_analyzer.main import app
+from src import stage_timing
+
+client = TestClient(app)
+
+SAMPLE_TEXT = "Founded 2019\nW-2 employees: 25\nEIN 12-3456789\n"
+
+
+def _sample_text() -> str:
+    # A fresh document each time so the result cache cannot skip extraction.
+    return SAMPLE_TEXT + f"Reference {uuid.uuid4().hex}\n"
+
+
+def _sample(name: str, **labels: str) -> float:
+    for line in stage_timing.render_latest().decode().splitlines():
+        metric, _, value = line.rpartition(" ")
+        if metric.partition("{")[0] != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', metric))
+        if all(found.get(k) == v for k, v in labels.items()):
+            return float(value)
+    raise AssertionError(f"{name} {labels}")
+
+
+def test_diagnose_report_breaks_down_stages(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fake_ocr(_: bytes) -> str:
+        stage_timing.record_ocr_attempt("fake", "raster", 0.002, True)
+        return text
+
+    text = _sample_text()
+    monkeypatch.setattr("ai_analyzer.main.extract_text", fake_ocr)
+    resp = client.post("/diagnose", files={"file": ("w2.png", io.BytesIO(b"img"), "image/png")})
+    assert resp.status_code == 200
+    timings = resp.json()["timings"]
+    stages = timings["stages_ms"]
+    for stage in ("upload_read", "raw_save", "ocr", "detect", "artifacts"):
+        assert stage in stages and stages[stage] >= 0
+    assert timings["extractors_ms"]
+    assert timings["ocr"] == [
+        {"backend": "fake", "signature": "raster", "ok": True, "seconds": 0.002, "duration_ms": 2.0}
+    ]
+    assert timings["total_ms"] >= sum(stages.values()) - 1
+
+
+def test_sessions_export_histograms_by_doc_type() -> None:
+    resp = client.post("/analyze", json={"text": _sample_text()})
+    assert resp.status_code == 200
+    doc_type = resp.json()["doc_type"]
+    assert _sample("analyzer_stage_duration_seconds_count", stage="total", doc_type=doc_type) >= 1
+    assert _sample("analyzer_extractor_duration_seconds_count", doc_type=doc_type) >= 1
+
+
+def test_nested_sessions_share_one_timings() -> None:
+    with stage_timing.session() as outer:
+        with stage_timing.session() as inner:
+            inner.add("detect", 0.5)
+        assert inner is outer
+    assert outer.stages == {"detect": 0.5}
+
+
+def test_ocr_limiter_reports_queue_depth_and_in_flight() -> None:
+    limiter = stage_timing.OCRLimiter(max_concurrency=1)
+    seen = []
+
+    def job(_: int) -> int:
+        time.sleep(0.02)  # let the other jobs queue up
+        seen.append((_sample("analyzer_ocr_queue_depth"), _sample("analyzer_ocr_in_flight")))
+        return _
+
+    async def run():
+        return await asyncio.gather(*(limiter.run(job, i) for i in range(3)))
+
+    assert asyncio.run(run()) == [0, 1, 2]
+    assert max(in_flight for _, in_flight in seen) == 1
+    assert max(depth for depth, _ in seen) == 2
+    assert _sample("analyzer_ocr_queue_depth") == 0
+    assert _sample("analyzer_ocr_in_flight") == 0
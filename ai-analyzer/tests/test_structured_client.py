@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import env_setup  # noqa: F401
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from src.structured_client import StructuredExtractionClient, StructuredExtractionError
+
+
+def stub_endpoint(*, fail_first=0, status=429, batch_ok=True):
+    """OpenAI-compatible stub returning the text length as ``ein``."""
+    app = FastAPI()
+    app.state.bodies = []
+    app.state.active = 0
+    app.state.peak = 0
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        app.state.bodies.append(body)
+        if len(app.state.bodies) <= fail_first:
+            return JSONResponse({"error": "busy"}, status_code=status, headers={"retry-after": "0"})
+        app.state.active += 1
+        app.state.peak = max(app.state.peak, app.state.active)
+        await asyncio.sleep(0.01)
+        app.state.active -= 1
+        user = body["messages"][-1]["content"]
+        if "JSON array" in body["messages"][0]["content"]:
+            docs = json.loads(user)
+            results = [{"id": d["id"], "ein": len(d["text"])} for d in docs]
+            content = {"results": results if batch_ok else results[:1]}
+        else:
+            content = {"ein": len(user)}
+        return {"choices": [{"message": {"content": json.dumps(content)}}]}
+
+    return app
+
+
+def make_client(app, **kwargs):
+    kwargs.setdefault("backoff_seconds", 0)
+    return StructuredExtractionClient(
+        api_key="k",
+        base_url="http://stub/v1",
+        transport=httpx.ASGITransport(app=app),
+        **kwargs,
+    )
+
+
+def test_short_texts_are_batched_and_cached():
+    app = stub_endpoint()
+    client = make_client(app, batch_max_items=4, batch_window_ms=20)
+
+    async def scenario():
+        texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+        results = await asyncio.gather(*(client.extract(t) for t in texts))
+        assert [r["ein"] for r in results] == [1, 2, 3, 4, 5]
+        again = await client.extract("ccc")
+        assert again == {"ein": 3}
+
+    asyncio.run(scenario())
+    # Four texts fill one batch; the fifth goes alone after the window.
+    assert len(app.state.bodies) == 2
+    assert client.stats["cache_hits"] == 1
+
+
+def test_malformed_batch_falls_back_to_single_requests():
+    app = stub_endpoint(batch_ok=False)
+    client = make_client(app, batch_max_items=3)
+
+    async def scenario():
+        return await asyncio.gather(*(client.extract(t) for t in ["x", "yy", "zzz"]))
+
+    assert [r["ein"] for r in asyncio.run(scenario())] == [1, 2, 3]
+    assert len(app.state.bodies) == 4
+
+
+def test_rate_limits_are_retried_without_blocking_and_concurrency_is_bounded():
+    app = stub_endpoint(fail_first=2)
+    client = make_client(app, batch_max_items=1, max_concurrency=2)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        tick_task = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(client.extract("t" * n) for n in range(1, 6)))
+        tick_task.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(scenario())
+    assert [r["ein"] for r in results] == [1, 2, 3, 4, 5]
+    assert ticks > 0
+    assert app.state.peak <= 2
+    assert client.stats["retries"] == 2
+
+
+def test_non_retryable_errors_raise():
+    client = make_client(stub_endpoint(fail_first=5, status=400), batch_max_items=1)
+    with pytest.raises(StructuredExtractionError):
+        asyncio.run(client.extract("text"))
@@ -78,6 +78,17 @@ def test_analyze_endpoint_exposes_metadata() -> None:
     assert data["field_confidence"]["box2_federal_income_tax_withheld"] >= 0.7
 
 
+def test_box13_checkboxes_on_following_lines() -> None:
+    text = PDF_SAMPLE.replace(
+        "13 Statutory employee (x) Retirement plan [ ] Third-party sick pay [ ]",
+        "13 Statutory employee (x)\nRetirement plan [X]\nThird-party sick pay [ ]",
+    )
+    out = extract(text)
+    assert out["fields_clean"]["box13_statutory_employee"] is True
+    assert out["fields_clean"]["box13_retirement_plan"] is True
+    assert out["fields_clean"]["box13_third_party_sick_pay"] is False
+
+
 def test_missing_ein_yields_warning() -> None:
     text = PDF_SAMPLE.replace("Employer identification number (EIN) 12-3456789\n", "")
     out = extract(text)
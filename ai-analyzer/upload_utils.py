@@ -3,17 +3,17 @@
 from __future__ import annotations
 
 import os
-import json
 from pathlib import Path
 
 from fastapi import HTTPException, UploadFile
 
 from ai_analyzer.config import settings  # type: ignore
+from common import catalogs
 
 
 FILE_TYPES_PATH = Path(__file__).resolve().parents[1] / "shared" / "file_types.json"
-with open(FILE_TYPES_PATH) as f:
-    ALLOWED_EXTENSIONS = set(json.load(f)["extensions"])
+# Read through common.catalogs: the compiled bundle when configured, else FILE_TYPES_PATH.
+ALLOWED_EXTENSIONS = set(catalogs.load("file_types")["extensions"])
 
 
 def validate_upload(file: UploadFile) -> None:
@@ -0,0 +1,11 @@
+"""Micro-benchmarks for the hot paths of the Python services.
+
+Each suite in :mod:`benchmarks.suites` runs in its own process from its
+service directory, the same way the service imports its modules::
+
+    python -m benchmarks run --save main           # benchmarks/baselines/main.json
+    python -m benchmarks run --compare main        # fail on slowdowns vs. main
+    python -m benchmarks compare main feature.json --threshold 0.2
+
+See docs/benchmarks.md.
+"""
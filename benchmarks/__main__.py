@@ -0,0 +1,172 @@
+"""Command line entry point: ``python -m benchmarks {list,run,compare}``."""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks import compare as cmp
+from benchmarks import harness
+from benchmarks.suites import SUITES
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BASELINE_DIR = REPO_ROOT / "benchmarks" / "baselines"
+RESULTS_PATH = REPO_ROOT / "benchmarks" / "results" / "latest.json"
+QUICK = {"repeats": 3, "min_time": 0.02}
+
+
+def baseline_path(name: str) -> Path:
+    """A file path as given, otherwise ``benchmarks/baselines/<name>.json``."""
+    path = Path(name)
+    if path.suffix == ".json" or path.exists():
+        return path
+    return BASELINE_DIR / f"{name}.json"
+
+
+def _write(path: Path, doc: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(doc, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def _worker(args: argparse.Namespace) -> int:
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    importlib.import_module(SUITES[args.suite][1])
+    if args.list:
+        for bench in harness.REGISTRY:
+            for name, _kwargs in bench.cases():
+                print(name)
+        return 0
+
+    def progress(name: str, timing: harness.Timing) -> None:
+        print(f"{name:<70} {harness.format_seconds(timing.median_s):>10}", file=sys.stderr, flush=True)
+
+    results = harness.run(
+        args.suite,
+        harness.REGISTRY,
+        select=args.k,
+        repeats=args.repeats,
+        min_time=args.min_time,
+        progress=progress,
+    )
+    _write(args.out, harness.document(results))
+    return 0
+
+
+def _spawn(suite: str, extra: List[str]) -> subprocess.CompletedProcess:
+    directory = REPO_ROOT / SUITES[suite][0]
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (str(REPO_ROOT), str(directory), env.get("PYTHONPATH"))))
+    cmd = [sys.executable, "-m", "benchmarks", "worker", suite, *extra]
+    return subprocess.run(cmd, cwd=directory, env=env, stdout=subprocess.PIPE, text=True)
+
+
+def _list(args: argparse.Namespace) -> int:
+    status = 0
+    for suite in args.suite or SUITES:
+        proc = _spawn(suite, ["--list"])
+        sys.stdout.write(proc.stdout)
+        status = status or proc.returncode
+    return status
+
+
+def _run(args: argparse.Namespace) -> int:
+    repeats = args.repeats or (QUICK["repeats"] if args.quick else 5)
+    min_time = args.min_time or (QUICK["min_time"] if args.quick else 0.2)
+    results: Dict[str, Any] = {}
+    merged: Dict[str, Any] = {}
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for suite in args.suite or SUITES:
+            out = Path(tmp) / f"{suite}.json"
+            extra = ["--out", str(out), "--repeats", str(repeats), "--min-time", str(min_time)]
+            if args.k:
+                extra += ["-k", args.k]
+            proc = _spawn(suite, extra)
+            if proc.returncode != 0 or not out.exists():
+                failed.append(suite)
+                continue
+            merged = cmp.load(out)
+            results.update(merged["benchmarks"])
+
+    if failed:
+        print(f"suites failed: {', '.join(failed)}", file=sys.stderr)
+    if not results:
+        return 1
+    merged["benchmarks"] = dict(sorted(results.items()))
+    _write(args.out, merged)
+    print(f"wrote {len(merged['benchmarks'])} results to {args.out}")
+    if args.save:
+        _write(baseline_path(args.save), merged)
+        print(f"saved baseline {baseline_path(args.save)}")
+    status = 1 if failed else 0
+    if args.compare:
+        status = _report(cmp.load(baseline_path(args.compare)), merged, args.threshold, args.all) or status
+    return status
+
+
+def _report(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, show_all: bool) -> int:
+    for difference in cmp.machine_mismatch(baseline, current):
+        print(f"warning: machine differs from baseline ({difference})", file=sys.stderr)
+    changes = cmp.compare(baseline, current, threshold=threshold)
+    print(cmp.format_changes(changes, only_changed=not show_all))
+    slower = cmp.regressions(changes)
+    for change in slower:
+        print(f"regression: {change.name} is {change.ratio:.2f}x the baseline", file=sys.stderr)
+    return 1 if slower else 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    current = cmp.load(baseline_path(args.current))
+    return _report(cmp.load(baseline_path(args.baseline)), current, args.threshold, args.all)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    suites = sorted(SUITES)
+
+    listing = sub.add_parser("list", help="list benchmark names")
+    listing.add_argument("--suite", action="append", choices=suites)
+    listing.set_defaults(func=_list)
+
+    run = sub.add_parser("run", help="run benchmarks and write JSON results")
+    run.add_argument("--suite", action="append", choices=suites, help="repeatable; default all")
+    run.add_argument("-k", help="only benchmarks whose name contains or glob-matches this")
+    run.add_argument("--quick", action="store_true", help="fewer, shorter repeats (smoke check)")
+    run.add_argument("--repeats", type=int)
+    run.add_argument("--min-time", type=float, help="seconds per repeat")
+    run.add_argument("--out", type=Path, default=RESULTS_PATH)
+    run.add_argument("--save", metavar="NAME", help="also save as benchmarks/baselines/NAME.json")
+    run.add_argument("--compare", metavar="BASELINE", help="baseline name or path to compare against")
+    run.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    run.add_argument("--all", action="store_true", help="show unchanged benchmarks too")
+    run.set_defaults(func=_run)
+
+    compare = sub.add_parser("compare", help="compare two result files")
+    compare.add_argument("baseline")
+    compare.add_argument("current", nargs="?", default=str(RESULTS_PATH))
+    compare.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    compare.add_argument("--all", action="store_true", help="show unchanged benchmarks too")
+    compare.set_defaults(func=_compare)
+
+    worker = sub.add_parser("worker", help=argparse.SUPPRESS)
+    worker.add_argument("suite", choices=suites)
+    worker.add_argument("--list", action="store_true")
+    worker.add_argument("--out", type=Path)
+    worker.add_argument("-k")
+    worker.add_argument("--repeats", type=int, default=5)
+    worker.add_argument("--min-time", type=float, default=0.2)
+    worker.set_defaults(func=_worker)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
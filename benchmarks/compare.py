@@ -0,0 +1,104 @@
+"""Compare two benchmark runs and flag slowdowns."""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.harness import format_seconds
+
+SLOWER = "slower"
+FASTER = "faster"
+SAME = "ok"
+ADDED = "new"
+REMOVED = "missing"
+
+
+@dataclass
+class Change:
+    name: str
+    status: str
+    baseline_s: Optional[float] = None
+    current_s: Optional[float] = None
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if not self.baseline_s or self.current_s is None:
+            return None
+        return self.current_s / self.baseline_s
+
+
+def load(path: Path) -> Dict[str, Any]:
+    with Path(path).open(encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], *, threshold: float = 0.25) -> List[Change]:
+    """Compare median per-call times; ``threshold`` is a fraction (0.25 = 25%)."""
+    before = baseline.get("benchmarks", {})
+    after = current.get("benchmarks", {})
+    changes = []
+    for name in sorted(set(before) | set(after)):
+        if name not in after:
+            changes.append(Change(name, REMOVED, baseline_s=before[name]["median_s"]))
+            continue
+        if name not in before:
+            changes.append(Change(name, ADDED, current_s=after[name]["median_s"]))
+            continue
+        change = Change(name, SAME, before[name]["median_s"], after[name]["median_s"])
+        ratio = change.ratio
+        if ratio is not None and ratio > 1 + threshold:
+            change.status = SLOWER
+        elif ratio is not None and ratio < 1 / (1 + threshold):
+            change.status = FASTER
+        changes.append(change)
+    return changes
+
+
+def regressions(changes: List[Change]) -> List[Change]:
+    return [c for c in changes if c.status == SLOWER]
+
+
+def machine_mismatch(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Machine fields that differ; timings across machines are not comparable."""
+    before, after = baseline.get("machine", {}), current.get("machine", {})
+    keys = ("machine", "processor", "cpu_count", "python", "implementation")
+    return [f"{key}: {before.get(key)} -> {after.get(key)}" for key in keys if before.get(key) != after.get(key)]
+
+
+def format_changes(changes: List[Change], *, only_changed: bool = False) -> str:
+    rows = [("benchmark", "baseline", "current", "ratio", "status")]
+    for c in changes:
+        if only_changed and c.status == SAME:
+            continue
+        rows.append(
+            (
+                c.name,
+                format_seconds(c.baseline_s) if c.baseline_s is not None else "-",
+                format_seconds(c.current_s) if c.current_s is not None else "-",
+                f"{c.ratio:.2f}x" if c.ratio is not None else "-",
+                c.status,
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = []
+    for row in rows:
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(w) for cell, w in zip(row[1:], widths[1:])]
+        lines.append("  ".join(cells))
+    return "\n".join(lines)
+
+
+__all__ = [
+    "ADDED",
+    "Change",
+    "FASTER",
+    "REMOVED",
+    "SAME",
+    "SLOWER",
+    "compare",
+    "format_changes",
+    "load",
+    "machine_mismatch",
+    "regressions",
+]
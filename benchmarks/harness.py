@@ -0,0 +1,187 @@
+"""Benchmark registry and timing loop.
+
+A benchmark is a factory registered with :func:`bench`.  It receives one
+combination of its parameters, does its setup and returns (or yields) the
+zero-argument callable to time; code after a ``yield`` runs as teardown::
+
+    @bench("engine.analyze_eligibility", grants=(10, 100))
+    def analyze(grants):
+        with patched_catalog(grants):
+            yield lambda: engine.analyze_eligibility(payload)
+
+Timing follows :mod:`timeit`: the loop count is raised until one repeat
+takes ``min_time``, the collector is off while timing, and the per-call time
+of every repeat is kept so the median is robust to a noisy neighbour.
+"""
+from __future__ import annotations
+
+import gc
+import inspect
+import itertools
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    factory: Callable[..., Any]
+    params: Tuple[Tuple[str, Tuple[Any, ...]], ...] = ()
+
+    def cases(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """``(full name, kwargs)`` for every parameter combination."""
+        if not self.params:
+            return [(self.name, {})]
+        keys = [key for key, _ in self.params]
+        cases = []
+        for values in itertools.product(*(values for _, values in self.params)):
+            kwargs = dict(zip(keys, values))
+            label = ",".join(f"{key}={value}" for key, value in kwargs.items())
+            cases.append((f"{self.name}[{label}]", kwargs))
+        return cases
+
+
+@dataclass
+class Timing:
+    suite: str
+    params: Dict[str, Any]
+    loops: int
+    repeats: int
+    median_s: float
+    min_s: float
+    mean_s: float
+    stdev_s: float
+    samples_s: List[float] = field(default_factory=list)
+
+
+REGISTRY: List[Benchmark] = []
+
+
+def bench(name: str, **params: Sequence[Any]) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Register the decorated factory as benchmark ``name``."""
+
+    def decorator(factory: Callable[..., Any]) -> Callable[..., Any]:
+        REGISTRY.append(Benchmark(name, factory, tuple((k, tuple(v)) for k, v in params.items())))
+        return factory
+
+    return decorator
+
+
+def _time(fn: Callable[[], Any], loops: int) -> float:
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        return time.perf_counter() - started
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def measure(fn: Callable[[], Any], *, repeats: int = 5, min_time: float = 0.2) -> Tuple[int, List[float]]:
+    """Return the loop count and per-call seconds of each repeat."""
+    loops = 1
+    while True:
+        elapsed = _time(fn, loops)  # doubles as warmup
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops = min(loops * max(2, int(min_time / max(elapsed, 1e-9) * 1.2)), 1_000_000)
+    return loops, [_time(fn, loops) / loops for _ in range(repeats)]
+
+
+def _setup(bench_: Benchmark, kwargs: Dict[str, Any]):
+    if inspect.isgeneratorfunction(bench_.factory):
+        gen = bench_.factory(**kwargs)
+        return next(gen), lambda: next(gen, None)
+    return bench_.factory(**kwargs), None
+
+
+def run(
+    suite: str,
+    benchmarks: Sequence[Benchmark],
+    *,
+    select: Optional[str] = None,
+    repeats: int = 5,
+    min_time: float = 0.2,
+    progress: Optional[Callable[[str, Timing], None]] = None,
+) -> Dict[str, Timing]:
+    """Time every case of ``benchmarks`` whose name matches ``select``."""
+    results: Dict[str, Timing] = {}
+    for bench_ in benchmarks:
+        for name, kwargs in bench_.cases():
+            if select and not fnmatchcase(name, select) and select not in name:
+                continue
+            fn, teardown = _setup(bench_, kwargs)
+            try:
+                loops, samples = measure(fn, repeats=repeats, min_time=min_time)
+            finally:
+                if teardown is not None:
+                    teardown()
+            timing = Timing(
+                suite=suite,
+                params=kwargs,
+                loops=loops,
+                repeats=repeats,
+                median_s=statistics.median(samples),
+                min_s=min(samples),
+                mean_s=statistics.fmean(samples),
+                stdev_s=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+                samples_s=samples,
+            )
+            results[name] = timing
+            if progress is not None:
+                progress(name, timing)
+    return results
+
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "implementation": sys.implementation.name,
+    }
+
+
+def document(results: Dict[str, Timing]) -> Dict[str, Any]:
+    """The JSON document written for a run or saved as a baseline."""
+    return {
+        "version": FORMAT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "benchmarks": {name: asdict(timing) for name, timing in sorted(results.items())},
+    }
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+__all__ = [
+    "Benchmark",
+    "REGISTRY",
+    "Timing",
+    "bench",
+    "document",
+    "format_seconds",
+    "machine_info",
+    "measure",
+    "run",
+]
@@ -0,0 +1,13 @@
+"""Benchmark suites, one per service.
+
+A suite is imported in a worker process whose working directory is the
+service directory, so modules resolve exactly as they do in the service
+(each service has its own top-level ``config``).
+"""
+
+# suite -> (service directory, module)
+SUITES = {
+    "engine": ("eligibility-engine", "benchmarks.suites.eligibility_engine"),
+    "analyzer": ("ai-analyzer", "benchmarks.suites.ai_analyzer"),
+    "agent": ("ai-agent", "benchmarks.suites.ai_agent"),
+}
@@ -0,0 +1,48 @@
+"""AI agent: form filling per template and the expression evaluator."""
+from __future__ import annotations
+
+import json
+import random
+from typing import get_args
+
+import fill_form
+from schemas import FormName
+
+from benchmarks.harness import bench
+from loadtest.synthetic import REPO_ROOT, load_field_map, profile, scalar_fields
+
+SEED_PAYLOAD = REPO_ROOT / "eligibility-engine" / "test_payload.json"
+
+
+def _profile() -> dict:
+    with SEED_PAYLOAD.open(encoding="utf-8") as fh:
+        seed = json.load(fh)
+    rng = random.Random(44)
+    return profile(rng, scalar_fields(load_field_map()), [seed], fill_rate=0.8, normalized=True)
+
+
+@bench("agent.fill_form", form=get_args(FormName))
+def fill(form):
+    data = _profile()
+    return lambda: fill_form.fill_form(form, dict(data))
+
+
+EXPRESSIONS = {
+    "arithmetic": ("a + b * 2 - c / 4", {"a": 1, "b": 5, "c": 8}),
+    "comparison": ("a + b * 2 > 10 and int(c) == 3", {"a": 1, "b": 5, "c": "3"}),
+    "boolean": ("not done and (-b < c or float(d) >= 0.5)", {"done": False, "b": 2, "c": 1, "d": "0.75"}),
+}
+
+
+@bench("agent.safe_eval", expr=tuple(EXPRESSIONS))
+def evaluate(expr):
+    source, names = EXPRESSIONS[expr]
+    return lambda: fill_form.safe_eval(source, names)
+
+
+@bench("agent.compile_expression", expr=tuple(EXPRESSIONS))
+def compile_uncached(expr):
+    source, _names = EXPRESSIONS[expr]
+    compile_ = fill_form._compile_cached.__wrapped__
+    limits = (fill_form.MAX_AST_NODES, fill_form.MAX_STRING_LENGTH, fill_form.MAX_NUMBER_ABS)
+    return lambda: compile_(source, *limits)
@@ -0,0 +1,82 @@
+"""AI analyzer: document detection and every text extractor.
+
+Documents grow by repeating a realistic page (a test fixture or a load-test
+corpus document) ``pages`` times, the way multi-page scans reach the
+extractors after OCR.
+"""
+from __future__ import annotations
+
+import importlib
+import pkgutil
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import src.extractors as extractors
+from src.detectors import detect
+
+from benchmarks.harness import bench
+from loadtest.synthetic import corpus
+
+FIXTURES = Path(__file__).resolve().parents[2] / "ai-analyzer" / "tests" / "fixtures"
+PAGES = (1, 10, 100)
+PAGE_BREAK = "\n\f\n"
+
+# extractor module -> fixture used as its page; others use a corpus document
+PAGE_FIXTURES = {
+    "business_plan": "business_plan_sample.txt",
+    "dbe_acdbe_uniform_application": "dbe_acdbe_uniform_application/digital_clean.txt",
+    "energy_savings_report": "energy_savings_report_sample.txt",
+    "equipment_specs": "equipment_specs_sample.txt",
+    "installer_contract": "installer_contract_sample.txt",
+    "invoices_or_quotes": "invoice_sample.txt",
+    "irs_1099_nec": "irs_1099_nec_ocr.txt",
+    "utility_bill": "utility_bill_sample.txt",
+    "w2_form": "w2_sample_ocr.txt",
+    "w9_form": "w9_form_sample.txt",
+}
+PAGE_CORPUS = {"Bank_Statements": "bank_statement"}
+DEFAULT_CORPUS = "business_plan"
+
+
+def extractor_functions() -> List[Tuple[str, Callable[[str], object]]]:
+    found = []
+    for info in pkgutil.iter_modules(extractors.__path__):
+        module = importlib.import_module(f"src.extractors.{info.name}")
+        for attr in ("extract", "extract_form1099_summary"):
+            fn = getattr(module, attr, None)
+            if callable(fn):
+                found.append((info.name, fn))
+    return found
+
+
+def page_for(module: str, docs: Dict[str, str]) -> str:
+    fixture = PAGE_FIXTURES.get(module)
+    if fixture and (FIXTURES / fixture).exists():
+        return (FIXTURES / fixture).read_text(encoding="utf-8")
+    return docs[PAGE_CORPUS.get(module, DEFAULT_CORPUS)]
+
+
+def document(page: str, pages: int) -> str:
+    return PAGE_BREAK.join([page] * pages)
+
+
+DOCS = corpus()
+
+
+@bench("analyzer.detect", doc=tuple(sorted(DOCS)), pages=PAGES)
+def detect_document(doc, pages):
+    text = document(DOCS[doc], pages)
+    return lambda: detect(text)
+
+
+def _register_extractors() -> None:
+    for module, fn in extractor_functions():
+
+        def factory(pages, _module=module, _fn=fn):
+            text = document(page_for(_module, DOCS), pages)
+            return lambda: _fn(text)
+
+        bench(f"analyzer.extract.{module}", pages=PAGES)(factory)
+
+
+_register_extractors()
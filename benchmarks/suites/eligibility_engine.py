@@ -0,0 +1,88 @@
+"""Eligibility engine: rule evaluation, normalization and NAICS inference."""
+from __future__ import annotations
+
+import copy
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+import engine
+from grants_loader import load_grants
+from industry_classifier import assign_industry_naics
+from normalization.ingest import normalize_payload
+
+from benchmarks.harness import bench
+from loadtest.synthetic import load_field_map, profile, scalar_fields
+
+ENGINE_DIR = Path(engine.__file__).resolve().parent
+
+
+def _sample_payload() -> Dict[str, Any]:
+    with (ENGINE_DIR / "test_payload.json").open(encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def synthetic_catalog(size: int) -> List[Dict[str, Any]]:
+    """``size`` grants cycled from the real catalog under unique keys."""
+    grants = load_grants()
+    catalog = []
+    for index in range(size):
+        grant = copy.deepcopy(grants[index % len(grants)])
+        grant["key"] = f"{grant['key']}_{index}"
+        grant["name"] = f"{grant.get('name')} #{index}"
+        catalog.append(grant)
+    return catalog
+
+
+def _analyzer_payloads(count: int = 20) -> List[Dict[str, Any]]:
+    rng = random.Random(44)
+    fields = scalar_fields(load_field_map())
+    seeds = [_sample_payload()]
+    return [profile(rng, fields, seeds, fill_rate=0.7) for _ in range(count)]
+
+
+@bench("engine.load_grants")
+def load_catalog():
+    # Time the parse itself; the cached loader only pays it once per process.
+    return load_grants.__wrapped__
+
+
+@bench("engine.analyze_eligibility", grants=(10, 100, 1_000, 10_000))
+def analyze_eligibility(grants):
+    catalog = synthetic_catalog(grants)
+    payload = normalize_payload(_sample_payload())
+    original = engine.load_grants
+    engine.load_grants = lambda: catalog
+    try:
+        yield lambda: engine.analyze_eligibility(payload)
+    finally:
+        engine.load_grants = original
+
+
+@bench("engine.normalize_payload")
+def normalize():
+    payloads = _analyzer_payloads()
+
+    def run():
+        for payload in payloads:
+            normalize_payload(payload)
+
+    return run
+
+
+INDUSTRY_CASES = {
+    "provided": {"business_industry_naics": "541511", "business_name": "Acme"},
+    "company_naics": {"company_naics": ["238220", "541330"]},
+    "inferred": {
+        "business_name": "Sunrise Solar Installers",
+        "business_description": "We design and install rooftop solar panels and battery storage for homes.",
+    },
+    "unknown": {"business_name": "Blue Fern Holdings", "business_description": "General holding company."},
+}
+
+
+@bench("engine.assign_industry_naics", case=tuple(INDUSTRY_CASES))
+def industry(case):
+    data = INDUSTRY_CASES[case]
+    return lambda: assign_industry_naics(data)
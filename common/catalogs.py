@@ -0,0 +1,417 @@
+"""Compiled catalog bundle: every JSON catalog in one versioned snapshot.
+
+The services read their configuration from JSON files spread across the
+tree: grant definitions, the field map and required fields, the NAICS
+industry catalog, the document catalog and aliases, the allowed upload file
+types and the form templates.  ``python -m common.catalogs build`` validates
+all of them and compiles them, with their lookup indexes precomputed, into
+one pickle::
+
+    python -m common.catalogs build --output build/catalogs.bundle
+    python -m common.catalogs check          # validate only
+
+A service started with ``CATALOG_BUNDLE_PATH`` pointing at that file maps it
+with :mod:`mmap` and unpickles every catalog in one pass instead of opening
+and parsing each JSON file.  Without it (development), :func:`load` compiles
+the requested catalog from its JSON sources, so edits show up after a
+restart or ``SIGHUP`` without a build step.  A missing or unreadable bundle
+is logged and also falls back to the JSON sources.
+
+:func:`version` is a content hash over every source file.  It is the
+bundle's version when one is loaded and is computed from the files
+otherwise, so both paths agree for the same tree.  Caches keyed on catalog
+content use it as their version.
+
+Compiled catalogs are shared by every caller; callers must not mutate them.
+The bundle is trusted build output.  Only point ``CATALOG_BUNDLE_PATH`` at a
+file produced by the build step.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import re
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+BUNDLE_FORMAT = 1
+DEFAULT_OUTPUT = ROOT / "build" / "catalogs.bundle"
+
+Sources = List[Tuple[Path, Any]]
+
+
+class CatalogError(ValueError):
+    """Raised when catalog sources fail validation; ``problems`` lists each one."""
+
+    def __init__(self, problems: Sequence[str]) -> None:
+        self.problems = list(problems)
+        super().__init__("invalid catalogs:\n  " + "\n  ".join(self.problems))
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """One catalog: its source files, validation and compiled form."""
+
+    name: str
+    pattern: str  # relative to the repository root; may be a glob
+    compile: Callable[[Sources], Any]
+    validate: Callable[[Sources], List[str]]
+    required: bool = True
+
+    def paths(self, root: Path = ROOT) -> List[Path]:
+        return sorted(root.glob(self.pattern))
+
+
+# -- compilers ---------------------------------------------------------------
+
+
+def _compile_grants(sources: Sources) -> Dict[str, Any]:
+    grants = [{**data, "key": path.stem} for path, data in sources]
+    return {"grants": grants, "by_key": {grant["key"]: grant for grant in grants}}
+
+
+def _compile_field_map(sources: Sources) -> Dict[str, Any]:
+    fields = sources[0][1]
+    aliases: Dict[str, str] = {}
+    for target, info in fields.items():
+        aliases[target] = target
+        for alias in info.get("aliases", []):
+            aliases[alias] = target
+    return {"fields": fields, "aliases": aliases}
+
+
+def _compile_industries(sources: Sources) -> Dict[str, Any]:
+    industries = sources[0][1]
+    return {"industries": industries, "by_code": {item["naics_code"]: item for item in industries}}
+
+
+def _compile_single(sources: Sources) -> Any:
+    return sources[0][1] if sources else {}
+
+
+def _compile_file_types(sources: Sources) -> Dict[str, Any]:
+    return {"extensions": frozenset(sources[0][1]["extensions"])}
+
+
+def _compile_forms(sources: Sources) -> Dict[str, Any]:
+    return {path.stem: data for path, data in sources}
+
+
+# -- validators --------------------------------------------------------------
+
+
+def _is_str_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _check_grants(sources: Sources) -> List[str]:
+    problems = []
+    for path, grant in sources:
+        if not isinstance(grant, dict):
+            problems.append(f"{path.name}: expected an object")
+            continue
+        if not isinstance(grant.get("name"), str) or not grant["name"]:
+            problems.append(f"{path.name}: 'name' must be a non-empty string")
+        for key in ("required_fields", "required_documents", "required_forms", "tags"):
+            if key in grant and not _is_str_list(grant[key]):
+                problems.append(f"{path.name}: '{key}' must be a list of strings")
+    return problems
+
+
+def _check_field_map(sources: Sources) -> List[str]:
+    fields = sources[0][1]
+    if not isinstance(fields, dict):
+        return ["field_map.json: expected an object"]
+    problems = []
+    owners: Dict[str, str] = {}
+    for target, info in fields.items():
+        if not isinstance(info, dict):
+            problems.append(f"field_map.json: {target}: expected an object")
+            continue
+        if not _is_str_list(info.get("aliases", [])):
+            problems.append(f"field_map.json: {target}: 'aliases' must be a list of strings")
+            continue
+        for alias in [target, *info.get("aliases", [])]:
+            owner = owners.setdefault(alias, target)
+            if owner != target:
+                problems.append(f"field_map.json: alias {alias!r} maps to both {owner!r} and {target!r}")
+        pattern = (info.get("normalize") or {}).get("pattern")
+        if pattern is not None:
+            try:
+                re.compile(pattern)
+            except re.error as exc:
+                problems.append(f"field_map.json: {target}: bad pattern: {exc}")
+    return problems
+
+
+def _check_required_fields(sources: Sources) -> List[str]:
+    required = sources[0][1]
+    if not isinstance(required, dict):
+        return ["required_fields.json: expected an object"]
+    problems = []
+    for grant, spec in required.items():
+        for key in ("required_fields", "optional_fields"):
+            if not _is_str_list((spec or {}).get(key, [])):
+                problems.append(f"required_fields.json: {grant}: '{key}' must be a list of strings")
+    return problems
+
+
+def _check_industries(sources: Sources) -> List[str]:
+    industries = sources[0][1]
+    if not isinstance(industries, list):
+        return ["industries.json: expected a list"]
+    problems = []
+    seen = set()
+    for index, item in enumerate(industries):
+        code = item.get("naics_code") if isinstance(item, dict) else None
+        if not isinstance(code, str) or not code:
+            problems.append(f"industries.json: entry {index}: 'naics_code' must be a non-empty string")
+        elif code in seen:
+            problems.append(f"industries.json: duplicate naics_code {code!r}")
+        seen.add(code)
+    return problems
+
+
+def _check_documents(sources: Sources) -> List[str]:
+    catalog = sources[0][1]
+    if not isinstance(catalog, dict) or not isinstance(catalog.get("documents"), list):
+        return ["catalog.json: must contain a 'documents' array"]
+    problems = []
+    seen = set()
+    for index, doc in enumerate(catalog["documents"]):
+        key = doc.get("key") if isinstance(doc, dict) else None
+        if not isinstance(key, str) or not key:
+            problems.append(f"catalog.json: document {index}: 'key' must be a non-empty string")
+            continue
+        if key in seen:
+            problems.append(f"catalog.json: duplicate document key {key!r}")
+        seen.add(key)
+        for pattern in (doc.get("detector") or {}).get("text_regex", []):
+            try:
+                re.compile(pattern)
+            except re.error as exc:
+                problems.append(f"catalog.json: {key}: bad text_regex {pattern!r}: {exc}")
+    return problems
+
+
+def _check_aliases(sources: Sources) -> List[str]:
+    if not sources:
+        return []
+    payload = sources[0][1]
+    if not isinstance(payload, dict):
+        return ["aliases.json: expected an object"]
+    problems = []
+    for section in ("aliases", "family_aliases", "field_aliases"):
+        if not isinstance(payload.get(section, {}), dict):
+            problems.append(f"aliases.json: '{section}' must be an object")
+    return problems
+
+
+def _check_file_types(sources: Sources) -> List[str]:
+    extensions = sources[0][1].get("extensions") if isinstance(sources[0][1], dict) else None
+    if not _is_str_list(extensions) or not all(ext.startswith(".") for ext in extensions):
+        return ["file_types.json: 'extensions' must be a list of '.ext' strings"]
+    return []
+
+
+def _check_forms(sources: Sources) -> List[str]:
+    problems = [f"{path.name}: expected an object" for path, data in sources if not isinstance(data, dict)]
+    index = {path.stem: data for path, data in sources}.get("catalog")
+    if isinstance(index, dict):
+        names = {path.name for path, _ in sources}
+        for form in index.get("forms", []):
+            if form.get("path") not in names:
+                problems.append(f"form_templates/catalog.json: {form.get('key')}: missing {form.get('path')}")
+    return problems
+
+
+CATALOGS: Dict[str, Catalog] = {
+    catalog.name: catalog
+    for catalog in (
+        Catalog("grants", "eligibility-engine/grants/*.json", _compile_grants, _check_grants),
+        Catalog("field_map", "eligibility-engine/contracts/field_map.json", _compile_field_map, _check_field_map),
+        Catalog(
+            "required_fields",
+            "eligibility-engine/contracts/required_fields.json",
+            _compile_single,
+            _check_required_fields,
+        ),
+        Catalog("industries", "eligibility-engine/industries.json", _compile_industries, _check_industries),
+        Catalog("documents", "document_library/catalog.json", _compile_single, _check_documents),
+        Catalog("document_aliases", "document_library/aliases.json", _compile_single, _check_aliases, False),
+        Catalog("file_types", "shared/file_types.json", _compile_file_types, _check_file_types),
+        Catalog("form_templates", "form_templates/*.json", _compile_forms, _check_forms),
+    )
+}
+
+
+# -- build -------------------------------------------------------------------
+
+
+def _read(catalog: Catalog, root: Path) -> Tuple[Sources, Dict[str, bytes]]:
+    raw = {path.relative_to(root).as_posix(): path.read_bytes() for path in catalog.paths(root)}
+    if catalog.required and not raw:
+        raise FileNotFoundError(f"no catalog source matches {catalog.pattern}")
+    sources = [(root / rel, json.loads(data)) for rel, data in raw.items()]
+    return sources, raw
+
+
+def content_hash(root: Path = ROOT) -> str:
+    """Short content hash over every catalog source file under ``root``."""
+    digest = hashlib.sha256()
+    for catalog in CATALOGS.values():
+        for path in catalog.paths(root):
+            digest.update(path.relative_to(root).as_posix().encode("utf-8") + b"\0")
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def build(root: Path = ROOT) -> Dict[str, Any]:
+    """Validate and compile every catalog; raises :class:`CatalogError`."""
+    problems: List[str] = []
+    compiled: Dict[str, Any] = {}
+    files: Dict[str, str] = {}
+    for catalog in CATALOGS.values():
+        try:
+            sources, raw = _read(catalog, root)
+        except (OSError, ValueError) as exc:
+            problems.append(f"{catalog.name}: {exc}")
+            continue
+        files.update({rel: hashlib.sha256(data).hexdigest()[:12] for rel, data in raw.items()})
+        found = catalog.validate(sources) if sources else []
+        problems.extend(found)
+        if not found:
+            compiled[catalog.name] = catalog.compile(sources)
+    if "grants" in compiled and "required_fields" in compiled:
+        grants = compiled["grants"]["by_key"]
+        problems.extend(
+            f"required_fields.json: unknown grant {key!r}"
+            for key in compiled["required_fields"]
+            if key not in grants
+        )
+    if problems:
+        raise CatalogError(problems)
+    return {
+        "format": BUNDLE_FORMAT,
+        "version": content_hash(root),
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "sources": files,
+        "catalogs": compiled,
+    }
+
+
+def write(bundle: Dict[str, Any], output: Path) -> None:
+    """Write ``bundle`` to ``output`` atomically."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(f".{output.name}.{os.getpid()}")
+    tmp.write_bytes(pickle.dumps(bundle, protocol=pickle.HIGHEST_PROTOCOL))
+    os.replace(tmp, output)
+
+
+def read_bundle(path: Path) -> Dict[str, Any]:
+    """Map ``path`` and unpickle it; raises ``ValueError`` for another format."""
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        bundle = pickle.loads(mapped)
+    if not isinstance(bundle, dict) or bundle.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"{path} is not a format {BUNDLE_FORMAT} catalog bundle")
+    return bundle
+
+
+# -- runtime -----------------------------------------------------------------
+
+_lock = threading.Lock()
+_bundle: Optional[Dict[str, Any]] = None
+_bundle_loaded = False
+
+
+def bundle() -> Optional[Dict[str, Any]]:
+    """The bundle named by ``CATALOG_BUNDLE_PATH``, or ``None`` to use JSON sources."""
+    global _bundle, _bundle_loaded
+    if _bundle_loaded:
+        return _bundle
+    with _lock:
+        if not _bundle_loaded:
+            path = os.getenv("CATALOG_BUNDLE_PATH")
+            if path:
+                try:
+                    _bundle = read_bundle(Path(path))
+                    logger.info("catalog_bundle_loaded", extra={"path": path, "version": _bundle["version"]})
+                except (OSError, ValueError, pickle.UnpicklingError) as exc:
+                    logger.warning("catalog_bundle_unavailable", extra={"path": path, "error": str(exc)})
+            _bundle_loaded = True
+    return _bundle
+
+
+def load(name: str) -> Any:
+    """Compiled catalog ``name``, from the bundle or its JSON sources."""
+    loaded = bundle()
+    if loaded is not None:
+        return loaded["catalogs"][name]
+    catalog = CATALOGS[name]
+    sources, _ = _read(catalog, ROOT)
+    return catalog.compile(sources)
+
+
+@lru_cache(maxsize=1)
+def version() -> str:
+    """Content hash of the catalogs in use; the version key for catalog-derived caches."""
+    loaded = bundle()
+    return loaded["version"] if loaded is not None else content_hash()
+
+
+def reload() -> None:
+    """Forget the loaded bundle and version; the next :func:`load` reads them again."""
+    global _bundle, _bundle_loaded
+    with _lock:
+        _bundle, _bundle_loaded = None, False
+    version.cache_clear()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m common.catalogs", description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", choices=("build", "check"))
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="bundle path for 'build'")
+    parser.add_argument("--root", type=Path, default=ROOT, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    try:
+        compiled = build(args.root)
+    except CatalogError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    if args.command == "build":
+        write(compiled, args.output)
+        print(f"wrote {args.output} version {compiled['version']} ({len(compiled['sources'])} sources)")
+    else:
+        print(f"ok version {compiled['version']} ({len(compiled['sources'])} sources)")
+    return 0
+
+
+__all__ = [
+    "CATALOGS",
+    "Catalog",
+    "CatalogError",
+    "build",
+    "bundle",
+    "content_hash",
+    "load",
+    "read_bundle",
+    "reload",
+    "version",
+    "write",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Optional heavy dependencies imported on first use.
+
+``pytesseract = OptionalImport("pytesseract")`` replaces the usual::
+
+    try:
+        import pytesseract
+    except Exception:
+        pytesseract = None
+
+without paying for the import when the module is loaded.  The import happens
+the first time an attribute is read, the object is called or it is
+truth-tested, so ``if pytesseract:`` still asks "is it installed?".  A
+failed import is remembered and the object is falsy from then on.  Tests
+can keep monkeypatching the module attribute with a stand-in or ``None``.
+
+Warmup steps call :meth:`OptionalImport.load` to pay the import cost before
+the service reports ready.
+"""
+import importlib
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+_MISSING = object()
+
+
+class OptionalImport:
+    """Lazily imported module, or one attribute of it (``attr``)."""
+
+    def __init__(self, module: str, attr: Optional[str] = None) -> None:
+        self._module = module
+        self._attr = attr
+        self._value: Any = _MISSING
+        self._setup: List[Callable[[Any], Any]] = []
+        self._lock = threading.Lock()
+        self.import_seconds: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self._module}.{self._attr}" if self._attr else self._module
+
+    def load(self) -> Any:
+        """Import now; return the module (or attribute), or ``None`` if unavailable."""
+        value = self._value
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            if self._value is not _MISSING:
+                return self._value
+            started = time.perf_counter()
+            try:
+                module = importlib.import_module(self._module)
+                value = getattr(module, self._attr) if self._attr else module
+                for setup in self._setup:
+                    setup(module)
+            except Exception as exc:  # missing or broken optional dependency
+                logger.debug("optional_import_unavailable", extra={"module": self.name, "error": str(exc)})
+                value = None
+            self.import_seconds = round(time.perf_counter() - started, 4)
+            self._value = value
+            return value
+
+    def configure(self, setup: Callable[[Any], Any]) -> None:
+        """Run ``setup(module)`` once the module is imported (now, if it already is)."""
+        with self._lock:
+            if self._value is _MISSING:
+                self._setup.append(setup)
+                return
+        if self._value is not None:
+            setup(importlib.import_module(self._module))
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not _MISSING
+
+    def __bool__(self) -> bool:
+        return self.load() is not None
+
+    def __getattr__(self, item: str) -> Any:
+        value = self.load()
+        if value is None:
+            raise ImportError(f"optional dependency {self.name!r} is not installed")
+        return getattr(value, item)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        value = self.load()
+        if value is None:
+            raise ImportError(f"optional dependency {self.name!r} is not installed")
+        return value(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        state = "not loaded" if self._value is _MISSING else ("missing" if self._value is None else "loaded")
+        return f"<OptionalImport {self.name} ({state})>"
+
+
+def load_all(*imports: OptionalImport) -> dict:
+    """Import each of ``imports``; return ``{name: available}``."""
+    return {item.name: item.load() is not None for item in imports}
+
+
+__all__ = ["OptionalImport", "load_all"]
@@ -1,29 +1,70 @@
-import logging
+"""Structured JSON logging shared by every service.
+
+Loggers from :func:`get_logger` hand records to a :class:`QueueHandler`; one
+listener thread per process redacts, encodes and writes them, so the calling
+thread only pays for building the record.  Redaction decisions for the
+``extra`` keys of a record are computed once per record shape and cached.
+
+Noisy loggers can be sampled or rate limited below ``WARNING``::
+
+    LOG_SAMPLE_RATES="src.extractors=0.1"   # keep ~10% of records
+    LOG_RATE_LIMITS="common.request_id=50"  # at most 50 records per second
+
+Records propagate to the root logger as before, so ``caplog`` and any
+handlers configured by the host application still see every record.
+"""
+import atexit
+import hashlib
 import json
+import logging
+import logging.handlers
 import os
+import queue
+import random
 import re
-import hashlib
-from typing import Any, Dict
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - fallback when orjson is missing
+    orjson = None
 
 SENSITIVE_FIELDS = {"password", "token", "api_key", "ssn", "email", "name", "address", "ip", "phone"}
 EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 IP_RE = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
 
+# Attributes every LogRecord carries; anything else came from ``extra=``.
+RESERVED_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "taskName"}
+
+
 def _anonymize_ip(ip: str) -> str:
     return hashlib.sha256(ip.encode()).hexdigest()[:8]
 
+
+def _redact_string(value: str) -> str:
+    # Both patterns need a "." so most strings skip the regex scans.
+    if "." not in value:
+        return value
+    if IP_RE.search(value):
+        return _anonymize_ip(value)
+    if "@" in value and EMAIL_RE.search(value):
+        return "[REDACTED]"
+    return value
+
+
 def _redact_value(key: str, value: Any) -> Any:
     if key in SENSITIVE_FIELDS:
         if key == "ip" and isinstance(value, str):
             return _anonymize_ip(value)
         return "[REDACTED]"
     if isinstance(value, str):
-        if IP_RE.search(value):
-            return _anonymize_ip(value)
-        if EMAIL_RE.search(value):
-            return "[REDACTED]"
+        return _redact_string(value)
     return _redact(value)
 
+
 def _redact(value: Any) -> Any:
     """Recursively redact sensitive fields from dictionaries."""
     if isinstance(value, dict):
@@ -32,9 +73,72 @@ def _redact(value: Any) -> Any:
         return [_redact(v) for v in value]
     return value
 
+
+_MASK = "mask"
+_HASH_IP = "hash_ip"
+_SCAN = "scan"
+
+
+@lru_cache(maxsize=1024)
+def redaction_plan(keys: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    """Return ``(key, action)`` pairs for the ``extra`` keys of a record."""
+    plan = []
+    for key in keys:
+        if key in RESERVED_ATTRS:
+            continue
+        if key == "ip":
+            plan.append((key, _HASH_IP))
+        elif key in SENSITIVE_FIELDS:
+            plan.append((key, _MASK))
+        else:
+            plan.append((key, _SCAN))
+    return tuple(plan)
+
+
+def _apply_plan(plan: Tuple[Tuple[str, str], ...], attrs: Dict[str, Any], out: Dict[str, Any]) -> None:
+    for key, action in plan:
+        value = attrs[key]
+        if action == _SCAN:
+            if isinstance(value, str):
+                out[key] = _redact_string(value)
+            elif isinstance(value, (dict, list)):
+                out[key] = _redact(value)
+            else:
+                out[key] = value
+        elif action == _HASH_IP and isinstance(value, str):
+            out[key] = _anonymize_ip(value)
+        else:
+            out[key] = "[REDACTED]"
+
+
+if orjson is not None:  # pragma: no cover - depends on optional dependency
+
+    def _dumps(payload: Dict[str, Any]) -> str:
+        return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+else:  # pragma: no cover - stdlib fallback
+    _encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+    _dumps = _encoder.encode
+
+
 class JsonFormatter(logging.Formatter):
     """Format logs as JSON with timestamp and level."""
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._ts_cache: Tuple[int, str] = (-1, "")
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if datefmt is not None:
+            return super().formatTime(record, datefmt)
+        # Only the seconds part goes through strftime; reuse it within a second.
+        second = int(record.created)
+        cached_second, text = self._ts_cache
+        if second != cached_second:
+            text = time.strftime(self.default_time_format, self.converter(record.created))
+            self._ts_cache = (second, text)
+        return self.default_msec_format % (text, record.msecs)
+
     def format(self, record: logging.LogRecord) -> str:
         log_record: Dict[str, Any] = {
             "timestamp": self.formatTime(record, self.datefmt),
@@ -42,39 +146,169 @@ class JsonFormatter(logging.Formatter):
             "name": record.name,
             "message": record.getMessage(),
         }
-        for key, value in record.__dict__.items():
-            if key not in {
-                "name",
-                "msg",
-                "args",
-                "levelname",
-                "levelno",
-                "pathname",
-                "filename",
-                "module",
-                "exc_info",
-                "exc_text",
-                "stack_info",
-                "lineno",
-                "funcName",
-                "created",
-                "msecs",
-                "relativeCreated",
-                "thread",
-                "threadName",
-                "processName",
-                "process",
-            }:
-                log_record[key] = _redact(value)
-        return json.dumps(log_record)
+        attrs = record.__dict__
+        _apply_plan(redaction_plan(tuple(attrs)), attrs, log_record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_record["exc_info"] = record.exc_text
+        return _dumps(log_record)
+
+
+def _parse_overrides(raw: Optional[str], cast: Callable[[str], float]) -> Dict[str, float]:
+    """Parse ``"logger=value,other=value"`` settings; bad entries are ignored."""
+    overrides: Dict[str, float] = {}
+    for item in (raw or "").split(","):
+        name, sep, value = item.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            overrides[name.strip()] = cast(value.strip())
+        except ValueError:
+            continue
+    return overrides
+
+
+def _lookup(overrides: Dict[str, float], name: str) -> Optional[float]:
+    # The closest configured ancestor applies, like logger levels.
+    while True:
+        if name in overrides:
+            return overrides[name]
+        if "." not in name:
+            return None
+        name = name.rsplit(".", 1)[0]
+
+
+class SamplingFilter(logging.Filter):
+    """Drop a share of low-severity records per logger and cap their rate.
+
+    ``WARNING`` and above always pass.  ``sample_rates`` maps logger names to
+    the fraction of records kept; ``rate_limits`` to records per second
+    (token bucket, bursts up to one second's worth).
+    """
+
+    def __init__(
+        self,
+        sample_rates: Optional[Dict[str, float]] = None,
+        rate_limits: Optional[Dict[str, float]] = None,
+    ) -> None:
+        super().__init__()
+        self.sample_rates = dict(sample_rates or {})
+        self.rate_limits = dict(rate_limits or {})
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    @classmethod
+    def from_env(cls) -> "SamplingFilter":
+        return cls(
+            _parse_overrides(os.getenv("LOG_SAMPLE_RATES"), float),
+            _parse_overrides(os.getenv("LOG_RATE_LIMITS"), float),
+        )
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not (self.sample_rates or self.rate_limits):
+            return True
+        rate = _lookup(self.sample_rates, record.name)
+        if rate is not None and random.random() >= rate:
+            self.dropped += 1
+            return False
+        limit = _lookup(self.rate_limits, record.name)
+        if limit is not None and not self._take(record.name, limit):
+            self.dropped += 1
+            return False
+        return True
+
+    def _take(self, name: str, per_second: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(name, (per_second, now))
+            tokens = min(per_second, tokens + (now - updated) * per_second)
+            if tokens < 1:
+                self._buckets[name] = (tokens, now)
+                return False
+            self._buckets[name] = (tokens - 1, now)
+            return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records without formatting them on the calling thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Freeze the message and traceback now; arguments and frames may
+        # change before the listener gets to the record.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if _listener_pid != os.getpid():
+            _start_listener()
+        if _shutdown:
+            # Interpreter exit: nothing drains the queue any more.
+            _stream_handler().handle(record)
+        else:
+            self.queue.put_nowait(record)
+
+
+def _stream_handler() -> logging.Handler:
+    handler = logging.StreamHandler()
+    handler.setFormatter(_formatter)
+    return handler
+
+
+_formatter = JsonFormatter()
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_handler = _DeferredQueueHandler(_queue)
+_queue_handler.addFilter(SamplingFilter.from_env())
+_listener: Optional[logging.handlers.QueueListener] = None
+# The listener thread does not survive fork(); workers start their own.
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+_shutdown = False
+
+
+def _start_listener() -> None:
+    global _listener, _listener_pid
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        _listener = logging.handlers.QueueListener(_queue, _stream_handler())
+        _listener.start()
+        _listener_pid = os.getpid()
+
+
+def stop_logging() -> None:
+    """Write out queued records and stop the listener thread.
+
+    The next record logged starts a fresh listener.
+    """
+    global _listener, _listener_pid
+    with _listener_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+        _listener = None
+        _listener_pid = None
+
+
+def _stop_at_exit() -> None:
+    global _shutdown
+    stop_logging()
+    _shutdown = True
+
+
+atexit.register(_stop_at_exit)
+
 
 def get_logger(name: str) -> logging.Logger:
     """Return a module-level logger with JSON formatting."""
     logger = logging.getLogger(name)
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        handler.setFormatter(JsonFormatter())
-        logger.addHandler(handler)
+        logger.addHandler(_queue_handler)
         level = os.getenv("LOG_LEVEL", "INFO")
         if os.getenv("ENVIRONMENT") == "production" and level == "INFO":
             level = "WARNING"
@@ -83,6 +317,7 @@ def get_logger(name: str) -> logging.Logger:
         logger.propagate = True
     return logger
 
+
 def audit_log(logger: logging.Logger, action: str, **details: Any) -> None:
     """Emit an audit log entry for security-critical events."""
     logger.info(action, extra={"audit": True, **_redact(details)})
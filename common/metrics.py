@@ -0,0 +1,268 @@
+"""In-process metrics shared by the Python services.
+
+:class:`Histogram`, :class:`Counter` and :class:`Gauge` mirror the small part
+of ``prometheus_client``'s API the services use (``labels(...).observe()``,
+``.inc()``, ``.set()``), so code can record into either one.  Metrics register
+themselves in :data:`REGISTRY` and :func:`generate_latest` renders them in the
+Prometheus text format for services running without ``prometheus_client``.
+
+:data:`REQUEST_LATENCY` is the one HTTP latency histogram per process: a
+``prometheus_client`` histogram when that is installed (the services export
+its registry then), otherwise one of the classes here.  Services and the
+request middleware reuse it rather than registering the name again.
+"""
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0,
+)
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Registry:
+    """Metrics by name; registering a name again replaces the old metric."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            self._metrics[metric.name] = metric
+
+    def unregister(self, metric: "_Metric") -> None:
+        with self._lock:
+            if self._metrics.get(metric.name) is metric:
+                del self._metrics[metric.name]
+
+    def collect(self) -> List["_Metric"]:
+        with self._lock:
+            return list(self._metrics.values())
+
+
+REGISTRY = Registry()
+
+
+class _Child:
+    __slots__ = ("_metric", "_key")
+
+    def __init__(self, metric: "_Metric", key: Tuple[str, ...]) -> None:
+        self._metric = metric
+        self._key = key
+
+    def observe(self, value: float) -> None:
+        self._metric._observe(self._key, value)  # type: ignore[attr-defined]
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._metric._add(self._key, amount)  # type: ignore[attr-defined]
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._metric._add(self._key, -amount)  # type: ignore[attr-defined]
+
+    def set(self, value: float) -> None:
+        self._metric._set(self._key, value)  # type: ignore[attr-defined]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values: object) -> _Child:
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"expected {len(self.labelnames)} label values")
+        return _Child(self, tuple(str(v) for v in values))
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], str, float]]:
+        """Return ``(suffix, label values, extra label, value)`` samples."""
+        raise NotImplementedError
+
+
+class _Value(_Metric):
+    def __init__(self, *args, **kwargs) -> None:
+        self._values: Dict[Tuple[str, ...], float] = {}
+        super().__init__(*args, **kwargs)
+
+    def _add(self, key: Tuple[str, ...], amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _set(self, key: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, *labels: object) -> float:
+        with self._lock:
+            return self._values.get(tuple(str(v) for v in labels), 0.0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(self._suffix, key, "", value) for key, value in items]
+
+
+class Counter(_Value):
+    """Monotonic counter; exported with a ``_total`` suffix like prometheus_client."""
+
+    kind = "counter"
+    _suffix = "_total"
+
+    def __init__(self, name: str, *args, **kwargs) -> None:
+        super().__init__(name[: -len("_total")] if name.endswith("_total") else name, *args, **kwargs)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._add((), amount)
+
+
+class Gauge(_Value):
+    kind = "gauge"
+    _suffix = ""
+
+    def set(self, value: float) -> None:
+        self._set((), value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._add((), amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._add((), -amount)
+
+
+class _Series:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """Thread-safe labelled histogram with fixed upper bounds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = REGISTRY,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], _Series] = {}
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float) -> None:
+        self._observe((), value)
+
+    def _observe(self, key: Tuple[str, ...], value: float) -> None:
+        # Index of the first bucket that holds ``value``; len(buckets) is +Inf.
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets) + 1)
+            series.counts[index] += 1
+            series.total += value
+            series.count += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict[str, object]]:
+        """Return cumulative bucket counts, sum and count per label set."""
+        with self._lock:
+            items = [(k, list(s.counts), s.total, s.count) for k, s in self._series.items()]
+        out: Dict[Tuple[str, ...], Dict[str, object]] = {}
+        for key, counts, total, count in items:
+            cumulative: List[int] = []
+            running = 0
+            for c in counts:
+                running += c
+                cumulative.append(running)
+            out[key] = {"buckets": cumulative, "sum": total, "count": count}
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], str, float]]:
+        bounds = [repr(float(b)) for b in self.buckets] + ["+Inf"]
+        out: List[Tuple[str, Tuple[str, ...], str, float]] = []
+        for key, data in sorted(self.snapshot().items()):
+            for bound, count in zip(bounds, data["buckets"]):  # type: ignore[arg-type]
+                out.append(("_bucket", key, 'le="%s"' % bound, count))
+            out.append(("_sum", key, "", data["sum"]))  # type: ignore[arg-type]
+            out.append(("_count", key, "", data["count"]))  # type: ignore[arg-type]
+        return out
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(metrics: Optional[Iterable[_Metric]] = None) -> str:
+    """Render ``metrics`` (default: everything registered) as Prometheus text."""
+    lines: List[str] = []
+    for metric in REGISTRY.collect() if metrics is None else metrics:
+        name = metric.name + ("_total" if metric.kind == "counter" else "")
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for suffix, key, extra, value in metric.samples():
+            lines.append(f"{metric.name}{suffix}{_labels(metric.labelnames, key, extra)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_latest() -> bytes:
+    return render().encode("utf-8")
+
+
+try:
+    from prometheus_client import Histogram as _RequestHistogram
+except ImportError:  # pragma: no cover - prometheus-client is pinned by the services
+    _RequestHistogram = Histogram
+
+REQUEST_LATENCY = _RequestHistogram(
+    "http_server_duration_seconds",
+    "HTTP request duration measured by the request middleware",
+    ["method", "path", "status"],
+)
+
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "Counter",
+    "DEFAULT_BUCKETS",
+    "Gauge",
+    "Histogram",
+    "REGISTRY",
+    "REQUEST_LATENCY",
+    "Registry",
+    "generate_latest",
+    "render",
+]
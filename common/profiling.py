@@ -0,0 +1,301 @@
+"""On-demand sampling profiler for the Python services.
+
+``GET /debug/profile`` samples the stack of every thread in the worker
+(event loop and thread pool alike) with :func:`sys._current_frames` and
+returns the result in one of two formats:
+
+* ``collapsed`` (default): one ``frame;frame;frame count`` line per distinct
+  stack, ready for ``flamegraph.pl`` or speedscope;
+* ``pstats``: a marshalled :mod:`pstats` table (load it with
+  ``pstats.Stats(path)`` or snakeviz). Times are sample counts multiplied by
+  the sampling interval.
+
+There are two capture modes:
+
+* ``?seconds=N`` samples the whole worker for ``N`` seconds;
+* ``?requests=N&path=/analyze`` waits for the next ``N`` requests whose path
+  starts with ``path`` and samples only while one of them is running.
+  Requests served concurrently on the same worker show up as well.
+
+Stacks whose innermost frame is just waiting (selector, lock or queue) are
+dropped unless ``idle=true``.
+
+Profiling is off unless the service's ``ENABLE_DEBUG`` setting is true.
+:func:`install` then adds neither the route nor the middleware, so a disabled
+service pays nothing. Only one capture runs per worker at a time; a second
+request gets 409.
+"""
+import asyncio
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from common.logger import get_logger
+from common.request_id import ASGIApp, Receive, Scope, Send
+
+logger = get_logger(__name__)
+
+Frame = Tuple[str, int, str]
+Stack = Tuple[Frame, ...]
+
+DEFAULT_SECONDS = 10.0
+MAX_SECONDS = 120.0
+DEFAULT_INTERVAL_MS = 5.0
+MIN_INTERVAL_MS = 1.0
+MAX_REQUESTS = 1000
+FORMATS = ("collapsed", "pstats")
+
+# Innermost frames of threads that are parked rather than doing work.
+IDLE_FRAMES = frozenset(
+    {
+        ("selectors.py", "select"),
+        ("threading.py", "wait"),
+        ("queue.py", "get"),
+        ("thread.py", "_worker"),
+        ("socket.py", "accept"),
+    }
+)
+
+
+def _is_idle(frame: Frame) -> bool:
+    return (os.path.basename(frame[0]), frame[2]) in IDLE_FRAMES
+
+
+def _label(frame: Frame) -> str:
+    filename, lineno, name = frame
+    parts = filename.replace("\\", "/").rsplit("/", 2)
+    short = "/".join(parts[-2:])
+    return f"{name} ({short}:{lineno})".replace(";", ":")
+
+
+class Sampler:
+    """Background thread that counts the stacks of every other thread."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL_MS / 1000, *, include_idle: bool = False) -> None:
+        self.interval = interval
+        self.include_idle = include_idle
+        self.counts: Counter = Counter()
+        self.samples = 0
+        # Samples are only recorded while ``active`` is set; request mode
+        # clears it between matching requests.
+        self.active = threading.Event()
+        self.active.set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="debug-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if self.active.is_set():
+                self.sample(skip=own)
+
+    def sample(self, skip: Optional[int] = None) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            stack: List[Frame] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if not stack or (not self.include_idle and _is_idle(stack[0])):
+                continue
+            stack.reverse()
+            self.counts[(names.get(ident, str(ident)), tuple(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format, rooted at the thread name."""
+        merged: Counter = Counter()
+        for (thread, stack), count in self.counts.items():
+            line = ";".join([thread.replace(";", ":"), *map(_label, stack)])
+            merged[line] += count
+        return "".join(f"{line} {count}\n" for line, count in merged.most_common())
+
+    def pstats(self) -> bytes:
+        """Marshalled stats table in the layout :class:`pstats.Stats` loads."""
+        return marshal.dumps(stats_table(self.counts.items(), self.interval))
+
+
+def stats_table(counts: Iterable[Tuple[Tuple[str, Stack], int]], interval: float) -> Dict[Frame, Any]:
+    """Convert sampled stacks to ``{func: (cc, nc, tt, ct, callers)}``."""
+    calls: Counter = Counter()
+    own: Counter = Counter()
+    total: Counter = Counter()
+    callers: Dict[Frame, Counter] = {}
+    for (_, stack), count in counts:
+        own[stack[-1]] += count
+        for func in set(stack):
+            total[func] += count
+        for caller, callee in zip(stack, stack[1:]):
+            callers.setdefault(callee, Counter())[caller] += count
+        for func in stack:
+            calls[func] += count
+    table: Dict[Frame, Any] = {}
+    for func, count in calls.items():
+        edges = {
+            caller: (n, n, n * interval, n * interval)
+            for caller, n in callers.get(func, Counter()).items()
+        }
+        table[func] = (count, count, own[func] * interval, total[func] * interval, edges)
+    return table
+
+
+class RequestTrigger:
+    """Sample while any of the next ``remaining`` requests under ``path`` runs."""
+
+    def __init__(self, path: str, count: int, sampler: Sampler) -> None:
+        self.path = path
+        self.remaining = count
+        self.sampler = sampler
+        self.completed = 0
+        self.inflight = 0
+        self.done = asyncio.Event()
+
+    def matches(self, path: str) -> bool:
+        return path.startswith(self.path) and not path.startswith("/debug/")
+
+    def claim(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        self.inflight += 1
+        self.sampler.active.set()
+        return True
+
+    def release(self) -> None:
+        self.inflight -= 1
+        self.completed += 1
+        if self.inflight == 0:
+            self.sampler.active.clear()
+        if self.remaining == 0 and self.inflight == 0:
+            self.done.set()
+
+
+class Profiler:
+    """Per-worker capture state shared by the route and the middleware."""
+
+    def __init__(self, service: str) -> None:
+        self.service = service
+        self.trigger: Optional[RequestTrigger] = None
+        self._busy = False
+
+    async def capture(
+        self,
+        *,
+        seconds: Optional[float] = None,
+        requests: Optional[int] = None,
+        path: str = "/",
+        interval: float = DEFAULT_INTERVAL_MS / 1000,
+        include_idle: bool = False,
+    ) -> Tuple[Sampler, Dict[str, Any]]:
+        if self._busy:
+            raise RuntimeError("profile already running")
+        self._busy = True
+        sampler = Sampler(interval, include_idle=include_idle)
+        info: Dict[str, Any] = {"service": self.service, "pid": os.getpid()}
+        start = time.perf_counter()
+        try:
+            if requests:
+                sampler.active.clear()
+                trigger = RequestTrigger(path, requests, sampler)
+                sampler.start()
+                self.trigger = trigger
+                try:
+                    await asyncio.wait_for(trigger.done.wait(), timeout=seconds or MAX_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    self.trigger = None
+                info["requests"] = trigger.completed
+            else:
+                sampler.start()
+                await asyncio.sleep(seconds or DEFAULT_SECONDS)
+        finally:
+            sampler.stop()
+            self._busy = False
+        info["seconds"] = round(time.perf_counter() - start, 3)
+        info["samples"] = sampler.samples
+        logger.info("debug_profile", extra=info)
+        return sampler, info
+
+
+class ProfilerMiddleware:
+    """Marks requests that the armed :class:`RequestTrigger` should sample."""
+
+    def __init__(self, app: ASGIApp, *, profiler: Profiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trigger = self.profiler.trigger
+        if (
+            trigger is None
+            or scope["type"] != "http"
+            or not trigger.matches(scope.get("path", ""))
+            or not trigger.claim()
+        ):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            trigger.release()
+
+
+def install(app: Any, service: str, *, enabled: bool) -> Optional[Profiler]:
+    """Add ``GET /debug/profile`` and its middleware to ``app`` when ``enabled``."""
+    if not enabled:
+        return None
+    from fastapi import HTTPException, Query
+    from fastapi.responses import PlainTextResponse, Response
+
+    profiler = Profiler(service)
+
+    async def debug_profile(
+        seconds: Optional[float] = Query(None, gt=0, le=MAX_SECONDS),
+        requests: Optional[int] = Query(None, ge=1, le=MAX_REQUESTS),
+        path: str = "/",
+        format: str = "collapsed",
+        interval_ms: float = Query(DEFAULT_INTERVAL_MS, ge=MIN_INTERVAL_MS, le=1000),
+        idle: bool = False,
+    ) -> Response:
+        if format not in FORMATS:
+            raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+        try:
+            sampler, info = await profiler.capture(
+                seconds=seconds,
+                requests=requests,
+                path=path,
+                interval=interval_ms / 1000,
+                include_idle=idle,
+            )
+        except RuntimeError as exc:
+            raise HTTPException(status_code=409, detail=str(exc))
+        headers = {f"X-Profile-{key.title()}": str(value) for key, value in info.items()}
+        if format == "pstats":
+            headers["Content-Disposition"] = f'attachment; filename="{service}-{info["pid"]}.pstats"'
+            return Response(sampler.pstats(), media_type="application/octet-stream", headers=headers)
+        return PlainTextResponse(sampler.collapsed(), headers=headers)
+
+    app.add_api_route("/debug/profile", debug_profile, methods=["GET"], include_in_schema=False)
+    app.add_middleware(ProfilerMiddleware, profiler=profiler)
+    logger.warning("debug_profiler_enabled", extra={"service": service})
+    return profiler
+
+
+__all__ = ["Profiler", "ProfilerMiddleware", "RequestTrigger", "Sampler", "install", "stats_table"]
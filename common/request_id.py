@@ -1,37 +1,141 @@
+"""Request id propagation and request timing for the Python services.
+
+:class:`RequestContextMiddleware` is plain ASGI middleware: it only wraps
+``send`` to add the ``X-Request-Id`` response header and note the status, so
+streaming responses pass through untouched and no extra task is spawned per
+request.  Every request is timed with a monotonic clock into
+:data:`common.metrics.REQUEST_LATENCY` (and any extra histograms passed in),
+labelled by the route template rather than the raw path.
+
+When tracing is enabled (see :mod:`common.tracing`) each request also runs
+in a server span that continues the caller's ``traceparent``.
+
+Set ``REQUEST_LOG_JSON=true`` to also emit one access log line per request.
+"""
+import os
+import time
 import uuid
 from contextvars import ContextVar
-from starlette.requests import Request
+from typing import Any, Awaitable, Callable, Dict, MutableMapping, Optional, Sequence
+
+from common import tracing
 from common.logger import get_logger
+from common.metrics import REQUEST_LATENCY
 
 _request_id_ctx = ContextVar("request_id", default=None)
 logger = get_logger(__name__)
 
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+HEADER = b"x-request-id"
+TRACEPARENT = tracing.TRACEPARENT.encode("latin-1")
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers") or ():
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_label(scope: Scope) -> str:
+    """Route template matched for this request.
+
+    Requests that matched no route (404s, scanners) share ``UNMATCHED_ROUTE``
+    so the label set stays bounded.
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if isinstance(path, str) else UNMATCHED_ROUTE
+
+
+class RequestContextMiddleware:
+    """Assign request ids and record request latency."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        histograms: Sequence[Any] = (),
+        access_log: Optional[bool] = None,
+    ) -> None:
+        self.app = app
+        self.histograms = (REQUEST_LATENCY, *histograms)
+        if access_log is None:
+            access_log = os.getenv("REQUEST_LOG_JSON") == "true"
+        self.access_log = access_log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if tracing.is_enabled():
+            parent = tracing.parse_traceparent(_header(scope, TRACEPARENT))
+            with tracing.span("http.request", kind=tracing.SERVER, parent=parent) as span:
+                await self._handle(scope, receive, send, span)
+        else:
+            await self._handle(scope, receive, send, tracing.NOOP_SPAN)
+
+    async def _handle(self, scope: Scope, receive: Receive, send: Send, span: Any) -> None:
+        req_id = _header(scope, HEADER) or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = req_id
+        token = _request_id_ctx.set(req_id)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [(k, v) for k, v in message.get("headers", ()) if k.lower() != HEADER]
+                headers.append((HEADER, req_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
 
-async def request_id_middleware(request: Request, call_next):
-    req_id = request.headers.get("X-Request-Id") or str(uuid.uuid4())
-    request.state.request_id = req_id
-    _request_id_ctx.set(req_id)
-    response = await call_next(request)
-    response.headers["X-Request-Id"] = req_id
-    logger.info(
-        "request",
-        extra={
-            "request_id": req_id,
-            "method": request.method,
-            "path": request.url.path,
-            "status_code": response.status_code,
-        },
-    )
-    return response
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_id_ctx.reset(token)
+            method = scope.get("method", "")
+            path = route_label(scope)
+            for histogram in self.histograms:
+                histogram.labels(method, path, status).observe(elapsed)
+            if span.recording:
+                span.update_name(f"{method} {path}")
+                span.set_attribute("http.request.method", method)
+                span.set_attribute("http.route", path)
+                span.set_attribute("http.response.status_code", status)
+                span.set_attribute("request_id", req_id)
+                if status >= 500:
+                    span.set_error(f"HTTP {status}")
+            if self.access_log:
+                extra = {
+                    "request_id": req_id,
+                    "method": method,
+                    "path": path,
+                    "status_code": status,
+                    "duration_ms": round(elapsed * 1000, 3),
+                }
+                if span.context is not None:
+                    extra["trace_id"] = span.context.trace_id
+                logger.info("request", extra=extra)
 
 
 def get_request_id():
     return _request_id_ctx.get()
 
 
-def inject_request_id(headers: dict | None = None) -> dict:
-    """Attach the current request id to outbound request headers."""
-    headers = dict(headers or {})
+def inject_request_id(headers: Optional[Dict[str, str]] = None) -> dict:
+    """Attach the current request id and trace context to outbound request headers."""
+    headers = tracing.inject(headers)
     req_id = get_request_id()
     if req_id:
         headers.setdefault("X-Request-Id", req_id)
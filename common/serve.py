@@ -0,0 +1,376 @@
+"""Pre-forking production launcher for the Python services.
+
+:func:`run` imports the service's ASGI app once in a master process.  It
+calls the service's ``preload`` hook so every catalog is parsed, then moves
+the heap into the permanent GC generation with :func:`gc.freeze`.  Only then
+does it fork the workers, so they share those pages copy-on-write instead of
+each parsing its own copy.  A cyclic GC pass in a worker would otherwise
+touch every preloaded object and copy the pages anyway.
+
+Each worker serves the listening socket inherited from the master with
+uvicorn, and is recycled after ``SERVE_MAX_REQUESTS`` requests (plus up to
+``SERVE_MAX_REQUESTS_JITTER`` so workers do not restart together) or once
+its RSS passes ``SERVE_MAX_WORKER_MEMORY_MB``.  A recycled worker drains
+its open requests and exits; the master starts a fresh fork.
+
+The master handles these signals:
+
+* ``SIGTERM`` / ``SIGINT``: stop every worker gracefully, then exit.
+  Workers still running after ``SERVE_GRACEFUL_TIMEOUT`` seconds are killed.
+* ``SIGHUP``: rolling restart.  The preload hook runs again, so catalog
+  changes on disk are picked up.  Then the workers are replaced one at a
+  time, each old one only after its replacement is up.
+* ``SIGTTIN`` / ``SIGTTOU``: add or remove one worker.
+
+``SERVE_RELOAD=true`` runs a single reloading uvicorn process for local
+development instead.
+"""
+import argparse
+import gc
+import importlib
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from common import tracing
+from common.logger import get_logger, stop_logging
+
+logger = get_logger(__name__)
+
+WORKER_SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size (Linux), or ``None`` where unavailable."""
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):  # pragma: no cover - non-Linux
+        return None
+
+
+@dataclass
+class ServeConfig:
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 1
+    max_requests: int = 0
+    max_requests_jitter: int = 0
+    max_worker_memory_mb: int = 0
+    memory_check_seconds: float = 5.0
+    graceful_timeout: float = 30.0
+    backlog: int = 2048
+    reload: bool = False
+    ssl: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_env(cls, port: int, **overrides: Any) -> "ServeConfig":
+        config = cls(
+            port=_env_int("PORT", port),
+            workers=_env_int("WEB_CONCURRENCY", os.cpu_count() or 1),
+            max_requests=_env_int("SERVE_MAX_REQUESTS", 0),
+            max_requests_jitter=_env_int("SERVE_MAX_REQUESTS_JITTER", 0),
+            max_worker_memory_mb=_env_int("SERVE_MAX_WORKER_MEMORY_MB", 0),
+            graceful_timeout=float(_env_int("SERVE_GRACEFUL_TIMEOUT", 30)),
+            reload=os.getenv("SERVE_RELOAD") == "true",
+        )
+        for key, value in overrides.items():
+            setattr(config, key, value)
+        config.workers = max(config.workers, 1)
+        return config
+
+
+def ssl_options(cert: Optional[str], key: Optional[str], ca: Optional[str] = None) -> Dict[str, Any]:
+    """uvicorn TLS settings; a CA also requires client certificates."""
+    if not (cert and key):
+        return {}
+    import ssl
+
+    options: Dict[str, Any] = {"ssl_certfile": cert, "ssl_keyfile": key}
+    if ca:
+        options["ssl_ca_certs"] = ca
+        options["ssl_cert_reqs"] = ssl.CERT_REQUIRED
+    return options
+
+
+def refresh_caches(*cached: Callable[[], Any]) -> None:
+    """Clear and refill ``functools.lru_cache`` loaders; used by preload hooks."""
+    for loader in cached:
+        loader.cache_clear()  # type: ignore[attr-defined]
+        loader()
+
+
+def import_string(target: str) -> Any:
+    module, _, attr = target.partition(":")
+    obj = importlib.import_module(module)
+    for part in (attr or "app").split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+class Worker:
+    """One forked uvicorn server; runs in the child process."""
+
+    def __init__(self, app: Any, sock: socket.socket, config: ServeConfig) -> None:
+        self.app = app
+        self.sock = sock
+        self.config = config
+
+    def run(self) -> None:
+        import uvicorn
+
+        for sig in WORKER_SIGNALS:
+            signal.signal(sig, signal.SIG_DFL)
+        random.seed()
+        limit = None
+        if self.config.max_requests > 0:
+            limit = self.config.max_requests + random.randint(0, max(self.config.max_requests_jitter, 0))
+        server = uvicorn.Server(
+            uvicorn.Config(
+                self.app,
+                limit_max_requests=limit,
+                **self.config.ssl,
+            )
+        )
+        if self.config.max_worker_memory_mb > 0:
+            threading.Thread(
+                target=self._watch_memory, args=(server,), name="memory-watchdog", daemon=True
+            ).start()
+        logger.info("worker_started", extra={"pid": os.getpid(), "max_requests": limit})
+        server.run(sockets=[self.sock])
+
+    def _watch_memory(self, server: Any) -> None:
+        limit = self.config.max_worker_memory_mb * 1024 * 1024
+        while not server.should_exit:
+            time.sleep(self.config.memory_check_seconds)
+            rss = rss_bytes()
+            if rss is not None and rss > limit:
+                logger.warning("worker_memory_recycle", extra={"pid": os.getpid(), "rss_bytes": rss})
+                server.should_exit = True
+                return
+
+
+class Master:
+    """Preload the app, fork workers and keep their number up."""
+
+    def __init__(
+        self,
+        target: str,
+        config: ServeConfig,
+        preload: Optional[Callable[[], Any]] = None,
+        app: Any = None,
+    ) -> None:
+        self.target = target
+        self.config = config
+        self.preload = preload
+        self.app = app
+        self.sock: Optional[socket.socket] = None
+        self.workers: Dict[int, float] = {}
+        self.signals: List[int] = []
+        self.stopping = False
+
+    def load(self) -> None:
+        started = time.perf_counter()
+        if self.app is None:
+            self.app = import_string(self.target)
+        self._preload()
+        logger.info(
+            "app_preloaded",
+            extra={"target": self.target, "seconds": round(time.perf_counter() - started, 3)},
+        )
+
+    def _preload(self) -> None:
+        gc.unfreeze()
+        if self.preload is not None:
+            self.preload()
+        gc.collect()
+        # Preloaded objects are never collected, so the workers' GC passes
+        # leave their pages untouched and shared.
+        gc.freeze()
+
+    def bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.config.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.config.host, self.config.port))
+        sock.listen(self.config.backlog)
+        sock.set_inheritable(True)
+        return sock
+
+    def spawn(self) -> int:
+        # Drain log and span queues so the child does not inherit and repeat them.
+        stop_logging()
+        tracing.force_flush()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                Worker(self.app, self.sock, self.config).run()
+            except BaseException:
+                logger.exception("worker_crashed")
+                code = 1
+            finally:
+                stop_logging()
+                tracing.shutdown()
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        return pid
+
+    def reap(self) -> List[int]:
+        exited = []
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if self.workers.pop(pid, None) is not None:
+                exited.append(pid)
+                code = os.waitstatus_to_exitcode(status)
+                if not self.stopping:
+                    log = logger.info if code == 0 else logger.warning
+                    log("worker_exited", extra={"pid": pid, "exit_code": code})
+        return exited
+
+    def kill_all(self, sig: int) -> None:
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                self.workers.pop(pid, None)
+
+    def _on_signal(self, signum: int, _frame: Any) -> None:
+        self.signals.append(signum)
+
+    def install_signals(self) -> None:
+        for sig in WORKER_SIGNALS:
+            signal.signal(sig, self._on_signal)
+
+    def run(self) -> None:
+        self.load()
+        self.sock = self.bind()
+        self.install_signals()
+        logger.info(
+            "master_started",
+            extra={"pid": os.getpid(), "port": self.config.port, "workers": self.config.workers},
+        )
+        for _ in range(self.config.workers):
+            self.spawn()
+        while not self.stopping:
+            self.reap()
+            while self.signals:
+                self.handle(self.signals.pop(0))
+            if self.stopping:
+                break
+            while len(self.workers) < self.config.workers:
+                self.spawn()
+            time.sleep(0.2)
+        self.stop()
+
+    def handle(self, signum: int) -> None:
+        if signum in (signal.SIGTERM, signal.SIGINT):
+            self.stopping = True
+        elif signum == signal.SIGHUP:
+            self.rolling_restart()
+        elif signum == signal.SIGTTIN:
+            self.config.workers += 1
+        elif signum == signal.SIGTTOU and self.config.workers > 1:
+            self.config.workers -= 1
+            oldest = min(self.workers, key=self.workers.__getitem__, default=None)
+            if oldest is not None:
+                os.kill(oldest, signal.SIGTERM)
+
+    def rolling_restart(self) -> None:
+        logger.info("rolling_restart", extra={"workers": len(self.workers)})
+        self._preload()
+        for old in list(self.workers):
+            if self.stopping:
+                return
+            if old not in self.workers:
+                continue
+            self.spawn()
+            # Give the replacement time to start accepting before the old
+            # worker stops; both share the listening socket meanwhile.
+            time.sleep(1.0)
+            try:
+                os.kill(old, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            self.reap()
+            if signal.SIGTERM in self.signals or signal.SIGINT in self.signals:
+                self.stopping = True
+
+    def stop(self) -> None:
+        self.kill_all(signal.SIGTERM)
+        deadline = time.monotonic() + self.config.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        if self.workers:
+            logger.warning("workers_killed", extra={"pids": list(self.workers)})
+            self.kill_all(signal.SIGKILL)
+            while self.workers:
+                self.reap()
+                time.sleep(0.05)
+        if self.sock is not None:
+            self.sock.close()
+        logger.info("master_stopped", extra={"pid": os.getpid()})
+
+
+def run(
+    target: str,
+    *,
+    port: int,
+    preload: Optional[Callable[[], Any]] = None,
+    app: Any = None,
+    **overrides: Any,
+) -> None:
+    """Serve ``module:app``; settings come from the environment (see module docstring).
+
+    Pass ``app`` when calling from the module that defines it, so a script
+    run as ``__main__`` is not imported a second time.
+    """
+    config = ServeConfig.from_env(port, **overrides)
+    if config.reload:
+        import uvicorn
+
+        uvicorn.run(target, host=config.host, port=config.port, reload=True, **config.ssl)
+        return
+    Master(target, config, preload, app).run()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m common.serve", description=__doc__.split("\n")[0])
+    parser.add_argument("target", help="ASGI app as module:attribute")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--preload", help="module:function run in the master before forking")
+    parser.add_argument("--workers", type=int, help="defaults to WEB_CONCURRENCY or the CPU count")
+    args = parser.parse_args(argv)
+    sys.path.insert(0, os.getcwd())
+    overrides: Dict[str, Any] = {"host": args.host}
+    if args.workers:
+        overrides["workers"] = args.workers
+    preload = import_string(args.preload) if args.preload else None
+    run(args.target, port=args.port, preload=preload, **overrides)
+
+
+__all__ = ["Master", "ServeConfig", "Worker", "import_string", "refresh_caches", "rss_bytes", "run", "ssl_options"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Keep the shape of slow requests for offline reproduction.
+
+:class:`SlowRequestRecorder` is plain ASGI middleware.  It opens a
+:class:`RequestRecord` for every request.  When a request takes longer than
+``SLOW_REQUEST_MS`` (default ``500``, the ``latency_p95_ms`` SLO; ``0``
+turns recording off), it keeps one entry.  The entry holds the route, status,
+duration, request id, stage timings and the *shape* of the payload.  Entries
+go into a bounded in-memory ring buffer and, when ``SLOW_REQUEST_LOG_PATH``
+is set, a rotating JSONL file.
+
+Services add detail through the module-level helpers, which do nothing
+outside a recorded request:
+
+* :func:`record_stages` charges stage durations (seconds) to the request,
+  and :func:`stage` times a block into it;
+* :func:`note` attaches payload facts such as the document type, page count
+  or grant count.  Dicts and lists are reduced to field names, types and
+  sizes by :func:`describe`, and callables are evaluated, only when the
+  request turns out to be slow.  Fast requests pay for a context variable
+  and a dict update.
+
+Values never leave the service: :func:`describe` keeps keys, types and
+lengths only.
+
+``GET /debug/slow-requests`` returns the buffer, newest first, when the
+service's ``ENABLE_DEBUG`` setting is true.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Mapping, Optional
+
+from common.logger import get_logger
+from common.request_id import ASGIApp, Message, Receive, Scope, Send, route_label
+
+logger = get_logger(__name__)
+
+SKIP_PATHS = frozenset({"/", "/healthz", "/readyz", "/status", "/metrics"})
+DEFAULT_THRESHOLD_MS = 500.0
+DEFAULT_BUFFER = 200
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+MAX_DEPTH = 3
+MAX_KEYS = 100
+
+
+def describe(value: Any, depth: int = MAX_DEPTH) -> Any:
+    """Shape of ``value``: keys, types and sizes, never the values themselves."""
+    if isinstance(value, Mapping):
+        if depth <= 0:
+            return {"type": "object", "keys": len(value)}
+        items = list(value.items())[:MAX_KEYS]
+        return {str(k): describe(v, depth - 1) for k, v in items}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value)
+        shape: Dict[str, Any] = {"type": "list", "len": len(items)}
+        if items and depth > 0:
+            shape["item"] = describe(items[0], depth - 1)
+        return shape
+    if isinstance(value, str):
+        return {"type": "str", "len": len(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {"type": "bytes", "len": len(value)}
+    if value is None:
+        return "null"
+    return type(value).__name__
+
+
+class RequestRecord:
+    """Stage timings and payload notes gathered while one request runs."""
+
+    __slots__ = ("stages", "notes")
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+        self.notes: Dict[str, Any] = {}
+
+    def shape(self) -> Dict[str, Any]:
+        shape: Dict[str, Any] = {}
+        for key, value in self.notes.items():
+            try:
+                if callable(value):
+                    value = value()
+                if isinstance(value, (Mapping, list, tuple, set, frozenset)):
+                    value = describe(value)
+            except Exception as exc:  # describing must never fail a request
+                value = f"<{type(exc).__name__}>"
+            shape[key] = value
+        return shape
+
+
+_current: "ContextVar[Optional[RequestRecord]]" = ContextVar("slow_request_record", default=None)
+
+
+def current() -> Optional[RequestRecord]:
+    return _current.get()
+
+
+def record_stages(stages: Mapping[str, float], prefix: str = "") -> None:
+    """Add ``stages`` (seconds) to the current request's breakdown."""
+    record = _current.get()
+    if record is None:
+        return
+    for name, seconds in stages.items():
+        key = prefix + name
+        record.stages[key] = record.stages.get(key, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block into the current request's ``name`` stage."""
+    record = _current.get()
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.stages[name] = record.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def note(**fields: Any) -> None:
+    """Attach payload facts to the current request; see the module docstring."""
+    record = _current.get()
+    if record is not None:
+        record.notes.update(fields)
+
+
+class SlowRequestLog:
+    """Ring buffer of slow requests with an optional rotating JSONL file."""
+
+    def __init__(
+        self,
+        service: str,
+        *,
+        threshold_ms: float = DEFAULT_THRESHOLD_MS,
+        size: int = DEFAULT_BUFFER,
+        path: Optional[str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backups: int = DEFAULT_BACKUPS,
+    ) -> None:
+        self.service = service
+        self.threshold = threshold_ms / 1000
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=max(size, 1))
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.entries.append(entry)
+            if self.path is not None:
+                try:
+                    self._write(entry)
+                except OSError:
+                    logger.warning("slow_request_write_failed", exc_info=True)
+
+    def snapshot(self, limit: Optional[int] = None, route: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self.entries)
+        entries.reverse()
+        if route:
+            entries = [e for e in entries if e["route"] == route]
+        return entries[:limit] if limit else entries
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        # Expanded per write: workers forked by common.serve each get their own file.
+        path = Path(self.path.format(service=self.service, pid=os.getpid()))
+        line = (json.dumps(entry, default=str, separators=(",", ":")) + "\n").encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists() and path.stat().st_size + len(line) > self.max_bytes:
+            self._rotate(path)
+        with path.open("ab") as fh:
+            fh.write(line)
+
+    def _rotate(self, path: Path) -> None:
+        if self.backups <= 0:
+            path.unlink()
+            return
+        for index in range(self.backups - 1, 0, -1):
+            older = path.with_name(f"{path.name}.{index}")
+            if older.exists():
+                older.replace(path.with_name(f"{path.name}.{index + 1}"))
+        path.replace(path.with_name(f"{path.name}.1"))
+
+
+class SlowRequestRecorder:
+    """Record requests slower than ``log.threshold`` into ``log``."""
+
+    def __init__(self, app: ASGIApp, *, log: SlowRequestLog) -> None:
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path in SKIP_PATHS or path.startswith("/debug/"):
+            await self.app(scope, receive, send)
+            return
+        record = RequestRecord()
+        token = _current.set(record)
+        status = 500
+        response_bytes = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            if elapsed >= self.log.threshold:
+                try:
+                    self.log.add(self._entry(scope, record, status, elapsed, response_bytes))
+                except Exception:  # recording must never fail a request
+                    logger.warning("slow_request_record_failed", exc_info=True)
+
+    def _entry(
+        self, scope: Scope, record: RequestRecord, status: int, elapsed: float, response_bytes: int
+    ) -> Dict[str, Any]:
+        headers = dict(scope.get("headers") or ())
+        request_bytes = headers.get(b"content-length")
+        entry = {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "service": self.log.service,
+            "request_id": (scope.get("state") or {}).get("request_id"),
+            "method": scope.get("method", ""),
+            "route": route_label(scope),
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 3),
+            "stages_ms": {name: round(s * 1000, 3) for name, s in record.stages.items()},
+            "content_type": headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip(),
+            "request_bytes": int(request_bytes) if request_bytes else None,
+            "response_bytes": response_bytes,
+            "shape": record.shape(),
+        }
+        logger.info(
+            "slow_request",
+            extra={k: entry[k] for k in ("request_id", "route", "status", "duration_ms")},
+        )
+        return entry
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def install(app: Any, service: str, *, expose: bool = False) -> Optional[SlowRequestLog]:
+    """Add a :class:`SlowRequestRecorder` to ``app`` unless ``SLOW_REQUEST_MS=0``.
+
+    ``expose`` also adds ``GET /debug/slow-requests``.
+    """
+    threshold_ms = _env_float("SLOW_REQUEST_MS", DEFAULT_THRESHOLD_MS)
+    if threshold_ms <= 0:
+        return None
+    log = SlowRequestLog(
+        service,
+        threshold_ms=threshold_ms,
+        size=int(_env_float("SLOW_REQUEST_BUFFER", DEFAULT_BUFFER)),
+        path=os.getenv("SLOW_REQUEST_LOG_PATH") or None,
+        max_bytes=int(_env_float("SLOW_REQUEST_LOG_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        backups=int(_env_float("SLOW_REQUEST_LOG_BACKUPS", DEFAULT_BACKUPS)),
+    )
+    app.add_middleware(SlowRequestRecorder, log=log)
+    if expose:
+
+        def slow_requests(limit: int = 50, route: Optional[str] = None) -> Dict[str, Any]:
+            entries = log.snapshot(limit, route)
+            return {
+                "service": service,
+                "pid": os.getpid(),
+                "threshold_ms": threshold_ms,
+                "count": len(entries),
+                "requests": entries,
+            }
+
+        app.add_api_route("/debug/slow-requests", slow_requests, methods=["GET"], include_in_schema=False)
+    return log
+
+
+__all__ = [
+    "RequestRecord",
+    "SlowRequestLog",
+    "SlowRequestRecorder",
+    "current",
+    "describe",
+    "install",
+    "note",
+    "record_stages",
+    "stage",
+]
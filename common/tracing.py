@@ -0,0 +1,544 @@
+"""Distributed tracing for the Python services.
+
+Spans follow the OpenTelemetry data model and propagate over the W3C
+``traceparent`` header, so a trace started by the Node pipeline (or any
+OpenTelemetry SDK) continues through the analyzer, the engine and the agent.
+:class:`common.request_id.RequestContextMiddleware` opens one server span per
+request, parented on the inbound header.  Code opens child spans with
+:func:`span`, or with :func:`record_span` for work it already timed, and
+:func:`inject` adds the current context to outbound request headers.
+
+Finished spans are batched by a background thread and handed to the exporter
+named by ``OTEL_TRACES_EXPORTER``:
+
+* ``console`` writes one JSON line per span to stderr,
+* ``file`` appends JSON lines to ``OTEL_TRACES_FILE`` (works offline),
+* ``otlp`` posts OTLP/JSON to ``OTEL_EXPORTER_OTLP_ENDPOINT``,
+* ``none`` drops them.
+
+Without ``OTEL_TRACES_EXPORTER`` spans go to OTLP when an endpoint is set and
+to the console otherwise; :func:`register_exporter` adds more backends.
+
+Tracing is off unless ``OTEL_ENABLED=true``.  New traces are kept with
+probability ``OTEL_TRACES_SAMPLER_ARG`` (default ``1.0``); spans with a parent,
+including one received from upstream, follow the parent's decision.
+"""
+import atexit
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, TextIO
+
+INTERNAL = "internal"
+SERVER = "server"
+CLIENT = "client"
+
+TRACEPARENT = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?$")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Parse a W3C ``traceparent`` header; invalid values yield ``None``."""
+    if not value:
+        return None
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags, rest = match.groups()
+    if version == "ff" or (version == "00" and rest):
+        return None
+    if trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+def format_traceparent(context: SpanContext) -> str:
+    return f"00-{context.trace_id}-{context.span_id}-{'01' if context.sampled else '00'}"
+
+
+def _new_id(bits: int) -> str:
+    # random reseeds itself in forked children, so workers never share ids.
+    return "%0*x" % (bits // 4, random.getrandbits(bits) or 1)
+
+
+class Span:
+    """One timed operation.  Unsampled spans carry context but are not exported."""
+
+    __slots__ = ("name", "context", "parent_id", "kind", "attributes", "status",
+                 "start_ns", "end_ns", "_started", "_service")
+
+    def __init__(
+        self,
+        name: str,
+        context: SpanContext,
+        parent_id: Optional[str] = None,
+        kind: str = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        start_ns: Optional[int] = None,
+    ) -> None:
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status: Optional[str] = None
+        self.start_ns = time.time_ns() if start_ns is None else start_ns
+        self.end_ns: Optional[int] = None
+        self._started = time.perf_counter_ns()
+        self._service = _state.service
+
+    @property
+    def recording(self) -> bool:
+        return self.context.sampled
+
+    def update_name(self, name: str) -> None:
+        self.name = name
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, description: str) -> None:
+        self.status = description
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.attributes["exception.type"] = type(exc).__name__
+        self.set_error(str(exc) or type(exc).__name__)
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns is not None:
+            return
+        # Wall clock for the start, monotonic clock for the duration.
+        self.end_ns = end_ns if end_ns is not None else self.start_ns + time.perf_counter_ns() - self._started
+        processor = _state.processor
+        if self.context.sampled and processor is not None:
+            processor.on_end(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        end_ns = self.end_ns if self.end_ns is not None else self.start_ns
+        return {
+            "service": self._service,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": end_ns,
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": "error" if self.status is not None else "ok",
+            "status_message": self.status,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is off."""
+
+    recording = False
+    context = None
+
+    def update_name(self, name: str) -> None:
+        pass
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, description: str) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    """Receives batches of finished spans (as dicts) on the export thread."""
+
+    def export(self, spans: Sequence[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _dumps(span: Dict[str, Any]) -> str:
+    return json.dumps(span, default=str, separators=(",", ":"))
+
+
+class ConsoleSpanExporter(SpanExporter):
+    def __init__(self, stream: Optional[TextIO] = None) -> None:
+        self.stream = stream
+
+    def export(self, spans: Sequence[Dict[str, Any]]) -> None:
+        stream = self.stream or sys.stderr
+        stream.write("".join(_dumps(s) + "\n" for s in spans))
+        stream.flush()
+
+
+class FileSpanExporter(SpanExporter):
+    """Append spans as JSON lines; several workers may share one file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: Sequence[Dict[str, Any]]) -> None:
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write("".join(_dumps(s) + "\n" for s in spans))
+
+
+_OTLP_KINDS = {INTERNAL: 1, SERVER: 2, CLIENT: 3}
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build an OTLP/JSON ``ExportTraceServiceRequest`` body."""
+    by_service: Dict[str, List[Dict[str, Any]]] = {}
+    for s in spans:
+        otlp_span: Dict[str, Any] = {
+            "traceId": s["trace_id"],
+            "spanId": s["span_id"],
+            "name": s["name"],
+            "kind": _OTLP_KINDS.get(s["kind"], 1),
+            "startTimeUnixNano": str(s["start_time_unix_nano"]),
+            "endTimeUnixNano": str(s["end_time_unix_nano"]),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s["attributes"].items()],
+            "status": {"code": 2, "message": s["status_message"]} if s["status"] == "error" else {"code": 1},
+        }
+        if s["parent_span_id"]:
+            otlp_span["parentSpanId"] = s["parent_span_id"]
+        by_service.setdefault(s["service"], []).append(otlp_span)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": items}],
+            }
+            for service, items in by_service.items()
+        ]
+    }
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """POST spans as OTLP/JSON, e.g. to an OpenTelemetry collector on :4318."""
+
+    def __init__(self, endpoint: str, *, timeout: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: Sequence[Dict[str, Any]]) -> None:
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(otlp_payload(spans)).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+            resp.read()
+
+
+def _otlp_endpoint() -> Optional[str]:
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")
+    if endpoint:
+        return endpoint
+    base = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    return base.rstrip("/") + "/v1/traces" if base else None
+
+
+_EXPORTERS: Dict[str, Callable[[], Optional[SpanExporter]]] = {
+    "console": ConsoleSpanExporter,
+    "file": lambda: FileSpanExporter(os.getenv("OTEL_TRACES_FILE", "traces.jsonl")),
+    "otlp": lambda: OTLPHttpSpanExporter(_otlp_endpoint() or "http://localhost:4318/v1/traces"),
+    "none": lambda: None,
+}
+
+
+def register_exporter(name: str, factory: Callable[[], Optional[SpanExporter]]) -> None:
+    """Make ``OTEL_TRACES_EXPORTER=<name>`` use ``factory()``."""
+    _EXPORTERS[name] = factory
+
+
+def exporter_from_env() -> Optional[SpanExporter]:
+    name = os.getenv("OTEL_TRACES_EXPORTER") or ("otlp" if _otlp_endpoint() else "console")
+    factory = _EXPORTERS.get(name.strip().lower())
+    if factory is None:
+        raise ValueError(f"unknown OTEL_TRACES_EXPORTER {name!r}")
+    return factory()
+
+
+class BatchSpanProcessor:
+    """Queue finished spans and export them in batches from a daemon thread."""
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        *,
+        max_batch: int = 512,
+        max_queue: int = 4096,
+        delay_seconds: float = 1.0,
+    ) -> None:
+        self.exporter = exporter
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.delay_seconds = delay_seconds
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        # The export thread does not survive fork(); workers start their own.
+        self._pid: Optional[int] = None
+
+    def on_end(self, span: Span) -> None:
+        if self._queue.qsize() >= self.max_queue:
+            self.dropped += 1
+            return
+        if self._pid != os.getpid():
+            self._start()
+        self._queue.put(span)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.delay_seconds
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = None
+            if isinstance(item, Span):
+                batch.append(item)
+                if len(batch) < self.max_batch and time.monotonic() < deadline:
+                    continue
+            self._export(batch)
+            batch = []
+            deadline = time.monotonic() + self.delay_seconds
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item == "stop":
+                return
+
+    def _export(self, batch: List[Span]) -> None:
+        if not batch:
+            return
+        try:
+            self.exporter.export([s.to_dict() for s in batch])
+        except Exception as exc:  # exporters must never break the service
+            self.failed += len(batch)
+            sys.stderr.write(f"span export failed: {exc!r}\n")
+
+    def force_flush(self, timeout: float = 5.0) -> bool:
+        """Export everything queued so far; ``False`` if it timed out."""
+        if self._pid != os.getpid():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def shutdown(self) -> None:
+        if self._pid == os.getpid():
+            self.force_flush()
+            self._queue.put("stop")
+            self._pid = None
+        self.exporter.shutdown()
+
+
+class _State:
+    __slots__ = ("service", "enabled", "sample_ratio", "processor")
+
+    def __init__(self) -> None:
+        self.service = "unknown"
+        self.enabled = False
+        self.sample_ratio = 1.0
+        self.processor: Optional[BatchSpanProcessor] = None
+
+
+_state = _State()
+_current: "ContextVar[Optional[Span]]" = ContextVar("current_span", default=None)
+
+
+def configure(
+    service_name: str,
+    *,
+    enabled: Optional[bool] = None,
+    sample_ratio: Optional[float] = None,
+    exporter: Optional[SpanExporter] = None,
+) -> None:
+    """Set up tracing for this process; unset arguments come from the environment.
+
+    ``OTEL_SERVICE_NAME`` overrides ``service_name``.
+    """
+    if enabled is None:
+        enabled = os.getenv("OTEL_ENABLED") == "true"
+    if sample_ratio is None:
+        try:
+            sample_ratio = float(os.getenv("OTEL_TRACES_SAMPLER_ARG", "1.0"))
+        except ValueError:
+            sample_ratio = 1.0
+    if enabled and exporter is None:
+        exporter = exporter_from_env()
+    shutdown()
+    _state.service = os.getenv("OTEL_SERVICE_NAME") or service_name
+    _state.sample_ratio = min(max(sample_ratio, 0.0), 1.0)
+    _state.processor = BatchSpanProcessor(exporter) if enabled and exporter is not None else None
+    _state.enabled = bool(enabled)
+
+
+def is_enabled() -> bool:
+    return _state.enabled
+
+
+def force_flush(timeout: float = 5.0) -> bool:
+    processor = _state.processor
+    return processor.force_flush(timeout) if processor is not None else True
+
+
+def shutdown() -> None:
+    """Export queued spans and turn tracing off."""
+    processor = _state.processor
+    _state.enabled = False
+    _state.processor = None
+    if processor is not None:
+        processor.shutdown()
+
+
+atexit.register(shutdown)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def _start(
+    name: str,
+    parent: Optional[SpanContext],
+    kind: str,
+    attributes: Dict[str, Any],
+    start_ns: Optional[int] = None,
+) -> Span:
+    if parent is None:
+        context = SpanContext(_new_id(128), _new_id(64), random.random() < _state.sample_ratio)
+        return Span(name, context, None, kind, attributes, start_ns)
+    context = SpanContext(parent.trace_id, _new_id(64), parent.sampled)
+    return Span(name, context, parent.span_id, kind, attributes, start_ns)
+
+
+@contextmanager
+def span(
+    name: str,
+    *,
+    kind: str = INTERNAL,
+    parent: Optional[SpanContext] = None,
+    **attributes: Any,
+) -> Iterator[Any]:
+    """Run the block in a child of the current span (or of ``parent``).
+
+    Yields :data:`NOOP_SPAN` while tracing is off.  An exception leaving the
+    block marks the span as failed.
+    """
+    if not _state.enabled:
+        yield NOOP_SPAN
+        return
+    if parent is None:
+        current = _current.get()
+        parent = current.context if current is not None else None
+    new = _start(name, parent, kind, attributes)
+    token = _current.set(new)
+    try:
+        yield new
+    except Exception as exc:
+        new.record_exception(exc)
+        raise
+    finally:
+        _current.reset(token)
+        new.end()
+
+
+def record_span(name: str, seconds: float, **attributes: Any) -> None:
+    """Record a child span for work that ended just now and took ``seconds``."""
+    if not _state.enabled:
+        return
+    current = _current.get()
+    end_ns = time.time_ns()
+    new = _start(
+        name,
+        current.context if current is not None else None,
+        INTERNAL,
+        attributes,
+        start_ns=end_ns - int(seconds * 1e9),
+    )
+    new.end(end_ns)
+
+
+def inject(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Return ``headers`` with the current ``traceparent`` added."""
+    headers = dict(headers or {})
+    current = _current.get()
+    if current is not None:
+        headers.setdefault(TRACEPARENT, format_traceparent(current.context))
+    return headers
+
+
+__all__ = [
+    "BatchSpanProcessor",
+    "CLIENT",
+    "ConsoleSpanExporter",
+    "FileSpanExporter",
+    "INTERNAL",
+    "NOOP_SPAN",
+    "OTLPHttpSpanExporter",
+    "SERVER",
+    "Span",
+    "SpanContext",
+    "SpanExporter",
+    "TRACEPARENT",
+    "configure",
+    "current_span",
+    "exporter_from_env",
+    "force_flush",
+    "format_traceparent",
+    "inject",
+    "is_enabled",
+    "otlp_payload",
+    "parse_traceparent",
+    "record_span",
+    "register_exporter",
+    "shutdown",
+    "span",
+]
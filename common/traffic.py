@@ -0,0 +1,281 @@
+"""Record sanitized request/response pairs for load-test replay.
+
+:class:`TrafficRecorder` is plain ASGI middleware.  It buffers each request
+body as it is read and, once the response has been sent, appends one JSON
+line describing the exchange.  That line holds the JSON body or form fields,
+upload sizes, the status, the latency and the JSON response.
+:mod:`loadtest` replays these files.
+
+Nothing identifying leaves the service:
+
+* the logs' sensitive keys are masked as in the logs,
+* values under any key naming personal data (``employee_ssn``,
+  ``payer_tin``, ``recipient_address``, ``account_number`` ...) keep their
+  shape but lose their letters and digits, and numbers become ``0``,
+* in free text, values after labels such as ``Name:`` or ``Account number:``
+  are masked the same way,
+* SSNs, phone numbers and other runs of five or more digits (EINs, account
+  and routing numbers, ZIP codes) lose their digits, and e-mail addresses
+  are replaced,
+* uploaded files are reduced to their extension, type and size.
+
+Masking keeps lengths and separators so replayed payloads stay realistic.
+Names in unlabelled free text cannot be recognised and are kept.
+
+Recording is off unless ``TRAFFIC_RECORD_PATH`` is set; ``{service}`` and
+``{pid}`` in the path are expanded so workers can write separate files.
+``TRAFFIC_RECORD_SAMPLE`` keeps that share of requests (default ``1.0``).
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from common.logger import EMAIL_RE, SENSITIVE_FIELDS, _redact_value, get_logger
+from common.request_id import ASGIApp, Message, Receive, Scope, Send, route_label
+
+logger = get_logger(__name__)
+
+SKIP_PATHS = frozenset({"/", "/healthz", "/readyz", "/status", "/metrics"})
+MAX_RESPONSE_BYTES = 64 * 1024
+SSN_RE = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
+PHONE_RE = re.compile(r"(?:\+1[\s.-]?)?\(?\b\d{3}\)?[\s.-]\d{3}[\s.-]\d{4}\b")
+DIGIT_RUN_RE = re.compile(r"\b\d[\d-]*\d\b")
+ISO_DATE_RE = re.compile(r"\d{4}-\d{1,2}-\d{1,2}")
+MIN_DIGIT_RUN = 5
+LABELLED_VALUE_RE = re.compile(
+    r"(?i)\b(?:name|address|ssn|tin|ein|phone|dob|date of birth|account(?: number| no\.?| #)?)"
+    r"[^\S\n]*[:#][^\S\n]*(?P<value>[^\n]+)"
+)
+
+# Keys naming personal data.  Short fragments must be a whole ``_``-separated
+# word of the key ("payer_tin", not "rating"); longer ones may appear anywhere.
+SENSITIVE_KEY_WORDS = frozenset({"ssn", "tin", "ein", "dob", "zip", "ip"})
+SENSITIVE_KEY_FRAGMENTS = (
+    "name", "address", "phone", "account", "routing", "birth", "email", "street",
+    "password", "token", "secret",
+)
+# Keys matching the fragments above whose values replay needs verbatim.
+SAFE_KEYS = frozenset({"form_name", "form_names"})
+_KEY_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _zero_digits(match: "re.Match[str]") -> str:
+    return re.sub(r"\d", "0", match.group(0))
+
+
+def _mask_text(text: str) -> str:
+    return re.sub(r"\d", "0", re.sub(r"[^\W\d_]", "x", text))
+
+
+def _mask_digit_run(match: "re.Match[str]") -> str:
+    run = match.group(0)
+    if ISO_DATE_RE.fullmatch(run) or sum(ch.isdigit() for ch in run) < MIN_DIGIT_RUN:
+        return run
+    return _zero_digits(match)
+
+
+def _mask_labelled(match: "re.Match[str]") -> str:
+    # The value runs to the end of the match.
+    label = match.group(0)[: match.start("value") - match.start()]
+    return label + _mask_text(match.group("value"))
+
+
+def scrub_text(text: str) -> str:
+    """Mask personal data in free text without changing its layout much."""
+    text = LABELLED_VALUE_RE.sub(_mask_labelled, text)
+    text = SSN_RE.sub(_zero_digits, text)
+    text = PHONE_RE.sub(_zero_digits, text)
+    text = DIGIT_RUN_RE.sub(_mask_digit_run, text)
+    if "@" in text:
+        text = EMAIL_RE.sub("user@example.com", text)
+    return text
+
+
+def sensitive_key(key: str) -> bool:
+    """Whether ``key`` names personal data (see :data:`SENSITIVE_KEY_FRAGMENTS`)."""
+    key = key.lower()
+    if key in SAFE_KEYS:
+        return False
+    if any(fragment in key for fragment in SENSITIVE_KEY_FRAGMENTS):
+        return True
+    return not SENSITIVE_KEY_WORDS.isdisjoint(_KEY_WORD_RE.findall(key))
+
+
+def mask(value: Any) -> Any:
+    """Mask every scalar in ``value``, keeping strings' shape and JSON types."""
+    if isinstance(value, str):
+        return _mask_text(value)
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return type(value)(0)
+    if isinstance(value, dict):
+        return {k: mask(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [mask(v) for v in value]
+    return value
+
+
+def sanitize(value: Any) -> Any:
+    """Redact a decoded JSON value."""
+    if isinstance(value, str):
+        return scrub_text(value)
+    if isinstance(value, dict):
+        return {k: _sanitize_item(k, v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v) for v in value]
+    return value
+
+
+def _sanitize_item(key: str, value: Any) -> Any:
+    if key in SENSITIVE_FIELDS:
+        return _redact_value(key, value)
+    if sensitive_key(key):
+        return mask(value)
+    return sanitize(value)
+
+
+def _content_type(scope: Scope) -> str:
+    for key, value in scope.get("headers") or ():
+        if key == b"content-type":
+            return value.decode("latin-1")
+    return ""
+
+
+async def _form_fields(scope: Scope, body: bytes) -> Dict[str, Any]:
+    from starlette.requests import Request
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    form: Dict[str, Any] = {}
+    files: Dict[str, Any] = {}
+    async with Request(scope, receive).form() as data:
+        for name, value in data.multi_items():
+            if isinstance(value, str):
+                form[name] = _sanitize_item(name, value)
+            else:
+                files[name] = {
+                    "ext": Path(value.filename or "").suffix.lower(),
+                    "content_type": value.content_type,
+                    "size": value.size,
+                }
+    return {"form": form, "files": files}
+
+
+class TrafficRecorder:
+    """Append one sanitized JSON line per request to ``path``."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        service: str,
+        path: str,
+        sample_rate: float = 1.0,
+        max_body_bytes: int = 25 * 1024 * 1024,
+    ) -> None:
+        self.app = app
+        self.service = service
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope.get("path") in SKIP_PATHS
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+        chunks: List[bytes] = []
+        size = 0
+        response: Dict[str, Any] = {"status": 500, "content_type": "", "body": []}
+
+        async def receive_wrapper() -> Message:
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request":
+                size += len(message.get("body", b""))
+                if size <= self.max_body_bytes:
+                    chunks.append(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for key, value in message.get("headers", ()):
+                    if key.lower() == b"content-type":
+                        response["content_type"] = value.decode("latin-1")
+            elif message["type"] == "http.response.body" and "json" in response["content_type"]:
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            if size <= self.max_body_bytes:
+                try:
+                    entry = await self._entry(scope, b"".join(chunks), response, elapsed)
+                    self._write(entry)
+                except Exception:  # recording must never fail a request
+                    logger.warning("traffic_record_failed", exc_info=True)
+
+    async def _entry(
+        self, scope: Scope, body: bytes, response: Dict[str, Any], elapsed: float
+    ) -> Dict[str, Any]:
+        content_type = _content_type(scope)
+        entry: Dict[str, Any] = {
+            "service": self.service,
+            "method": scope.get("method", ""),
+            "path": scope.get("path", ""),
+            "route": route_label(scope),
+            "query": scrub_text(scope.get("query_string", b"").decode("latin-1")),
+            "content_type": content_type.split(";")[0].strip(),
+        }
+        if body and "json" in content_type:
+            entry["body"] = sanitize(json.loads(body))
+        elif body and ("multipart/form-data" in content_type or "urlencoded" in content_type):
+            entry.update(await _form_fields(scope, body))
+        raw = b"".join(response["body"])
+        entry["status"] = response["status"]
+        entry["duration_ms"] = round(elapsed * 1000, 3)
+        entry["response_bytes"] = len(raw)
+        if raw and len(raw) <= MAX_RESPONSE_BYTES:
+            try:
+                entry["response"] = sanitize(json.loads(raw))
+            except ValueError:
+                pass
+        return entry
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        path = Path(self.path.format(service=self.service, pid=os.getpid()))
+        line = json.dumps(entry, default=str, separators=(",", ":")) + "\n"
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as fh:
+                fh.write(line)
+
+
+def install(app: Any, service: str) -> None:
+    """Add a :class:`TrafficRecorder` to ``app`` when ``TRAFFIC_RECORD_PATH`` is set."""
+    path = os.getenv("TRAFFIC_RECORD_PATH")
+    if not path:
+        return
+    try:
+        sample_rate = float(os.getenv("TRAFFIC_RECORD_SAMPLE", "1.0"))
+    except ValueError:
+        sample_rate = 1.0
+    app.add_middleware(TrafficRecorder, service=service, path=path, sample_rate=sample_rate)
+
+
+__all__ = ["SKIP_PATHS", "TrafficRecorder", "install", "mask", "sanitize", "scrub_text", "sensitive_key"]
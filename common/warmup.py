@@ -0,0 +1,126 @@
+"""Startup warmup and readiness for the Python services.
+
+A service registers warmup steps on its :class:`Warmup`: parse catalogs,
+import optional backends and extractor modules, compile detectors and
+templates, and run one representative request through the hot path so that
+regex, expression and lookup caches are primed.  :meth:`Warmup.start` runs
+them once on a background thread, and ``/readyz`` answers 503 until they
+have finished.  A cold pod therefore only gets traffic after its first
+requests would be as fast as the rest.
+
+Under :mod:`common.serve`, :meth:`Warmup.run` is the master's preload hook,
+so the steps run once before the fork, every worker starts warm and
+:meth:`Warmup.start` has nothing left to do.
+
+A failing step is logged and reported but does not keep the service
+unready; the request path still handles whatever the step would have
+prepared.  The ``warmup_complete`` log line reports the time the process
+spent starting up and importing and the time per step.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def process_uptime() -> Optional[float]:
+    """Seconds since this process started (Linux), or ``None`` where unavailable."""
+    try:
+        with open("/proc/self/stat", "rb") as fh:
+            # The command name may contain spaces; fields resume after ")".
+            fields = fh.read().rsplit(b")", 1)[1].split()
+        with open("/proc/uptime", "rb") as fh:
+            uptime = float(fh.read().split()[0])
+        return round(uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"), 3)
+    except (OSError, ValueError, IndexError):  # pragma: no cover - non-Linux
+        return None
+
+
+class Warmup:
+    """Ordered warmup steps and the readiness they gate."""
+
+    def __init__(self, service: str) -> None:
+        self.service = service
+        self.steps: List[Tuple[str, Callable[[], Any]]] = []
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.import_seconds: Optional[float] = None
+        self._done = threading.Event()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def step(self, name: str) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+        """Register the decorated function as a warmup step."""
+
+        def register(func: Callable[[], Any]) -> Callable[[], Any]:
+            self.steps.append((name, func))
+            return func
+
+        return register
+
+    def imported(self) -> None:
+        """Note that module-level imports have finished."""
+        self.import_seconds = process_uptime()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def run(self) -> Dict[str, Any]:
+        """Run every step, in this thread, and mark the service ready.
+
+        Used as the :mod:`common.serve` preload hook, so a ``SIGHUP``
+        re-preload runs the steps again against the refreshed catalogs.
+        """
+        with self._lock:
+            self._started = True
+            started = time.perf_counter()
+            self.errors.clear()
+            for name, func in self.steps:
+                step_started = time.perf_counter()
+                try:
+                    func()
+                except Exception as exc:
+                    self.errors[name] = f"{type(exc).__name__}: {exc}"
+                    logger.warning(
+                        "warmup_step_failed", extra={"service": self.service, "step": name}, exc_info=True
+                    )
+                self.timings[name] = round((time.perf_counter() - step_started) * 1000, 3)
+            self._done.set()
+            report = self.report()
+            report["warmup_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        logger.info("warmup_complete", extra=report)
+        return report
+
+    def start(self) -> None:
+        """Run the steps on a daemon thread unless they already ran (e.g. before fork)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self.run, name=f"{self.service}-warmup", daemon=True).start()
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "service": self.service,
+            "ready": self.ready,
+            "import_seconds": self.import_seconds,
+            "steps_ms": dict(self.timings),
+            "errors": dict(self.errors),
+        }
+
+    def readiness(self) -> Tuple[int, Dict[str, Any]]:
+        """``(status code, body)`` for ``/readyz``."""
+        if self.ready:
+            return 200, {"status": "ready", "warmup": self.report()}
+        return 503, {"status": "warming", "warmup": self.report()}
+
+
+__all__ = ["Warmup", "process_uptime"]
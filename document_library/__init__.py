@@ -1,12 +1,17 @@
-"""Utilities for working with the shared document catalog."""
+"""Utilities for working with the shared document catalog.
+
+The catalog and aliases come from :mod:`common.catalogs`, which reads the
+compiled catalog bundle when one is configured and the JSON files otherwise.
+"""
 from __future__ import annotations
 
 from dataclasses import dataclass, field
 from functools import lru_cache
-import json
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from common import catalogs
+
 BASE_DIR = Path(__file__).resolve().parent
 CATALOG_PATH = BASE_DIR / "catalog.json"
 ALIAS_PATH = BASE_DIR / "aliases.json"
@@ -79,7 +84,7 @@ class DocumentDefinition:
 
 
 def _load_catalog_json() -> Dict[str, Any]:
-    raw = json.loads(CATALOG_PATH.read_text(encoding="utf-8"))
+    raw = catalogs.load("documents")
     if "documents" not in raw:
         raise ValueError("catalog.json must contain a 'documents' array")
     return raw
@@ -93,6 +98,19 @@ def load_catalog() -> List[DocumentDefinition]:
     return [DocumentDefinition.from_dict(entry) for entry in data.get("documents", [])]
 
 
+@lru_cache(maxsize=1)
+def catalog_version() -> str:
+    """Return ``<version>:<content hash>`` identifying the loaded catalog.
+
+    The hash is :func:`common.catalogs.version`, so edits that forget to
+    bump ``version`` still produce a new identifier and every catalog-derived
+    cache shares one key.
+    """
+
+    version = _load_catalog_json().get("version", 0)
+    return f"{version}:{catalogs.version()}"
+
+
 @lru_cache(maxsize=1)
 def catalog_index() -> Dict[str, DocumentDefinition]:
     """Index catalog entries by their canonical document key."""
@@ -105,10 +123,8 @@ def load_alias_map() -> Dict[str, str]:
     """Return a lower-cased alias lookup table for document keys."""
 
     mapping: Dict[str, str] = {}
-    if ALIAS_PATH.exists():
-        alias_payload = json.loads(ALIAS_PATH.read_text(encoding="utf-8"))
-        for alias, canonical in alias_payload.get("aliases", {}).items():
-            mapping[str(alias).strip().lower()] = str(canonical)
+    for alias, canonical in catalogs.load("document_aliases").get("aliases", {}).items():
+        mapping[str(alias).strip().lower()] = str(canonical)
     # Ensure canonical keys and embedded aliases resolve to themselves
     for doc in load_catalog():
         mapping.setdefault(doc.key.lower(), doc.key)
@@ -117,6 +133,16 @@ def load_alias_map() -> Dict[str, str]:
     return mapping
 
 
+def preload() -> None:
+    """Reparse the catalog and alias caches, e.g. before forking workers."""
+
+    for cached in (load_catalog, catalog_version, catalog_index, load_alias_map):
+        cached.cache_clear()
+    catalog_version()
+    load_alias_map()
+    catalog_index()
+
+
 def normalize_key(key: Optional[str]) -> Optional[str]:
     """Normalize an arbitrary document key to its canonical value."""
 
@@ -146,9 +172,7 @@ def normalize_list(values: Optional[Iterable[str]]) -> List[str]:
 def family_aliases() -> Dict[str, str]:
     """Return alias mappings for document family names."""
 
-    if not ALIAS_PATH.exists():
-        return {}
-    payload = json.loads(ALIAS_PATH.read_text(encoding="utf-8"))
+    payload = catalogs.load("document_aliases")
     return {
         str(alias).strip().lower(): str(family)
         for alias, family in (payload.get("family_aliases") or {}).items()
@@ -159,9 +183,11 @@ __all__ = [
     "DocumentDefinition",
     "DetectorSpec",
     "catalog_index",
+    "catalog_version",
     "family_aliases",
     "load_alias_map",
     "load_catalog",
     "normalize_key",
     "normalize_list",
+    "preload",
 ]
@@ -1,11 +1,12 @@
 """Helpers for working with document field aliases."""
 from __future__ import annotations
 
-import json
 from functools import lru_cache
 from typing import Dict, Iterable, List
 
-from . import ALIAS_PATH, catalog_index
+from common import catalogs
+
+from . import catalog_index
 
 
 def _dedupe(values: Iterable[str]) -> List[str]:
@@ -41,9 +42,7 @@ def _default_alias(field_name: str) -> str | None:
 
 @lru_cache(maxsize=1)
 def _load_field_alias_payload() -> Dict[str, Dict[str, List[str]]]:
-    if not ALIAS_PATH.exists():
-        return {}
-    data = json.loads(ALIAS_PATH.read_text(encoding="utf-8"))
+    data = catalogs.load("document_aliases")
     raw_field_aliases = data.get("field_aliases") or {}
     normalized: Dict[str, Dict[str, List[str]]] = {}
     for doc_key, mapping in raw_field_aliases.items():
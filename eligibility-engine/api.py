@@ -1,53 +1,79 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, Response
-import time
+import json
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 import sys
-from typing import Any, Dict, List
+import time
+from typing import Any, AsyncIterator, Dict, List
 from pydantic import ValidationError
-from prometheus_client import Histogram, CONTENT_TYPE_LATEST, generate_latest
 
 CURRENT_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(CURRENT_DIR.parent))
+from common import catalogs, profiling, serve, slow_requests, tracing, traffic
 from common.logger import get_logger
-from common.request_id import request_id_middleware
-from grants_loader import load_grants
+from common.request_id import RequestContextMiddleware
+from common.warmup import Warmup
+import metrics
+from grants_loader import GRANTS_DIR, load_grants
+from industry_classifier import CATALOG_PATH, catalog_by_code, load_catalog
+import document_library
 from engine import analyze_eligibility
 from config import settings  # type: ignore
 from models import ResultsEnvelope, GrantResult
-from normalization.ingest import normalize_payload
+from normalization import ingest
+from normalization.ingest import field_aliases, load_field_map, normalize_payload
 
 logger = get_logger(__name__)
+tracing.configure("eligibility-engine")
 
 OBS_ENABLED = os.getenv("OBSERVABILITY_ENABLED") == "true"
 PROM_ENABLED = OBS_ENABLED and os.getenv("PROMETHEUS_METRICS_ENABLED") == "true"
 
-if PROM_ENABLED:
-    REQ_LATENCY = Histogram(
-        "http_request_duration_seconds",
-        "Request duration",
-        ["method", "path", "status"],
-    )
+ingest.set_stage_timer(metrics.request_stages)
+metrics.register_cache("industry_catalog", load_catalog)
+metrics.register_cache("industry_catalog_by_code", catalog_by_code)
+metrics.register_catalog("grants", lambda: (len(load_grants()), list(GRANTS_DIR.glob("*.json"))))
+metrics.register_catalog("industries", lambda: (len(load_catalog()), [CATALOG_PATH]))
 
-async def observability_middleware(request: Request, call_next):
-    start = time.time()
-    response = await call_next(request)
-    if PROM_ENABLED:
-        REQ_LATENCY.labels(request.method, request.url.path, response.status_code).observe(time.time() - start)
-    return response
 
-if PROM_ENABLED:
-    def metrics():
-        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+def metrics_endpoint() -> Response:
+    return Response(metrics.render_latest(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
+warmup = Warmup("eligibility-engine")
+WARMUP_PAYLOAD = CURRENT_DIR / "test_payload.json"
+
+
+@warmup.step("catalogs")
+def preload_catalogs() -> None:
+    """Parse every catalog the engine reads; run by common.serve before forking."""
+    catalogs.reload()
+    serve.refresh_caches(load_grants, load_field_map, field_aliases, load_catalog, catalog_by_code)
+    document_library.preload()
+
+
+@warmup.step("check")
+def _warm_check() -> None:
+    # One representative /check primes rule, NAICS and normalization caches
+    # and builds the response models' serializers.
+    payload = json.loads(WARMUP_PAYLOAD.read_text(encoding="utf-8"))
+    _serialize(analyze_eligibility(normalize_payload(payload), explain=True))
 
-app = FastAPI(title="Grant Eligibility Engine")
-try:
-    app.middleware("http")(request_id_middleware)
-except AttributeError:
-    pass
-app.middleware("http")(observability_middleware)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    warmup.start()
+    yield
+
+
+app = FastAPI(title="Grant Eligibility Engine", lifespan=lifespan)
+app.add_middleware(RequestContextMiddleware)
+traffic.install(app, "eligibility-engine")
+profiling.install(app, "eligibility-engine", enabled=settings.ENABLE_DEBUG)
+slow_requests.install(app, "eligibility-engine", expose=settings.ENABLE_DEBUG)
 
 app.add_middleware(
     CORSMiddleware,
@@ -82,10 +108,11 @@ def healthz() -> dict[str, str]:
 
 @app.get("/readyz")
 def readyz() -> JSONResponse:
-    return JSONResponse(status_code=200, content={"status": "ready"})
+    code, body = warmup.readiness()
+    return JSONResponse(status_code=code, content=body)
 
 if PROM_ENABLED:
-    app.get("/metrics")(metrics)
+    app.get("/metrics")(metrics_endpoint)
 
 @app.get("/")
 def root() -> dict[str, str]:
@@ -95,24 +122,30 @@ def root() -> dict[str, str]:
 def status() -> dict[str, str]:
     return {"status": "ok"}
 
-GRANTS = load_grants()
-
-
 @app.post("/check")
 async def check(payload: Dict[str, Any]) -> Any:
     if not isinstance(payload, dict) or not payload:
         raise HTTPException(status_code=400, detail="Request body must be a non-empty JSON object.")
 
-    try:
-        grant_results = await compute_grant_results(payload)
-        logger.info("eligibility_check", extra={"fields": list(payload.keys())})
-    except KeyError as ke:
-        logger.error("eligibility_check_failed", extra={"error": f"Missing required field: {ke}"})
-        raise HTTPException(status_code=422, detail=f"Missing required field: {ke}") from ke
-    except ValueError as ve:
-        logger.error("eligibility_check_failed", extra={"error": str(ve)})
-        raise HTTPException(status_code=400, detail=str(ve)) from ve
-
+    with metrics.request_stages() as timer:
+        try:
+            grant_results = await compute_grant_results(payload)
+            slow_requests.note(fields=payload, grant_count=len(grant_results))
+            logger.info("eligibility_check", extra={"fields": list(payload.keys())})
+        except KeyError as ke:
+            logger.error("eligibility_check_failed", extra={"error": f"Missing required field: {ke}"})
+            raise HTTPException(status_code=422, detail=f"Missing required field: {ke}") from ke
+        except ValueError as ve:
+            logger.error("eligibility_check_failed", extra={"error": str(ve)})
+            raise HTTPException(status_code=400, detail=str(ve)) from ve
+
+        started = time.perf_counter()
+        body = _serialize(grant_results)
+        timer.add("serialize", started)
+    return body
+
+
+def _serialize(grant_results: List[Dict[str, Any]]) -> Any:
     typed_results: List[GrantResult] = [GrantResult(**gr) for gr in grant_results]
 
     if not settings.WRAP_RESULTS:
@@ -137,6 +170,7 @@ async def check(payload: Dict[str, Any]) -> Any:
     )
     return envelope.model_dump(by_alias=True, exclude_none=True)
 
+
 @app.get("/grants")
 def list_grants():
     return [
@@ -147,12 +181,12 @@ def list_grants():
             "ui_questions": g.get("ui_questions", []),
             "description": g.get("description", ""),
         }
-        for g in GRANTS
+        for g in load_grants()
     ]
 
 @app.get("/grants/{grant_key}")
 def get_grant(grant_key: str):
-    for g in GRANTS:
+    for g in load_grants():
         if g["key"] == grant_key:
             return g
     raise HTTPException(status_code=404, detail="Grant not found")
@@ -162,17 +196,16 @@ async def compute_grant_results(payload: Dict[str, Any]) -> List[Dict[str, Any]]
     normalized = normalize_payload(payload)
     return analyze_eligibility(normalized, explain=True)
 
+
+warmup.imported()
+
 if __name__ == "__main__":
-    import uvicorn
-    import ssl
-
-    cert = str(settings.TLS_CERT_PATH)
-    key = str(settings.TLS_KEY_PATH)
-    ca = str(settings.TLS_CA_PATH) if settings.TLS_CA_PATH else None
-    kwargs: dict[str, object] = {"reload": True}
-    if cert and key:
-        kwargs.update({"ssl_certfile": cert, "ssl_keyfile": key})
-        if ca:
-            kwargs["ssl_ca_certs"] = ca
-            kwargs["ssl_cert_reqs"] = ssl.CERT_REQUIRED
-    uvicorn.run("api:app", host="0.0.0.0", port=4001, **kwargs)
+    serve.run(
+        "api:app",
+        app=app,
+        port=4001,
+        preload=warmup.run,
+        ssl=serve.ssl_options(
+            os.getenv("TLS_CERT_PATH"), os.getenv("TLS_KEY_PATH"), os.getenv("TLS_CA_PATH")
+        ),
+    )
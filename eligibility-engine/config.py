@@ -11,6 +11,8 @@ class Settings(BaseSettings):
     NODE_ENV: str = "development"
     MONGO_URI: str = "mongodb://localhost:27017/grant-platform"
     WRAP_RESULTS: bool = True
+    # Exposes /debug/profile (see common/profiling.py).
+    ENABLE_DEBUG: bool = False
 
 
 settings = Settings()
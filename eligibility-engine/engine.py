@@ -1,24 +1,17 @@
+import time
 from typing import Any, Dict, List
 
-from fastapi import FastAPI
-
 from common.logger import get_logger
 
+import metrics
 from grants_loader import load_grants
 from industry_classifier import list_naics_codes
 from normalization import normalize_list
 from rules_utils import check_rules, check_rule_groups, estimate_award
 
-app = FastAPI()
-
 logger = get_logger(__name__)
 
 
-@app.get("/healthz")
-def health_check() -> dict[str, str]:
-    return {"status": "ok"}
-
-
 def _heuristic_estimate(data: Dict[str, Any]) -> int:
     """Fallback estimation using simple heuristics."""
     payroll = data.get("annual_payroll") or data.get("payroll")
@@ -37,28 +30,41 @@ def _heuristic_estimate(data: Dict[str, Any]) -> int:
     return 5000
 
 
+def _grant_label(grant: Dict[str, Any]) -> str:
+    return str(grant.get("key") or grant.get("name") or "unknown")
+
+
 def analyze_eligibility(
     user_data: Dict[str, Any], explain: bool = False
 ) -> List[Dict[str, Any]]:
     """Validate user data against all grant definitions."""
+    with metrics.request_stages() as timer:
+        return _analyze(user_data, timer)
+
+
+def _analyze(user_data: Dict[str, Any], timer: metrics.StageTimer) -> List[Dict[str, Any]]:
     grants = load_grants()
     user_tags = set(user_data.get("tags", []))
 
     results: List[Dict[str, Any]] = []
     for grant in grants:
+        grant_started = time.perf_counter()
         logger.debug("Evaluating grant %s", grant.get("name"))
         grant_tags = set(grant.get("tags", []))
         tag_score = {tag: 1 for tag in user_tags & grant_tags} if user_tags else {}
         missing = [f for f in grant.get("required_fields", []) if f not in user_data]
         if missing:
             logger.debug("%s missing fields: %s", grant.get("name"), missing)
+            metrics.record_grant(_grant_label(grant), "skipped", time.perf_counter() - grant_started)
             continue
 
         base_documents = normalize_list(grant.get("required_documents", []))
         base_forms = normalize_list(grant.get("required_forms", []))
 
+        started = time.perf_counter()
         if grant.get("eligibility_categories"):
             rule_result = check_rule_groups(user_data, grant.get("eligibility_categories"))
+            started = timer.add("rules", started)
             if rule_result.get("estimated_award"):
                 award_info = rule_result.get("estimated_award")
             elif rule_result["eligible"]:
@@ -69,6 +75,7 @@ def analyze_eligibility(
             group_documents = normalize_list(rule_result.get("required_documents", []))
         else:
             rule_result = check_rules(user_data, grant.get("eligibility_rules", {}))
+            started = timer.add("rules", started)
             award_info = (
                 estimate_award(user_data, grant.get("estimated_award", {}))
                 if rule_result["eligible"]
@@ -93,6 +100,7 @@ def analyze_eligibility(
             amount = award_info
         if rule_result.get("status") == "conditional" and amount == 0:
             amount = _heuristic_estimate(user_data)
+        timer.add("award", started)
 
         debug_data = {**rule_result["debug"]}
         debug_data["award"] = award_info if isinstance(award_info, dict) else {"amount": amount}
@@ -108,7 +116,9 @@ def analyze_eligibility(
         allowed_industries = [str(code) for code in grant.get("eligible_industries", []) if str(code)]
         if allowed_industries:
             allowed_set = set(allowed_industries)
+            started = time.perf_counter()
             business_codes = list_naics_codes(user_data)
+            timer.add("industry", started)
             industry_debug: Dict[str, Any] = {
                 "allowed": sorted(allowed_set),
                 "business_codes": business_codes,
@@ -190,6 +200,7 @@ def analyze_eligibility(
             result["required_forms"] = required_forms
         if required_documents:
             result["required_documents"] = required_documents
+        metrics.record_grant(_grant_label(grant), status, time.perf_counter() - grant_started)
         logger.debug(
             "Grant %s result: eligible=%s score=%s",
             grant.get("name"),
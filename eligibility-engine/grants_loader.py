@@ -1,17 +1,19 @@
+from functools import lru_cache
 from pathlib import Path
-import json
 from typing import List, Dict, Any
 
+from common import catalogs
+
 
 GRANTS_DIR = Path(__file__).parent / "grants"
 
 
+@lru_cache(maxsize=1)
 def load_grants() -> List[Dict[str, Any]]:
-    """Load all grant JSON files from the grants directory."""
-    grants: List[Dict[str, Any]] = []
-    for path in GRANTS_DIR.glob("*.json"):
-        with path.open("r", encoding="utf-8") as f:
-            grant = json.load(f)
-            grant["key"] = path.stem
-            grants.append(grant)
-    return grants
+    """Load all grant definitions, ordered by key.
+
+    They come from the compiled catalog bundle when one is configured and
+    from ``grants/*.json`` otherwise (see :mod:`common.catalogs`).  The list
+    is parsed once per process and shared; callers must not mutate it.
+    """
+    return catalogs.load("grants")["grants"]
@@ -1,11 +1,12 @@
 """Utilities to map businesses to NAICS industries."""
 
-import json
 import re
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Sequence
 
+from common import catalogs
+
 CATALOG_PATH = Path(__file__).resolve().parent / "industries.json"
 
 
@@ -44,14 +45,12 @@ def _coerce_entry(value: Any, *, default_source: str) -> Optional[Dict[str, Any]
 
 @lru_cache()
 def load_catalog() -> List[Dict[str, Any]]:
-    with CATALOG_PATH.open("r", encoding="utf-8") as fh:
-        data = json.load(fh)
-        return data
+    return catalogs.load("industries")["industries"]
 
 
 @lru_cache()
 def catalog_by_code() -> Dict[str, Dict[str, Any]]:
-    return {item["naics_code"]: item for item in load_catalog()}
+    return catalogs.load("industries")["by_code"]
 
 
 def _iter_naics_values(value: Any, *, default_source: str) -> Iterable[Dict[str, Any]]:
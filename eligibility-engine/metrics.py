@@ -0,0 +1,194 @@
+"""Prometheus metrics for the eligibility engine.
+
+``/check`` time is broken down into stages (``normalize``, ``industry``,
+``rules``, ``award`` and ``serialize``), each observed once per request.
+Every grant evaluation is timed and its outcome counted.  Catalog and cache
+gauges are refreshed when ``/metrics`` is scraped, so they cost nothing on
+the request path.
+
+Stages and grant evaluations are also recorded as :mod:`common.tracing`
+spans when tracing is enabled, and stage totals are handed to
+:mod:`common.slow_requests` for the slow-request log.
+
+``prometheus_client`` is used when installed; otherwise the in-process
+implementation in :mod:`common.metrics` serves the same text format.
+"""
+import hashlib
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+    USING_PROMETHEUS = True
+except ImportError:  # pragma: no cover - prometheus-client is pinned in requirements.txt
+    from common.metrics import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+    USING_PROMETHEUS = False
+
+from common import slow_requests, tracing
+
+STAGES = ("normalize", "industry", "rules", "award", "serialize")
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+STAGE_LATENCY = Histogram(
+    "engine_stage_duration_seconds",
+    "Time spent per /check stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+GRANT_LATENCY = Histogram(
+    "engine_grant_evaluation_seconds",
+    "Time to evaluate one grant",
+    ["grant"],
+    buckets=STAGE_BUCKETS,
+)
+GRANT_OUTCOMES = Counter(
+    "engine_grant_outcomes_total",
+    "Grant evaluations by outcome",
+    ["grant", "status"],
+)
+CACHE_HIT_RATIO = Gauge("engine_cache_hit_ratio", "Hit ratio of in-process caches", ["cache"])
+CACHE_ENTRIES = Gauge("engine_cache_entries", "Entries held by in-process caches", ["cache"])
+CATALOG_ENTRIES = Gauge("engine_catalog_entries", "Entries in a loaded catalog", ["catalog"])
+CATALOG_BYTES = Gauge("engine_catalog_bytes", "Size of a catalog's source files", ["catalog"])
+CATALOG_INFO = Gauge(
+    "engine_catalog_info", "Catalog content version (always 1)", ["catalog", "version"]
+)
+
+# Bound children skip the label lookup on the hot path.
+_STAGE = {stage: STAGE_LATENCY.labels(stage) for stage in STAGES}
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    _STAGE[stage].observe(seconds)
+
+
+class StageTimer:
+    """Accumulate time per stage within one request, then observe it once.
+
+    Stages that run several times per request (``rules`` once per grant) are
+    summed, so each histogram sample is that stage's share of one request.
+    """
+
+    __slots__ = ("totals",)
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = {}
+
+    def add(self, stage: str, started: float) -> float:
+        """Charge ``perf_counter() - started`` to ``stage``; return the new now."""
+        now = time.perf_counter()
+        self.totals[stage] = self.totals.get(stage, 0.0) + (now - started)
+        tracing.record_span(f"engine.{stage}", now - started)
+        return now
+
+    def flush(self) -> None:
+        slow_requests.record_stages(self.totals, prefix="engine.")
+        for stage, seconds in self.totals.items():
+            _STAGE[stage].observe(seconds)
+        self.totals.clear()
+
+
+_current: "ContextVar[Optional[StageTimer]]" = ContextVar("engine_stage_timer", default=None)
+
+
+@contextmanager
+def request_stages() -> Iterator[StageTimer]:
+    """Yield the active request's :class:`StageTimer`, starting one if needed.
+
+    Nested uses share the outermost timer, which observes on exit.
+    """
+    timer = _current.get()
+    if timer is not None:
+        yield timer
+        return
+    timer = StageTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+        timer.flush()
+
+
+def record_grant(grant: str, status: str, seconds: float) -> None:
+    GRANT_LATENCY.labels(grant).observe(seconds)
+    GRANT_OUTCOMES.labels(grant, status).inc()
+    tracing.record_span("engine.grant", seconds, grant=grant, status=status)
+
+
+_caches: Dict[str, Callable[[], Any]] = {}
+_catalogs: Dict[str, Callable[[], tuple]] = {}
+
+
+def register_cache(name: str, cached: Callable[..., Any]) -> None:
+    """Report a ``functools.lru_cache`` wrapped function's hit ratio."""
+    _caches[name] = cached.cache_info  # type: ignore[attr-defined]
+
+
+def register_catalog(name: str, describe: Callable[[], tuple]) -> None:
+    """Report a catalog; ``describe`` returns ``(entries, source paths)``."""
+    _catalogs[name] = describe
+
+
+def fingerprint(paths: Iterable[Path]) -> tuple:
+    """Return ``(short content hash, total bytes)`` for catalog source files."""
+    digest = hashlib.sha256()
+    size = 0
+    for path in sorted(paths):
+        data = path.read_bytes()
+        digest.update(path.name.encode("utf-8"))
+        digest.update(data)
+        size += len(data)
+    return digest.hexdigest()[:12], size
+
+
+def refresh() -> None:
+    """Update cache and catalog gauges; called on scrape."""
+    for name, cache_info in _caches.items():
+        info = cache_info()
+        lookups = info.hits + info.misses
+        CACHE_HIT_RATIO.labels(name).set(info.hits / lookups if lookups else 0.0)
+        CACHE_ENTRIES.labels(name).set(info.currsize)
+    for name, describe in _catalogs.items():
+        entries, paths = describe()
+        version, size = fingerprint(paths)
+        CATALOG_ENTRIES.labels(name).set(entries)
+        CATALOG_BYTES.labels(name).set(size)
+        _set_catalog_version(name, version)
+
+
+_versions: Dict[str, str] = {}
+
+
+def _set_catalog_version(name: str, version: str) -> None:
+    previous = _versions.get(name)
+    if previous == version:
+        return
+    if previous is not None:
+        CATALOG_INFO.labels(name, previous).set(0)
+    CATALOG_INFO.labels(name, version).set(1)
+    _versions[name] = version
+
+
+def render_latest() -> bytes:
+    refresh()
+    return generate_latest()
+
+
+__all__: List[str] = [
+    "CONTENT_TYPE_LATEST",
+    "STAGES",
+    "StageTimer",
+    "observe_stage",
+    "record_grant",
+    "request_stages",
+    "register_cache",
+    "register_catalog",
+    "refresh",
+    "render_latest",
+]
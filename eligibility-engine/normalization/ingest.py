@@ -1,40 +1,92 @@
 import json
 import re
+import time
+from contextlib import nullcontext
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Callable, ContextManager, Dict, Optional
 
+from common import catalogs
 from industry_classifier import assign_industry_naics
 
 FIELD_MAP_PATH = Path(__file__).resolve().parent.parent / "contracts" / "field_map.json"
 
 
+@lru_cache(maxsize=4)
 def load_field_map(path: Path = FIELD_MAP_PATH) -> Dict[str, Any]:
+    """Parsed field map, shared per process; callers must not mutate it.
+
+    The default map comes from :mod:`common.catalogs` (the compiled bundle
+    when configured); another ``path`` is read directly.
+    """
+    if path == FIELD_MAP_PATH:
+        return catalogs.load("field_map")["fields"]
     with path.open() as f:
         return json.load(f)
 
 
+@lru_cache(maxsize=1)
+def field_aliases() -> Dict[str, str]:
+    """Alias -> canonical field lookup for the default field map."""
+    return catalogs.load("field_map")["aliases"]
+
+
+class _Untimed:
+    """Stage timer that records nothing."""
+
+    def add(self, stage: str, started: float) -> float:
+        return time.perf_counter()
+
+
+def _untimed() -> ContextManager[Any]:
+    return nullcontext(_Untimed())
+
+
+_stage_timer: Callable[[], ContextManager[Any]] = _untimed
+
+
+def set_stage_timer(factory: Callable[[], ContextManager[Any]]) -> None:
+    """Time the ``normalize`` and ``industry`` stages with ``factory``.
+
+    ``factory()`` yields an object with ``add(stage, started) -> now``; the
+    service installs ``metrics.request_stages``.  Normalization is untimed
+    until then, so importing it registers no metrics.
+    """
+    global _stage_timer
+    _stage_timer = factory
+
+
 def normalize_payload(analyzer_payload: Dict[str, Any]) -> Dict[str, Any]:
-    field_map = load_field_map()
-    data = fill_aliases(analyzer_payload, field_map)
-    data = coerce_types_and_units(data, field_map)
-    data = assign_industry_naics(data)
+    with _stage_timer() as timer:
+        started = time.perf_counter()
+        field_map = load_field_map()
+        data = fill_aliases(analyzer_payload, field_map, field_aliases())
+        data = coerce_types_and_units(data, field_map)
+        started = timer.add("normalize", started)
+        data = assign_industry_naics(data)
+        timer.add("industry", started)
     return data
 
 
-def fill_aliases(payload: Dict[str, Any], field_map: Dict[str, Any]) -> Dict[str, Any]:
+def fill_aliases(
+    payload: Dict[str, Any], field_map: Dict[str, Any], alias_map: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
     """Map all known aliases to their canonical targets.
 
     The field map now defines each canonical field once and lists any
-    acceptable aliases. This helper builds a reverse lookup so payload keys
+    acceptable aliases. This helper uses a reverse lookup so payload keys
     produced by the analyzer or UI are rewritten to the canonical key.
+    ``alias_map`` is that lookup precomputed (see :func:`field_aliases`);
+    it is built from ``field_map`` when omitted.
     """
 
-    alias_map: Dict[str, str] = {}
-    for target, info in field_map.items():
-        alias_map[target] = target
-        for alias in info.get("aliases", []):
-            alias_map[alias] = target
+    if alias_map is None:
+        alias_map = {}
+        for target, info in field_map.items():
+            alias_map[target] = target
+            for alias in info.get("aliases", []):
+                alias_map[alias] = target
 
     result: Dict[str, Any] = {}
     for key, value in payload.items():
@@ -0,0 +1,56 @@
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient  # noqa: E402
+
+import metrics  # noqa: E402
+from api import app  # noqa: E402
+from engine import analyze_eligibility  # noqa: E402
+
+client = TestClient(app)
+
+
+def _sample(text: str, name: str, **labels: str) -> float:
+    for line in text.splitlines():
+        if not line.startswith(name + "{"):
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', line[len(name):line.rindex("}")]))
+        if all(found.get(k) == v for k, v in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_check_records_each_stage_once_per_request():
+    before = metrics.render_latest().decode()
+    payload = json.loads((Path(__file__).resolve().parents[1] / "test_payload.json").read_text())
+    resp = client.post("/check", json=payload)
+    assert resp.status_code == 200
+    after = metrics.render_latest().decode()
+    name = "engine_stage_duration_seconds_count"
+    for stage in metrics.STAGES:
+        delta = _sample(after, name, stage=stage) - _sample(before, name, stage=stage)
+        assert delta == 1, stage
+
+
+def test_grant_outcomes_are_counted():
+    before = metrics.render_latest().decode()
+    results = analyze_eligibility({"owner_veteran": True})
+    after = metrics.render_latest().decode()
+    evaluated = sum(
+        _sample(after, "engine_grant_outcomes_total", status=s)
+        - _sample(before, "engine_grant_outcomes_total", status=s)
+        for s in ("eligible", "conditional", "ineligible")
+    )
+    assert evaluated == len([r for r in results if not r.get("debug", {}).get("fallback")])
+
+
+def test_catalog_and_cache_gauges_refresh_on_scrape():
+    text = metrics.render_latest().decode()
+    assert _sample(text, "engine_catalog_entries", catalog="grants") > 0
+    assert _sample(text, "engine_catalog_entries", catalog="industries") > 0
+    assert re.search(r'engine_catalog_info\{catalog="grants",version="[0-9a-f]{12}"\} 1', text)
+    assert 0.0 <= _sample(text, "engine_cache_hit_ratio", cache="industry_catalog") <= 1.0
@@ -0,0 +1,12 @@
+"""Load-test harness for the Python services.
+
+Record live traffic with :mod:`common.traffic` (set ``TRAFFIC_RECORD_PATH``)
+or generate it with :mod:`loadtest.synthetic`, then replay it::
+
+    python -m loadtest synth --count 500 --out loadtest/recordings/synthetic.jsonl
+    python -m loadtest run --traffic loadtest/recordings/*.jsonl --spawn \
+        --concurrency 16 --rate 40 --duration 120
+
+``run`` prints p50/p95/p99, throughput and error rate per endpoint and exits
+non-zero when ``observability/slo.yml`` is not met.  See docs/load-testing.md.
+"""
@@ -0,0 +1,110 @@
+"""Command line entry point: ``python -m loadtest {synth,run}``."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loadtest import report
+from loadtest.replay import RunResult, load_entries, replay, write_entries
+from loadtest.services import SERVICES, local_services
+from loadtest.synthetic import generate
+
+
+def _targets(args: argparse.Namespace) -> Dict[str, str]:
+    urls = {
+        "ai-analyzer": args.analyzer_url,
+        "eligibility-engine": args.engine_url,
+        "ai-agent": args.agent_url,
+    }
+    return {name: url.rstrip("/") for name, url in urls.items() if url}
+
+
+def _run(args: argparse.Namespace) -> int:
+    entries = load_entries(args.traffic) if args.traffic else []
+    if args.synthetic:
+        entries += generate(args.synthetic, seed=args.seed)
+    if not entries:
+        print("no traffic: pass --traffic files and/or --synthetic N", file=sys.stderr)
+        return 2
+
+    def execute(targets: Dict[str, str]) -> RunResult:
+        return asyncio.run(
+            replay(
+                entries,
+                targets,
+                concurrency=args.concurrency,
+                rate=args.rate,
+                requests=args.requests,
+                duration=args.duration,
+                timeout=args.timeout,
+            )
+        )
+
+    if args.spawn:
+        wanted = sorted({e["service"] for e in entries} & set(SERVICES))
+        with local_services(wanted, workers=args.workers) as targets:
+            result = execute(targets)
+    else:
+        result = execute(_targets(args))
+
+    if result.skipped:
+        print(f"skipped (no target): {result.skipped}", file=sys.stderr)
+    stats = report.summarize(result.samples, result.wall_seconds)
+    print(report.format_table(stats))
+    for name, entry in stats.items():
+        if entry.failures and name != report.OVERALL:
+            print(f"failures {name}: {entry.failures}", file=sys.stderr)
+    violations = report.check_slo(stats, report.load_slo(args.slo)) if args.slo else []
+    for violation in violations:
+        print(f"SLO violation: {violation}", file=sys.stderr)
+    if args.report:
+        Path(args.report).write_text(json.dumps(report.as_json(stats, violations), indent=2))
+    if not result.samples:
+        return 2
+    return 1 if violations else 0
+
+
+def _synth(args: argparse.Namespace) -> int:
+    write_entries(args.out, generate(args.count, seed=args.seed))
+    print(f"wrote {args.count} entries to {args.out}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m loadtest")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    synth = sub.add_parser("synth", help="write synthetic traffic as JSONL")
+    synth.add_argument("--count", type=int, default=200)
+    synth.add_argument("--seed", type=int, default=0)
+    synth.add_argument("--out", type=Path, default=Path("loadtest/recordings/synthetic.jsonl"))
+    synth.set_defaults(func=_synth)
+
+    run = sub.add_parser("run", help="replay traffic and check SLOs")
+    run.add_argument("--traffic", type=Path, nargs="*", default=[], help="recorded JSONL files")
+    run.add_argument("--synthetic", type=int, default=0, help="add N synthetic requests")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--rate", type=float, help="requests per second (open loop)")
+    run.add_argument("--requests", type=int, help="total requests, cycling through the traffic")
+    run.add_argument("--duration", type=float, help="seconds to keep replaying")
+    run.add_argument("--timeout", type=float, default=60.0)
+    run.add_argument("--analyzer-url")
+    run.add_argument("--engine-url")
+    run.add_argument("--agent-url")
+    run.add_argument("--spawn", action="store_true", help="start the services locally under uvicorn")
+    run.add_argument("--workers", type=int, default=1, help="uvicorn workers per spawned service")
+    run.add_argument("--slo", default=str(report.SLO_PATH), help="SLO file ('' to skip the check)")
+    run.add_argument("--report", type=Path, help="write the summary as JSON")
+    run.set_defaults(func=_run)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Replay recorded or synthetic traffic against running services.
+
+Entries are read from JSONL files written by
+:class:`common.traffic.TrafficRecorder` or :func:`loadtest.synthetic.generate`
+and sent to the service they were recorded from.  Uploads are rebuilt from
+the fixture corpus, since recordings only keep a file's type and size.
+
+Without a rate, ``concurrency`` requests are kept in flight (closed loop).
+With ``rate`` requests are started on a fixed schedule (open loop).  Their
+latency is measured from the scheduled start, so time spent waiting for a
+free slot counts against the service rather than being hidden.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import httpx
+
+from loadtest.report import Sample
+from loadtest.synthetic import corpus, text_pdf
+
+
+def load_entries(paths: Iterable[Path]) -> List[Dict[str, Any]]:
+    entries = []
+    for path in paths:
+        with Path(path).open(encoding="utf-8") as fh:
+            entries.extend(json.loads(line) for line in fh if line.strip())
+    return entries
+
+
+def write_entries(path: Path, entries: Iterable[Dict[str, Any]]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as fh:
+        for entry in entries:
+            fh.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+def endpoint_key(entry: Dict[str, Any]) -> str:
+    return f"{entry['service']} {entry['method']} {entry.get('route') or entry['path']}"
+
+
+class _Uploads:
+    """PDF renderings of the corpus, built once per run."""
+
+    def __init__(self) -> None:
+        self.docs = corpus()
+        self._pdfs: Dict[str, bytes] = {}
+        self._names = itertools.cycle(sorted(self.docs))
+
+    def pdf(self, name: Optional[str]) -> bytes:
+        if name not in self.docs:
+            name = next(self._names)
+        if name not in self._pdfs:
+            self._pdfs[name] = text_pdf(self.docs[name])
+        return self._pdfs[name]
+
+
+def build_request(entry: Dict[str, Any], uploads: _Uploads) -> Dict[str, Any]:
+    """Keyword arguments for ``httpx.AsyncClient.request`` replaying ``entry``."""
+    kwargs: Dict[str, Any] = {"method": entry["method"], "url": entry["path"]}
+    if entry.get("query"):
+        kwargs["url"] += "?" + entry["query"]
+    if "body" in entry:
+        kwargs["json"] = entry["body"]
+    files = entry.get("files") or {}
+    if entry.get("form") or files:
+        kwargs["data"] = entry.get("form") or {}
+        if files:
+            kwargs["files"] = {
+                name: (f"{meta.get('doc') or 'upload'}.pdf", uploads.pdf(meta.get("doc")), "application/pdf")
+                for name, meta in files.items()
+            }
+    return kwargs
+
+
+@dataclass
+class RunResult:
+    samples: List[Sample] = field(default_factory=list)
+    wall_seconds: float = 0.0
+    skipped: Dict[str, int] = field(default_factory=dict)
+
+
+def _schedule(
+    entries: List[Dict[str, Any]], requests: Optional[int], duration: Optional[float]
+) -> Iterator[Dict[str, Any]]:
+    if requests is not None:
+        return itertools.islice(itertools.cycle(entries), requests)
+    if duration is not None:
+        return itertools.cycle(entries)
+    return iter(entries)
+
+
+async def replay(
+    entries: List[Dict[str, Any]],
+    targets: Dict[str, str],
+    *,
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    requests: Optional[int] = None,
+    duration: Optional[float] = None,
+    timeout: float = 60.0,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> RunResult:
+    """Send ``entries`` to ``targets`` (service name -> base URL).
+
+    By default every entry is sent once; ``requests`` cycles through them up
+    to that count and ``duration`` keeps cycling for that many seconds.
+    Entries for services without a target are skipped and counted.
+    """
+    result = RunResult()
+    runnable = []
+    for entry in entries:
+        if entry["service"] in targets:
+            runnable.append(entry)
+        else:
+            result.skipped[entry["service"]] = result.skipped.get(entry["service"], 0) + 1
+    if not runnable:
+        return result
+
+    uploads = _Uploads()
+    clients = {
+        service: httpx.AsyncClient(base_url=url, timeout=timeout, transport=transport)
+        for service, url in targets.items()
+    }
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    pending: set = set()
+
+    async def send(entry: Dict[str, Any], scheduled: float) -> None:
+        status, error = 0, None
+        try:
+            resp = await clients[entry["service"]].request(**build_request(entry, uploads))
+            status = resp.status_code
+        except httpx.HTTPError as exc:
+            error = type(exc).__name__
+        finally:
+            semaphore.release()
+        latency_ms = (time.perf_counter() - scheduled) * 1000
+        result.samples.append(Sample(endpoint_key(entry), latency_ms, status, error))
+
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else None
+    try:
+        for index, entry in enumerate(_schedule(runnable, requests, duration)):
+            scheduled = start + index / rate if rate else None
+            if scheduled is not None and scheduled > time.perf_counter():
+                await asyncio.sleep(scheduled - time.perf_counter())
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            await semaphore.acquire()
+            task = asyncio.create_task(send(entry, scheduled or time.perf_counter()))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        await asyncio.gather(*pending)
+    finally:
+        result.wall_seconds = time.perf_counter() - start
+        await asyncio.gather(*(client.aclose() for client in clients.values()))
+    return result
+
+
+__all__ = ["RunResult", "build_request", "endpoint_key", "load_entries", "replay", "write_entries"]
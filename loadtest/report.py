@@ -0,0 +1,184 @@
+"""Latency/throughput summaries and SLO checks for replay runs.
+
+``observability/slo.yml`` holds thresholds that every endpoint must meet::
+
+    latency_p95_ms: 500
+    error_rate_percent: 1
+
+``latency_p50_ms``, ``latency_p99_ms`` (maximums) and ``throughput_rps``
+(minimum) are understood too, and an ``endpoints`` mapping overrides them
+for one endpoint key such as ``"eligibility-engine POST /check"``.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - PyYAML is listed in loadtest/requirements.txt
+    yaml = None
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SLO_PATH = REPO_ROOT / "observability" / "slo.yml"
+OVERALL = "overall"
+
+MAX_THRESHOLDS = {
+    "latency_p50_ms": "p50_ms",
+    "latency_p95_ms": "p95_ms",
+    "latency_p99_ms": "p99_ms",
+    "error_rate_percent": "error_rate_percent",
+}
+MIN_THRESHOLDS = {"throughput_rps": "throughput_rps"}
+
+
+@dataclass
+class Sample:
+    """One replayed request."""
+
+    endpoint: str
+    latency_ms: float
+    status: int
+    error: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None or self.status >= 500
+
+    @property
+    def failure(self) -> str:
+        return self.error or str(self.status)
+
+
+@dataclass
+class EndpointStats:
+    endpoint: str
+    count: int
+    errors: int
+    error_rate_percent: float
+    throughput_rps: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    failures: Dict[str, int] = field(default_factory=dict)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _stats(endpoint: str, samples: List[Sample], wall_seconds: float) -> EndpointStats:
+    latencies = sorted(s.latency_ms for s in samples)
+    failures: Dict[str, int] = {}
+    for s in samples:
+        if s.failed:
+            failures[s.failure] = failures.get(s.failure, 0) + 1
+    errors = sum(failures.values())
+    count = len(samples)
+    return EndpointStats(
+        endpoint=endpoint,
+        count=count,
+        errors=errors,
+        error_rate_percent=round(100 * errors / count, 3) if count else 0.0,
+        throughput_rps=round(count / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        mean_ms=round(sum(latencies) / count, 3) if count else 0.0,
+        p50_ms=round(percentile(latencies, 50), 3),
+        p95_ms=round(percentile(latencies, 95), 3),
+        p99_ms=round(percentile(latencies, 99), 3),
+        max_ms=round(latencies[-1], 3) if latencies else 0.0,
+        failures=failures,
+    )
+
+
+def summarize(samples: Iterable[Sample], wall_seconds: float) -> Dict[str, EndpointStats]:
+    """Stats per endpoint plus an :data:`OVERALL` entry."""
+    by_endpoint: Dict[str, List[Sample]] = {}
+    everything: List[Sample] = []
+    for sample in samples:
+        by_endpoint.setdefault(sample.endpoint, []).append(sample)
+        everything.append(sample)
+    stats = {name: _stats(name, items, wall_seconds) for name, items in sorted(by_endpoint.items())}
+    stats[OVERALL] = _stats(OVERALL, everything, wall_seconds)
+    return stats
+
+
+def _parse_flat(text: str) -> Dict[str, Any]:
+    data: Dict[str, Any] = {}
+    for line in text.splitlines():
+        key, sep, value = line.split("#", 1)[0].partition(":")
+        if sep and key.strip() and value.strip():
+            data[key.strip()] = float(value)
+    return data
+
+
+def load_slo(path: Path = SLO_PATH) -> Dict[str, Any]:
+    text = Path(path).read_text(encoding="utf-8")
+    if yaml is None:  # pragma: no cover - only flat files parse without PyYAML
+        return _parse_flat(text)
+    return yaml.safe_load(text) or {}
+
+
+def check_slo(stats: Dict[str, EndpointStats], slo: Dict[str, Any]) -> List[str]:
+    """Return one message per threshold an endpoint breaks."""
+    overrides = slo.get("endpoints") or {}
+    violations = []
+    for name, entry in stats.items():
+        if name == OVERALL or entry.count == 0:
+            continue
+        limits = {**{k: v for k, v in slo.items() if k != "endpoints"}, **overrides.get(name, {})}
+        for key, attr in MAX_THRESHOLDS.items():
+            if key in limits and getattr(entry, attr) > float(limits[key]):
+                violations.append(f"{name}: {attr}={getattr(entry, attr)} exceeds {key}={limits[key]}")
+        for key, attr in MIN_THRESHOLDS.items():
+            if key in limits and getattr(entry, attr) < float(limits[key]):
+                violations.append(f"{name}: {attr}={getattr(entry, attr)} below {key}={limits[key]}")
+    return violations
+
+
+def format_table(stats: Dict[str, EndpointStats]) -> str:
+    header = ("endpoint", "count", "err%", "rps", "p50", "p95", "p99", "max")
+    rows = [header] + [
+        (
+            s.endpoint,
+            str(s.count),
+            f"{s.error_rate_percent:.2f}",
+            f"{s.throughput_rps:.1f}",
+            f"{s.p50_ms:.1f}",
+            f"{s.p95_ms:.1f}",
+            f"{s.p99_ms:.1f}",
+            f"{s.max_ms:.1f}",
+        )
+        for s in stats.values()
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = []
+    for row in rows:
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(w) for cell, w in zip(row[1:], widths[1:])]
+        lines.append("  ".join(cells))
+    return "\n".join(lines)
+
+
+def as_json(stats: Dict[str, EndpointStats], violations: List[str]) -> Dict[str, Any]:
+    return {"endpoints": {name: asdict(s) for name, s in stats.items()}, "violations": violations}
+
+
+__all__ = [
+    "EndpointStats",
+    "OVERALL",
+    "SLO_PATH",
+    "Sample",
+    "as_json",
+    "check_slo",
+    "format_table",
+    "load_slo",
+    "percentile",
+    "summarize",
+]
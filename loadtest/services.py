@@ -0,0 +1,75 @@
+"""Start the Python services locally for a load test."""
+from __future__ import annotations
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List
+
+import httpx
+
+from loadtest.synthetic import REPO_ROOT
+
+# service -> (working directory, ASGI app)
+SERVICES = {
+    "ai-analyzer": ("ai-analyzer", "main:app"),
+    "eligibility-engine": ("eligibility-engine", "api:app"),
+    "ai-agent": ("ai-agent", "main:app"),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {proc.returncode}")
+        try:
+            # /readyz stays 503 until the service's warmup has finished.
+            if httpx.get(f"{url}/readyz", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+
+@contextmanager
+def local_services(
+    names: Iterable[str], *, workers: int = 1, startup_timeout: float = 60.0
+) -> Iterator[Dict[str, str]]:
+    """Run ``names`` under uvicorn on free ports; yield service -> base URL."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (str(REPO_ROOT), env.get("PYTHONPATH"))))
+    procs: List[subprocess.Popen] = []
+    targets: Dict[str, str] = {}
+    try:
+        for name in names:
+            directory, app = SERVICES[name]
+            port = _free_port()
+            cmd = [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+                   "--workers", str(workers), "--log-level", "warning"]
+            procs.append(subprocess.Popen(cmd, cwd=REPO_ROOT / directory, env=env))
+            targets[name] = f"http://127.0.0.1:{port}"
+        for proc, url in zip(procs, targets.values()):
+            _wait_ready(url, proc, startup_timeout)
+        yield targets
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+__all__ = ["SERVICES", "local_services"]
@@ -0,0 +1,223 @@
+"""Synthetic traffic for services that have no recorded traffic yet.
+
+Profiles start from the engine's sample payloads and overlay random values
+for the scalar fields in ``contracts/field_map.json``, sometimes under an
+alias, so normalization does real work.  Documents come from ``corpus/``.
+They are sent either as ``text`` or, for uploads, rendered into a one-page
+PDF with a text layer.  :func:`generate` returns entries in the same format
+:class:`common.traffic.TrafficRecorder` writes.
+"""
+from __future__ import annotations
+
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+FIELD_MAP_PATH = REPO_ROOT / "eligibility-engine" / "contracts" / "field_map.json"
+SEED_PROFILES = (
+    REPO_ROOT / "eligibility-engine" / "test_payload.json",
+    REPO_ROOT / "eligibility-engine" / "test_payload_partial.json",
+)
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+
+# Mirrors ``schemas.FormName`` in the agent.
+FORM_NAMES = (
+    "form_8974",
+    "form_6765",
+    "form_424A",
+    "form_sf424",
+    "form_RD_400_1",
+    "form_RD_400_4",
+    "form_RD_400_8",
+)
+SCALAR_TYPES = frozenset({"ein", "int", "currency", "percent", "bool", "date", "string"})
+STRING_VALUES = {
+    "business_location_state": ("CA", "TX", "NY", "GA", "OH", "WA"),
+    "business_location_country": ("US",),
+    "entity_type": ("LLC", "Corporation", "S-Corp", "Sole Proprietorship", "Partnership"),
+    "business_type": ("LLC", "Corporation", "Sole Proprietorship"),
+    "currency": ("USD",),
+    "income_level": ("low", "moderate", "high"),
+    "project_type": ("solar", "energy_efficiency", "equipment", "expansion"),
+}
+
+# (service, method, path, weight)
+DEFAULT_MIX: Tuple[Tuple[str, str, str, float], ...] = (
+    ("eligibility-engine", "POST", "/check", 0.4),
+    ("ai-agent", "POST", "/check", 0.2),
+    ("ai-agent", "POST", "/form-fill", 0.15),
+    ("ai-analyzer", "POST", "/analyze", 0.25),
+)
+
+Field = Tuple[str, str, Tuple[str, ...]]
+
+
+def load_field_map(path: Path = FIELD_MAP_PATH) -> Dict[str, Any]:
+    with path.open(encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def scalar_fields(field_map: Dict[str, Any]) -> List[Field]:
+    """Return ``(canonical, type, aliases)`` for top-level scalar fields."""
+    fields = []
+    for name, info in field_map.items():
+        kind = info.get("type")
+        if kind in SCALAR_TYPES and "." not in name:
+            aliases = tuple(a for a in info.get("aliases", ()) if "." not in a)
+            fields.append((name, kind, aliases))
+    return fields
+
+
+def value_for(name: str, kind: str, rng: random.Random, *, formatted: bool = True) -> Any:
+    """Random value of ``kind``; ``formatted`` mixes in strings like ``"$1,200"``."""
+    if kind == "ein":
+        return f"{rng.randint(10, 99)}-{rng.randint(1000000, 9999999)}"
+    if kind == "int":
+        if name in ("year_founded", "tax_year"):
+            return rng.randint(1990, 2024)
+        return rng.randint(0, 250)
+    if kind == "currency":
+        amount = rng.randint(1_000, 5_000_000)
+        if not formatted:
+            return amount
+        # Analyzer output mixes numbers and formatted strings.
+        return rng.choice((amount, f"${amount:,}", f"{amount / 1000:.0f}k"))
+    if kind == "percent":
+        percent = rng.randint(0, 100)
+        return rng.choice((percent, f"{percent}%", round(percent / 100, 2))) if formatted else percent
+    if kind == "bool":
+        return rng.choice((True, False, "yes", "no") if formatted else (True, False))
+    if kind == "date":
+        day = date(2018, 1, 1) + timedelta(days=rng.randint(0, 2500))
+        return rng.choice((day.isoformat(), day.strftime("%m/%d/%Y"))) if formatted else day.isoformat()
+    choices = STRING_VALUES.get(name)
+    return rng.choice(choices) if choices else f"Synthetic {name.replace('_', ' ')} {rng.randint(1, 999)}"
+
+
+def _seed_profiles() -> List[Dict[str, Any]]:
+    seeds = []
+    for path in SEED_PROFILES:
+        if path.exists():
+            with path.open(encoding="utf-8") as fh:
+                seeds.append(json.load(fh))
+    return seeds or [{}]
+
+
+def profile(
+    rng: random.Random,
+    fields: Sequence[Field],
+    seeds: Sequence[Dict[str, Any]],
+    *,
+    fill_rate: float = 0.5,
+    alias_rate: float = 0.3,
+    normalized: bool = False,
+) -> Dict[str, Any]:
+    """Return one applicant profile.
+
+    ``normalized`` profiles use canonical keys and typed values, like the
+    ones the Node API sends to the agent; others look like analyzer output.
+    """
+    data = dict(rng.choice(seeds))
+    for name, kind, aliases in fields:
+        if rng.random() >= fill_rate:
+            continue
+        use_alias = aliases and not normalized and rng.random() < alias_rate
+        key = rng.choice(aliases) if use_alias else name
+        data[key] = value_for(name, kind, rng, formatted=not normalized)
+    return data
+
+
+def corpus(directory: Path = CORPUS_DIR) -> Dict[str, str]:
+    """Fixture documents by name (file stem)."""
+    return {p.stem: p.read_text(encoding="utf-8") for p in sorted(directory.glob("*.txt"))}
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_pdf(text: str) -> bytes:
+    """Render ``text`` into a minimal one-page PDF with a text layer."""
+    ops = ["BT", "/F1 10 Tf", "12 TL", "50 760 Td"]
+    ops += ["(%s) Tj T*" % _pdf_escape(line) for line in text.splitlines()[:60]]
+    ops.append("ET")
+    stream = "\n".join(ops).encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _entry(service: str, method: str, path: str, **fields: Any) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {"service": service, "method": method, "path": path, "route": path}
+    entry.update(fields)
+    entry["synthetic"] = True
+    return entry
+
+
+def generate(
+    count: int,
+    *,
+    seed: int = 0,
+    mix: Sequence[Tuple[str, str, str, float]] = DEFAULT_MIX,
+    upload_rate: float = 0.4,
+) -> List[Dict[str, Any]]:
+    """Return ``count`` synthetic entries; the same seed gives the same traffic."""
+    rng = random.Random(seed)
+    fields = scalar_fields(load_field_map())
+    seeds = _seed_profiles()
+    docs = corpus()
+    weights = [w for *_, w in mix]
+    entries = []
+    for _ in range(count):
+        service, method, path, _weight = rng.choices(mix, weights)[0]
+        if service == "ai-analyzer":
+            doc = rng.choice(sorted(docs))
+            if rng.random() < upload_rate:
+                files = {"file": {"ext": ".pdf", "content_type": "application/pdf", "doc": doc}}
+                entries.append(_entry(service, method, path, content_type="multipart/form-data", form={}, files=files))
+            else:
+                form = {"text": docs[doc]}
+                entries.append(_entry(service, method, path, content_type="multipart/form-data", form=form, files={}))
+            continue
+        data = profile(rng, fields, seeds, normalized=service == "ai-agent")
+        if service == "eligibility-engine":
+            body: Dict[str, Any] = data
+        elif path == "/form-fill":
+            body = {"form_name": rng.choice(FORM_NAMES), "user_payload": data}
+        else:
+            body = {"analyzer_fields": data, "explain": True}
+        entries.append(_entry(service, method, path, content_type="application/json", body=body))
+    return entries
+
+
+__all__ = [
+    "CORPUS_DIR",
+    "DEFAULT_MIX",
+    "FORM_NAMES",
+    "corpus",
+    "generate",
+    "load_field_map",
+    "profile",
+    "scalar_fields",
+    "text_pdf",
+    "value_for",
+]
@@ -1,8 +1,19 @@
 const { randomUUID } = require('crypto');
 
+let otel = null;
+try {
+  otel = require('@opentelemetry/api');
+} catch (e) {
+  otel = null;
+}
+
 function getServiceHeaders(service, req) {
   const requestId = (req && req.id) || randomUUID();
-  return { 'X-Request-Id': requestId };
+  const headers = { 'X-Request-Id': requestId };
+  // Adds `traceparent` while tracing is initialised, so the Python services
+  // continue this request's trace; a no-op otherwise.
+  if (otel) otel.propagation.inject(otel.context.active(), headers);
+  return headers;
 }
 
 module.exports = { getServiceHeaders };
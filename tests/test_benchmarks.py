@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from benchmarks import compare as cmp  # noqa: E402
+from benchmarks import harness  # noqa: E402
+from benchmarks.__main__ import main  # noqa: E402
+
+
+def _doc(**medians):
+    return {"machine": {"python": "3.11"}, "benchmarks": {k: {"median_s": v} for k, v in medians.items()}}
+
+
+def test_cases_expand_parameter_grid():
+    bench = harness.Benchmark("x.run", lambda **kw: None, (("n", (1, 10)), ("mode", ("a",))))
+    assert bench.cases() == [("x.run[n=1,mode=a]", {"n": 1, "mode": "a"}), ("x.run[n=10,mode=a]", {"n": 10, "mode": "a"})]
+    assert harness.Benchmark("x.plain", lambda: None).cases() == [("x.plain", {})]
+
+
+def test_run_times_every_case_and_tears_down():
+    events = []
+
+    def factory(n):
+        events.append(("setup", n))
+        yield lambda: sum(range(n))
+        events.append(("teardown", n))
+
+    bench = harness.Benchmark("sum", factory, (("n", (10, 100)),))
+    results = harness.run("demo", [bench], repeats=3, min_time=0.001)
+    assert set(results) == {"sum[n=10]", "sum[n=100]"}
+    timing = results["sum[n=100]"]
+    assert timing.params == {"n": 100} and timing.repeats == 3 and len(timing.samples_s) == 3
+    assert timing.loops >= 1 and timing.min_s <= timing.median_s
+    assert events == [("setup", 10), ("teardown", 10), ("setup", 100), ("teardown", 100)]
+
+    selected = harness.run("demo", [bench], select="sum[n=10]", repeats=1, min_time=0.0)
+    assert list(selected) == ["sum[n=10]"]
+
+
+def test_compare_flags_changes_beyond_threshold():
+    baseline = _doc(a=1.0, b=1.0, c=1.0, gone=1.0)
+    current = _doc(a=1.2, b=1.5, c=0.5, added=1.0)
+    changes = {c.name: c.status for c in cmp.compare(baseline, current, threshold=0.25)}
+    assert changes == {"a": cmp.SAME, "b": cmp.SLOWER, "c": cmp.FASTER, "gone": cmp.REMOVED, "added": cmp.ADDED}
+    assert [c.name for c in cmp.regressions(cmp.compare(baseline, current, threshold=0.6))] == []
+    assert cmp.machine_mismatch(baseline, {"machine": {"python": "3.12"}}) == ["python: 3.11 -> 3.12"]
+
+
+def test_compare_command_exit_status(tmp_path, capsys):
+    (tmp_path / "base.json").write_text(json.dumps(_doc(a=1.0)))
+    (tmp_path / "slow.json").write_text(json.dumps(_doc(a=2.0)))
+    assert main(["compare", str(tmp_path / "base.json"), str(tmp_path / "base.json")]) == 0
+    assert main(["compare", str(tmp_path / "base.json"), str(tmp_path / "slow.json")]) == 1
+    assert "a is 2.00x the baseline" in capsys.readouterr().err
+    assert main(["compare", str(tmp_path / "base.json"), str(tmp_path / "slow.json"), "--threshold", "1.5"]) == 0
+
+
+def test_run_suite_in_service_process(tmp_path):
+    out = tmp_path / "run.json"
+    args = ["run", "--suite", "agent", "-k", "agent.safe_eval*", "--repeats", "2", "--min-time", "0.001"]
+    assert main(args + ["--out", str(out), "--save", str(tmp_path / "base.json")]) == 0
+    doc = json.loads(out.read_text())
+    assert sorted(doc["benchmarks"]) == [
+        "agent.safe_eval[expr=arithmetic]",
+        "agent.safe_eval[expr=boolean]",
+        "agent.safe_eval[expr=comparison]",
+    ]
+    assert doc["benchmarks"]["agent.safe_eval[expr=boolean]"]["suite"] == "agent"
+    assert json.loads((tmp_path / "base.json").read_text())["benchmarks"] == doc["benchmarks"]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from common import catalogs  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _fresh(monkeypatch):
+    monkeypatch.delenv("CATALOG_BUNDLE_PATH", raising=False)
+    catalogs.reload()
+    yield
+    catalogs.reload()
+
+
+def _copy_tree(tmp_path: Path) -> Path:
+    for catalog in catalogs.CATALOGS.values():
+        for path in catalog.paths():
+            target = tmp_path / path.relative_to(ROOT)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, target)
+    return tmp_path
+
+
+def test_repository_catalogs_validate() -> None:
+    bundle = catalogs.build()
+    assert bundle["version"] == catalogs.content_hash()
+    assert set(bundle["catalogs"]) == set(catalogs.CATALOGS)
+    assert "eligibility-engine/contracts/field_map.json" in bundle["sources"]
+
+
+def test_bundle_matches_json_sources(tmp_path, monkeypatch) -> None:
+    from_json = {name: catalogs.load(name) for name in catalogs.CATALOGS}
+    json_version = catalogs.version()
+
+    output = tmp_path / "catalogs.bundle"
+    assert catalogs.main(["build", "--output", str(output)]) == 0
+    monkeypatch.setenv("CATALOG_BUNDLE_PATH", str(output))
+    catalogs.reload()
+
+    assert catalogs.bundle() is not None
+    assert catalogs.version() == json_version
+    assert {name: catalogs.load(name) for name in catalogs.CATALOGS} == from_json
+
+
+def test_precomputed_indexes() -> None:
+    field_map = catalogs.load("field_map")
+    assert field_map["aliases"]["ein"] == "employer_identification_number"
+    grants = catalogs.load("grants")
+    assert grants["by_key"]["erc"] is next(g for g in grants["grants"] if g["key"] == "erc")
+    assert ".pdf" in catalogs.load("file_types")["extensions"]
+
+
+def test_missing_bundle_falls_back_to_json(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("CATALOG_BUNDLE_PATH", str(tmp_path / "missing.bundle"))
+    assert catalogs.bundle() is None
+    assert catalogs.load("industries")["by_code"]
+
+
+def test_content_hash_changes_with_any_source(tmp_path) -> None:
+    root = _copy_tree(tmp_path)
+    before = catalogs.content_hash(root)
+    path = root / "shared" / "file_types.json"
+    path.write_text(json.dumps({"extensions": [".pdf"]}))
+    assert catalogs.content_hash(root) != before
+
+
+def test_invalid_sources_are_all_reported(tmp_path) -> None:
+    root = _copy_tree(tmp_path)
+    field_map = root / "eligibility-engine" / "contracts" / "field_map.json"
+    data = json.loads(field_map.read_text())
+    data["duplicate_ein"] = {"aliases": ["ein"]}
+    field_map.write_text(json.dumps(data))
+    (root / "shared" / "file_types.json").write_text(json.dumps({"extensions": ["pdf"]}))
+    (root / "eligibility-engine" / "grants" / "broken.json").write_text("{")
+
+    with pytest.raises(catalogs.CatalogError) as exc:
+        catalogs.build(root)
+    problems = "\n".join(exc.value.problems)
+    assert "alias 'ein' maps to both" in problems
+    assert "file_types.json" in problems
+    assert "grants:" in problems
+    assert catalogs.main(["check", "--root", str(root)]) == 1
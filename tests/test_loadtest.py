@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, File, Form, UploadFile
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from common.traffic import TrafficRecorder, sanitize, scrub_text  # noqa: E402
+from loadtest import report  # noqa: E402
+from loadtest.__main__ import main  # noqa: E402
+from loadtest.replay import load_entries, replay, write_entries  # noqa: E402
+from loadtest.synthetic import FORM_NAMES, generate, load_field_map  # noqa: E402
+
+
+def _service_app(record_path: Path | None = None) -> FastAPI:
+    app = FastAPI()
+    if record_path is not None:
+        app.add_middleware(TrafficRecorder, service="svc", path=str(record_path))
+
+    @app.post("/check")
+    async def check(payload: dict):
+        if payload.get("explode"):
+            raise RuntimeError("boom")
+        return {"ok": True, "email": payload.get("email"), "keys": len(payload)}
+
+    @app.post("/analyze")
+    async def analyze(file: UploadFile | None = File(None), text: str | None = Form(None)):
+        body = await file.read() if file is not None else b""
+        return {"bytes": len(body), "text": text}
+
+    @app.get("/healthz")
+    def healthz():
+        return {"status": "ok"}
+
+    return app
+
+
+def _replay(entries, app, **kwargs):
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    targets = {service: "http://test" for service in {e["service"] for e in entries}}
+    return asyncio.run(replay(entries, targets, transport=transport, **kwargs))
+
+
+def test_scrub_text_keeps_shape():
+    text = "SSN 123-45-6789 call (512) 555-0199 or mail jane.doe@example.org, EIN 12-3456789"
+    assert scrub_text(text) == "SSN 000-00-0000 call (000) 000-0000 or mail user@example.com, EIN 00-0000000"
+
+
+def test_scrub_text_masks_labelled_values_and_digit_runs():
+    text = "Employee name: Jane Public\nAccount number: 00123456789\nPaid 55,000.00 on 2024-01-15\n"
+    assert scrub_text(text) == "Employee name: xxxx xxxxxx\nAccount number: 00000000000\nPaid 55,000.00 on 2024-01-15\n"
+
+
+def test_sanitize_masks_extractor_output():
+    # Keys and values as produced by the W-2, 1099-NEC and bank statement extractors.
+    fields = {
+        "ein": "123456789",
+        "employer_name": "Acme Corporation",
+        "employer_address": "123 Business Road Suite 400, Metropolis, NY 10101",
+        "employer_zip": "10101",
+        "employee_ssn": "123456789",
+        "employee_ssn_masked": "***-**-6789",
+        "employee_name": "John Q Worker",
+        "employee_address": "789 Main Street, Smallville, NY 10010",
+        "box15_employer_state_id": "12-34567",
+        "box20_locality_name": "Gotham",
+        "payer_name": "Westfield Consulting Inc.",
+        "payer_phone": "858-555-1212",
+        "payer_tin": "987654321",
+        "payer_tin_last4": "4321",
+        "recipient_tin": "98-7654321",
+        "account_number": "00123456789",
+        "account_number_last4": "6789",
+        "box6_state_payer_state_no": "CA-998877",
+        "box1_wages": 55000.0,
+        "box15_state": "NY",
+        "statement_period": "January 1, 2024 - January 31, 2024",
+        "box13_retirement_plan": False,
+    }
+    clean = sanitize({"doc_type": "W2", "fields": fields})["fields"]
+    recorded = str(clean)
+    for key, value in fields.items():
+        if isinstance(value, str) and any(ch.isdigit() for ch in value) and key != "statement_period":
+            assert value not in recorded, key
+    for name in ("Acme", "Worker", "Westfield", "Gotham", "Metropolis"):
+        assert name not in recorded
+    assert clean["employee_name"] == "xxxx x xxxxxx"
+    assert clean["recipient_tin"] == "00-0000000"
+    assert clean["box1_wages"] == 55000.0 and clean["box15_state"] == "NY"
+    assert clean["box13_retirement_plan"] is False
+
+
+def test_recorder_writes_sanitized_pairs(tmp_path):
+    record = tmp_path / "rec" / "{service}.jsonl"
+    app = _service_app(record)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/healthz")
+            await client.post("/check", json={"email": "a@b.co", "ssn": "123-45-6789", "notes": "call 512-555-0199"})
+            await client.post(
+                "/analyze",
+                data={"text": "SSN 123-45-6789"},
+                files={"file": ("scan.PDF", b"%PDF-1.4 secret", "application/pdf")},
+            )
+
+    asyncio.run(run())
+    check, analyze = load_entries([tmp_path / "rec" / "svc.jsonl"])
+    assert check["route"] == "/check" and check["status"] == 200
+    assert check["body"] == {"email": "[REDACTED]", "ssn": "[REDACTED]", "notes": "call 000-000-0000"}
+    assert check["response"]["email"] == "[REDACTED]"
+    assert analyze["form"] == {"text": "SSN 000-00-0000"}
+    assert analyze["files"] == {"file": {"ext": ".pdf", "content_type": "application/pdf", "size": 15}}
+    assert "secret" not in (tmp_path / "rec" / "svc.jsonl").read_text()
+
+
+def test_synthetic_traffic_is_deterministic_and_uses_field_map():
+    first, second = generate(60, seed=7), generate(60, seed=7)
+    assert first == second
+    field_map = load_field_map()
+    known = set(field_map) | {a for info in field_map.values() for a in info.get("aliases", ())}
+    services = {e["service"] for e in first}
+    assert services == {"ai-analyzer", "eligibility-engine", "ai-agent"}
+    for entry in first:
+        if entry["service"] == "eligibility-engine":
+            assert known & set(entry["body"])
+        elif entry["path"] == "/form-fill":
+            assert entry["body"]["form_name"] in FORM_NAMES
+        elif entry["service"] == "ai-analyzer":
+            assert entry["form"].get("text") or entry["files"]["file"]["ext"] == ".pdf"
+
+
+def test_replay_reports_and_gates_on_slo(tmp_path):
+    entries = [
+        {"service": "svc", "method": "POST", "path": "/check", "route": "/check", "body": {"a": 1}},
+        {"service": "svc", "method": "POST", "path": "/check", "route": "/check", "body": {"explode": True}},
+        {"service": "svc", "method": "POST", "path": "/analyze", "route": "/analyze",
+         "form": {}, "files": {"file": {"ext": ".png", "size": 10}}},
+        {"service": "other", "method": "GET", "path": "/", "route": "/"},
+    ]
+    result = _replay(entries[:3], _service_app(), requests=30, concurrency=4)
+    assert len(result.samples) == 30
+    stats = report.summarize(result.samples, result.wall_seconds)
+    check, upload = stats["svc POST /check"], stats["svc POST /analyze"]
+    assert check.count == 20 and check.errors == 10 and check.failures == {"500": 10}
+    assert upload.count == 10 and upload.errors == 0
+    assert stats[report.OVERALL].count == 30
+    assert check.p50_ms <= check.p95_ms <= check.p99_ms <= check.max_ms
+
+    violations = report.check_slo(stats, {"latency_p95_ms": 10_000, "error_rate_percent": 1})
+    assert violations == [f"svc POST /check: error_rate_percent={check.error_rate_percent} exceeds error_rate_percent=1"]
+    relaxed = {"error_rate_percent": 1, "endpoints": {"svc POST /check": {"error_rate_percent": 60}}}
+    assert report.check_slo(stats, relaxed) == []
+    assert report.check_slo(stats, {"throughput_rps": 1e9})
+
+    skipped = _replay(entries, _service_app())
+    assert skipped.skipped == {} and len(skipped.samples) == 4
+    partial = asyncio.run(replay(entries, {}))
+    assert partial.skipped == {"svc": 3, "other": 1} and partial.samples == []
+
+
+def test_open_loop_rate_paces_requests():
+    entries = [{"service": "svc", "method": "GET", "path": "/healthz", "route": "/healthz"}]
+    result = _replay(entries, _service_app(), requests=10, rate=100)
+    assert len(result.samples) == 10
+    assert result.wall_seconds >= 0.09
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert report.percentile(values, 50) == 50
+    assert report.percentile(values, 95) == 95
+    assert report.percentile(values, 99) == 99
+    assert report.percentile([3.0], 99) == 3.0
+    assert report.percentile([], 50) == 0.0
+
+
+def test_repo_slo_file_loads():
+    slo = report.load_slo()
+    assert slo["latency_p95_ms"] == 500
+    assert slo["error_rate_percent"] == 1
+
+
+def test_cli_synth_and_empty_run(tmp_path, capsys):
+    out = tmp_path / "synthetic.jsonl"
+    assert main(["synth", "--count", "5", "--out", str(out)]) == 0
+    assert len(out.read_text().splitlines()) == 5
+    assert main(["run"]) == 2
+    write_entries(tmp_path / "none.jsonl", [])
+    assert main(["run", "--traffic", str(tmp_path / "none.jsonl")]) == 2
+    assert "no traffic" in capsys.readouterr().err
+    assert json.loads(out.read_text().splitlines()[0])["synthetic"] is True
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import logging
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from common import logger as log_module  # noqa: E402
+from common.logger import JsonFormatter, SamplingFilter, get_logger, redaction_plan  # noqa: E402
+
+
+def _record(level=logging.INFO, name="svc.worker", **extra):
+    record = logging.LogRecord(name, level, __file__, 1, "hello %s", ("world",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_redacts_extra_fields():
+    record = _record(
+        email="a@b.com",
+        ip="10.0.0.1",
+        note="contact a@b.com",
+        nested={"password": "x", "count": 2},
+        count=3,
+    )
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "hello world"
+    assert payload["level"] == "INFO"
+    assert payload["email"] == "[REDACTED]"
+    assert payload["ip"] != "10.0.0.1" and len(payload["ip"]) == 8
+    assert payload["note"] == "[REDACTED]"
+    assert payload["nested"] == {"password": "[REDACTED]", "count": 2}
+    assert payload["count"] == 3
+    assert "args" not in payload and "lineno" not in payload
+
+
+def test_redaction_plan_is_cached_per_record_shape():
+    redaction_plan.cache_clear()
+    formatter = JsonFormatter()
+    formatter.format(_record(path="/a"))
+    formatter.format(_record(path="/b"))
+    info = redaction_plan.cache_info()
+    assert info.misses == 1 and info.hits == 1
+
+
+def test_json_formatter_handles_unserializable_values_and_exceptions():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("svc", logging.ERROR, __file__, 1, "failed", None, sys.exc_info())
+    record.obj = object()
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["obj"].startswith("<object")
+    assert "ValueError: boom" in payload["exc_info"]
+
+
+def test_sampling_filter_never_drops_warnings():
+    flt = SamplingFilter(sample_rates={"svc": 0.0})
+    assert not flt.filter(_record(name="svc.worker"))
+    assert flt.filter(_record(level=logging.WARNING, name="svc.worker"))
+    assert flt.filter(_record(name="other"))
+    assert flt.dropped == 1
+
+
+def test_rate_limit_caps_records_per_second():
+    flt = SamplingFilter(rate_limits={"svc.worker": 5})
+    passed = sum(flt.filter(_record()) for _ in range(50))
+    assert passed == 5
+
+
+def test_parse_overrides_ignores_bad_entries():
+    assert log_module._parse_overrides("a=0.5, b=x,=1,c", float) == {"a": 0.5}
+
+
+def test_get_logger_writes_through_queue_listener(capsys):
+    log_module.stop_logging()  # restart the listener on the captured stderr
+    logger = get_logger("tests.queue_listener")
+    logger.info("queued", extra={"token": "secret", "size": 4})
+    log_module.stop_logging()
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines() if line.startswith("{")]
+    entry = next(line for line in lines if line["message"] == "queued")
+    assert entry["token"] == "[REDACTED]" and entry["size"] == 4
+
+
+def test_get_logger_records_still_reach_caplog(caplog):
+    caplog.set_level(logging.INFO)
+    get_logger("tests.caplog").info("visible", extra={"size": 1})
+    assert [r.message for r in caplog.records] == ["visible"]
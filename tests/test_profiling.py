@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import marshal
+import pstats
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from common import profiling  # noqa: E402
+
+
+def _busy(seconds: float) -> int:
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def _app(enabled: bool = True) -> FastAPI:
+    app = FastAPI()
+    profiling.install(app, "test-service", enabled=enabled)
+
+    @app.get("/work")
+    def work():
+        return {"n": _busy(0.05)}
+
+    @app.get("/other")
+    def other():
+        return {"ok": True}
+
+    return app
+
+
+def _client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_disabled_installs_nothing():
+    app = FastAPI()
+    assert profiling.install(app, "svc", enabled=False) is None
+    assert not any(getattr(r, "path", "") == "/debug/profile" for r in app.routes)
+    assert not app.user_middleware
+
+
+def test_sampler_collapses_other_threads():
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            _busy(0.001)
+
+    thread = threading.Thread(target=spin, name="spinner")
+    thread.start()
+    sampler = profiling.Sampler(0.001)
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+    stop.set()
+    thread.join()
+
+    lines = sampler.collapsed().splitlines()
+    assert sampler.samples > 0
+    spinner = [line for line in lines if line.startswith("spinner;")]
+    assert spinner and all("debug-profiler" not in line for line in lines)
+    assert "_busy (tests/test_profiling.py:" in spinner[0]
+    assert int(spinner[0].rsplit(" ", 1)[1]) > 0
+
+
+def test_stats_table_loads_in_pstats(tmp_path):
+    main = ("app.py", 1, "main")
+    handler = ("app.py", 10, "handler")
+    leaf = ("lib.py", 5, "parse")
+    counts = [(("t", (main, handler, leaf)), 3), (("t", (main, handler)), 1)]
+    table = profiling.stats_table(counts, 0.01)
+    assert table[leaf][2] == 0.03  # own time
+    assert table[handler][3] == 0.04  # cumulative time
+    assert table[leaf][4] == {handler: (3, 3, 0.03, 0.03)}
+
+    path = tmp_path / "out.pstats"
+    path.write_bytes(marshal.dumps(table))
+    stats = pstats.Stats(str(path))
+    assert stats.total_tt == 0.04
+
+
+def test_profile_next_requests_matching_path():
+    async def run():
+        async with _client(_app()) as client:
+            capture = asyncio.create_task(
+                client.get("/debug/profile", params={"requests": 2, "path": "/work", "interval_ms": 1})
+            )
+            await asyncio.sleep(0.05)
+            busy = await client.get("/debug/profile", params={"seconds": 1})
+            await client.get("/other")
+            await client.get("/work")
+            await client.get("/work")
+            return busy, await capture
+
+    busy, resp = asyncio.run(run())
+    assert busy.status_code == 409
+    assert resp.status_code == 200
+    assert resp.headers["x-profile-requests"] == "2"
+    assert "_busy (" in resp.text
+    assert "other (" not in resp.text
+
+
+def test_profile_window_returns_pstats():
+    async def run():
+        async with _client(_app()) as client:
+            return await client.get(
+                "/debug/profile", params={"seconds": 0.05, "format": "pstats", "idle": "true"}
+            )
+
+    resp = asyncio.run(run())
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/octet-stream"
+    assert isinstance(marshal.loads(resp.content), dict)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from common import metrics  # noqa: E402
+from common.metrics import REQUEST_LATENCY, Histogram  # noqa: E402
+from common.request_id import RequestContextMiddleware, get_request_id, inject_request_id  # noqa: E402
+
+
+def _app(**kwargs) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware, **kwargs)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int, request: Request):
+        return {"ctx": get_request_id(), "state": request.state.request_id, "out": inject_request_id()}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk{i}\n"
+                await asyncio.sleep(0)
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+
+def _request_count(path: str, status: str) -> float:
+    labels = {"method": "GET", "path": path, "status": status}
+    if isinstance(REQUEST_LATENCY, metrics.Histogram):
+        return REQUEST_LATENCY.snapshot()[tuple(labels.values())]["count"]
+    from prometheus_client import REGISTRY
+
+    return REGISTRY.get_sample_value("http_server_duration_seconds_count", labels)
+
+
+def _client(app: FastAPI) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+def test_request_id_is_propagated_and_generated():
+    async def run():
+        async with _client(_app()) as client:
+            given = await client.get("/items/1", headers={"X-Request-Id": "abc"})
+            fresh = await client.get("/items/2")
+        return given, fresh
+
+    given, fresh = asyncio.run(run())
+    assert given.headers["x-request-id"] == "abc"
+    assert given.json() == {"ctx": "abc", "state": "abc", "out": {"X-Request-Id": "abc"}}
+    assert fresh.headers["x-request-id"] == fresh.json()["ctx"]
+    assert get_request_id() is None
+
+
+def test_latency_is_recorded_per_route_template():
+    REQUEST_LATENCY.clear()
+    extra = Histogram("test_latency_seconds", "test", ["method", "path", "status"])
+
+    async def run():
+        async with _client(_app(histograms=(extra,))) as client:
+            for i in range(3):
+                await client.get(f"/items/{i}")
+            await client.get("/boom")
+
+    asyncio.run(run())
+    assert _request_count("/items/{item_id}", "200") == 3
+    assert _request_count("/boom", "500") == 1
+    assert extra.snapshot()[("GET", "/items/{item_id}", "200")]["count"] == 3
+
+
+def test_unmatched_paths_share_one_label():
+    REQUEST_LATENCY.clear()
+
+    async def run():
+        async with _client(_app()) as client:
+            for i in range(3):
+                await client.get(f"/missing/{i}")
+
+    asyncio.run(run())
+    assert _request_count("<unmatched>", "404") == 3
+
+
+def test_streaming_responses_pass_through():
+    async def run():
+        async with _client(_app()) as client:
+            async with client.stream("GET", "/stream", headers={"X-Request-Id": "s1"}) as resp:
+                chunks = [c async for c in resp.aiter_text()]
+                return resp.headers["x-request-id"], "".join(chunks)
+
+    req_id, body = asyncio.run(run())
+    assert req_id == "s1"
+    assert body == "chunk0\nchunk1\nchunk2\n"
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import functools
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from common import serve  # noqa: E402
+
+APP = '''
+import gc
+import os
+
+PRELOADED = []
+
+
+def preload():
+    PRELOADED.append(os.getpid())
+
+
+async def app(scope, receive, send):
+    if scope["type"] != "http":
+        return
+    body = f"{os.getpid()} {PRELOADED[-1]} {gc.get_freeze_count() > 0}".encode()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": body})
+'''
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(port: int) -> list[str]:
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2) as resp:
+                return resp.read().decode().split()
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def _poll(port: int, done, timeout: float = 20.0) -> list[list[str]]:
+    """Request until ``done(responses)``; uvicorn only recycles on its 0.1 s tick."""
+    responses = []
+    deadline = time.monotonic() + timeout
+    while not done(responses) and time.monotonic() < deadline:
+        responses.append(_get(port))
+        time.sleep(0.05)
+    return responses
+
+
+def test_config_from_env(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("SERVE_MAX_REQUESTS", "1000")
+    monkeypatch.setenv("SERVE_MAX_WORKER_MEMORY_MB", "bogus")
+    config = serve.ServeConfig.from_env(4001, host="127.0.0.1")
+    assert (config.port, config.workers, config.max_requests) == (4001, 3, 1000)
+    assert config.max_worker_memory_mb == 0
+    assert config.host == "127.0.0.1"
+
+
+def test_refresh_caches_reloads():
+    calls = []
+
+    @functools.lru_cache(maxsize=1)
+    def loader():
+        calls.append(1)
+        return len(calls)
+
+    loader()
+    serve.refresh_caches(loader)
+    assert loader() == 2
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_master_preloads_forks_and_restarts(tmp_path):
+    pytest.importorskip("uvicorn")
+    (tmp_path / "tiny_app.py").write_text(APP)
+    port = _free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(tmp_path), str(ROOT)]),
+        "SERVE_MAX_REQUESTS": "2",
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "common.serve", "tiny_app:app", "--preload", "tiny_app:preload",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", "2"],
+        cwd=tmp_path,
+        env=env,
+    )
+    try:
+        responses = _poll(port, lambda seen: len({r[0] for r in seen}) >= 4)
+        master = str(proc.pid)
+        # Preloaded in the master and frozen before the fork.
+        assert {r[1] for r in responses} == {master}
+        assert {r[2] for r in responses} == {"True"}
+        workers = {r[0] for r in responses}
+        # Two workers, each recycled after two requests.
+        assert len(workers) >= 4 and master not in workers
+
+        before = {_get(port)[0] for _ in range(2)}
+        proc.send_signal(signal.SIGHUP)
+        after = _poll(port, lambda seen: len(seen) >= 2 and not before & {r[0] for r in seen[-2:]})
+        assert not before & {r[0] for r in after[-2:]}
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=30) == 0
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from common import slow_requests  # noqa: E402
+from common.request_id import RequestContextMiddleware  # noqa: E402
+
+
+def _app(monkeypatch, **env) -> FastAPI:
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+    slow_requests.install(app, "test-service", expose=True)
+
+    @app.post("/check")
+    def check(payload: dict):
+        with slow_requests.stage("rules"):
+            time.sleep(0.03)
+        slow_requests.note(fields=payload, grant_count=2, page_count=lambda: 7)
+        return {"ok": True}
+
+    @app.get("/fast")
+    def fast():
+        slow_requests.note(fields={"a": 1})
+        return {"ok": True}
+
+    return app
+
+
+def _client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_describe_keeps_shape_not_values():
+    shape = slow_requests.describe(
+        {"ssn": "123-45-6789", "revenue": 1000, "owners": [{"name": "Ann"}], "note": None}
+    )
+    assert shape == {
+        "ssn": {"type": "str", "len": 11},
+        "revenue": "int",
+        "owners": {"type": "list", "len": 1, "item": {"name": {"type": "str", "len": 3}}},
+        "note": "null",
+    }
+    assert "123-45-6789" not in json.dumps(shape)
+
+
+def test_slow_requests_are_recorded_and_listed(monkeypatch, tmp_path):
+    path = tmp_path / "{service}.jsonl"
+    app = _app(monkeypatch, SLOW_REQUEST_MS="20", SLOW_REQUEST_LOG_PATH=str(path))
+
+    async def run():
+        async with _client(app) as client:
+            await client.get("/fast")
+            await client.post("/check", json={"owner_name": "Jane Doe", "tags": ["a", "b"]},
+                              headers={"X-Request-Id": "req-1"})
+            return (await client.get("/debug/slow-requests")).json()
+
+    body = asyncio.run(run())
+    assert body["count"] == 1
+    entry = body["requests"][0]
+    assert entry["route"] == "/check"
+    assert entry["request_id"] == "req-1"
+    assert entry["status"] == 200
+    assert entry["duration_ms"] >= 20
+    assert entry["stages_ms"]["rules"] >= 20
+    assert entry["shape"]["grant_count"] == 2
+    assert entry["shape"]["page_count"] == 7
+    assert entry["shape"]["fields"]["owner_name"] == {"type": "str", "len": 8}
+    assert "Jane" not in json.dumps(entry)
+
+    lines = (tmp_path / "test-service.jsonl").read_text().splitlines()
+    assert [json.loads(line)["request_id"] for line in lines] == ["req-1"]
+
+
+def test_log_rotates_and_buffer_is_bounded(tmp_path):
+    log = slow_requests.SlowRequestLog(
+        "svc", size=2, path=str(tmp_path / "slow.jsonl"), max_bytes=200, backups=2
+    )
+    for i in range(6):
+        log.add({"route": "/check", "n": i, "pad": "x" * 100})
+    assert [e["n"] for e in log.snapshot()] == [5, 4]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["slow.jsonl", "slow.jsonl.1", "slow.jsonl.2"]
+    assert json.loads((tmp_path / "slow.jsonl").read_text())["n"] == 5
+
+
+def test_log_path_is_expanded_per_process(tmp_path, monkeypatch):
+    log = slow_requests.SlowRequestLog("svc", path=str(tmp_path / "{service}-{pid}.jsonl"))
+    log.add({"route": "/check", "n": 1})
+    # A worker forked after install writes its own file.
+    monkeypatch.setattr(os, "getpid", lambda: 4242)
+    log.add({"route": "/check", "n": 2})
+    assert json.loads((tmp_path / "svc-4242.jsonl").read_text())["n"] == 2
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_disabled_by_zero_threshold(monkeypatch):
+    monkeypatch.setenv("SLOW_REQUEST_MS", "0")
+    app = FastAPI()
+    assert slow_requests.install(app, "svc", expose=True) is None
+    assert not app.user_middleware
+
+
+def test_helpers_are_noops_outside_requests():
+    slow_requests.note(fields={"a": 1})
+    slow_requests.record_stages({"x": 1.0})
+    with slow_requests.stage("y"):
+        pass
+    assert slow_requests.current() is None
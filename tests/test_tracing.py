@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from common import tracing  # noqa: E402
+from common.request_id import RequestContextMiddleware, inject_request_id  # noqa: E402
+
+UPSTREAM = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+class ListExporter(tracing.SpanExporter):
+    def __init__(self) -> None:
+        self.spans: list[dict] = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+@pytest.fixture
+def exporter():
+    exp = ListExporter()
+    tracing.configure("test-service", enabled=True, sample_ratio=1.0, exporter=exp)
+    yield exp
+    tracing.shutdown()
+
+
+def _finished(exp: ListExporter) -> list[dict]:
+    assert tracing.force_flush()
+    return exp.spans
+
+
+def test_traceparent_round_trip_and_rejects_invalid():
+    ctx = tracing.parse_traceparent(UPSTREAM)
+    assert ctx == tracing.SpanContext("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331", True)
+    assert tracing.format_traceparent(ctx) == UPSTREAM
+    for bad in (None, "", "garbage", "ff" + UPSTREAM[2:], UPSTREAM + "-extra",
+                "00-" + "0" * 32 + "-b7ad6b7169203331-01"):
+        assert tracing.parse_traceparent(bad) is None
+
+
+def test_disabled_tracing_is_a_noop():
+    tracing.shutdown()
+    with tracing.span("work") as span:
+        assert span is tracing.NOOP_SPAN
+        assert tracing.inject() == {}
+    tracing.record_span("done", 0.1)
+
+
+def test_middleware_continues_inbound_trace(exporter):
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        with tracing.span("lookup", item=item_id):
+            tracing.record_span("cache", 0.002)
+            return inject_request_id()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/items/7", headers={"traceparent": UPSTREAM, "X-Request-Id": "r1"})
+
+    resp = asyncio.run(run())
+    spans = {s["name"]: s for s in _finished(exporter)}
+    server, lookup, cache = spans["GET /items/{item_id}"], spans["lookup"], spans["cache"]
+    assert {s["trace_id"] for s in spans.values()} == {"0af7651916cd43dd8448eb211c80319c"}
+    assert server["parent_span_id"] == "b7ad6b7169203331"
+    assert server["kind"] == "server" and server["service"] == "test-service"
+    assert server["attributes"]["http.response.status_code"] == 200
+    assert server["attributes"]["request_id"] == "r1"
+    assert lookup["parent_span_id"] == server["span_id"]
+    assert cache["parent_span_id"] == lookup["span_id"]
+    assert 1.5 <= cache["duration_ms"] <= 50
+    # Outbound headers carry the context of the span that makes the call.
+    outbound = tracing.parse_traceparent(resp.json()["traceparent"])
+    assert outbound.span_id == lookup["span_id"]
+
+
+def test_sampling_follows_parent(exporter):
+    tracing.configure("test-service", enabled=True, sample_ratio=0.0, exporter=exporter)
+    with tracing.span("dropped") as root:
+        assert not root.recording
+        with tracing.span("child") as child:
+            assert child.context.trace_id == root.context.trace_id
+            assert tracing.inject()["traceparent"].endswith("-00")
+    with tracing.span("kept", parent=tracing.parse_traceparent(UPSTREAM)):
+        pass
+    assert [s["name"] for s in _finished(exporter)] == ["kept"]
+
+
+def test_exceptions_mark_span_failed(exporter):
+    with pytest.raises(ValueError):
+        with tracing.span("fails"):
+            raise ValueError("bad input")
+    (span,) = _finished(exporter)
+    assert span["status"] == "error"
+    assert span["status_message"] == "bad input"
+    assert span["attributes"]["exception.type"] == "ValueError"
+
+
+def test_file_exporter_and_otlp_payload(tmp_path, monkeypatch):
+    path = tmp_path / "traces" / "spans.jsonl"
+    monkeypatch.setenv("OTEL_TRACES_EXPORTER", "file")
+    monkeypatch.setenv("OTEL_TRACES_FILE", str(path))
+    tracing.configure("file-service", enabled=True)
+    try:
+        with tracing.span("outer", doc_type="W2"):
+            tracing.record_span("inner", 0.001, count=2)
+        assert tracing.force_flush()
+    finally:
+        tracing.shutdown()
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [s["name"] for s in spans] == ["inner", "outer"]
+
+    payload = tracing.otlp_payload(spans)
+    (resource,) = payload["resourceSpans"]
+    assert resource["resource"]["attributes"][0]["value"] == {"stringValue": "file-service"}
+    inner, outer = resource["scopeSpans"][0]["spans"]
+    assert inner["parentSpanId"] == outer["spanId"]
+    assert "parentSpanId" not in outer
+    assert inner["attributes"] == [{"key": "count", "value": {"intValue": "2"}}]
+    assert outer["kind"] == 1 and outer["status"] == {"code": 1}
+
+
+def test_unknown_exporter_is_rejected(monkeypatch):
+    monkeypatch.setenv("OTEL_TRACES_EXPORTER", "carrier-pigeon")
+    with pytest.raises(ValueError):
+        tracing.configure("svc", enabled=True)
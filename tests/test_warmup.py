@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from common.lazy_import import OptionalImport, load_all  # noqa: E402
+from common.warmup import Warmup, process_uptime  # noqa: E402
+
+
+def test_readiness_waits_for_steps() -> None:
+    warmup = Warmup("svc")
+    release = threading.Event()
+    calls = []
+
+    @warmup.step("slow")
+    def slow() -> None:
+        release.wait(5)
+        calls.append("slow")
+
+    code, body = warmup.readiness()
+    assert code == 503 and body["status"] == "warming"
+
+    warmup.start()
+    assert not warmup.ready
+    release.set()
+    assert warmup.wait(5)
+
+    code, body = warmup.readiness()
+    assert code == 200 and body["status"] == "ready"
+    assert set(body["warmup"]["steps_ms"]) == {"slow"}
+    assert calls == ["slow"]
+
+
+def test_start_is_a_noop_after_run() -> None:
+    warmup = Warmup("svc")
+    calls = []
+    warmup.step("count")(lambda: calls.append(1))
+
+    warmup.run()
+    warmup.start()
+    assert calls == [1]
+
+    # A second run (SIGHUP re-preload under common.serve) repeats the steps.
+    warmup.run()
+    assert calls == [1, 1]
+
+
+def test_failing_step_is_reported_and_does_not_block() -> None:
+    warmup = Warmup("svc")
+    calls = []
+
+    @warmup.step("broken")
+    def broken() -> None:
+        raise ValueError("bad catalog")
+
+    warmup.step("after")(lambda: calls.append("after"))
+
+    report = warmup.run()
+    assert warmup.ready
+    assert calls == ["after"]
+    assert report["errors"] == {"broken": "ValueError: bad catalog"}
+    assert report["warmup_ms"] >= 0
+
+
+def test_imported_records_process_uptime() -> None:
+    warmup = Warmup("svc")
+    warmup.imported()
+    uptime = process_uptime()
+    if uptime is None:  # pragma: no cover - non-Linux
+        assert warmup.import_seconds is None
+    else:
+        assert 0 <= warmup.import_seconds <= uptime
+
+
+def test_optional_import_is_lazy() -> None:
+    sys.modules.pop("colorsys", None)
+    colorsys = OptionalImport("colorsys")
+    assert not colorsys.loaded
+    assert "colorsys" not in sys.modules
+
+    assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert colorsys.loaded and bool(colorsys)
+
+
+def test_optional_import_attribute_and_setup() -> None:
+    dumps = OptionalImport("json", "dumps")
+    seen = []
+    dumps.configure(lambda module: seen.append(module.__name__))
+    assert dumps({"a": 1}) == '{"a": 1}'
+    assert seen == ["json"]
+
+    # Registered after loading: runs straight away.
+    dumps.configure(lambda module: seen.append("again"))
+    assert seen == ["json", "again"]
+
+
+def test_missing_optional_import_is_falsy() -> None:
+    missing = OptionalImport("definitely_not_installed_module")
+    assert not missing
+    assert missing.load() is None
+    with pytest.raises(ImportError):
+        missing.anything
+    with pytest.raises(ImportError):
+        missing()
+    assert load_all(missing, OptionalImport("json")) == {
+        "definitely_not_installed_module": False,
+        "json": True,
+    }